@@ -7,3 +7,4 @@ add_subdirectory(valley_flood)
 add_subdirectory(dam_break)
 add_subdirectory(surface_flow)
 add_subdirectory(trans_shock)
+add_subdirectory(regions_regrid)
@@ -0,0 +1,162 @@
+!! Microbenchmark of the region tests done at every regrid.
+!!
+!! Places many small refinement regions (e.g. along flowlines and levees)
+!! and one background region over a square domain, then tags every patch
+!! of uniform levels 1..max_level once with fc2d_geoclaw_test_regions,
+!! which uses the bins of regions_module, and once by testing every
+!! region.  Stops with an error if the two tags differ.
+!!
+!! Usage:  regions_regrid [num_regions] [max_level] [repeats]
+PROGRAM regions_regrid
+    USE regions_module
+    IMPLICIT NONE
+
+    INTEGER :: num_small, max_level, repeats, m, level, r
+    INTEGER :: refine, num_patches
+    INTEGER, ALLOCATABLE :: tags_binned(:), tags_linear(:)
+    DOUBLE PRECISION :: xc, yc, w, h, t, t0, t1, time_binned, time_linear
+    DOUBLE PRECISION :: u(4)
+    CHARACTER(len=32) :: arg
+
+    num_small = 500
+    max_level = 7
+    repeats = 5
+    if (command_argument_count() >= 1) then
+        call get_command_argument(1,arg)
+        read(arg,*) num_small
+    endif
+    if (command_argument_count() >= 2) then
+        call get_command_argument(2,arg)
+        read(arg,*) max_level
+    endif
+    if (command_argument_count() >= 3) then
+        call get_command_argument(3,arg)
+        read(arg,*) repeats
+    endif
+
+    !! Domain [0,1]x[0,1]; region 1 is the background region
+    num_regions = num_small + 1
+    allocate(regions(num_regions))
+    call set_region(1, 1, 3, 0.d0, 1.d0, 0.d0, 1.d0)
+    do m = 2,num_regions
+        call random_number(u)
+        xc = u(1)
+        yc = u(2)
+        w = 0.002d0 + 0.02d0*u(3)
+        h = 0.002d0 + 0.02d0*u(4)
+        call set_region(m, 3 + mod(m,3), 5 + mod(m,3), xc - w, xc + w, yc - h, yc + h)
+    end do
+    call build_region_bins()
+
+    t = 1.d0
+    refine = 1
+    num_patches = 0
+    do level = 1,max_level
+        num_patches = num_patches + 4**level
+    end do
+    allocate(tags_binned(num_patches), tags_linear(num_patches))
+
+    call cpu_time(t0)
+    do r = 1,repeats
+        call sweep(.true., tags_binned)
+    end do
+    call cpu_time(t1)
+    time_binned = t1 - t0
+
+    call cpu_time(t0)
+    do r = 1,repeats
+        call sweep(.false., tags_linear)
+    end do
+    call cpu_time(t1)
+    time_linear = t1 - t0
+
+    if (any(tags_binned .ne. tags_linear)) then
+        write(6,*) 'Tags differ for ', count(tags_binned .ne. tags_linear), ' patches'
+        stop 1
+    endif
+    num_patches = num_patches*repeats
+
+    write(6,'(A,I8,A,I10,A)') 'regions: ', num_regions, '   patch tests: ', &
+         num_patches
+    write(6,'(A,F10.4,A)') 'binned region tests : ', time_binned, ' s'
+    write(6,'(A,F10.4,A)') 'all region tests    : ', time_linear, ' s'
+
+CONTAINS
+
+    SUBROUTINE set_region(m, min_level, max_level, x_low, x_hi, y_low, y_hi)
+        INTEGER :: m, min_level, max_level
+        DOUBLE PRECISION :: x_low, x_hi, y_low, y_hi
+        regions(m)%min_level = min_level
+        regions(m)%max_level = max_level
+        regions(m)%t_low = 0.d0
+        regions(m)%t_hi = 1.d10
+        regions(m)%x_low = x_low
+        regions(m)%x_hi = x_hi
+        regions(m)%y_low = y_low
+        regions(m)%y_hi = y_hi
+    END SUBROUTINE set_region
+
+    !! Tag every patch of the uniform levels 1..max_level, as a regrid does
+    SUBROUTINE sweep(binned, tags)
+        LOGICAL :: binned
+        INTEGER :: tags(:)
+        INTEGER :: level, n, i, j, k
+        DOUBLE PRECISION :: dx, xlower, ylower, xupper, yupper
+
+        k = 0
+        do level = 1,max_level
+            n = 2**level
+            dx = 1.d0/n
+            do j = 0,n-1
+                do i = 0,n-1
+                    xlower = i*dx
+                    ylower = j*dx
+                    xupper = xlower + dx
+                    yupper = ylower + dx
+                    k = k + 1
+                    if (binned) then
+                        call fc2d_geoclaw_test_regions(level,xlower,ylower, &
+                             xupper,yupper,t,refine,tags(k))
+                    else
+                        call test_regions_linear(level,xlower,ylower, &
+                             xupper,yupper,t,refine,tags(k))
+                    endif
+                end do
+            end do
+        end do
+    END SUBROUTINE sweep
+
+    !! Region test without the bins, as before they were added
+    SUBROUTINE test_regions_linear(level,xlower,ylower,xupper,yupper, &
+                                   t,refine,tag_patch)
+        INTEGER :: level, refine, tag_patch
+        DOUBLE PRECISION :: xlower,ylower,xupper,yupper,t
+        INTEGER :: m, min_level, max_level
+        LOGICAL :: fc2d_geoclaw_P_intersects_R
+
+        min_level = 100
+        max_level = 0
+        do m = 1,num_regions
+            if (fc2d_geoclaw_P_intersects_R(xlower,ylower,xupper,yupper,t,regions(m))) then
+                min_level = min(min_level,regions(m)%min_level)
+                max_level = max(max_level,regions(m)%max_level)
+            endif
+        end do
+        tag_patch = -1
+        if (max_level == 0) return
+        if (refine .ne. 0) then
+            if (level .lt. min_level) then
+                tag_patch = 1
+            elseif (level .ge. max_level) then
+                tag_patch = 0
+            endif
+        else
+            if (level .le. min_level) then
+                tag_patch = 0
+            elseif (level .gt. max_level) then
+                tag_patch = 1
+            endif
+        endif
+    END SUBROUTINE test_regions_linear
+
+END PROGRAM regions_regrid
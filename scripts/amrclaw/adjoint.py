@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Snapshots of an adjoint run, for previewing adjoint-weighted refinement.
+
+An adjoint-guided run flags cells where the inner product of the forward
+solution with the adjoint solution is large.  :class:`AdjointSnapshots`
+reads the binary output of the adjoint run (``fort.tXXXX``, ``fort.qXXXX``
+and ``fort.bXXXX`` in *adjoint_outdir*) so that this inner product can be
+computed for the frames of a forward run without running it again::
+
+    from amrclaw.adjoint import AdjointSnapshots
+    adjoint = AdjointSnapshots('adjoint/_output', innerprod_index=[1])
+    forward = pyclaw.Solution(12, path='_output')
+    ip = adjoint.innerproduct(forward)   # one array per patch
+    flagged = [p > 1e-3 for p in ip]
+
+The times of all snapshots are read in one pass over the t files, the
+snapshots are memory-mapped rather than read, and only the two snapshots
+bracketing a time are kept open.
+
+The adjoint is solved backward in time, so snapshot time *tau* is forward
+time ``t_final - tau``, with *t_final* the last snapshot time by default.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import glob
+
+import numpy as np
+import sys
+sys.path.append('../../../scripts')
+import pyclaw
+from pyclaw.fileio.ascii import read_t, read_patch_header, shard_files, \
+                               output_frames
+from pyclaw.virtual_gauges import PatchIndex, sample_frame
+
+
+def time_index(outdir, file_prefix='fort', binary_only=False):
+    r"""
+    Frame numbers and times of the frames in *outdir*, reading every
+    ``fort.tXXXX`` file once.
+
+    :Input:
+     - *binary_only* - (bool) only frames with a ``fort.bXXXX`` file (or
+       shards of one)
+
+    :Output:
+     - (list) of ``(frame, t, num_eqn, num_patches, num_ghost, file_format)``
+       sorted by frame number, with file_format ``'binary64'`` if the t
+       file does not name it
+    """
+    index = []
+    for frame in output_frames(outdir, file_prefix):
+        if binary_only and not glob.glob(os.path.join(outdir, '%s.b%04d*'
+                                         % (file_prefix, frame))):
+            continue
+        t, num_eqn, num_patches, num_aux, num_dim, num_ghost, file_format = \
+            read_t(frame, outdir, file_prefix)
+        if file_format is None or file_format == 'binary':
+            file_format = 'binary64'
+        index.append((frame, t, num_eqn, num_patches, num_ghost, file_format))
+    return index
+
+
+def read_snapshot(frame, outdir, file_prefix='fort', index=None):
+    r"""
+    Memory-map the binary frame *frame* of *outdir*.
+
+    :Input:
+     - *index* - (tuple) entry of the frame in :func:`time_index`, read if
+       None
+
+    :Output:
+     - (:class:`~pyclaw.solution.Solution`) whose q arrays are read-only
+       views, without ghost cells, of the memory-mapped fort.bXXXX file (or
+       its shards)
+    """
+    if index is None:
+        index = [entry for entry in time_index(outdir, file_prefix)
+                 if entry[0] == frame][0]
+    frame, t, num_eqn, num_patches, num_ghost, file_format = index
+    if file_format == 'binary32':
+        dtype = np.float32
+    elif file_format == 'binary64':
+        dtype = np.float64
+    else:
+        raise ValueError("Adjoint snapshots must be binary, not %s"
+                         % file_format)
+
+    q_fname = os.path.join(outdir, '%s.q%s' % (file_prefix, str(frame).zfill(4)))
+    b_fname = os.path.join(outdir, '%s.b%s' % (file_prefix, str(frame).zfill(4)))
+    mbc = num_ghost
+    states = []
+    for q_shard in shard_files(q_fname):
+        if len(states) >= num_patches:
+            break
+        b_shard = b_fname + q_shard[len(q_fname):]
+        if os.path.getsize(b_shard) == 0:
+            continue
+        qdata = np.memmap(b_shard, dtype=dtype, mode='r')
+        start = 0
+        with open(q_shard, 'r') as f:
+            while start < len(qdata) and len(states) < num_patches:
+                patch = read_patch_header(f, 2)
+                mx, my = patch.num_cells_global
+                size = num_eqn*(mx + 2*mbc)*(my + 2*mbc)
+                qpatch = np.reshape(qdata[start:start+size],
+                                    (num_eqn, mx + 2*mbc, my + 2*mbc),
+                                    order='F')
+                start += size
+                state = pyclaw.State(patch, 0)
+                state.q = qpatch[:, mbc:mx+mbc, mbc:my+mbc]
+                state.t = t
+                states.append(state)
+
+    solution = pyclaw.Solution(states, pyclaw.Domain([s.patch for s in states]))
+    solution.t = t
+    return solution
+
+
+class AdjointSnapshots(object):
+    r"""
+    Store of the binary snapshots of an adjoint run.
+
+    :Input:
+     - *adjoint_outdir* - (string) output directory of the adjoint run
+     - *t2* - (float) snapshots later than *t2* are left out, as by
+       :meth:`AdjointData.set_adjoint_files`
+     - *t_final* - (float) forward time of adjoint time 0, the time of the
+       last snapshot in *adjoint_outdir* (before filtering by *t2*) if None
+     - *innerprod_index* - (int or list of int) components of q, counted
+       from 1, in the inner product, or None for all of them
+    """
+
+    def __init__(self, adjoint_outdir='_adjoint', t2=None, t_final=None,
+                 innerprod_index=None, file_prefix='fort'):
+        self.outdir = adjoint_outdir
+        self.file_prefix = file_prefix
+        index = time_index(adjoint_outdir, file_prefix, binary_only=True)
+        if t_final is None and len(index) > 0:
+            # The last snapshot of the run, whether or not t2 leaves it out
+            t_final = max(entry[1] for entry in index)
+        self.index = [entry for entry in index if t2 is None or entry[1] <= t2]
+        if len(self.index) == 0:
+            raise IOError("No adjoint snapshots in %s" % adjoint_outdir)
+
+        # Snapshots in increasing adjoint time
+        order = np.argsort([entry[1] for entry in self.index], kind='stable')
+        self.index = [self.index[k] for k in order]
+        self.frames = np.array([entry[0] for entry in self.index])
+        self.times = np.array([entry[1] for entry in self.index])
+        self.t_final = t_final
+
+        if innerprod_index is None:
+            self.components = None
+        else:
+            self.components = np.atleast_1d(innerprod_index).astype(int) - 1
+        self._snapshots = {}
+
+    def __len__(self):
+        return len(self.frames)
+
+    def snapshot(self, k):
+        r"""
+        Snapshot *k* (in increasing adjoint time) and its patch index; the
+        last two snapshots used are kept.
+        """
+        if k not in self._snapshots:
+            if len(self._snapshots) >= 2:
+                del self._snapshots[min(self._snapshots,
+                                        key=lambda n: self._snapshots[n][2])]
+            solution = read_snapshot(self.frames[k], self.outdir,
+                                     self.file_prefix, self.index[k])
+            self._snapshots[k] = [solution, PatchIndex(solution.states), 0]
+        entry = self._snapshots[k]
+        entry[2] = max(e[2] for e in self._snapshots.values()) + 1
+        return entry[0], entry[1]
+
+    def bracket(self, t):
+        r"""
+        Snapshots *k1*, *k2* bracketing forward time *t* and the weight
+        *alpha* of *k2* for linear interpolation in time.  Times outside
+        the snapshots use the nearest one.
+        """
+        tau = self.t_final - t
+        if tau <= self.times[0]:
+            return 0, 0, 0.
+        if tau >= self.times[-1]:
+            k = len(self.times) - 1
+            return k, k, 0.
+        k2 = int(np.searchsorted(self.times, tau, side='left'))
+        k1 = k2 - 1
+        if self.times[k2] == tau:
+            return k2, k2, 0.
+        alpha = (tau - self.times[k1])/(self.times[k2] - self.times[k1])
+        return k1, k2, alpha
+
+    def sample(self, x, y, t):
+        r"""
+        Adjoint q at the points ``(x, y)`` at forward time *t*, interpolated
+        linearly between the bracketing snapshots, from the cell of the
+        finest patch containing each point; NaN outside the domain.
+
+        :Output:
+         - (ndarray(num_eqn, :) - float)
+        """
+        k1, k2, alpha = self.bracket(t)
+        solution, index = self.snapshot(k1)
+        q = sample_frame(solution, x, y, index)[1]
+        if alpha > 0:
+            solution, index = self.snapshot(k2)
+            q = (1 - alpha)*q + alpha*sample_frame(solution, x, y, index)[1]
+        return q
+
+    def innerproduct(self, solution, t=None):
+        r"""
+        Absolute value of the inner product of the forward frame *solution*
+        with the adjoint at its time (or at forward time *t*), over the
+        *innerprod_index* components, in every cell.
+
+        :Output:
+         - (list) of arrays of the shape of each patch of *solution*, zero
+           where the adjoint is not defined
+        """
+        if t is None:
+            t = solution.t
+        centers = [state.grid.p_centers for state in solution.states]
+        x = np.concatenate([X.ravel() for X, Y in centers])
+        y = np.concatenate([Y.ravel() for X, Y in centers])
+        q_adjoint = self.sample(x, y, t)
+
+        ip = []
+        start = 0
+        for state in solution.states:
+            q = state.q.reshape(state.q.shape[0], -1)
+            end = start + q.shape[1]
+            qa = q_adjoint[:, start:end]
+            if self.components is not None:
+                q = q[self.components]
+                qa = qa[self.components]
+            product = np.abs(np.sum(q*qa, axis=0))
+            product[np.isnan(product)] = 0.
+            ip.append(product.reshape(state.q.shape[1:]))
+            start = end
+        return ip
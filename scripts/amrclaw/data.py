@@ -619,29 +619,54 @@ class AdjointData(clawutil.data.ClawData):
         self.close_data_file()
 
     def set_adjoint_files(self):
-        import glob
-        from pyclaw.fileio.ascii import read_t
+        r"""
+        Set the binary files of the adjoint snapshots up to time *t2*.
+
+        The Fortran code reads one ``fort.bXXXX`` file per snapshot, so an
+        IOError is raised if a snapshot was written as one shard per
+        processor (``fort.bXXXX.rNNNNN``).
+        """
+        from amrclaw.adjoint import time_index
+        from pyclaw.fileio.ascii import shard_files
 
         self.adjoint_files = []
         if self.use_adjoint:
-            files = glob.glob(os.path.join(self.adjoint_outdir,"fort.b*"))
-            files.sort()
-            for file in files:
-                frameno = int(file[-4:])
-                #print('+++ file, frameno: ',file, frameno)
-                [t,num_eqn,nstates,num_aux,num_dim,num_ghost,file_format] \
-                    = read_t(frameno, self.adjoint_outdir)
-                if t <= self.t2:
-                    #print('+++   using this file')
-                    self.adjoint_files.append(file)
+            for entry in time_index(self.adjoint_outdir, binary_only=True):
+                frameno, t = entry[:2]
+                if self.t2 is None or t <= self.t2:
+                    fname = os.path.join(self.adjoint_outdir,
+                                         "fort.b%s" % str(frameno).zfill(4))
+                    if shard_files(fname) != [fname]:
+                        raise IOError("Adjoint snapshot %s is written in "
+                                      "shards, which adjoint.data cannot "
+                                      "name; merge them or run the adjoint "
+                                      "problem without sharded output"
+                                      % fname)
+                    self.adjoint_files.append(fname)
             self.numadjoints = len(self.adjoint_files)
             if (len(self.adjoint_files) == 0):
                 print("*** WARNING: No binary files found for adjoint output!")
 
 
     def read_adjoint_files(self):
-        self.set_adjoint_files()
-        # read them in for Python processing...  add if we need it
+        r"""
+        Return an :class:`~amrclaw.adjoint.AdjointSnapshots` store of the
+        adjoint snapshots up to time *t2*, sharded or not, and set
+        *numadjoints* to their number; None if there are none.
+        """
+        from amrclaw.adjoint import AdjointSnapshots
+
+        self.numadjoints = 0
+        if not self.use_adjoint:
+            return None
+        try:
+            adjoint = AdjointSnapshots(self.adjoint_outdir, t2=self.t2,
+                                       innerprod_index=self.innerprod_index)
+        except IOError:
+            print("*** WARNING: No binary files found for adjoint output!")
+            return None
+        self.numadjoints = len(adjoint)
+        return adjoint
 
 
 
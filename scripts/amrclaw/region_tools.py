@@ -100,6 +100,44 @@ class RuledRectangle(object):
         return x,y
             
             
+    def bounds(self, s):
+        """
+        Given an array s of values of x (if self.ixy is 'x') or y (if 'y'),
+        return arrays lower, upper of the same shape with the range of the
+        other coordinate covered by this RuledRectangle at each s,
+        piecewise constant or linear in s according to self.method.
+        Where s is outside self.s.min() to self.s.max(), lower = inf and
+        upper = -inf so that no point lies between them.
+        """
+        s = np.asarray(s)
+        lower = np.empty(s.shape)
+        upper = np.empty(s.shape)
+        lower[...] = np.inf
+        upper[...] = -np.inf
+
+        inside = np.logical_and(self.s.min() <= s, s <= self.s.max())
+        si = s[inside]
+
+        # k1, k2 such that self.s[k1] <= si <= self.s[k2]:
+        k1 = np.searchsorted(self.s, si, side='right') - 1
+        k2 = np.searchsorted(self.s, si, side='left')
+        lk = self.lower[k1]
+        uk = self.upper[k1]
+
+        if self.method != 0:
+            # linear interpolation, except at the s values themselves:
+            sk1 = self.s[k1]
+            sk2 = self.s[k2]
+            k = sk1 < si
+            alpha = (si[k]-sk1[k])/(sk2[k]-sk1[k])
+            lk[k] = (1-alpha)*self.lower[k1[k]] + alpha*self.lower[k2[k]]
+            uk[k] = (1-alpha)*self.upper[k1[k]] + alpha*self.upper[k2[k]]
+
+        lower[inside] = lk
+        upper[inside] = uk
+        return lower, upper
+
+
     def mask_outside(self, X, Y):
         """
         Given 2d arrays X,Y, return a mask with the same shape with
@@ -113,6 +151,8 @@ class RuledRectangle(object):
               for self.s monotonically increasing or decreasing, 
                          but elsewhere we require increasing so check for that.
         
+        The bounds are computed for all columns (or rows) at once by
+        bounds, so large fgmax or flagregion grids do not loop in Python.
         """
         assert np.diff(self.s).min() > 0, \
             '*** s must be monotonically increasing: \n  s =  %s' % self.s
@@ -126,82 +166,22 @@ class RuledRectangle(object):
             y = Y[:,0]
         assert x[0] != x[-1], '*** Wrong orientation?'            
         
-        def bracket(xy, s):
-            """
-            Given a point xy (an x or y value)
-            and an array s that is monotone increasing or decreasing, 
-            return indices (k1, k2) such that 
-                s[k1] <= xy <= s[k2]
-            If xy is outside the range of s, return (-1,-1)
-            """
-            from numpy import ma, argmin
-            if xy < s.min() or xy > s.max():
-                return -1,-1
-            pos = ma.masked_where(xy-s < 0, xy-s)
-            k1 = argmin(pos)
-            pos = ma.masked_where(s-xy < 0, s-xy)
-            k2 = argmin(pos)
-            return k1,k2
-            
-        mask = np.empty((len(y),len(x)), dtype=bool)
-        mask[:,:] = True
         if self.ixy in [1,'x']:
-            # indices of x array that lie within s.min() to s.max():
-            iin, = np.where(np.logical_and(self.s.min() <= x, x <= self.s.max()))
-            
-            for i in iin:
-                # a column of array that might include points in the polygon
-                xi = x[i]
-                # determine k1,k2 such that s[k1] <= xi <= s[k2]:
-                k1,k2 = bracket(xi, self.s)
-                
-                if k1 > -1:
-                    sk1 = self.s[k1]
-                    sk2 = self.s[k2]
-                    if (self.method==0) or (sk1 >= xi):
-                        ylower = self.lower[k1]
-                        yupper = self.upper[k1]
-                    else:
-                        # method==1 and not at top, so linear interpolation:
-                        alpha = (xi-sk1)/(sk2-sk1)
-                        ylower = (1-alpha)*self.lower[k1] + \
-                                     alpha*self.lower[k2]
-                        yupper = (1-alpha)*self.upper[k1] + \
-                                     alpha*self.upper[k2] 
-                    # indices j for which ylower <= y[j] <= yupper, so inside:  
-                    j, = np.where(np.logical_and(ylower <= y, y <= yupper))
-                    mask[j,i] = False
-                    
+            # bounds on y in each column, inside if ylower <= y <= yupper:
+            ylower, yupper = self.bounds(x)
+            inside = ylower <= y[:,np.newaxis]
+            inside &= y[:,np.newaxis] <= yupper
+
         elif self.ixy in [2,'y']:
-            # indices of y array that lie within s.min() to s.max():
-            jin, = np.where(np.logical_and(self.s.min() <= y, y <= self.s.max()))
-            
-            for j in jin:
-                # a row of array that might include points in the polygon
-                yj = y[j]
-                # determine k1,k2 such that s[k1] <= yj <= s[k2]:
-                k1,k2 = bracket(yj, self.s)
-                
-                if k1 > -1:
-                    sk1 = self.s[k1]
-                    sk2 = self.s[k2]
-                    if (self.method==0) or (min(sk1,sk2) >= yj):
-                        xlower = self.lower[k1]
-                        xupper = self.upper[k1]
-                    else:
-                        # method==1 and not at top, so linear interpolation:
-                        alpha = (yj-sk1)/(sk2-sk1)
-                        xlower = (1-alpha)*self.lower[k1] + \
-                                     alpha*self.lower[k2]
-                        xupper = (1-alpha)*self.upper[k1] + \
-                                     alpha*self.upper[k2]   
-                    # indices i for which xlower <= x[i] <= xupper, so inside:
-                    i, = np.where(np.logical_and(xlower <= x, x <= xupper))
-                    mask[j,i] = False
+            # bounds on x in each row, inside if xlower <= x <= xupper:
+            xlower, xupper = self.bounds(y)
+            inside = xlower[:,np.newaxis] <= x
+            inside &= x <= xupper[:,np.newaxis]
 
         else:
             raise ValueError('Unrecognized attribute ixy = %s' % self.ixy)
                     
+        mask = np.logical_not(inside, out=inside)
         if transpose_arrays:
             mask = mask.T
             
@@ -289,38 +269,31 @@ def ruledrectangle_covering_selected_points(X, Y, pts_chosen, ixy, method=0,
     dx = x[1] - x[0]
     dy = y[1] - y[0]
 
+    # first and last chosen point in each column (ixy = x) or row (ixy = y):
+    chosen = np.asarray(pts_chosen) == 1
     if ixy in [1,'x']:
 
         # Ruled rectangle with s = x:
 
-        s = []
-        lower = []
-        upper = []
-        for i in range(len(x)):
-            if pts_chosen[:,i].sum() > 0:
-                j = np.where(pts_chosen[:,i]==1)[0]
-                j1 = j.min()
-                j2 = j.max()
-                s.append(x[i])
-                lower.append(y[j1])
-                upper.append(y[j2])
+        i, = np.where(chosen.any(axis=0))
+        chosen = chosen[:,i]
+        j1 = np.argmax(chosen, axis=0)
+        j2 = len(y) - 1 - np.argmax(chosen[::-1,:], axis=0)
+        s = x[i]
+        lower = y[j1]
+        upper = y[j2]
                 
     elif ixy in [2,'y']:
 
         # Ruled rectangle with s = y:
 
-        s = []
-        lower = []
-        upper = []
-
-        for j in range(len(y)):
-            if pts_chosen[j,:].sum() > 0:
-                i = np.where(pts_chosen[j,:]==1)[0]
-                i1 = i.min()
-                i2 = i.max()
-                s.append(y[j])
-                lower.append(x[i1])
-                upper.append(x[i2])
+        j, = np.where(chosen.any(axis=1))
+        chosen = chosen[j,:]
+        i1 = np.argmax(chosen, axis=1)
+        i2 = len(x) - 1 - np.argmax(chosen[:,::-1], axis=1)
+        s = y[j]
+        lower = x[i1]
+        upper = x[i2]
                 
     else:
         raise(ValueError('Unrecognized value of ixy'))
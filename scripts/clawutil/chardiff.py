@@ -25,6 +25,20 @@ help_message = __doc__
 import sys
 import os
 import getopt
+import numpy as np
+
+
+def toggle_indices(line1, line2):
+    r"""
+    Return the indices in two equal length strings where there is a switch
+    between matching and non-matching substrings, starting in the
+    matching state.  The comparison is done on arrays of code points.
+    """
+    c1 = np.frombuffer(line1.encode('utf-32-le'), dtype=np.uint32)
+    c2 = np.frombuffer(line2.encode('utf-32-le'), dtype=np.uint32)
+    differ = np.concatenate(([False], c1 != c2))
+    return np.flatnonzero(differ[1:] != differ[:-1]).tolist()
+
 
 def chardiff_file(fname1, fname2, print_all_lines=True, hfile1='', \
                   hfile2='', verbose=True):
@@ -63,14 +77,9 @@ def chardiff_file(fname1, fname2, print_all_lines=True, hfile1='', \
                 badline = True  # signal break after this line
                 line2 = line2.ljust(len_line)  # pad the line
 
-            toggle = []   # keep track of indices in string where there's a 
-                          # switch between matching and non-matching substrings
-            same = True
-            for j in range(len_line):
-                if (same and (line1[j] != line2[j])) or \
-                      ((not same) and (line1[j] == line2[j])):
-                    same = not same
-                    toggle.append(j)
+            # keep track of indices in string where there's a 
+            # switch between matching and non-matching substrings
+            toggle = toggle_indices(line1, line2)
 
             if len(toggle)==0:
                 #print "*** Error: toggle should be nonempty"
@@ -201,7 +210,6 @@ def chardiff_dir(dir1, dir2, dir3="_char_diff", file_pattern='all',
     list files.
     """
     import filecmp, glob
-    from numpy import alltrue
     
     ignored_extensions = ['.o','.pdf','.ps','.chk','']
     
@@ -244,7 +252,7 @@ def chardiff_dir(dir1, dir2, dir3="_char_diff", file_pattern='all',
     files.sort()
     
     testfiles = [f in checkfiles.same_files for f in files]
-    if alltrue(testfiles) and verbose:
+    if np.all(testfiles) and verbose:
         print("Files matching pattern in the two directories are equal")
 
     
@@ -271,7 +279,7 @@ def chardiff_dir(dir1, dir2, dir3="_char_diff", file_pattern='all',
             <ul>
             """ % (dir1,dir2,file_pattern))
                             
-    v = verbose and (not alltrue(testfiles))
+    v = verbose and (not np.all(testfiles))
     
     for f in files:
 
@@ -319,7 +327,7 @@ def chardiff_dir(dir1, dir2, dir3="_char_diff", file_pattern='all',
         rfiles1 = os.listdir(dir1)
         rfiles2 = os.listdir(dir2)
         regression_test_files = rfiles1 + rfiles2
-    regression_ok = alltrue([f in checkfiles.same_files for f in \
+    regression_ok = np.all([f in checkfiles.same_files for f in \
                                 regression_test_files])
     if verbose and regression_ok:
         print("Regression files all match")
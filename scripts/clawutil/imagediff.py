@@ -15,6 +15,7 @@ for the resulting diff's and html files.  Default is '_image_diff'.
 Command line flags include:
     -v, --verbose = Verbose output   
     -r, --relocatable = Copy original image files to dir3 also
+    -n N, --nprocs=N = Number of processes used to diff images (default all)
     -h, --help = Display this help
 """
 
@@ -45,7 +46,72 @@ def imagediff_file(fname1, fname2, verbose=True):
     
     
          
-def make_imagediff(fname1,fname2,fname3='', verbose=False):
+def file_hash(fname, blocksize=1<<20):
+    r"""
+    Return the sha1 hex digest of the contents of *fname*, read in blocks
+    of *blocksize* bytes.  Used to skip identical files before decoding.
+    """
+    import hashlib
+    h = hashlib.sha1()
+    with open(fname, 'rb') as f:
+        block = f.read(blocksize)
+        while block:
+            h.update(block)
+            block = f.read(blocksize)
+    return h.hexdigest()
+
+
+def read_image(fname):
+    r"""
+    Read an image file into a float array of shape (ny, nx, 4) with values
+    in [0,1].  Grayscale and RGB images are promoted to RGBA so that any
+    two images can be compared channel by channel.
+    """
+    import numpy as np
+    import matplotlib.image
+
+    a = np.asarray(matplotlib.image.imread(fname))
+    if a.dtype.kind in 'ui':
+        a = a / float(np.iinfo(a.dtype).max)
+    if a.ndim == 2:
+        a = np.dstack((a, a, a))
+    if a.shape[2] == 3:
+        a = np.dstack((a, np.ones(a.shape[:2], dtype=a.dtype)))
+    return a
+
+
+def pixel_diff(a1, a2, threshold=0.001):
+    r"""
+    Return a boolean array that is True wherever the images *a1* and *a2*
+    (as returned by :func:`read_image`) differ by more than *threshold*
+    in any channel.  Images of different size are padded with transparent
+    pixels so that the non-overlapping region counts as different.
+    """
+    import numpy as np
+
+    if a1.shape != a2.shape:
+        ny = max(a1.shape[0], a2.shape[0])
+        nx = max(a1.shape[1], a2.shape[1])
+        b1 = np.zeros((ny,nx,4))
+        b2 = np.zeros((ny,nx,4))
+        b1[:a1.shape[0],:a1.shape[1],:] = a1
+        b2[:a2.shape[0],:a2.shape[1],:] = a2
+        a1, a2 = b1, b2
+    return (np.abs(a1 - a2) > threshold).any(axis=2)
+
+
+def make_imagediff(fname1,fname2,fname3='', verbose=False, stats=None):
+    r"""
+    Create the image *fname3* that is black where *fname1* and *fname2*
+    differ and white elsewhere.  The comparison is done in-process with
+    numpy, no external ``convert`` is needed.
+
+    If *stats* is a dictionary it is filled with the number of pixels
+    compared, the number that differ and the maximum channel difference.
+    """
+    import numpy as np
+    import matplotlib.image
+
     ext1 = os.path.splitext(fname1)[1]
     ext2 = os.path.splitext(fname2)[1]
     if ext1 != ext2:
@@ -57,21 +123,84 @@ def make_imagediff(fname1,fname2,fname3='', verbose=False):
     
     if fname3 == '':
         fname3 = "_image_diff" + ext1
-    
-    os.system("convert %s %s -compose subtract -composite -threshold 0.001 -negate %s" \
-         % (fname1, fname2, fname3))
+
+    a1 = read_image(fname1)
+    a2 = read_image(fname2)
+    differ = pixel_diff(a1, a2)
+    matplotlib.image.imsave(fname3, np.where(differ, 0., 1.), cmap='gray',
+                            vmin=0., vmax=1.)
+
+    if stats is not None:
+        stats['num_pixels'] = int(differ.size)
+        stats['num_differ'] = int(differ.sum())
+        stats['same_shape'] = a1.shape == a2.shape
+        if a1.shape == a2.shape:
+            stats['max_abs_diff'] = float(np.abs(a1 - a2).max())
+        else:
+            stats['max_abs_diff'] = 1.
     
     if verbose:     
         print("Created pixelwise difference ", fname3)
     return fname3
+
+
+def _imagediff_worker(args):
+    r"""
+    Process pool entry point: diff one pair of image files and return
+    ``(f, stats)`` for the summary, with ``stats['error']`` set if no diff
+    image could be made.
+    """
+    f, fname1, fname2, fname3 = args
+    stats = {}
+    try:
+        if make_imagediff(fname1, fname2, fname3, stats=stats) is None:
+            stats['error'] = "image files not recognized"
+    except Exception as e:
+        stats['error'] = str(e)
+    return f, stats
     
     
+def files_equal(dir1, dir2, files, num_procs=None):
+    r"""
+    Return the list of *files* present in both *dir1* and *dir2* with
+    identical contents.  Sizes are compared first and the remaining
+    candidates are hashed concurrently, so identical files never need to be
+    decoded.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    candidates = []
+    for f in files:
+        fname1 = os.path.join(dir1,f)
+        fname2 = os.path.join(dir2,f)
+        if os.path.isfile(fname1) and os.path.isfile(fname2) and \
+                os.path.getsize(fname1) == os.path.getsize(fname2):
+            candidates.append(f)
+
+    fnames = [os.path.join(d,f) for f in candidates for d in (dir1,dir2)]
+    with ThreadPoolExecutor(max_workers=num_procs) as executor:
+        hashes = list(executor.map(file_hash, fnames))
+    return [f for k,f in enumerate(candidates) \
+              if hashes[2*k] == hashes[2*k+1]]
+
+
 def imagediff_dir(dir1, dir2, dir3="_image_diff", ext='.png', \
                   regression_test_files='all',  \
-                  relocatable=False, overwrite=False, verbose=False):
-    
-    import filecmp,glob
-    from numpy import alltrue
+                  relocatable=False, overwrite=False, verbose=False, \
+                  num_procs=None, summary_file='_ImageDiffSummary.json'):
+    r"""
+    Compare all images with extension *ext* in *dir1* and *dir2* and write
+    an html index with pixelwise differences to *dir3*.
+
+    Identical files are detected by hashing and skipped, the remaining
+    pairs are diffed on a pool of *num_procs* processes (all cores if None,
+    serially if 1).  A machine-readable summary is written to
+    *summary_file* in *dir3* alongside the html index.
+
+    Returns True if all *regression_test_files* are identical.
+    """
+    import glob, json
+    from concurrent.futures import ProcessPoolExecutor
     
     if dir1[-1] == '/': dir1 = dir1[:-1]
     if dir2[-1] == '/': dir2 = dir2[:-1]
@@ -119,7 +248,7 @@ def imagediff_dir(dir1, dir2, dir3="_image_diff", ext='.png', \
             <h2>Files:</h2>
             """ % (dir1,dir2,ext))
             
-    f_equal, f_diff, f_other = filecmp.cmpfiles(dir1,dir2,files,False)
+    f_equal = files_equal(dir1,dir2,files,num_procs=num_procs)
 
     if relocatable:
         # copy files from dir1 and dir2 into dir3 so the whole thing can
@@ -148,6 +277,17 @@ def imagediff_dir(dir1, dir2, dir3="_image_diff", ext='.png', \
     files_missing1 = []
     files_missing2 = []
     files_differ = []
+
+    # Diff all pairs that are not byte-identical before writing the html:
+    jobs = [(f, os.path.abspath(os.path.join(dir1,f)),
+                os.path.abspath(os.path.join(dir2,f)), os.path.abspath(f)) \
+            for f in files if (f in files1) and (f in files2) \
+                              and (f not in f_equal)]
+    if num_procs == 1:
+        diff_stats = dict(map(_imagediff_worker, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=num_procs) as executor:
+            diff_stats = dict(executor.map(_imagediff_worker, jobs))
     
     for f in files:
         fhtml = os.path.splitext(f)[0] + '.html'  ## Specific to Clawpack _plots
@@ -191,11 +331,24 @@ def imagediff_dir(dir1, dir2, dir3="_image_diff", ext='.png', \
             # hfile.write("""
             #               <a href="%s"><img src="%s" width=350 border="1"></a>""" \
             #                 % (fname1,fname1))
+        elif 'error' in diff_stats[f]:
+            files_differ.append(f)
+            print("*** Error diffing %s: %s" % (f, diff_stats[f]['error']))
+            hfile.write("""
+              <table>
+              <tr><td><b>%s</b> from dir1</td><td><b>%s</b>  from dir2</td>
+                  <td>Pixels that differ between the images</td>  </tr>
+              <tr>
+              <td><a href="%s"><img src="%s" width=350 border="1"></a></td> &nbsp;&nbsp; 
+              <td><a href="%s"><img src="%s" width=350 border="1"></a></td> &nbsp;&nbsp; 
+              <td>Could not diff the images: %s</td>  </tr>
+              </table><p>""" \
+                % (f,f,fhtml1,fname1,fhtml2,fname2,diff_stats[f]['error']))
         else:
             files_differ.append(f)
             fname3 = f
-
-            fname3 = make_imagediff(fname1,fname2,fname3,verbose=verbose)
+            if verbose:
+                print("Created pixelwise difference ", fname3)
             hfile.write("""
               <table>
               <tr><td><b>%s</b> from dir1</td><td><b>%s</b>  from dir2</td>
@@ -210,7 +363,7 @@ def imagediff_dir(dir1, dir2, dir3="_image_diff", ext='.png', \
     # Test regression files for return value:
     if regression_test_files=='all':
         regression_test_files = files_both
-    regression_ok = alltrue([f in f_equal for f in \
+    regression_ok = all([f in f_equal for f in \
                                 regression_test_files])
     if verbose and regression_ok:
         print("Regression files all match")
@@ -219,6 +372,16 @@ def imagediff_dir(dir1, dir2, dir3="_image_diff", ext='.png', \
         print("*** Files missing from dir1:   ",files_missing1)
         print("*** Files missing from dir2:   ",files_missing2)
         print("*** Files that differ:   ",files_differ)
+
+    hfile.close()
+    summary = {'dir1': dir1, 'dir2': dir2, 'ext': ext,
+               'regression_ok': bool(regression_ok),
+               'identical': sorted(f_equal),
+               'missing_from_dir1': files_missing1,
+               'missing_from_dir2': files_missing2,
+               'differ': dict((f, diff_stats[f]) for f in files_differ)}
+    with open(summary_file,'w') as sfile:
+        json.dump(summary, sfile, indent=2, sort_keys=True)
         
     os.chdir(startdir)
     dir3 = os.path.abspath(dir3)
@@ -237,13 +400,15 @@ if __name__ == "__main__":
     argv = sys.argv
     try:
         try:
-            opts, args = getopt.getopt(argv[1:], "hv",["help","verbose","relocatable"])
+            opts, args = getopt.getopt(argv[1:], "hvrn:",
+                                       ["help","verbose","relocatable","nprocs="])
         except getopt.error as msg:
             raise Usage(msg)
 
         # Default script parameter values
         verbose = False
         relocatable = False
+        num_procs = None
 
         # option processing
         for option, value in opts:
@@ -252,6 +417,8 @@ if __name__ == "__main__":
                  verbose = True
             if option in ("-r","--relocatable"):
                  relocatable = True
+            if option in ("-n","--nprocs"):
+                 num_procs = int(value)
             if option in ("-h","--help"):
                 raise Usage(help_message)
 
@@ -261,10 +428,10 @@ if __name__ == "__main__":
         elif os.path.isdir(args[0]) and os.path.isdir(args[1]):
             if len(args)==3:
                 sys.exit(imagediff_dir(args[0],args[1],args[2],verbose=verbose,\
-                     relocatable=relocatable))
+                     relocatable=relocatable,num_procs=num_procs))
             else:
                 sys.exit(imagediff_dir(args[0],args[1],verbose=verbose,\
-                     relocatable=relocatable))
+                     relocatable=relocatable,num_procs=num_procs))
         else:
               raise Usage("Both paths must either be files or directories.")
         
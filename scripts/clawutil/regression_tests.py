@@ -9,6 +9,10 @@ alls subdirectories the two directories test_dir and compare_dir.
 
 Image differences can be viewed by opening a browser to 
     _image_diff/_ImageDiffIndex.html
+and a machine-readable summary of all subdirectories is written to
+    _regression_summary.json
+
+Subdirectories are compared in parallel on a process pool.
 
 If compare_dir is not specified, attempt to compare with plots in the latest
 Clawpack gallery.  For this to work you need to first clone and/or
@@ -23,12 +27,71 @@ $CLAW/clawpack.github.com/doc/_static.
 from __future__ import absolute_import
 from __future__ import print_function
 import os, subprocess
-from clawpack.clawutil import imagediff
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from six import StringIO
 from six.moves import input
+sys.path.append('../../../scripts')
+from clawutil import imagediff
+
+
+def _test_subdir(args):
+    r"""
+    Process pool entry point: run imagediff on the _plots of one example
+    subdirectory and return ``(test_subdir, regression_ok, summary_file,
+    output)``, *output* being what was printed, so that the output of
+    parallel workers can be printed in order.
+    """
+    stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        result = _diff_subdir(*args)
+    finally:
+        sys.stdout = stdout
+    return result + (output.getvalue(),)
+
+
+def _diff_subdir(test_subdir, subdir, test_plots, compare_plots, relocatable,
+                 verbose):
+
+    print("\n=============================================================")
+    print(test_subdir)
+    print("=============================================================")
+
+    if not os.path.isdir(test_plots):
+        print("*** Cannot find _plots directory ")
+        print("*** Looking for ",test_plots)
+        return test_subdir, False, None
+
+    if not os.path.isdir(compare_plots):
+        print("*** Cannot find _plots directory to compare against")
+        print("*** Looking for ",compare_plots)
+        return test_subdir, False, None
+
+    os.chdir(subdir)
+    try:
+        # Each subdirectory already has its own process, diff serially:
+        regression_ok = imagediff.imagediff_dir(test_plots,compare_plots, \
+                                relocatable=relocatable,overwrite=True, \
+                                verbose=verbose,num_procs=1)
+        if not regression_ok:
+            print("*** Regression files are not all identical in ")
+            print("   ",test_subdir)
+    except:
+        print("*** Error running imagediff with directories \n  %s\n  %s\n" \
+                    % (test_plots,compare_plots))
+        regression_ok = False
+    summary_file = os.path.abspath(os.path.join('_image_diff',
+                                                '_ImageDiffSummary.json'))
+    if not os.path.isfile(summary_file):
+        summary_file = None
+    return test_subdir, bool(regression_ok), summary_file
 
 
 def test_subdirs(compare_dir=None,examples_dir='.',\
-                 verbose=True,relocatable=False):
+                 verbose=True,relocatable=False,num_procs=None,\
+                 summary_file='_regression_summary.json'):
 
     from .make_all import list_examples
 
@@ -72,42 +135,37 @@ def test_subdirs(compare_dir=None,examples_dir='.',\
             return all_ok
 
     top_dir = os.getcwd()
+    jobs = []
     for test_subdir in dir_list:
-        print("\n=============================================================")
-        print(test_subdir)
-        print("=============================================================")
         #subdir = os.path.split(test_subdir)[1]
         subdir = test_subdir[len(examples_dir)+1:]
         compare_subdir = os.path.join(compare_dir, subdir)
         test_plots = os.path.join(test_subdir,'_plots')
         compare_plots = os.path.join(compare_subdir, '_plots')
-
-        if not os.path.isdir(test_plots):
-            print("*** Cannot find _plots directory ")
-            print("*** Looking for ",test_plots)
-            all_ok = False
-            continue
-
-        if not os.path.isdir(compare_plots):
-            print("*** Cannot find _plots directory to compare against")
-            print("*** Looking for ",compare_plots)
-            all_ok = False
-            continue
-    
-        os.chdir(subdir)
-        try:
-            regression_ok = imagediff.imagediff_dir(test_plots,compare_plots, \
-                                    relocatable=relocatable,overwrite=True, \
-                                    verbose=verbose)
-            if not regression_ok:
-                print("*** Regression files are not all identical in ")
-                print("   ",test_subdir)
-        except:
-            print("*** Error running imagediff with directories \n  %s\n  %s\n" \
-                        % (test_plots,compare_plots))
-            regression_ok = False
-        all_ok = all_ok and regression_ok
+        jobs.append((test_subdir, os.path.join(top_dir,subdir), test_plots,
+                     compare_plots, relocatable, verbose))
+
+    results = []
+    if num_procs == 1:
+        for job in jobs:
+            results.append(_test_subdir(job))
+            print(results[-1][3], end='')
         os.chdir(top_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=num_procs) as executor:
+            for result in executor.map(_test_subdir, jobs):
+                results.append(result)
+                print(result[3], end='')
+
+    summary = {}
+    for test_subdir, regression_ok, subdir_summary, output in results:
+        summary[test_subdir] = {'regression_ok': regression_ok,
+                                'summary_file': subdir_summary}
+        all_ok = all_ok and regression_ok
+
+    with open(os.path.join(top_dir,summary_file),'w') as sfile:
+        json.dump({'compare_dir': compare_dir, 'all_ok': all_ok,
+                   'subdirs': summary}, sfile, indent=2, sort_keys=True)
 
     return all_ok
     
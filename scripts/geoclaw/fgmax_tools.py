@@ -12,7 +12,12 @@ import os
 from numpy import sqrt, ma
 import numpy
 from six.moves import range
-from clawpack.geoclaw import topotools
+import sys
+sys.path.append('../../../scripts')
+from geoclaw import topotools
+from pyclaw.fileio.ascii import output_frames
+from pyclaw.util import map_processes, num_workers
+from pyclaw.virtual_gauges import PatchIndex, sample_frame
 
 
 class FGmaxGrid(object):
@@ -586,7 +591,7 @@ class FGmaxGrid(object):
         Also calculates B0 = B - dz, attempting to recover the pre-event
         topography from the GeoClaw run topography stored in B.
         """
-        from clawpack.geoclaw import dtopotools
+        from geoclaw import dtopotools
         from scipy.interpolate import RegularGridInterpolator
 
         dtopo = dtopotools.DTopography(dtopo_path, dtopo_type=dtopo_type)
@@ -655,3 +660,239 @@ def adjust_fgmax_grid(x1_desired, x2_desired, x1_domain, dx,
         #print "fg.y2 = %17.12f" % y2_new
     return x1_new, x2_new, nx, y1_new, y2_new, ny
 
+
+
+# ----------------------------------------------------------------------------
+# fgmax values computed after a run from the frame output
+
+class FrameMaxAccumulator(object):
+    r"""
+    Running maxima over frames of the depth and speed on the grid of points
+    ``X,Y``, with the times they were attained and the first arrival time,
+    named as the attributes of :class:`FGmaxGrid`.  Points that are never
+    covered by a patch keep ``h == -1e99`` and ``level == 0``.
+
+    Accumulators for disjoint sets of frames can be combined with
+    :meth:`merge`, so frames may be processed in any order or in parallel.
+    """
+
+    def __init__(self, shape, arrival_tol=1.e-2, dry_tolerance=1.e-3):
+        self.arrival_tol = arrival_tol
+        self.dry_tolerance = dry_tolerance
+        self.h = numpy.full(shape, -1e99)
+        self.h_time = numpy.full(shape, numpy.nan)
+        self.s = numpy.full(shape, -1e99)
+        self.s_time = numpy.full(shape, numpy.nan)
+        self.arrival_time = numpy.full(shape, numpy.inf)
+        self.B = numpy.full(shape, numpy.nan)
+        self.B_time = numpy.full(shape, -numpy.inf)
+        self.level = numpy.zeros(shape, dtype=int)
+
+    def update(self, t, h, s, B, level):
+        r"""
+        Fold in the values sampled from the frame at time *t*; NaN values of
+        *h* mark points not covered by the frame.
+        """
+        covered = ~numpy.isnan(h)
+        # ties keep the earliest time, as when frames are seen in order
+        better = covered & ((h > self.h) | ((h == self.h) & (t < self.h_time)))
+        self.h[better] = h[better]
+        self.h_time[better] = t
+        better = covered & ((s > self.s) | ((s == self.s) & (t < self.s_time)))
+        self.s[better] = s[better]
+        self.s_time[better] = t
+        arrived = covered & (h > self.arrival_tol)
+        self.arrival_time[arrived] = numpy.minimum(self.arrival_time[arrived], t)
+        # topography and level from the finest level, latest time
+        finer = covered & ((level > self.level) |
+                           ((level == self.level) & (t > self.B_time)))
+        self.B[finer] = B[finer]
+        self.B_time[finer] = t
+        self.level[finer] = level[finer]
+
+    def merge(self, other):
+        r"""Combine with the accumulator *other* of other frames."""
+        for name in ['h', 's']:
+            q, q_time = getattr(other, name), getattr(other, name + '_time')
+            mine, mine_time = getattr(self, name), getattr(self, name + '_time')
+            better = (q > mine) | ((q == mine) & (q_time < mine_time))
+            mine[better] = q[better]
+            mine_time[better] = q_time[better]
+        numpy.minimum(self.arrival_time, other.arrival_time,
+                      out=self.arrival_time)
+        finer = (other.level > self.level) | \
+                ((other.level == self.level) & (other.B_time > self.B_time))
+        self.B[finer] = other.B[finer]
+        self.B_time[finer] = other.B_time[finer]
+        self.level[finer] = other.level[finer]
+        return self
+
+
+def sample_grid(framesoln, x, y, levels='all', method='nearest',
+                dry_tolerance=1.e-3):
+    r"""
+    Sample depth, speed, topography and AMR level of one frame on the grid
+    of points ``meshgrid(x,y)``, returning arrays of shape ``(len(y),len(x))``
+    that are NaN (level 0) where no patch covers a point.
+
+    Values are taken from the finest level covering each point, as in
+    :func:`visclaw.gridtools.grid_output_2d`: with ``method='nearest'`` by
+    :func:`pyclaw.virtual_gauges.sample_frame`, with ``method='linear'`` by
+    interpolating in each patch on the points inside it.  The topography is
+    ``q[3] - q[0]`` if the frame has eta as 4th component (GeoFlood output)
+    and ``aux[0]`` otherwise.
+    """
+    if levels == 'all':
+        levels = range(1, 100)
+    shape = (len(y), len(x))
+    states = [state for state in framesoln.states
+              if state.patch.level in levels]
+    if len(states) == 0:
+        nan = numpy.full(shape, numpy.nan)
+        return nan, nan.copy(), nan.copy(), numpy.zeros(shape, dtype=int)
+
+    if method == 'nearest':
+        X, Y = numpy.meshgrid(x, y)
+        level, q, aux = sample_frame(framesoln, X.ravel(), Y.ravel(),
+                                     index=PatchIndex(states), aux=True)
+        h, s, B = _depth_speed_topo(q, aux, dry_tolerance)
+        s[level == 0] = numpy.nan
+        return (h.reshape(shape), s.reshape(shape), B.reshape(shape),
+                level.reshape(shape))
+
+    from visclaw.gridtools import grid_eval_2d
+    h = numpy.full(shape, numpy.nan)
+    s = numpy.full(shape, numpy.nan)
+    B = numpy.full(shape, numpy.nan)
+    level = numpy.zeros(shape, dtype=int)
+    states.sort(key=lambda state: state.patch.level)  # coarse to fine
+    for state in states:
+        grid = state.grid
+        tol_x = 1e-3*grid.delta[0]
+        tol_y = 1e-3*grid.delta[1]
+        i1, i2 = numpy.searchsorted(x, [grid.x.lower - tol_x,
+                                        grid.x.upper + tol_x], side='left')
+        j1, j2 = numpy.searchsorted(y, [grid.y.lower - tol_y,
+                                        grid.y.upper + tol_y], side='left')
+        if i1 == i2 or j1 == j2:
+            continue  # no overlap
+
+        aux = state.aux if state.aux is not None else numpy.empty((0,) +
+                                                              state.q.shape[1:])
+        Qp = numpy.array(_depth_speed_topo(state.q, aux, dry_tolerance))
+        xout, yout = numpy.meshgrid(x[i1:i2], y[j1:j2], indexing='ij')
+        Xc, Yc = grid.c_centers
+        Q = grid_eval_2d(Xc, Yc, Qp, xout, yout, method=method,
+                         return_ma=False)
+        h[j1:j2, i1:i2] = Q[0].T
+        s[j1:j2, i1:i2] = Q[1].T
+        B[j1:j2, i1:i2] = Q[2].T
+        level[j1:j2, i1:i2] = state.patch.level
+    return h, s, B, level
+
+
+def _depth_speed_topo(q, aux, dry_tolerance):
+    r"""Depth, speed (0 where dry) and topography from *q* and *aux*."""
+    h = q[0]
+    hu2 = q[1]**2 + q[2]**2
+    with numpy.errstate(invalid='ignore'):
+        s = numpy.where(h > dry_tolerance,
+                        numpy.sqrt(hu2)/numpy.where(h > 0, h, 1.), 0.)
+    if q.shape[0] > 3:
+        B = q[3] - q[0]
+    elif aux.shape[0] > 0:
+        B = aux[0]
+    else:
+        B = numpy.full(h.shape, numpy.nan)
+    return h, s, B
+
+
+def _accumulate_frames(args):
+    r"""Process pool entry point: accumulate maxima over some frames."""
+    frames, x, y, outdir, file_format, file_prefix, options = args
+    from pyclaw import Solution
+    acc = FrameMaxAccumulator((len(y), len(x)), options['arrival_tol'],
+                              options['dry_tolerance'])
+    bbox = [x[0], x[-1], y[0], y[-1]]
+    for frame in frames:
+        framesoln = Solution(frame, path=outdir, file_format=file_format,
+                             file_prefix=file_prefix, read_aux=True, bbox=bbox)
+        if not (options['tstart_max'] <= framesoln.t <= options['tend_max']):
+            continue
+        h, s, B, level = sample_grid(framesoln, x, y, options['levels'],
+                                     options['method'],
+                                     options['dry_tolerance'])
+        acc.update(framesoln.t, h, s, B, level)
+    return acc
+
+
+def fgmax_from_frames(x, y, outdir='_output', frames=None,
+                      file_format='ascii', file_prefix='fort', levels='all',
+                      method='nearest', arrival_tol=1.e-2, dry_tolerance=1.e-3,
+                      tstart_max=0., tend_max=1.e10, num_procs=None):
+    r"""
+    Compute fgmax values on the grid ``meshgrid(x,y)`` from the frames of a
+    run that had no fgmax grid there.
+
+    Each frame is sampled with :func:`sample_grid` and folded into running
+    maxima; frames are split among *num_procs* processes (see
+    :func:`pyclaw.util.map_processes`) whose results are then merged.  The values are only as
+    good as the output times: maxima between frames are missed.
+
+    :Input:
+     - *x, y* - (1d arrays) increasing coordinates of the grid points
+     - *outdir* - (string) output directory, or archive if *file_format* is
+       'archive' (only patches near the grid are then read)
+     - *frames* - (list) frames to use, all of them by default
+     - *levels*, *method* - as for
+       :func:`visclaw.gridtools.grid_output_2d`
+     - *arrival_tol* - depth at which the flow has arrived at a point
+     - *dry_tolerance* - speed is 0 where the depth is below this
+     - *tstart_max*, *tend_max* - only frames in this time interval are used
+
+    :Output:
+     - (:class:`FGmaxGrid`) with ``X, Y, B, h, h_time, s, s_time,
+       arrival_time, level`` set as by :meth:`FGmaxGrid.read_output` for a
+       grid with ``point_style = 2``: masked arrays of shape
+       ``(len(y),len(x))``, masked where no frame covered a point.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    if frames is None:
+        frames = output_frames(outdir, file_prefix, file_format)
+    num_procs = max(1, min(num_workers(num_procs), len(frames)))
+
+    options = {'levels': levels, 'method': method, 'arrival_tol': arrival_tol,
+               'dry_tolerance': dry_tolerance, 'tstart_max': tstart_max,
+               'tend_max': tend_max}
+    jobs = [(frames[n::num_procs], x, y, outdir, file_format, file_prefix,
+             options) for n in range(num_procs)]
+    results = list(map_processes(_accumulate_frames, jobs, num_procs))
+    acc = results[0]
+    for other in results[1:]:
+        acc.merge(other)
+
+    fg = FGmaxGrid()
+    fg.point_style = 2
+    fg.outdir = outdir
+    fg.nx = len(x)
+    fg.ny = len(y)
+    fg.x1, fg.x2, fg.y1, fg.y2 = x[0], x[-1], y[0], y[-1]
+    fg.min_level_check = min(levels) if levels != 'all' else 1
+    fg.arrival_tol = arrival_tol
+    fg.tstart_max = tstart_max
+    fg.tend_max = tend_max
+    fg.X, fg.Y = numpy.meshgrid(x, y)
+    fg.x = x
+    fg.y = y
+
+    mask = acc.level == 0
+    fg.level = acc.level
+    fg.B = ma.masked_where(mask, acc.B)
+    fg.h = ma.masked_where(mask, acc.h)
+    fg.h_time = ma.masked_where(mask, acc.h_time)
+    fg.s = ma.masked_where(mask, acc.s)
+    fg.s_time = ma.masked_where(mask, acc.s_time)
+    fg.arrival_time = ma.masked_where(mask | numpy.isinf(acc.arrival_time),
+                                      acc.arrival_time)
+    return fg
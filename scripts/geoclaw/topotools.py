@@ -18,6 +18,9 @@ topography (bathymetry) files.
  - topo2writer 
  - topo3writer 
  - swapheader
+ - coarsen_array
+ - inpaint
+ - read_pyramid
 
 
 :TODO:
@@ -26,13 +29,13 @@ topography (bathymetry) files.
    the create_topo_func into Topography class, maybe allow more broad 
    initialization ability to the class to handle this?
  - Fix `in_poly` function
- - Add remove/fill no data value
  - Add more robust plotting capabilities
 """
 
 from __future__ import absolute_import
 from __future__ import print_function
 import os
+import re
 
 import numpy
 import sys
@@ -261,6 +264,221 @@ def swapheader(inputfile, outputfile):
     topo.write(outputfile)
 
 
+def coarsen_array(Z, coarsen, method='mean', no_data_value=None):
+    r"""Reduce each *coarsen* x *coarsen* block of the 2d array *Z* to one value.
+
+    Rows and columns past the last whole block at the upper edges are
+    dropped, so that the coarse points are equally spaced.  Cells equal to
+    *no_data_value* or NaN are ignored, and a block with no valid cells is
+    set to *no_data_value* (NaN if it is None).
+
+    :Input:
+     - *Z* (numpy.ndarray) 2d array to coarsen
+     - *coarsen* (int) block size
+     - *method* (str) one of *mean*, *min* or *max*
+
+    :Output:
+     - (numpy.ndarray) of shape ``Z.shape // coarsen``
+    """
+
+    if method not in ['mean', 'min', 'max']:
+        raise ValueError("Unrecognized coarsening method: %s" % method)
+
+    my = Z.shape[0] // coarsen
+    mx = Z.shape[1] // coarsen
+    if my == 0 or mx == 0:
+        raise ValueError("Cannot coarsen a %s by %s array by %s"
+                         % (Z.shape + (coarsen,)))
+    data = numpy.array(Z[:my*coarsen, :mx*coarsen], dtype=float)
+    mask = numpy.isnan(data)
+    if no_data_value is not None:
+        mask |= (data == no_data_value)
+
+    # Gather each block along the last axis and reduce over it
+    blocks = numpy.ma.array(data, mask=mask).reshape(my, coarsen, mx, coarsen)
+    blocks = blocks.swapaxes(1, 2).reshape(my, mx, coarsen**2)
+    Z_coarse = getattr(blocks, method)(axis=2)
+
+    if no_data_value is None:
+        no_data_value = numpy.nan
+    return numpy.ma.filled(Z_coarse, no_data_value)
+
+
+def _fill_window_mean(Z, mask):
+    r"""Fill the *mask* points of *Z* with the mean of the valid points in
+    the smallest square window around each that has any."""
+
+    from scipy import ndimage
+
+    valid = ~mask
+    # Chessboard distance to the nearest valid point is the window radius
+    r = ndimage.distance_transform_cdt(mask, metric='chessboard')
+    i, j = mask.nonzero()
+    r = r[i, j]
+
+    # Window sums from summed-area tables of the valid values and counts
+    offset = Z[valid].mean()
+    ny, nx = Z.shape
+    sums = numpy.zeros((ny + 1, nx + 1))
+    counts = numpy.zeros((ny + 1, nx + 1))
+    sums[1:, 1:] = numpy.where(valid, Z - offset, 0.).cumsum(0).cumsum(1)
+    counts[1:, 1:] = valid.cumsum(0).cumsum(1)
+    i0 = numpy.maximum(i - r, 0)
+    i1 = numpy.minimum(i + r + 1, ny)
+    j0 = numpy.maximum(j - r, 0)
+    j1 = numpy.minimum(j + r + 1, nx)
+    window_sum = sums[i1, j1] - sums[i0, j1] - sums[i1, j0] + sums[i0, j0]
+    window_count = counts[i1, j1] - counts[i0, j1] - counts[i1, j0] \
+                   + counts[i0, j0]
+    Z[i, j] = offset + window_sum / window_count
+
+
+def _fill_nearest(Z, mask):
+    r"""Fill the *mask* points of *Z* with the nearest valid value."""
+
+    from scipy import ndimage
+
+    index = ndimage.distance_transform_edt(mask, return_distances=False,
+                                           return_indices=True)
+    Z[mask] = Z[index[0][mask], index[1][mask]]
+
+
+def _fill_laplace(Z, mask, tol, max_iter):
+    r"""Fill the *mask* points of *Z* with the solution of Laplace's equation
+    with the valid points as boundary values, and no flux at the edges of
+    the array, by conjugate gradients from the nearest valid values."""
+
+    from scipy import sparse
+    from scipy.sparse import linalg
+
+    _fill_nearest(Z, mask)
+    ny, nx = Z.shape
+    i, j = mask.nonzero()
+    num_points = len(i)
+    unknown = numpy.zeros(Z.shape, dtype=int)
+    unknown[i, j] = numpy.arange(num_points)
+
+    # Five point Laplacian, with the valid neighbors on the right hand side
+    diagonal = numpy.zeros(num_points)
+    rhs = numpy.zeros(num_points)
+    rows = []
+    cols = []
+    for di, dj in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+        inside = (0 <= i + di) & (i + di < ny) & (0 <= j + dj) & (j + dj < nx)
+        k = inside.nonzero()[0]
+        ni, nj = i[k] + di, j[k] + dj
+        diagonal[k] += 1.
+        hole = mask[ni, nj]
+        rows.append(k[hole])
+        cols.append(unknown[ni[hole], nj[hole]])
+        rhs[k[~hole]] += Z[ni[~hole], nj[~hole]]
+    rows = numpy.concatenate(rows)
+    cols = numpy.concatenate(cols)
+    A = sparse.csr_matrix((-numpy.ones(len(rows)), (rows, cols)),
+                          shape=(num_points, num_points)) \
+        + sparse.diags(diagonal)
+
+    try:
+        solution, info = linalg.cg(A, rhs, x0=Z[i, j], rtol=tol,
+                                   maxiter=max_iter)
+    except TypeError:
+        # scipy < 1.12
+        solution, info = linalg.cg(A, rhs, x0=Z[i, j], tol=tol,
+                                   maxiter=max_iter)
+    Z[i, j] = solution
+
+
+def _inpaint_tile(args):
+    r"""Inpaint one tile, see :func:`inpaint`."""
+
+    Z, mask, method, tol, max_iter = args
+    Z = numpy.array(Z, dtype=float)
+    if mask.all():
+        return Z, False
+    if method == 'fill':
+        _fill_window_mean(Z, mask)
+    elif method == 'nearest':
+        _fill_nearest(Z, mask)
+    elif method == 'laplace':
+        _fill_laplace(Z, mask, tol, max_iter)
+    return Z, True
+
+
+def inpaint(Z, mask, method='fill', tile_size=None, halo=32, num_procs=1,
+            tol=1e-6, max_iter=10000):
+    r"""Replace the points of *Z* where *mask* is True using the others.
+
+    :Input:
+     - *Z* (numpy.ndarray) 2d array of data
+     - *mask* (numpy.ndarray) 2d bool array, True at the points to replace
+     - *method* (str) one of:
+
+         - *fill* - mean of the valid points in the smallest square window
+           around the point containing any
+         - *nearest* - value of the nearest valid point
+         - *laplace* - harmonic interpolation of the valid points around
+           each hole, solved by conjugate gradients to relative residual
+           *tol* in at most *max_iter* iterations
+
+     - *tile_size* (int) work on tiles of this many points squared, each
+       extended by *halo* points of its neighbors, or on the whole array if
+       None.  Holes wider than the halo are filled from the data of the
+       extended tile only, and a tile with no valid data is filled once its
+       neighbors are.
+     - *num_procs* (int) number of processes for the tiles, see
+       :func:`pyclaw.util.map_processes`
+
+    :Output:
+     - (numpy.ndarray) copy of *Z* with the points replaced
+    """
+
+    from pyclaw.util import map_processes
+
+    if method not in ['fill', 'nearest', 'laplace']:
+        raise ValueError("Unrecognized inpainting method: %s" % method)
+
+    Z = numpy.array(numpy.ma.getdata(Z), dtype=float)
+    mask = numpy.array(mask, dtype=bool)
+    if mask.all():
+        raise ValueError("No valid data to inpaint from")
+    ny, nx = Z.shape
+    if tile_size is None:
+        tile_size = max(ny, nx)
+        halo = 0
+
+    while mask.any():
+        tiles = []
+        for i in range(0, ny, tile_size):
+            for j in range(0, nx, tile_size):
+                if mask[i:i+tile_size, j:j+tile_size].any():
+                    tiles.append((max(i - halo, 0), min(i + tile_size, ny),
+                                  min(i + tile_size + halo, ny),
+                                  max(j - halo, 0), min(j + tile_size, nx),
+                                  min(j + tile_size + halo, nx), i, j))
+        jobs = [(Z[a0:a2, b0:b2], mask[a0:a2, b0:b2], method, tol, max_iter)
+                for a0, a1, a2, b0, b1, b2, i, j in tiles]
+        results = map_processes(_inpaint_tile, jobs,
+                                1 if len(jobs) == 1 else num_procs)
+
+        # Write back the interior of the tiles that had valid data
+        filled = numpy.zeros(mask.shape, dtype=bool)
+        for (a0, a1, a2, b0, b1, b2, i, j), (Z_tile, done) in \
+                zip(tiles, results):
+            if done:
+                Z[i:a1, j:b1] = Z_tile[i-a0:a1-a0, j-b0:b1-b0]
+                filled[i:a1, j:b1] = True
+        mask &= ~filled
+
+    return Z
+
+
+def _coarsen_coordinate(x, coarsen):
+    r"""Centers of the whole blocks of *coarsen* points of the 1d array *x*,
+    as for :func:`coarsen_array`."""
+    n = len(x) // coarsen
+    return numpy.reshape(x[:n*coarsen], (n, coarsen)).mean(axis=1)
+
+
 
 # ==============================================================================
 #  Topography class
@@ -1546,79 +1764,67 @@ class Topography(object):
                numpy.ma.masked_where(intersect, y, copy=False).reshape(self.Y.shape)
 
 
-    def replace_values(self, indices, value=numpy.nan, method='fill'):
+    def replace_values(self, indices, value=numpy.nan, method='fill',
+                             **kargs):
         r"""Replace the values at *indices* by the specified method
 
+        *indices* can be a boolean array of the shape of *Z*, a tuple of
+        index arrays as returned by *nonzero*, or a list of (i,j) pairs.
+
         :Methods:
-         - "fill"
-         - "nearest"
+         - "fill" - average of the surrounding good data, in the smallest
+           square around each point that has any
+         - "nearest" - nearest good data
+         - "laplace" - harmonic interpolation of the surrounding good data
+         - "value" - *value*
+
+        Other keyword arguments, such as *tile_size* and *num_procs* for
+        large DEMs, are passed to :func:`inpaint`.
         """
 
-        # Average surrounding good data
-        if method == 'fill':
-            for index in indices:
-                r = 0
-                point_replaced = False
-                while not point_replaced and r < max(self.Z.shape):
-                    r = r + 1
-                    i_range = list(range(max(0, index[0] - r), min(index[0] + r + 1, self.Z.shape[0])))
-                    j_range = list(range(max(0, index[1] - r), min(index[1] + r + 1, self.Z.shape[1])))
-                    num_points = 0
-                    summation = 0.0
-                    for i in i_range:
-                        for j in j_range:
-                            if (i,j) not in indices:
-                                summation += self.Z[i,j]
-                                num_points += 1
-                    if num_points > 0:
-                        self.Z[index[0], index[1]] = summation / num_points
-                        point_replaced = True
-
-        elif method == "nearest":
-            pass
-
-
-    def replace_no_data_values(self, method='fill'):
+        indices_mask = numpy.zeros(self.Z.shape, dtype=bool)
+        if isinstance(indices, numpy.ndarray) and indices.dtype == bool:
+            indices_mask[...] = indices
+        elif isinstance(indices, tuple) and len(indices) == 2 and \
+             isinstance(indices[0], numpy.ndarray):
+            indices_mask[indices] = True
+        elif len(indices) > 0:
+            indices = numpy.asarray(indices, dtype=int).reshape(-1, 2)
+            indices_mask[indices[:,0], indices[:,1]] = True
+
+        if not indices_mask.any():
+            return
+        if method == 'value':
+            self.Z[indices_mask] = value
+        else:
+            self._Z = inpaint(self.Z, indices_mask, method=method, **kargs)
+
+
+    def replace_no_data_values(self, method='fill', **kargs):
         r"""Replace *no_data_value* with other values as specified by *method*.
 
-        self.no_data_value
+        NaN values are replaced as well.
 
         :Input:
          - *method* can be one of:
 
-             - *fill* - Fill in all *no_data_value* locations with *value*
-             - *nearest* - Fill in *no_data_value* locations with 
-               average of nearest neighbors.
+             - *fill* - Fill in *no_data_value* locations with the average
+               of the nearest good data
+             - *nearest* - Fill in *no_data_value* locations with the
+               nearest good data
+             - *laplace* - Interpolate the good data around each hole
+               harmonically
 
+        See :meth:`replace_values` for the other arguments.
         """
-        raise NotImplemented("This functionality has not been added yet.")
-        no_data_value_indices = (self.Z == self.no_data_value).nonzero()
-        self.replace_values(no_data_value_indices, method=method)
-
-        # nrows= shape(Z)[0]
-        # ncols= shape(Z)[1]
-        # npts = nrows*ncols
-
-        # xi=X[0,:]
-        # yi=Y[:,0]
-
-        # X.np.reshape(npts)
-        # Y.np.reshape(npts)
-        # Z.np.reshape(npts)
-
-        # ind=np.where(Z!=nodata_value)
-        # X=X[ind]
-        # Y=Y[ind]
-        # Z=Z[ind]
 
-        # ptsremove=npts-len(Z)
-        # if ptsremove>0:
-        #     print("Removing %s nodata_value points" % ptsremove)
-
-        # Z = pylab.griddata(X,Y,Z,xi,yi)
-        # (X,Y)=np.meshgrid(xi,yi)
-
-        # griddata2topofile(X,Y,Z,outputfile,topotypeout,nodata_value,nodata_value)
+        Z = numpy.ma.getdata(self.Z)
+        no_data = numpy.isnan(Z) | (Z == self.no_data_value)
+        if numpy.ma.isMaskedArray(self.Z):
+            no_data |= numpy.ma.getmaskarray(self.Z)
+        if no_data.any():
+            print("Replacing %s no_data_value points" % no_data.sum())
+        self.replace_values(no_data, method=method, **kargs)
 
 
     def smooth_data(self, indices, r=1):
@@ -1650,12 +1856,24 @@ class Topography(object):
                 self.Z[index[0], index[1]] = summation / num_points
 
 
-    def crop(self, filter_region=None, coarsen=1):
+    def crop(self, filter_region=None, coarsen=1, method='subsample'):
         r"""Crop region to *filter_region*
 
         Create a new Topography object that is identical to this one but cropped
         to the region specified by filter_region
 
+        :Input:
+         - *filter_region* (tuple) x and y limits, the whole region if None
+         - *coarsen* (int) coarsening factor
+         - *method* (str) how to coarsen:
+
+             - *subsample* - keep every *coarsen* point
+             - *mean*, *min*, *max* - reduce each *coarsen* x *coarsen* block
+               of points, ignoring *no_data_value*, to one point at its
+               center (see :func:`coarsen_array`, which drops the points
+               past the last whole block).  *max* keeps levees and *min*
+               keeps channels that subsampling can miss.
+
         :TODO:
          - Currently this does not work for unstructured data, could in principle
          - This could be a special case of in_poly although that routine could
@@ -1677,8 +1895,14 @@ class Topography(object):
         region_index[3] = (self.y <= filter_region[3]).nonzero()[0][-1] + 1
         newtopo = Topography()
 
-        newtopo._x = self._x[region_index[0]:region_index[1]:coarsen]
-        newtopo._y = self._y[region_index[2]:region_index[3]:coarsen]
+        if method == 'subsample':
+            newtopo._x = self._x[region_index[0]:region_index[1]:coarsen]
+            newtopo._y = self._y[region_index[2]:region_index[3]:coarsen]
+        else:
+            newtopo._x = _coarsen_coordinate(
+                             self._x[region_index[0]:region_index[1]], coarsen)
+            newtopo._y = _coarsen_coordinate(
+                             self._y[region_index[2]:region_index[3]], coarsen)
 
         # Force regeneration of 2d coordinate arrays and extent if needed
         newtopo._X = None
@@ -1686,15 +1910,72 @@ class Topography(object):
         newtopo._extent = None
 
         # Modify Z array as well
-        newtopo._Z = self._Z[region_index[2]:region_index[3]:coarsen,
-                          region_index[0]:region_index[1]:coarsen]
+        if method == 'subsample':
+            newtopo._Z = self._Z[region_index[2]:region_index[3]:coarsen,
+                              region_index[0]:region_index[1]:coarsen]
+        else:
+            newtopo._Z = coarsen_array(self._Z[region_index[2]:region_index[3],
+                                               region_index[0]:region_index[1]],
+                                       coarsen, method, self.no_data_value)
 
         newtopo.unstructured = self.unstructured
         newtopo.topo_type = self.topo_type
+        newtopo.no_data_value = self.no_data_value
 
         # print "Cropped to %s by %s array"  % (len(newtopo.x),len(newtopo.y))
         return newtopo
 
+
+    def make_pyramid(self, pyramid_dir=None, factor=2, method='mean',
+                     min_points=64):
+        r"""Save this topography and successively coarsened copies of it.
+
+        Level 0 is the data itself and level *k* coarsens level *k-1* by
+        *factor* with :func:`coarsen_array`, until a level has fewer than
+        *min_points* points in x or y.  Each level is saved as ``x_k.npy``,
+        ``y_k.npy`` and ``Z_k.npy`` in *pyramid_dir*, which is
+        ``<path>.pyramid`` next to the topo file by default, for
+        :func:`read_pyramid` to load windows of without reading the full
+        resolution data.
+
+        :Output:
+         - (str) *pyramid_dir*
+        """
+
+        if pyramid_dir is None:
+            if self.path is None:
+                raise ValueError("*** Need a path or pyramid_dir")
+            pyramid_dir = self.path + '.pyramid'
+        if not os.path.isdir(pyramid_dir):
+            os.makedirs(pyramid_dir)
+        # Remove the levels of an earlier pyramid, and only those
+        level_file = re.compile(r'[xyZ]_\d+\.npy$')
+        for fname in os.listdir(pyramid_dir):
+            if level_file.match(fname):
+                os.remove(os.path.join(pyramid_dir, fname))
+
+        x, y, Z = self.x, self.y, numpy.asarray(self.Z)
+        level = 0
+        while True:
+            numpy.save(os.path.join(pyramid_dir, 'x_%d.npy' % level), x)
+            numpy.save(os.path.join(pyramid_dir, 'y_%d.npy' % level), y)
+            numpy.save(os.path.join(pyramid_dir, 'Z_%d.npy' % level), Z)
+            if min(len(x), len(y)) < factor*min_points:
+                break
+            x = _coarsen_coordinate(x, factor)
+            y = _coarsen_coordinate(y, factor)
+            Z = coarsen_array(Z, factor, method, self.no_data_value)
+            level += 1
+
+        with open(os.path.join(pyramid_dir, 'pyramid.data'), 'w') as data_file:
+            data_file.write("%s\n" % self.path)
+            data_file.write("%i          num_levels\n" % (level + 1))
+            data_file.write("%i          factor\n" % factor)
+            data_file.write("%s          method\n" % method)
+            data_file.write("%g          no_data_value\n" % self.no_data_value)
+
+        return pyramid_dir
+
     def make_shoreline_xy(self, sea_level=0):
         r"""
         Returns an array *shoreline_xy* with 2 columns containing x and y values
@@ -1730,6 +2011,87 @@ class Topography(object):
 
 
 
+def read_pyramid(path, delta=None, filter_region=None, topo_type=None,
+                 pyramid_dir=None, method='mean', factor=2, min_points=64):
+    r"""Read the topo file *path* at the resolution needed.
+
+    Loads the coarsest level of the pyramid of *path* (see
+    :meth:`Topography.make_pyramid`) whose spacing is at most *delta*, and
+    only its part in *filter_region*, from memory-mapped arrays.  The
+    pyramid is made first if it is missing or older than *path*.
+
+    :Input:
+     - *path* (str) topo file
+     - *delta* (float or tuple) coarsest acceptable spacing in x and y, the
+       full resolution if None
+     - *filter_region* (tuple) x and y limits, the whole region if None
+     - *topo_type* (int) of *path*, from its suffix if None
+     - *method*, *factor* - of the pyramid, which is made again if it was
+       made with others
+     - *min_points* - see :meth:`Topography.make_pyramid`, used if the
+       pyramid has to be made
+
+    :Output:
+     - (:class:`Topography`)
+    """
+
+    if pyramid_dir is None:
+        pyramid_dir = path + '.pyramid'
+    data_path = os.path.join(pyramid_dir, 'pyramid.data')
+
+    def read_pyramid_data():
+        with open(data_path) as data_file:
+            data_file.readline()
+            return [data_file.readline().split()[0] for k in range(4)]
+
+    # Remake the pyramid if it is older than path or made differently
+    remake = True
+    if os.path.exists(data_path) and \
+       os.path.getmtime(data_path) >= os.path.getmtime(path):
+        data = read_pyramid_data()
+        remake = (int(data[1]) != factor) or (data[2] != method)
+    if remake:
+        topo = Topography(path, topo_type=topo_type)
+        topo.read()
+        topo.make_pyramid(pyramid_dir, factor=factor, method=method,
+                          min_points=min_points)
+        data = read_pyramid_data()
+    num_levels = int(data[0])
+    no_data_value = float(data[3])
+
+    # Coarsest level no coarser than delta
+    level = 0
+    if delta is not None:
+        delta = numpy.ones(2) * delta
+        for k in range(1, num_levels):
+            x = numpy.load(os.path.join(pyramid_dir, 'x_%d.npy' % k))
+            y = numpy.load(os.path.join(pyramid_dir, 'y_%d.npy' % k))
+            if len(x) < 2 or len(y) < 2 or \
+               x[1] - x[0] > delta[0] or y[1] - y[0] > delta[1]:
+                break
+            level = k
+
+    x = numpy.load(os.path.join(pyramid_dir, 'x_%d.npy' % level))
+    y = numpy.load(os.path.join(pyramid_dir, 'y_%d.npy' % level))
+    Z = numpy.load(os.path.join(pyramid_dir, 'Z_%d.npy' % level),
+                   mmap_mode='r')
+    if filter_region is None:
+        filter_region = [x[0], x[-1], y[0], y[-1]]
+    i = [numpy.searchsorted(x, filter_region[0], 'left'),
+         numpy.searchsorted(x, filter_region[1], 'right')]
+    j = [numpy.searchsorted(y, filter_region[2], 'left'),
+         numpy.searchsorted(y, filter_region[3], 'right')]
+
+    topo = Topography()
+    topo._x = x[i[0]:i[1]]
+    topo._y = y[j[0]:j[1]]
+    topo._Z = numpy.array(Z[j[0]:j[1], i[0]:i[1]])
+    topo.unstructured = False
+    topo.topo_type = 3
+    topo.no_data_value = no_data_value
+    return topo
+
+
 # Define convenience dictionary of URLs for some online DEMs in netCDF form:
 remote_topo_urls = {}
 
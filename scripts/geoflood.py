@@ -43,6 +43,9 @@ class GeoFlooddata(object):
         self.tikz_plot_prefix = 'plot'
         self.tikz_plot_suffix = 'png'
         self.buffer_len = 1024
+        self.skip_dry_patches = True
+        self.topo_cache_size = 1024
+        self.timing_csv = True
         self.speed_tolerance_entries_c = 6
         self.claw_version = 5
 
@@ -237,6 +240,16 @@ class GeoFlooddata(object):
         else:
             ascii_out = 'F'
 
+        # binary output: fort.b files read by pyclaw.fileio.binary
+        binary_precision = 64
+        if clawdata.output_format in [3,'binary','binary64']:
+            binary_out = 'T'
+        elif clawdata.output_format in [2,'binary32']:
+            binary_out = 'T'
+            binary_precision = 32
+        else:
+            binary_out = 'F'
+
         #print(clawdata.output_format)
         #print(ascii_out)
         
@@ -286,10 +299,22 @@ class GeoFlooddata(object):
             '   speed_tolerance_entries_c':self.speed_tolerance_entries_c,
             '   speed_tolerance_c': refinement_data.speed_tolerance, "\n"
 
-            '   buffer-len': self.buffer_len,
+            '   buffer-len': self.buffer_len,"\n"
+
+            '   # Skip the update of patches that are dry, ghost cells included': None,
+            '   skip-dry-patches': self.skip_dry_patches,
+
+            '   # Number of patches whose topography is cached for regridding': None,
+            '   # (0 disables the cache)': None,
+            '   topo-cache-size': self.topo_cache_size,"\n"
 
             '   # Output' : None,
-            '   ascii-out': ascii_out
+            '   ascii-out': ascii_out,
+            '   binary-out': binary_out,
+            '   binary-precision': binary_precision,"\n"
+
+            '   # Wall and CPU times by level and by phase at every output frame': None,
+            '   timing-csv': self.timing_csv
             }
         with open('geoflood.ini','w') as geofloodfile:
             geoflood.write(geofloodfile)
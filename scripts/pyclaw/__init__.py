@@ -27,6 +27,8 @@ from .solution import Solution
 from .geometry import Dimension, Patch, Domain
 from .state import State
 from .cfl import CFL
+__all__.append('Ensemble')
+from .ensemble import Ensemble
 import sys 
 
 sys.path.append('../../../scripts')
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Micro-benchmark of the per-step cost of :meth:`pyclaw.solver.Solver._apply_bcs`.
+
+For the small grids typical of ensemble runs the boundary condition
+bookkeeping is pure Python overhead, so the time per call is reported for
+a range of grid sizes and every boundary condition type.  The "before"
+column times the implementation that predates the boundary condition plan,
+kept below as :func:`apply_bcs_before`, on the same solver and state.
+
+Run from the scripts directory with:
+    python pyclaw/benchmarks/apply_bcs.py [num_calls]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..','..'))
+import pyclaw
+from pyclaw import BC
+
+
+def setup(num_dim, mx, bc, num_eqn=3, num_aux=1):
+    r"""Return a set up solver and its state for an mx^num_dim grid."""
+    if num_dim == 1:
+        solver = pyclaw.ClawSolver1D()
+    else:
+        solver = pyclaw.ClawSolver2D()
+    solver.kernel_language = 'Python'
+    solver.num_eqn = num_eqn
+    solver.num_waves = num_eqn
+    solver.bc_lower = [bc]*num_dim
+    solver.bc_upper = [bc]*num_dim
+    solver.aux_bc_lower = [bc]*num_dim
+    solver.aux_bc_upper = [bc]*num_dim
+
+    dims = [pyclaw.Dimension(0.,1.,mx,name=name)
+            for name in ('x','y')[:num_dim]]
+    domain = pyclaw.Domain(dims)
+    state = pyclaw.State(domain,num_eqn,num_aux)
+    state.q[...] = 1.
+    state.aux[...] = 0.
+    solver._allocate_bc_arrays(state)
+    return solver, state
+
+
+def bc_lower_before(solver, bc_type, array, idim, name):
+    r"""Fill the lower ghost cells of *array* the way _bc_lower used to."""
+    num_ghost = solver.num_ghost
+    if bc_type == BC.extrap:
+        for i in range(num_ghost):
+            array[:,i,...] = array[:,num_ghost,...]
+    elif bc_type == BC.periodic:
+        array[:,:num_ghost,...] = array[:,-2*num_ghost:-num_ghost,...]
+    elif bc_type == BC.wall:
+        for i in range(num_ghost):
+            array[:,i,...] = array[:,2*num_ghost-1-i,...]
+            if name == 'q':
+                array[solver.reflect_index[idim],i,...] = \
+                    -array[solver.reflect_index[idim],2*num_ghost-1-i,...]
+
+
+def bc_upper_before(solver, bc_type, array, idim, name):
+    r"""Fill the upper ghost cells of *array* the way _bc_upper used to."""
+    num_ghost = solver.num_ghost
+    if bc_type == BC.extrap:
+        for i in range(num_ghost):
+            array[:,-i-1,...] = array[:,-num_ghost-1,...]
+    elif bc_type == BC.periodic:
+        array[:,-num_ghost:,...] = array[:,num_ghost:2*num_ghost,...]
+    elif bc_type == BC.wall:
+        for i in range(num_ghost):
+            array[:,-i-1,...] = array[:,-2*num_ghost+i,...]
+            if name == 'q':
+                array[solver.reflect_index[idim],-i-1,...] = \
+                    -array[solver.reflect_index[idim],-2*num_ghost+i,...]
+
+
+def apply_bcs_before(solver, state):
+    r"""
+    The per-step work of _apply_bcs before the boundary condition plan: the
+    list of boundary conditions is rebuilt and a rolled view of the arrays is
+    taken for every boundary, custom boundary conditions aside.
+    """
+    solver.qbc = state.get_qbc_from_q(solver.num_ghost, solver.qbc)
+    if state.num_aux > 0:
+        solver.auxbc = state.get_auxbc_from_aux(solver.num_ghost, solver.auxbc)
+
+    grid = state.grid
+    for (idim, dim) in enumerate(grid.dimensions):
+        for (side, on_boundary, on_other_boundary, fill) in [
+                ('lower', grid.on_lower_boundary[idim],
+                 grid.on_upper_boundary[idim], bc_lower_before),
+                ('upper', grid.on_upper_boundary[idim],
+                 grid.on_lower_boundary[idim], bc_upper_before)]:
+            if not on_boundary:
+                continue
+            bcs = []
+            if state.num_aux > 0:
+                bcs.append({'array': solver.auxbc,
+                            'type': getattr(solver, 'aux_bc_'+side),
+                            'variable': 'aux'})
+            bcs.append({'array': solver.qbc,
+                        'type': getattr(solver, 'bc_'+side),
+                        'variable': 'q'})
+            for bc in bcs:
+                if bc['type'][idim] == BC.periodic and not on_other_boundary:
+                    continue
+                fill(solver, bc['type'][idim],
+                     np.rollaxis(bc['array'], idim+1, 1), idim,
+                     bc['variable'])
+
+
+if __name__ == "__main__":
+    num_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bcs = [('extrap',pyclaw.BC.extrap), ('periodic',pyclaw.BC.periodic),
+           ('wall',pyclaw.BC.wall)]
+
+    print("%6s %6s %10s %10s %10s   (us per call)"
+          % ('dim','mx','bc','before','after'))
+    for num_dim in (1,2):
+        for mx in (16,64,256):
+            for name, bc in bcs:
+                solver, state = setup(num_dim, mx, bc)
+                before = timeit.timeit(lambda: apply_bcs_before(solver, state),
+                                       number=num_calls)
+                after = timeit.timeit(lambda: solver._apply_bcs(state),
+                                      number=num_calls)
+                print("%6i %6i %10s %10.2f %10.2f"
+                      % (num_dim, mx, name, 1.e6*before/num_calls,
+                         1.e6*after/num_calls))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark the vectorized Python 2D shallow water kernel of
+:class:`pyclaw.ClawSolver2D` against the Fortran kernel.
+
+A radial dam break over a Gaussian bump is run on grids of increasing size.
+The Fortran kernel is only timed if the compiled classic2 module and the
+GeoClaw-style Riemann solver ``riemann.sw_aug_2D`` are available.
+
+Run from the scripts directory with:
+    python pyclaw/benchmarks/python_kernel_2d.py [mx ...]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..','..'))
+import pyclaw
+from riemann import shallow_2D_py
+
+
+def setup(kernel_language, mx, riemann_solver=None):
+    r"""Return a Controller for a radial dam break on an mx x mx grid."""
+    if riemann_solver is None:
+        riemann_solver = shallow_2D_py.shallow_fwave_2d
+    solver = pyclaw.ClawSolver2D(riemann_solver)
+    solver.kernel_language = kernel_language
+    solver.fwave = True
+    solver.limiters = pyclaw.limiters.tvd.MC
+    solver.all_bcs = pyclaw.BC.wall
+    solver.aux_bc_lower = [pyclaw.BC.wall]*2
+    solver.aux_bc_upper = [pyclaw.BC.wall]*2
+
+    x = pyclaw.Dimension(-1.,1.,mx,name='x')
+    y = pyclaw.Dimension(-1.,1.,mx,name='y')
+    domain = pyclaw.Domain([x,y])
+    state = pyclaw.State(domain,3,1)
+    X,Y = state.grid.p_centers
+    state.aux[0] = 0.5*np.exp(-20.*((X-0.4)**2 + Y**2)) - 0.5
+    state.problem_data['grav'] = 9.81
+    state.problem_data['dry_tolerance'] = 1.e-3
+    state.problem_data['sea_level'] = 0.
+    eta = np.where(X**2 + Y**2 < 0.1, 0.3, 0.)
+    state.q[0] = np.maximum(eta - state.aux[0], 0.)
+    state.q[1] = 0.
+    state.q[2] = 0.
+
+    claw = pyclaw.Controller()
+    claw.solution = pyclaw.Solution(state,domain)
+    claw.solver = solver
+    claw.tfinal = 0.2
+    claw.num_output_times = 1
+    claw.output_format = None
+    claw.keep_copy = True
+    claw.verbosity = 0
+    return claw
+
+
+def time_run(claw):
+    r"""Run *claw* and return (wall time, number of steps, final q)."""
+    t0 = time.time()
+    claw.run()
+    return time.time() - t0, claw.solver.status['numsteps'], \
+           claw.frames[-1].q
+
+
+def fortran_riemann_solver():
+    r"""Return the Fortran Riemann solver, or None if it is not available."""
+    try:
+        __import__('pyclaw.classic.classic2')
+        from clawpack import riemann
+        return riemann.sw_aug_2D
+    except (ImportError, AttributeError):
+        return None
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 100, 200]
+    rp_fortran = fortran_riemann_solver()
+    if rp_fortran is None:
+        print("Fortran kernel not available, timing the Python kernel only")
+
+    print("%6s %8s %12s %14s %12s" % ('mx','steps','Python (s)',
+                                       'us/cell/step','Fortran (s)'))
+    for mx in sizes:
+        wall, steps, q = time_run(setup('Python',mx))
+        line = "%6i %8i %12.3f %14.3f" % (mx, steps, wall,
+                                         1.e6*wall/(steps*mx*mx))
+        if rp_fortran is not None:
+            wall_f, steps_f, q_f = time_run(setup('Fortran',mx,rp_fortran))
+            line += " %12.3f   max |dh| = %.2e" \
+                    % (wall_f, np.abs(q[0]-q_f[0]).max())
+        print(line)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark :meth:`amrclaw.region_tools.RuledRectangle.mask_outside` and
+:func:`amrclaw.region_tools.ruledrectangle_covering_selected_points` on
+fgmax/flagregion sized grids.
+
+The default grid is the finest level of the Teton dam example (5 x 2 blocks
+of 32 x 32 cells refined to level 5, so 5120 x 2048 points).  The covering
+of a random meandering flood plain is built and masked with ``method=0`` and
+``method=1``, with both ``ixy`` orientations, and compared with the
+column-by-column loop they replace, which is timed as well unless the grid
+is larger than ``max_loop_points``.
+
+Run from the scripts directory with:
+    python pyclaw/benchmarks/ruled_rectangle.py [mx my]
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..','..'))
+from amrclaw import region_tools
+
+max_loop_points = 5e7
+
+
+def flood_plain(mx, my):
+    r"""
+    Cell centers of an mx x my grid of square cells with y in [0,1], and a
+    meandering band of chosen points.
+    """
+    x = (np.arange(mx) + 0.5)/my
+    y = (np.arange(my) + 0.5)/my
+    X,Y = np.meshgrid(x, y, copy=False)
+    center = 0.5 + 0.25*np.sin(6*np.pi*x) + 0.05*np.sin(40*np.pi*x)
+    width = 0.05 + 0.04*np.cos(10*np.pi*x)
+    pts_chosen = np.logical_and(center - width < Y, Y < center + width)
+    return X, Y, pts_chosen.astype(np.int8)
+
+
+def loop_mask_outside(rr, X, Y):
+    r"""Mask of the points of X,Y outside rr, one column (or row) at a time."""
+    x = X[0,:]
+    y = Y[:,0]
+    mask = np.ones((len(y),len(x)), dtype=bool)
+    if rr.ixy in [1,'x']:
+        t, u = x, y
+    else:
+        t, u = y, x
+    for i in np.where((rr.s.min() <= t) & (t <= rr.s.max()))[0]:
+        k1 = np.where(rr.s <= t[i])[0].max()
+        k2 = np.where(rr.s >= t[i])[0].min()
+        lower, upper = rr.lower[k1], rr.upper[k1]
+        if rr.method != 0 and rr.s[k1] < t[i]:
+            alpha = (t[i]-rr.s[k1])/(rr.s[k2]-rr.s[k1])
+            lower = (1-alpha)*rr.lower[k1] + alpha*rr.lower[k2]
+            upper = (1-alpha)*rr.upper[k1] + alpha*rr.upper[k2]
+        j = np.where((lower <= u) & (u <= upper))[0]
+        if rr.ixy in [1,'x']:
+            mask[j,i] = False
+        else:
+            mask[i,j] = False
+    return mask
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        mx, my = int(sys.argv[1]), int(sys.argv[2])
+    else:
+        mx, my = 5*32*2**5, 2*32*2**5
+    X, Y, pts_chosen = flood_plain(mx, my)
+    time_loop = mx*my <= max_loop_points
+
+    print("Grid %i x %i, %i points chosen" % (mx, my, pts_chosen.sum()))
+    print("%4s %7s %12s %12s %12s %10s" % ('ixy','method','covering (s)',
+                                           'mask (s)','loop (s)','identical'))
+    for ixy in ['x','y']:
+        for method in [0,1]:
+            t0 = time.time()
+            rr = region_tools.ruledrectangle_covering_selected_points(
+                X, Y, pts_chosen, ixy, method=method, verbose=False)
+            t1 = time.time()
+            mask = rr.mask_outside(X, Y)
+            t2 = time.time()
+            if time_loop:
+                same = np.array_equal(mask, loop_mask_outside(rr, X, Y))
+                t3 = time.time()
+                print("%4s %7i %12.3f %12.3f %12.3f %10s"
+                      % (ixy, method, t1-t0, t2-t1, t3-t2, same))
+            else:
+                print("%4s %7i %12.3f %12.3f %12s %10s"
+                      % (ixy, method, t1-t0, t2-t1, '-', '-'))
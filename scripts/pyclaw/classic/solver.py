@@ -215,8 +215,10 @@ class ClawSolver(Solver):
                 self.fmod = __import__(so_name,fromlist=['pyclaw.classic'])
             self._set_fortran_parameters(solution)
             self._allocate_workspace(solution)
-        elif self.num_dim>1:
-            raise Exception('Only Fortran kernels are supported in multi-D.')
+        elif self.num_dim==2:
+            self._allocate_workspace(solution)
+        elif self.num_dim>2:
+            raise Exception('Only Fortran kernels are supported in 3D.')
 
         self._allocate_bc_arrays(solution.states[0])
 
@@ -427,7 +429,16 @@ class ClawSolver2D(ClawSolver):
         ClawSolver2D.trans_cor: Transverse increment waves and transverse
         correction waves are computed and propagated.
 
-    Note that only the fortran routines are supported for now in 2D.
+    With ``kernel_language = 'Python'`` a vectorized numpy implementation
+    of the dimensionally split algorithm is used.  The Riemann solver is then
+    a Python function with the signature::
+
+        wave, s, amdq, apdq = rp(q_l, q_r, aux_l, aux_r, problem_data, idir)
+
+    where *idir* is 0 for the x-sweep and 1 for the y-sweep, and the states
+    have the sweep direction as their last axis (see
+    :func:`riemann.shallow_2D_py.shallow_fwave_2d`).  Transverse waves and
+    capacity functions are only supported by the Fortran routines.
     """
 
     __doc__ += add_parent_doc(ClawSolver)
@@ -452,6 +463,9 @@ class ClawSolver2D(ClawSolver):
         self.aux2 = None
         self.aux3 = None
         self.work = None
+        self._fcorr = None
+        self._dtdx = None
+        self._rp_work = None
 
         super(ClawSolver2D,self).__init__(riemann_solver, claw_package)
 
@@ -472,11 +486,31 @@ class ClawSolver2D(ClawSolver):
         Pack parameters into format recognized by Clawpack (Fortran) code.
 
         Sets the method array and the cparam common block for the Riemann solver.
+        For the Python kernel, allocate the work arrays that are reused by
+        every sweep instead.
         """
         import numpy as np
 
         state = solution.state
 
+        if self.kernel_language == 'Python':
+            if not self.dimensional_split:
+                raise NotImplementedError("Only dimensional splitting is "
+                                          "supported by the Python kernel in 2D.")
+            if state.index_capa >= 0:
+                raise NotImplementedError("Capacity functions are not "
+                                          "supported by the Python kernel in 2D.")
+            mx, my = state.grid.num_cells
+            nx, ny = mx + 2*self.num_ghost, my + 2*self.num_ghost
+            # Correction fluxes, stored with the sweep direction last
+            self._fcorr = [np.empty((state.num_eqn,ny,nx)),
+                           np.empty((state.num_eqn,nx,ny))]
+            # dt/dx at the flattened interfaces, as expected by tvd.limit
+            self._dtdx = [np.empty(ny*(nx-1)+1), np.empty(nx*(ny-1)+1)]
+            # Work arrays of Riemann solvers that accept them, per direction
+            self._rp_work = [{}, {}]
+            return
+
         num_eqn,num_aux,num_waves,num_ghost,aux = state.num_eqn,state.num_aux,self.num_waves,self.num_ghost,state.aux
 
         #The following is a hack to work around an issue
@@ -549,8 +583,102 @@ class ClawSolver2D(ClawSolver):
             if state.num_aux > 0:
                 state.set_aux_from_auxbc(self.num_ghost,self.auxbc)
 
+        elif(self.kernel_language == 'Python'):
+            state = solution.states[0]
+
+            self._apply_bcs(state)
+
+            #Right now only Godunov-dimensional-splitting is implemented.
+            cfl_x = self._sweep_python(state,0)
+            cfl_y = self._sweep_python(state,1)
+            cfl = max(cfl_x,cfl_y)
+
+            self.cfl.update_global_max(cfl)
+            state.set_q_from_qbc(self.num_ghost,self.qbc)
+            if state.num_aux > 0:
+                state.set_aux_from_auxbc(self.num_ghost,self.auxbc)
+
+        else: raise Exception("Unrecognized kernel_language; choose 'Fortran' or 'Python'")
+
+    def _sweep_python(self,state,idir):
+        r"""
+        Take one vectorized wave-propagation sweep in direction *idir*
+        (0 for x, 1 for y) on self.qbc, in place.
+
+        This is the 1D Python algorithm of :class:`ClawSolver1D` applied to
+        all rows at once: the arrays are viewed with the sweep direction as
+        the last axis, and the waves of all rows are flattened into a single
+        row for :func:`pyclaw.limiters.tvd.limit`.  Only the interfaces at
+        the ends of each row see neighbours from another row, and these only
+        affect ghost cells.
+
+        :Output:
+         - (float) - Maximum CFL number of the sweep
+        """
+        import numpy as np
+
+        num_eqn, num_ghost = state.num_eqn, self.num_ghost
+        mx = state.grid.num_cells[idir]
+        dtdx = self.dt/state.grid.delta[idir]
+
+        # Views with the sweep direction as the last axis
+        if idir == 0:
+            q = np.swapaxes(self.qbc,1,2)
+            aux = np.swapaxes(self.auxbc,1,2)
         else:
-            raise NotImplementedError("No python implementation for step_hyperbolic in 2D.")
+            q = self.qbc
+            aux = self.auxbc
+
+        if state.num_aux > 0:
+            aux_l = aux[...,:-1]
+            aux_r = aux[...,1:]
+        else:
+            aux_l = None
+            aux_r = None
+        if getattr(self.rp,'uses_work',False):
+            wave,s,amdq,apdq = self.rp(q[...,:-1],q[...,1:],aux_l,aux_r,
+                                       state.problem_data,idir,
+                                       work=self._rp_work[idir])
+        else:
+            wave,s,amdq,apdq = self.rp(q[...,:-1],q[...,1:],aux_l,aux_r,
+                                       state.problem_data,idir)
+
+        # Same update limits as in 1D
+        LL = num_ghost - 1
+        UL = num_ghost + mx + 1
+
+        # Godunov update
+        q[...,LL:UL] -= dtdx*apdq[...,LL-1:UL-1]
+        q[...,LL-1:UL-1] -= dtdx*amdq[...,LL-1:UL-1]
+
+        # Maximum wave speed
+        cfl = dtdx*np.max(np.abs(s[...,LL-1:UL-1]))
+
+        if self.order == 2:
+            limiter = np.array(self._mthlim,ndmin=1)
+            if (limiter > 0).any():
+                shape = wave.shape
+                dtdx_flat = self._dtdx[idir]
+                dtdx_flat.fill(dtdx)
+                wave = tvd.limit(num_eqn,
+                                 wave.reshape(num_eqn,self.num_waves,-1),
+                                 s.reshape(self.num_waves,-1),
+                                 limiter,dtdx_flat).reshape(shape)
+
+            # Correction fluxes for the second order q_{xx} terms
+            f = self._fcorr[idir]
+            sl = s[...,LL-1:UL-1]
+            om = 1.0 - np.abs(sl)*dtdx
+            if self.fwave:
+                coef = 0.5*np.sign(sl)*om
+            else:
+                coef = 0.5*np.abs(sl)*om
+            np.einsum('w...,mw...->m...',coef,wave[...,LL-1:UL-1],
+                      out=f[...,LL:UL])
+
+            q[...,LL:UL-1] -= dtdx*(f[...,LL+1:UL] - f[...,LL:UL-1])
+
+        return cfl
 
 # ============================================================================
 #  ClawPack 3d Solver Class
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Ensemble runs of a pyclaw simulation over parameter sweeps.
+
+An :class:`Ensemble` takes a base :class:`~pyclaw.controller.Controller`
+and a set of parameter sweeps, e.g. friction coefficients, inflow
+hydrographs or dam breach times, and runs one scenario per parameter
+combination on a pool of processes.  Instead of keeping frames in memory,
+each scenario streams running statistics of the flow (maximum depth,
+maximum speed and first arrival time in every cell) which are written to
+its own output directory as soon as it finishes, along with one row of
+scalar results in a summary table.
+
+:Examples:
+
+    >>> from pyclaw.ensemble import Ensemble
+    >>> ens = Ensemble(claw, {'manning': [0.025, 0.035],
+    ...                       'breach_time': [0., 600.]},
+    ...                outdir='_ensemble')
+    >>> summary = ens.run()                             # doctest: +SKIP
+
+By default each parameter is stored in ``state.problem_data``; pass
+*set_parameters* to apply parameters that need more work, such as
+rebuilding an initial condition or an inflow boundary condition.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import csv
+import copy
+import json
+import pickle
+import itertools
+import logging
+
+import numpy as np
+
+from .util import map_processes
+
+logger = logging.getLogger('pyclaw.controller')
+
+
+class ScenarioStatistics(object):
+    r"""
+    Running statistics of a shallow water solution, updated in place.
+
+    :Input:
+     - *state* - (:class:`~pyclaw.state.State`) State of the scenario, only
+       used for its shape and grid
+     - *depth_index* - (int) Component of q holding the depth,
+       ``default = 0``
+     - *momentum_index* - (list of int) Components of q holding the
+       momenta, ``default = [1,2]`` (only the first one is used in 1D)
+     - *dry_tolerance* - (float) Depth below which the speed is zero,
+       ``default = 1e-3``
+     - *arrival_depth* - (float) Depth at which the flood is considered to
+       have arrived in a cell, ``default = 0.01``
+
+    .. attribute:: h_max
+
+        (ndarray) Maximum depth in every cell
+
+    .. attribute:: speed_max
+
+        (ndarray) Maximum speed in every cell
+
+    .. attribute:: arrival_time
+
+        (ndarray) First time the depth exceeded *arrival_depth*, NaN if it
+        never did
+    """
+
+    def __init__(self, state, depth_index=0, momentum_index=(1,2),
+                 dry_tolerance=1.e-3, arrival_depth=0.01):
+        self.depth_index = depth_index
+        self.momentum_index = list(momentum_index)[:state.num_dim]
+        self.dry_tolerance = dry_tolerance
+        self.arrival_depth = arrival_depth
+
+        shape = state.q.shape[1:]
+        self.h_max = np.zeros(shape)
+        self.speed_max = np.zeros(shape)
+        self.arrival_time = np.empty(shape)
+        self.arrival_time.fill(np.nan)
+        self._speed = np.empty(shape)
+        self._work = np.empty(shape)
+        self.cell_volume = np.prod(state.grid.delta)
+        self.num_updates = 0
+
+    def update(self, state):
+        r"""Fold the current *state* into the running statistics."""
+        h = state.q[self.depth_index]
+        np.maximum(self.h_max, h, out=self.h_max)
+
+        speed = self._speed
+        work = self._work
+        speed.fill(0.)
+        for m in self.momentum_index:
+            np.square(state.q[m], out=work)
+            speed += work
+        np.sqrt(speed, out=speed)
+        wet = h > self.dry_tolerance
+        np.divide(speed, h, out=speed, where=wet)
+        speed[~wet] = 0.
+        np.maximum(self.speed_max, speed, out=self.speed_max)
+
+        arrived = (h > self.arrival_depth) & np.isnan(self.arrival_time)
+        self.arrival_time[arrived] = state.t
+        self.num_updates += 1
+
+    def summary(self):
+        r"""
+        Return a dictionary of scalar statistics: the overall maximum depth
+        and speed, the flooded area (or length in 1D), and the first and
+        last arrival times over all flooded cells.
+        """
+        arrived = ~np.isnan(self.arrival_time)
+        summary = {'h_max': float(self.h_max.max()),
+                   'speed_max': float(self.speed_max.max()),
+                   'flooded_area': float(arrived.sum()*self.cell_volume),
+                   'first_arrival': np.nan, 'last_arrival': np.nan}
+        if arrived.any():
+            summary['first_arrival'] = float(self.arrival_time[arrived].min())
+            summary['last_arrival'] = float(self.arrival_time[arrived].max())
+        return summary
+
+    def write(self, path):
+        r"""Write the statistics arrays to the npz file *path*."""
+        np.savez(path, h_max=self.h_max, speed_max=self.speed_max,
+                 arrival_time=self.arrival_time)
+
+
+def default_set_parameters(claw, **parameters):
+    r"""
+    Default way of applying the parameters of a scenario: store each of
+    them in ``claw.solution.state.problem_data``.
+    """
+    for state in claw.solution.states:
+        state.problem_data.update(parameters)
+
+
+# Set in every worker process by _init_worker
+_worker = {}
+
+def _init_worker(base, set_parameters, statistics_options):
+    _worker['base'] = base
+    _worker['set_parameters'] = set_parameters
+    _worker['statistics_options'] = statistics_options
+
+
+def _run_scenario(args):
+    r"""
+    Process pool entry point: run one scenario and write its statistics.
+    Returns ``(index, parameters, summary)``, with ``summary['error']`` set
+    if the run failed.
+    """
+    index, parameters, scenario_dir = args
+    base = _worker['base']
+    if callable(base):
+        claw = base()
+    else:
+        claw = pickle.loads(base)
+    claw.keep_copy = False
+    claw.outdir = scenario_dir
+
+    if not os.path.isdir(scenario_dir):
+        os.makedirs(scenario_dir)
+    statistics = None
+    try:
+        # A bad parameter set fails this scenario, not the ensemble
+        _worker['set_parameters'](claw, **parameters)
+        statistics = ScenarioStatistics(claw.solution.state,
+                                        **_worker['statistics_options'])
+
+        # Sample every time step through the before_step hook
+        user_before_step = claw.solver.before_step
+        def before_step(solver, state):
+            if user_before_step is not None:
+                user_before_step(solver, state)
+            statistics.update(state)
+        claw.solver.before_step = before_step
+
+        status = claw.run()
+        statistics.update(claw.solution.state)
+        summary = statistics.summary()
+        summary['t_final'] = float(claw.solution.t)
+        summary['num_steps'] = int(status.get('numsteps', 0)) if status else 0
+    except Exception as e:
+        summary = {'error': str(e)}
+    if statistics is not None:
+        statistics.write(os.path.join(scenario_dir, 'statistics.npz'))
+    with open(os.path.join(scenario_dir, 'parameters.json'), 'w') as f:
+        json.dump(parameters, f, indent=2, default=str)
+    return index, parameters, summary
+
+
+class Ensemble(object):
+    r"""
+    Run a pyclaw simulation for many parameter combinations.
+
+    :Input:
+     - *base* - (:class:`~pyclaw.controller.Controller` or function) Base
+       simulation.  A Controller is copied for every scenario; a function
+       is called with no arguments and must return a new Controller, which
+       is useful if the solver holds objects that cannot be pickled.
+     - *sweeps* - (dict or list of dict) Either a dictionary mapping each
+       parameter name to a list of values, in which case every combination
+       is run, or an explicit list of parameter dictionaries.
+     - *set_parameters* - (function) ``set_parameters(claw, **parameters)``
+       applies a scenario's parameters to its Controller, ``default =``
+       :func:`default_set_parameters`.  Must be picklable, i.e. defined at
+       module level.
+     - *outdir* - (string) Directory for the per-scenario output and the
+       summary, ``default = '_ensemble'``
+     - *num_procs* - (int) Number of worker processes, see
+       :func:`pyclaw.util.map_processes`.  ``default = None``
+     - *statistics_options* - (dict) Keyword arguments for
+       :class:`ScenarioStatistics`, e.g. *dry_tolerance* or
+       *arrival_depth*.
+
+    Scenario ``n`` writes ``statistics.npz`` and ``parameters.json`` to
+    ``outdir/scenario_nnnn``, as well as any frame output if the base
+    Controller has an *output_format*.  Rows of ``outdir/summary.csv`` are
+    appended as scenarios finish.
+    """
+
+    def __init__(self, base, sweeps, set_parameters=None, outdir='_ensemble',
+                 num_procs=None, statistics_options=None):
+        self.base = base
+        self.sweeps = sweeps
+        if set_parameters is None:
+            set_parameters = default_set_parameters
+        self.set_parameters = set_parameters
+        self.outdir = outdir
+        self.num_procs = num_procs
+        if statistics_options is None:
+            statistics_options = {}
+        self.statistics_options = statistics_options
+        self.summary = []
+        r"""(list) - ``(parameters, summary)`` for every finished scenario,
+        in scenario order"""
+
+    @property
+    def scenarios(self):
+        r"""(list of dict) - Parameters of every scenario"""
+        if isinstance(self.sweeps, dict):
+            names = sorted(self.sweeps.keys())
+            return [dict(zip(names, values)) for values in
+                    itertools.product(*[self.sweeps[name] for name in names])]
+        return [dict(parameters) for parameters in self.sweeps]
+
+    def scenario_dir(self, index):
+        r"""Output directory of scenario *index*."""
+        return os.path.join(self.outdir, 'scenario_%04i' % index)
+
+    def run(self):
+        r"""
+        Run all scenarios and return the list of ``(parameters, summary)``
+        tuples, also available as :attr:`summary`.
+        """
+        scenarios = self.scenarios
+        if not os.path.isdir(self.outdir):
+            os.makedirs(self.outdir)
+
+        if callable(self.base):
+            base = self.base
+        else:
+            base = copy.copy(self.base)
+            base.frames = []
+            base = pickle.dumps(base)
+        initargs = (base, self.set_parameters, self.statistics_options)
+        jobs = [(n, parameters, self.scenario_dir(n))
+                for n, parameters in enumerate(scenarios)]
+
+        names = sorted(set(itertools.chain(*scenarios)))
+        fields = ['scenario'] + names + ['h_max', 'speed_max', 'flooded_area',
+                  'first_arrival', 'last_arrival', 't_final', 'num_steps',
+                  'error']
+        results = [None]*len(jobs)
+        with open(os.path.join(self.outdir, 'summary.csv'), 'w') as f:
+            writer = csv.DictWriter(f, fields, restval='')
+            writer.writeheader()
+
+            def record(index, parameters, summary):
+                results[index] = (parameters, summary)
+                row = {'scenario': index}
+                row.update(parameters)
+                row.update(summary)
+                writer.writerow(row)
+                f.flush()
+                if 'error' in summary:
+                    logger.warning("Scenario %s failed: %s"
+                                   % (index, summary['error']))
+                else:
+                    logger.info("Scenario %s done" % index)
+
+            for result in map_processes(_run_scenario, jobs, self.num_procs,
+                                        initializer=_init_worker,
+                                        initargs=initargs, ordered=False):
+                record(*result)
+
+        self.summary = results
+        return results
@@ -18,6 +18,8 @@ try:
     import h5py
     from . import hdf5
     __all__ += ['hdf5.read', 'hdf5.write']
+    from . import archive
+    __all__ += ['archive.read', 'archive.consolidate']
 except ImportError:
     logger.debug("No hdf5 support found.")
 
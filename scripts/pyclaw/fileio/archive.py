@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Routines for consolidating the output of a whole run into one HDF5 archive
+and reading frames back from it.
+
+An output directory holds a fort.t, fort.q (and possibly fort.a or fort.b)
+file per frame; with thousands of frames on a shared file system, opening and
+parsing them all is slow.  :func:`consolidate` reads every frame once and
+writes them to a single file, each frame in the packed layout of
+:mod:`pyclaw.fileio.hdf5`, together with a global index of the time of every
+frame and the level and bounding box of every patch::
+
+    from pyclaw.fileio import archive
+    archive.consolidate('_output', file_format='forestclaw')   # _output.hdf
+    sol = Solution(10, path='_output.hdf', file_format='archive',
+                   bbox=[x1,x2,y1,y2], levels=[4,5])
+
+or from the command line::
+
+    python -m pyclaw.fileio.archive _output --format forestclaw
+
+Archive layout:
+
+ - ``frames/NNNN`` - one group per frame in the packed hdf5 layout
+ - ``index/frames`` - frame number, time and number of patches of every
+   frame, and the first row of its patches in ``index/patches``
+ - ``index/patches`` - frame, patch index, level, block number, mpi rank,
+   lower and upper corner of every patch of every frame
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import logging
+
+import numpy as np
+import sys
+sys.path.append('../../../scripts')
+import pyclaw
+from . import hdf5
+from .ascii import output_frames
+
+import h5py
+
+logger = logging.getLogger('pyclaw.fileio')
+
+
+def archive_path(path):
+    r"""
+    Return the archive file for *path*, which is either the archive itself
+    or the output directory it was made from (``_output`` -> ``_output.hdf``).
+    """
+    if os.path.isfile(path):
+        return path
+    return os.path.normpath(path) + '.hdf'
+
+
+def consolidate(outdir='_output',archive=None,file_format='ascii',
+                file_prefix='fort',frames=None,read_aux=True,options={}):
+    r"""
+    Write all frames in *outdir* to a single archive.
+
+    :Input:
+     - *outdir* - (string) Output directory of the run
+     - *archive* - (string) Archive file, ``default = outdir + '.hdf'``
+     - *file_format* - (string) Format of the frames, if it is not recorded
+       in the fort.t files.  ``default = 'ascii'``
+     - *file_prefix* - (string) Prefix of the frame files
+     - *frames* - (list) Frames to archive, all of them by default
+     - *read_aux* - (bool) Also archive aux arrays, for the frames that
+       have them
+     - *options* - (dict) Options for the packed datasets, see
+       :func:`pyclaw.fileio.hdf5.write`
+
+    :Output:
+     - (string) Path to the archive
+    """
+    if archive is None:
+        archive = os.path.normpath(outdir) + '.hdf'
+    if frames is None:
+        frames = output_frames(outdir,file_prefix)
+
+    options = dict(options)
+    chunk_cells = options.pop('chunk_cells',16384)
+    options.pop('layout',None)
+    if 'compression' not in options:
+        options.update(compression='gzip',compression_opts=4,shuffle=True)
+    options.setdefault('chunks',None)
+
+    frame_rows = []
+    patch_rows = []
+    with h5py.File(archive,'w') as f:
+        f.attrs['layout'] = 'archive'
+        f.attrs['source'] = os.path.abspath(outdir)
+        group = f.create_group('frames')
+        for frame in frames:
+            solution = pyclaw.Solution(frame,path=outdir,
+                                       file_format=file_format,
+                                       file_prefix=file_prefix,
+                                       read_aux=read_aux)
+            has_aux = read_aux and solution.states[0].aux is not None
+            frame_group = group.create_group(str(frame).zfill(4))
+            hdf5._write_packed(frame_group,solution,has_aux,False,
+                               chunk_cells,dict(options))
+
+            table = frame_group['patches'][:]
+            upper = table['lower'] + table['delta']*table['num_cells']
+            frame_rows.append((frame,solution.t,len(table),len(patch_rows)))
+            for n in range(len(table)):
+                patch_rows.append((frame,table['patch_index'][n],
+                                   table['level'][n],table['block_number'][n],
+                                   table['mpi_rank'][n],table['lower'][n],
+                                   upper[n]))
+            logger.info("Archived frame %s" % frame)
+
+        num_dim = len(patch_rows[0][5]) if patch_rows else 1
+        index = f.create_group('index')
+        index.create_dataset('frames',data=np.array(frame_rows,
+                dtype=[('frame',np.int64),('t',np.float64),
+                       ('num_patches',np.int64),('first',np.int64)]))
+        index.create_dataset('patches',data=np.array(patch_rows,
+                dtype=[('frame',np.int64),('patch_index',np.int64),
+                       ('level',np.int64),('block_number',np.int64),
+                       ('mpi_rank',np.int64),
+                       ('lower',np.float64,(num_dim,)),
+                       ('upper',np.float64,(num_dim,))]),
+                **dict((k,v) for k,v in options.items() if k != 'chunks'))
+    return archive
+
+
+def read_index(path):
+    r"""
+    Return the frame and patch index tables of an archive as numpy record
+    arrays, see the module documentation for their fields.  *path* is the
+    archive or the output directory it was made from.
+    """
+    with h5py.File(archive_path(path),'r') as f:
+        return f['index/frames'][:], f['index/patches'][:]
+
+
+def read(solution,frame,path='./',file_prefix=None,read_aux=True,
+         options={}):
+    r"""
+    Read a frame from an archive into *solution*.
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) Solution object to
+       read the data into
+     - *frame* - (int) Frame number to be read in
+     - *path* - (string) The archive, or the output directory it was made
+       from
+     - *file_prefix* - Not used
+     - *read_aux* - (bool) Read the aux arrays if the frame has them
+     - *options* - (dict) *bbox* ``[x1,x2,y1,y2,...]`` and *levels* (list of
+       int) restrict reading to the patches that intersect the box and are
+       on one of the levels
+    """
+    with h5py.File(archive_path(path),'r') as f:
+        name = 'frames/%s' % str(frame).zfill(4)
+        if name not in f:
+            raise IOError("Frame %s is not in archive %s"
+                          % (frame,archive_path(path)))
+        hdf5._read_packed(f[name],solution,read_aux,
+                          options.get('bbox',None),options.get('levels',None))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Consolidate the frames of a run into one archive")
+    parser.add_argument('outdir',nargs='?',default='_output')
+    parser.add_argument('archive',nargs='?',default=None)
+    parser.add_argument('--format',default='ascii',
+                        help="format of frames without file_format in fort.t")
+    parser.add_argument('--prefix',default='fort')
+    parser.add_argument('--no-aux',action='store_true')
+    args = parser.parse_args()
+    print("Wrote %s" % consolidate(args.outdir,args.archive,args.format,
+                                    args.prefix,read_aux=not args.no_aux))
@@ -6,6 +6,7 @@ Routines for reading and writing an ascii output file
 
 from __future__ import absolute_import
 import os,sys
+import glob
 import logging
 import numpy as np
 import pickle
@@ -49,6 +50,8 @@ def write(solution, frame, path, file_prefix='fort', write_aux=False,
         f.write("%5i                  nstates\n" % len(solution.states))
         f.write("%5i                  num_aux\n" % solution.num_aux)
         f.write("%5i                  num_dim\n" % solution.domain.num_dim)
+        f.write("%5i                  num_ghost\n" % 0)
+        f.write("ascii                  file_format\n")
 
     # Write fort.qxxxx file
     file_name = 'fort.q%s' % str(frame).zfill(4)
@@ -147,7 +150,9 @@ def read(solution,frame,path='./',file_prefix='fort',read_aux=False,
      - *read_aux* (bool) Whether or not an auxiliary file will try to be read 
        in.  ``default = False``
      - *options* - (dict) Dictionary of optional arguments dependent on 
-       the format being read in.  ``default = {}``
+       the format being read in.  ``default = {}``.  Shards of a frame are
+       read in turn unless *num_procs* gives the number of processes to read
+       them on (all cores if None).
     """
 
     pickle_filename = os.path.join(path, '%s.pkl' % file_prefix) + str(frame).zfill(4)
@@ -173,31 +178,43 @@ def read(solution,frame,path='./',file_prefix='fort',read_aux=False,
 
     patches = []
 
-    # Read in values from fort.q file:
-    with open(q_fname,'r') as f:
-        # Loop through every patch setting the appropriate information
-        for m in range(nstates):
-            # Read header for this patch
-            patch = read_patch_header(f, num_dim)
-
-            # Construct state
-            state= pyclaw.state.State(patch,num_eqn,num_aux)
-            state.t = t
-            state.problem_data = problem_data
-            if mapc2p is not None:
-                # If no mapc2p the default identity map in grid will be used
-                state.grid.mapc2p = mapc2p
-
-            if num_aux > 0:
-                # Write NaNs for now to indicate this is uninitialized
-                state.aux[:] = np.nan
-
-            # Fill in q values
-            state.q = read_array(f, state, num_eqn)
-
-            # Add new patch to solution
-            solution.states.append(state)
-            patches.append(state.patch)
+    # Read in values from fort.q file, or from the shards written by each
+    # processor, in rank order:
+    q_files = shard_files(q_fname)
+    jobs = [(fname, num_dim, num_eqn, num_aux, nstates, read_patch_header)
+            for fname in q_files]
+    # A process pool only pays off for large frames, so only if asked for
+    num_procs = options.get('num_procs', 1)
+    if len(jobs) > 1 and num_procs != 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=num_procs) as executor:
+            shards = list(executor.map(_read_states, jobs))
+    else:
+        shards = []
+        for job in jobs:
+            shards.append(_read_states(job))
+            if sum(len(states) for states in shards) >= nstates:
+                break
+
+    states = [state for states in shards for state in states][:nstates]
+    if len(states) < nstates:
+        raise IOError('Found %s of %s patches in %s' % (len(states), nstates,
+                                                         ', '.join(q_files)))
+
+    for state in states:
+        state.t = t
+        state.problem_data = problem_data
+        if mapc2p is not None:
+            # If no mapc2p the default identity map in grid will be used
+            state.grid.mapc2p = mapc2p
+
+        if num_aux > 0:
+            # Write NaNs for now to indicate this is uninitialized
+            state.aux[:] = np.nan
+
+        # Add new patch to solution
+        solution.states.append(state)
+        patches.append(state.patch)
 
     solution.domain = pyclaw.geometry.Domain(patches)
 
@@ -240,6 +257,75 @@ def read(solution,frame,path='./',file_prefix='fort',read_aux=False,
                 state.aux = read_array(f, state, num_aux)
 
         
+def shard_files(fname):
+    r"""
+    Files holding the data of *fname*, e.g. ``fort.q0012``.
+
+    This is *fname* itself if it exists, otherwise the shards written by
+    each processor of a parallel run, ``fort.q0012.r00000``,
+    ``fort.q0012.r00001``, ... in rank order.  Patches appear in the shards
+    in the order they would have in a single file.
+    """
+    if os.path.exists(fname):
+        return [fname]
+    shards = []
+    for shard in glob.glob(fname + '.r*'):
+        rank = shard[len(fname)+2:]
+        if rank.isdigit():
+            shards.append((int(rank), shard))
+    if len(shards) == 0:
+        return [fname]
+    return [shard for rank, shard in sorted(shards)]
+
+
+def output_frames(outdir, file_prefix='fort', file_format=None):
+    r"""
+    Sorted frame numbers of the frames in *outdir*, those with a
+    ``fort.tXXXX`` file, or of the archive of *outdir* if *file_format* is
+    'archive'.
+    """
+    if file_format == 'archive':
+        from pyclaw.fileio import archive
+        return sorted(int(frame)
+                      for frame in archive.read_index(outdir)[0]['frame'])
+    frames = []
+    for fname in glob.glob(os.path.join(outdir, '%s.t*' % file_prefix)):
+        suffix = os.path.basename(fname)[len(file_prefix)+2:]
+        if suffix.isdigit():
+            frames.append(int(suffix))
+    return sorted(frames)
+
+
+def _read_states(args):
+    r"""
+    Read the patches of one q file, at most *max_states* of them, stopping
+    at the end of the file.  Also the process pool entry point for reading
+    shards in parallel.
+    """
+    fname, num_dim, num_eqn, num_aux, max_states, header_reader = args
+    states = []
+    with open(fname,'r') as f:
+        while len(states) < max_states:
+            # Stop at the end of the file
+            position = f.tell()
+            line = f.readline()
+            while line != '' and line.strip() == '':
+                position = f.tell()
+                line = f.readline()
+            if line == '':
+                break
+            f.seek(position)
+
+            # Read header for this patch
+            patch = header_reader(f, num_dim)
+
+            # Construct state and fill in q values
+            state = pyclaw.state.State(patch,num_eqn,num_aux)
+            state.q = read_array(f, state, num_eqn)
+            states.append(state)
+    return states
+
+
 def read_t(frame,path='./',file_prefix='fort'):
     r"""Read only the fort.t file and return the data.
 
@@ -297,6 +383,10 @@ def read_t(frame,path='./',file_prefix='fort'):
 
 def read_patch_header(f, num_dim):
     r"""Read header describing the next patch
+
+    Headers written by ForestClaw also give the ``block_number`` and
+    ``mpi_rank`` of the patch, after its level; they are stored as
+    attributes of the patch when present.
     
     :Input:
      - *f* - (file) Handle to open file
@@ -313,7 +403,13 @@ def read_patch_header(f, num_dim):
     lower = np.zeros((num_dim))
     patch_index = read_data_line(f, data_type=int)
     level       = read_data_line(f, data_type=int)
-    for i in range(num_dim):
+    forestclaw = {}
+    line = f.readline().split()
+    while line[1] in ('block_number', 'mpi_rank'):
+        forestclaw[line[1]] = int(line[0])
+        line = f.readline().split()
+    n[0] = int(line[0])
+    for i in range(1, num_dim):
         n[i] = read_data_line(f, data_type=int)
     for i in range(num_dim):
         lower[i] = read_data_line(f)
@@ -333,6 +429,8 @@ def read_patch_header(f, num_dim):
     # Add AMR attributes:
     patch.patch_index = patch_index
     patch.level = level
+    for name, value in forestclaw.items():
+        setattr(patch, name, value)
 
     return patch
 
@@ -8,10 +8,10 @@ writes these files is in AMRClaw, in Fortran).
 """
 
 from __future__ import absolute_import
+import io
 import os
 import logging
 
-from ..util import read_data_line
 import numpy as np
 import sys
 sys.path.append('../../../scripts')
@@ -46,7 +46,7 @@ def read(solution,frame,path='./',file_prefix='fort',read_aux=False,
      - *options* - (dict) Dictionary of optional arguments dependent on 
        the format being read in.  ``default = {}``
     """
-    from pyclaw.fileio.ascii import read_t
+    from pyclaw.fileio.ascii import read_t, shard_files, read_patch_header
     
     # Construct path names
     base_path = os.path.join(path,)
@@ -59,49 +59,47 @@ def read(solution,frame,path='./',file_prefix='fort',read_aux=False,
 
     patches = []
     
-    # Read in values from fort.b file:
+    # Read in values from fort.b file, or from the shards written by each
+    # processor (fort.bxxxx.rnnnnn), in rank order:
     file_format = options.get('format','binary64')
-    
-    with open(b_fname,'rb') as b_file:
-        if file_format in ['binary', 'binary64']:
-            qdata = np.fromfile(file=b_file, dtype=np.float64)
-        elif file_format == 'binary32':
-            qdata = np.fromfile(file=b_file, dtype=np.float32)
-        else:
-            msg = "Unrecognized file_format: %s" % file_format
-            logger.critical(msg)
-            raise Exception(msg)
+    if file_format in ['binary', 'binary64']:
+        dtype = np.float64
+    elif file_format == 'binary32':
+        dtype = np.float32
+    else:
+        msg = "Unrecognized file_format: %s" % file_format
+        logger.critical(msg)
+        raise Exception(msg)
+
+    q_files = shard_files(q_fname)
+    b_files = [b_fname + fname[len(q_fname):] for fname in q_files]
+    if len(b_files) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=options.get('num_procs')) as executor:
+            qdata = np.concatenate(list(executor.map(
+                lambda fname: np.fromfile(fname, dtype=dtype), b_files)))
+    else:
+        with open(b_fname,'rb') as b_file:
+            qdata = np.fromfile(file=b_file, dtype=dtype)
 
     i_start_patch = 0  # index into qdata for start of next patch
-    n     = np.zeros((num_dim),dtype=int)
-    lower = np.zeros((num_dim))
-    d     = np.zeros((num_dim))
-    # Since we do not have dimension names here, we will construct
-    # patches with dimensions named x,y,z
-    names = ['x','y','z']
-
-    with open(q_fname,'r') as f:
+
+    if len(q_files) > 1:
+        # The patch headers of the shards, one after the other
+        headers = []
+        for fname in q_files:
+            with open(fname,'r') as f:
+                headers.append(f.read())
+        q_file = io.StringIO(u''.join(headers))
+    else:
+        q_file = open(q_fname,'r')
+
+    with q_file as f:
         # Loop through patches, setting the appropriate information
         for m in range(nstates):
         
             # Read in header for this patch
-            patch_index = read_data_line(f,data_type=int)
-            level       = read_data_line(f,data_type=int)
-            for i in range(num_dim):
-                n[i] = read_data_line(f,data_type=int)
-            for i in range(num_dim):
-                lower[i] = read_data_line(f)
-            for i in range(num_dim):
-                d[i] = read_data_line(f)
-
-            blank = f.readline()
-
-            # Construct the patch
-            dimensions = []
-            for i in range(num_dim):
-                dimensions.append(
-                    pyclaw.geometry.Dimension(lower[i],lower[i] + n[i]*d[i],n[i],name=names[i]))
-            patch = pyclaw.geometry.Patch(dimensions)
+            patch = read_patch_header(f, num_dim)
             state = pyclaw.state.State(patch,num_eqn,num_aux)
             state.t = t
 
@@ -145,10 +143,6 @@ def read(solution,frame,path='./',file_prefix='fort',read_aux=False,
 
             i_start_patch = i_end_patch  # prepare for next patch
 
-            # Add AMR attributes:
-            patch.patch_index = patch_index
-            patch.level = level
-
             # Add new patch to solution
             solution.states.append(state)
             patches.append(state.patch)
@@ -13,13 +13,27 @@ h5py as it is a minimal wrapper to the HDF5 library.
 
 To install either, you must also install the hdf5 library from the website:
     http://www.hdfgroup.org/HDF5/release/obtain5.html
+
+Two layouts are supported.  The default writes one group per patch, which is
+fine for a few patches but dominated by HDF5 metadata for AMR frames with
+thousands of them.  With ``options={'layout':'packed'}`` the interiors of all
+patches are concatenated into a single chunked, compressed dataset per array,
+with a table giving the level, geometry and offset of each patch, so that a
+subset of the patches can be read without touching the others::
+
+    write(solution, frame, path, options={'layout':'packed'})
+    read(solution, frame, path, options={'bbox':[x1,x2,y1,y2], 'levels':[3,4]})
+
+:func:`read` recognizes either layout.
 """
 
 from __future__ import absolute_import
 import os
 import logging
 
-from clawpack import pyclaw
+import sys
+sys.path.append('../../../scripts')
+import pyclaw
 import six
 import numpy as np
 
@@ -93,7 +107,20 @@ def write(solution,frame,path,file_prefix='claw',write_aux=False,
     | fletcher32      | (True/False) Enable Fletcher32 error detection; may  |
     |                 | be used with or without compression.                 |
     +-----------------+------------------------------------------------------+
+    | layout          | ("patch" or "packed") One group per patch, or all    |
+    |                 | patches packed in one dataset per array.  The packed |
+    |                 | layout defaults to gzip level 4 with shuffle and     |
+    |                 | chunks of *chunk_cells* cells.  ``default = patch``  |
+    +-----------------+------------------------------------------------------+
+    | chunk_cells     | (int) Number of cells per chunk in the packed layout.|
+    |                 | ``default = 16384``                                  |
+    +-----------------+------------------------------------------------------+
     """
+    options = dict(options)
+    layout = options.pop('layout','patch')
+    chunk_cells = options.pop('chunk_cells',16384)
+    if layout == 'packed' and 'compression' not in options:
+        options.update(compression='gzip',compression_opts=4,shuffle=True)
     option_defaults = {'compression':None,'compression_opts':None,
                        'chunks':None,'shuffle':False,'fletcher32':False}
     for (k,v) in six.iteritems(option_defaults):
@@ -102,7 +129,11 @@ def write(solution,frame,path,file_prefix='claw',write_aux=False,
     filename = os.path.join(path,'%s%s.hdf' % 
                                 (file_prefix,str(frame).zfill(4)))
     
-    if use_h5py:
+    if use_h5py and layout == 'packed':
+        with h5py.File(filename,'w') as f:
+            _write_packed(f,solution,write_aux,write_p,chunk_cells,options)
+
+    elif use_h5py:
         with h5py.File(filename,'w') as f:
         
             # For each patch, write out attributes
@@ -162,7 +193,10 @@ def read(solution,frame,path='./',file_prefix='claw',read_aux=True,
      - *file_prefix* - (string) Prefix for the file name.  ``default = 'claw'``
      - *write_aux* - (bool) Boolean controlling whether the associated 
        auxiliary array should be written out.  ``default = False``     
-     - *options* - (dict) Optional argument dictionary, not used for reading.
+     - *options* - (dict) Optional argument dictionary.  For files written
+       with the packed layout, *bbox* ``[x1,x2,y1,y2,...]`` and *levels*
+       (list of int) restrict reading to the patches that intersect the box
+       and are on one of the levels.  Ignored for the patch layout.
     """
     filename = os.path.join(path,'%s%s.hdf' % 
                                 (file_prefix,str(frame).zfill(4)))
@@ -170,6 +204,11 @@ def read(solution,frame,path='./',file_prefix='claw',read_aux=True,
 
     if use_h5py:
         with h5py.File(filename,'r') as f:
+
+            if f.attrs.get('layout',None) == 'packed':
+                _read_packed(f,solution,read_aux,options.get('bbox',None),
+                             options.get('levels',None))
+                return
         
             for patch in six.itervalues(f):
                 # Construct each dimension
@@ -216,3 +255,170 @@ def read(solution,frame,path='./',file_prefix='claw',read_aux=True,
         err_msg = "No hdf5 python modules available."
         logging.critical(err_msg)
         raise Exception(err_msg)
+
+
+def _patch_table_dtype(num_dim):
+    return np.dtype([('patch_index',np.int64),('level',np.int64),
+                     ('block_number',np.int64),('mpi_rank',np.int64),
+                     ('lower',np.float64,(num_dim,)),
+                     ('delta',np.float64,(num_dim,)),
+                     ('num_cells',np.int64,(num_dim,)),
+                     ('offset',np.int64)])
+
+
+def _write_packed(f,solution,write_aux,write_p,chunk_cells,options):
+    r"""
+    Write all patches of *solution* into the open h5py file *f*.
+
+    Each array is stored as one dataset of shape ``(num_eqn, total_cells)``
+    holding the interior of every patch, flattened in Fortran order, one
+    patch after the other.  The ``patches`` dataset has one row per patch
+    with its index, level, lower corner, cell size, number of cells and
+    offset into the packed arrays, as well as the ForestClaw block number and
+    mpi rank (0 if the patches do not have them).
+    """
+    num_patches = len(solution.states)
+    num_dim = solution.states[0].patch.num_dim
+
+    table = np.zeros(num_patches,dtype=_patch_table_dtype(num_dim))
+    offset = 0
+    for n, state in enumerate(solution.states):
+        patch = state.patch
+        patch_index = getattr(patch,'patch_index',None)
+        level = getattr(patch,'level',None)
+        table['patch_index'][n] = n+1 if patch_index is None else patch_index
+        table['level'][n] = 1 if level is None else level
+        table['block_number'][n] = getattr(patch,'block_number',0)
+        table['mpi_rank'][n] = getattr(patch,'mpi_rank',0)
+        table['lower'][n] = patch.get_dim_attribute('lower')
+        table['delta'][n] = patch.get_dim_attribute('delta')
+        table['num_cells'][n] = patch.get_dim_attribute('num_cells')
+        table['offset'][n] = offset
+        offset += np.prod(table['num_cells'][n])
+    total_cells = offset
+
+    state = solution.states[0]
+    patch = state.patch
+
+    f.attrs['layout'] = 'packed'
+    f.attrs['t'] = state.t
+    f.attrs['num_eqn'] = state.num_eqn
+    f.attrs['num_aux'] = state.num_aux
+    f.attrs['num_dim'] = num_dim
+    f.attrs['num_cells'] = total_cells
+    f.attrs['dimensions'] = [name.encode('utf-8')
+                             for name in patch.get_dim_attribute('name')]
+    for dim in patch.dimensions:
+        if getattr(dim,'units',None) is not None:
+            f.attrs['%s.units' % dim.name] = dim.units
+    f.create_dataset('patches',data=table)
+
+    arrays = [('q',lambda state: state.p if write_p else state.q)]
+    if write_aux and state.num_aux > 0:
+        arrays.append(('aux',lambda state: state.aux))
+    for name, get_array in arrays:
+        num_fields = get_array(solution.states[0]).shape[0]
+        if options['chunks'] is None and total_cells > 0:
+            options['chunks'] = (num_fields,min(total_cells,chunk_cells))
+        data = np.empty((num_fields,total_cells))
+        for n, state in enumerate(solution.states):
+            i = table['offset'][n]
+            q = get_array(state)
+            data[:,i:i+q[0].size] = q.reshape((num_fields,-1),order='F')
+        f.create_dataset(name,data=data,**options)
+        options['chunks'] = None
+
+
+def select_patches(table,bbox=None,levels=None):
+    r"""
+    Return the indices of the rows of a packed patch *table* for the patches
+    intersecting *bbox* ``[x1,x2,y1,y2,...]`` and on one of *levels*.
+    """
+    keep = np.ones(len(table),dtype=bool)
+    if levels is not None:
+        keep &= np.isin(table['level'],levels)
+    if bbox is not None:
+        bbox = np.reshape(np.asarray(bbox,dtype=float),(-1,2))
+        lower = table['lower']
+        upper = lower + table['delta']*table['num_cells']
+        for d in range(bbox.shape[0]):
+            keep &= (upper[:,d] >= bbox[d,0]) & (lower[:,d] <= bbox[d,1])
+    return np.flatnonzero(keep)
+
+
+def _read_ranges(dataset,starts,stops):
+    r"""
+    Read the columns ``starts[k]:stops[k]`` of *dataset* for all k in one
+    array, merging adjacent ranges and reading the covering span at once
+    when the ranges fill most of it.
+    """
+    if len(starts) == 0:
+        return np.empty((dataset.shape[0],0))
+    span = stops[-1] - starts[0]
+    total = np.sum(stops - starts)
+    if total >= span//2:
+        data = dataset[:,starts[0]:stops[-1]]
+        if total == span:
+            return data
+        index = np.concatenate([np.arange(a,b) for a,b in zip(starts,stops)])
+        return data[:,index - starts[0]]
+    # Merge ranges that follow each other in the file
+    new_run = np.ones(len(starts),dtype=bool)
+    new_run[1:] = starts[1:] != stops[:-1]
+    run_starts = starts[new_run]
+    run_stops = stops[np.append(np.flatnonzero(new_run)[1:]-1,len(stops)-1)]
+    return np.hstack([dataset[:,a:b] for a,b in zip(run_starts,run_stops)])
+
+
+def _read_packed(f,solution,read_aux,bbox=None,levels=None):
+    r"""Read the patches of a packed file selected by *bbox* and *levels*."""
+    table = f['patches'][:]
+    rows = select_patches(table,bbox,levels)
+    table = table[rows]
+    sizes = np.prod(table['num_cells'],axis=1)
+    starts = table['offset']
+    stops = starts + sizes
+
+    t = f.attrs['t']
+    num_eqn = int(f.attrs['num_eqn'])
+    num_aux = int(f.attrs['num_aux'])
+    dim_names = np.array(f.attrs['dimensions']).astype(str)
+    units = [f.attrs.get('%s.units' % name,None) for name in dim_names]
+
+    q = _read_ranges(f['q'],starts,stops)
+    aux = None
+    if read_aux and 'aux' in f:
+        aux = _read_ranges(f['aux'],starts,stops)
+
+    patches = []
+    i = 0
+    for n, row in enumerate(table):
+        dimensions = []
+        for d, name in enumerate(dim_names):
+            lower = row['lower'][d]
+            upper = lower + row['delta'][d]*row['num_cells'][d]
+            dim = pyclaw.geometry.Dimension(lower,upper,row['num_cells'][d],
+                                            name=name)
+            if units[d] is not None:
+                dim.units = units[d]
+            dimensions.append(dim)
+        patch = pyclaw.geometry.Patch(dimensions)
+        patch.patch_index = int(row['patch_index'])
+        patch.level = int(row['level'])
+        patch.block_number = int(row['block_number'])
+        patch.mpi_rank = int(row['mpi_rank'])
+
+        state = pyclaw.state.State(patch,num_eqn,num_aux)
+        state.t = t
+        state.q = q[:,i:i+sizes[n]].reshape(state.q.shape,order='F')
+        if aux is not None:
+            state.aux = aux[:,i:i+sizes[n]].reshape(state.aux.shape,order='F')
+        i += sizes[n]
+
+        solution.states.append(state)
+        patches.append(patch)
+
+    if len(patches) == 0:
+        logger.warning("No patches selected in %s" % f.file.filename)
+        return
+    solution.domain = pyclaw.geometry.Domain(patches)
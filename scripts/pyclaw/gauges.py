@@ -228,13 +228,17 @@ class GaugeSolution(object):
 
 
 
-    def write(self, path=None, format="%+.15e"):
+    def write(self, path=None, format="%+.15e", file_format='ascii'):
         r"""Write the data from this gauge to a file in `path`
 
         :Input:
          - *path* (path) Path to write the gauge file to.  Defaults to
            `path = os.getcwd()`.
          - *format* (str) Format string used for the field values.
+         - *file_format* (str) 'ascii' writes the data after the header in
+           the .txt file, 'binary64' or 'binary32' writes only the header
+           there and the data to a .bin file, as GeoClaw does.  Defaults to
+           'ascii'.
 
         :Output:
          None
@@ -246,11 +250,29 @@ class GaugeSolution(object):
         if not self.is_valid():
             raise ValueError("Gauge is not initialized properly.")
 
+        if file_format == 'binary':
+            file_format = 'binary64'
+        if file_format not in ['ascii', 'binary64', 'binary32']:
+            raise ValueError("Unknown gauge file format %s" % file_format)
+
         gauge_file_name = "gauge%s.txt" % str(self.id).zfill(5)
         with open(os.path.join(path, gauge_file_name), "w") as gauge_file:
 
             gauge_file.write("# gauge_id= %s location=( %s %s ) num_eqn= %s\n" %
                  (self.id, self.location[0], self.location[1], self.q.shape[0]))
+
+            if file_format != 'ascii':
+                gauge_file.write("# Stationary gauge\n")
+                gauge_file.write("# Columns: level time q(1 ... num_eqn)\n")
+                gauge_file.write("# file format %s\n" % file_format)
+                dtype = numpy.float64 if file_format == 'binary64' \
+                        else numpy.float32
+                # rows of the Fortran ordered array are level, t, q
+                data = numpy.vstack((self.level, self.t, self.q)).T
+                bin_file_name = "gauge%s.bin" % str(self.id).zfill(5)
+                data.astype(dtype).tofile(os.path.join(path, bin_file_name))
+                return
+
             gauge_file.write("# Columns: level time q(1 ... num_eqn)\n")
 
             # print(self.q.shape)
@@ -243,6 +243,14 @@ class Solution(object):
     
     def __copy__(self):
         return self.__class__(self)
+
+    def __getstate__(self):
+        from .util import modules_to_names
+        return modules_to_names(self.__dict__)
+
+    def __setstate__(self,state):
+        from .util import names_to_modules
+        self.__dict__.update(names_to_modules(state))
     
     
     def __deepcopy__(self,memo={}):
@@ -340,23 +348,32 @@ class Solution(object):
            defaults to whatever the format defaults to, e.g. fort for ascii
          - *options* - (dict) Dictionary of optional arguments dependent on 
            the format being read in.  ``default = {}``
+         - *bbox*, *levels* - Only read the patches intersecting the box
+           ``[x1,x2,y1,y2,...]`` and on one of the levels (list of int), for
+           formats that support it ('archive' and packed 'hdf5').
             
         :Output:
          - (bool) - True if read was successful, False otherwise
         """
 
-        from pyclaw.fileio.ascii import read_t
-        
-        [t,num_eqn,nstates,num_aux,num_dim,num_ghost,file_format2] = \
-             read_t(frame,path,file_prefix=file_prefix)
+        if file_format != 'archive':
+            # An archive has no fort.t files
+            from pyclaw.fileio.ascii import read_t
+
+            [t,num_eqn,nstates,num_aux,num_dim,num_ghost,file_format2] = \
+                 read_t(frame,path,file_prefix=file_prefix)
 
-        if file_format2 is not None:
-            # value was read in from file, use it:
-            file_format = file_format2
+            if file_format2 is not None:
+                # value was read in from file, use it:
+                file_format = file_format2
 
         read_func = self.get_read_func(file_format)
 
+        options = dict(options)
         options['format'] = file_format
+        for key in ('bbox','levels'):
+            if kargs.get(key,None) is not None:
+                options[key] = kargs[key]
 
         path = os.path.expandvars(os.path.expanduser(path))
         if file_prefix is None:
@@ -364,7 +381,8 @@ class Solution(object):
         else:
             read_func(self,frame,path,file_prefix=file_prefix,
                                     read_aux=read_aux,options=options)
-        logging.getLogger('pyclaw.fileio').info("Read in solution for time t=%s" % self.t)
+        if len(self.states) > 0:
+            logging.getLogger('pyclaw.fileio').info("Read in solution for time t=%s" % self.t)
 
 
     def get_read_func(self, file_format):
@@ -384,6 +402,9 @@ class Solution(object):
         elif file_format == 'forestclaw':
             import forestclaw.fileio.ascii
             return forestclaw.fileio.ascii.read
+        elif file_format == 'archive':
+            import pyclaw.fileio.archive
+            return pyclaw.fileio.archive.read
         else:
             raise ValueError("File format %s not supported." % file_format)
 
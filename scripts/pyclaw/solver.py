@@ -146,6 +146,14 @@ class Solver(object):
             raise TypeError("%s has no attribute %s" % (self.__class__,key))
         object.__setattr__(self,key,value)
 
+    def __getstate__(self):
+        from .util import modules_to_names
+        return modules_to_names(self.__dict__)
+
+    def __setstate__(self,state):
+        from .util import names_to_modules
+        self.__dict__.update(names_to_modules(state))
+
     @property
     def all_bcs(self):
         return self.bc_lower, self.bc_upper
@@ -178,6 +186,8 @@ class Solver(object):
         self.fmod = None
         self._is_set_up = False
         self._use_old_bc_sig = False
+        self._bc_plan = None
+        self._bc_plan_key = None
         self.accept_step = True
         self.before_step = None
 
@@ -229,7 +239,15 @@ class Solver(object):
         r""" Array to hold ghost cell values.  This is the one that gets passed
         to the Fortran code.  """
 
-        if riemann_solver is not None:
+        if riemann_solver is not None and \
+                hasattr(riemann_solver,'num_eqn') and \
+                hasattr(riemann_solver,'num_waves') and \
+                callable(riemann_solver):
+            # Pure Python Riemann solvers carry their own sizes
+            self.rp = riemann_solver
+            self.num_eqn   = riemann_solver.num_eqn
+            self.num_waves = riemann_solver.num_waves
+        elif riemann_solver is not None:
             self.rp = riemann_solver
             rp_name = riemann_solver.__name__.split('.')[-1]
             from clawpack import riemann
@@ -326,7 +344,10 @@ class Solver(object):
         import inspect
         for fun in (self.user_bc_lower,self.user_bc_upper,self.user_aux_bc_lower,self.user_aux_bc_upper):
             if fun is not None:
-                args = inspect.getargspec(fun)[0]
+                try:
+                    args = inspect.getfullargspec(fun)[0]
+                except AttributeError: # Python 2
+                    args = inspect.getargspec(fun)[0]
                 if len(args) == 5:
                     self.logger.warn("""The custom boundary condition
                                         function signature has been changed.
@@ -344,6 +365,7 @@ class Solver(object):
         auxbc_dim.insert(0,state.num_aux)
         self.auxbc = np.empty(auxbc_dim,order='F')
 
+        self._build_bc_plan(state)
         self._apply_bcs(state)
 
     def _apply_bcs(self, state):
@@ -359,163 +381,149 @@ class Solver(object):
         that this interface has been deprecated.  In Clawpack 6, we will
         drop backward compatibility.
 
-        For parallel runs, we check whether we're actually on a domain
-        boundary.  If we are just at an inter-patch boundary, nothing needs to
-        be done here.
+        The interior is copied by the state, as it may need communication
+        (petclaw).  The ghost cells are then filled by the boundary condition
+        plan built by :meth:`_build_bc_plan`, which only copies between
+        precomputed slices of qbc and auxbc, in place.  The plan is rebuilt
+        whenever the boundary conditions have been changed.
         """
-
-        import numpy as np
-
         self.qbc = state.get_qbc_from_q(self.num_ghost, self.qbc)
         if state.num_aux > 0:
             self.auxbc = state.get_auxbc_from_aux(self.num_ghost, self.auxbc)
 
-        grid = state.grid
+        if self._bc_plan is None or self._bc_plan_key != self._bc_key():
+            self._build_bc_plan(state)
 
-        for (idim, dim) in enumerate(grid.dimensions):
-            # Check if we are on a true boundary
-            if state.grid.on_lower_boundary[idim]:
+        for (kind, name, dst, src, reflect) in self._bc_plan:
+            if kind == BC.custom:
+                if not self._use_old_bc_sig:
+                    dst(state, src, state.t, self.qbc, self.auxbc,
+                        self.num_ghost)
+                elif name == 'q':
+                    dst(state, src, state.t, self.qbc, self.num_ghost)
+                else:
+                    dst(state, src, state.t, self.auxbc, self.num_ghost)
+            else:
+                array = self.qbc if name == 'q' else self.auxbc
+                array[dst] = array[src]
+                if reflect is not None:
+                    # Negate normal velocity
+                    array[reflect] *= -1
 
-                bcs = []
-                if state.num_aux > 0:
-                    bcs.append({'array'  : self.auxbc,
-                                'type'   : self.aux_bc_lower,
-                                'custom_fun' : self.user_aux_bc_lower,
-                                'variable' : 'aux'})
-                bcs.append({'array'  : self.qbc,
-                            'type'   : self.bc_lower,
-                            'custom_fun' : self.user_bc_lower,
-                            'variable' : 'q'})
-                for (i, bc) in enumerate(bcs):
-
-                    if bc['type'][idim] == BC.custom:
-                        if not self._use_old_bc_sig:
-                            bc['custom_fun'](state, dim, state.t, self.qbc,
-                                             self.auxbc, self.num_ghost)
-                        else:
-                            bc['custom_fun'](state, dim, state.t, bc['array'], self.num_ghost)
-
-                    elif bc['type'][idim] == BC.periodic \
-                            and not state.grid.on_upper_boundary[idim]:
-                        pass  # In a parallel run, # PETSc handles periodic BCs.
+    def _build_bc_plan(self, state):
+        r"""
+        Precompute the boundary condition plan used by :meth:`_apply_bcs`.
 
-                    else:
-                        self._bc_lower(bc['type'][idim], state, dim, state.t,
-                                        np.rollaxis(bc['array'], idim+1, 1), idim,
-                                        bc['variable'])
+        The plan is a list of ``(kind, name, dst, src, reflect)`` tuples, in
+        the order in which the boundaries must be filled (dimension by
+        dimension, lower then upper, aux before q).  For the built-in
+        boundary conditions *dst* and *src* are index tuples into the array
+        *name* ('q' or 'aux') and *reflect*, if not None, indexes the normal
+        velocity in the ghost cells.  For custom boundary conditions *dst* is
+        the user function and *src* the dimension.
 
-            if state.grid.on_upper_boundary[idim]:
+        For parallel runs, we check whether we're actually on a domain
+        boundary.  If we are just at an inter-patch boundary, nothing needs
+        to be done here.
+
+        The boundary conditions the plan was built for are recorded by
+        :meth:`_bc_key`.
+        """
+        grid = state.grid
+        plan = []
+        for (idim, dim) in enumerate(grid.dimensions):
+            for side in ('lower','upper'):
+                if side == 'lower':
+                    on_boundary = grid.on_lower_boundary[idim]
+                    on_other_boundary = grid.on_upper_boundary[idim]
+                else:
+                    on_boundary = grid.on_upper_boundary[idim]
+                    on_other_boundary = grid.on_lower_boundary[idim]
+                if not on_boundary:
+                    continue
 
                 bcs = []
                 if state.num_aux > 0:
-                    bcs.append({'array'  : self.auxbc,
-                                'type'   : self.aux_bc_upper,
-                                'custom_fun' : self.user_aux_bc_upper,
-                                'variable' : 'aux'})
-                bcs.append({'array'  : self.qbc,
-                            'type'   : self.bc_upper,
-                            'custom_fun' : self.user_bc_upper,
-                            'variable' : 'q'})
-                for (i, bc) in enumerate(bcs):
-
-                    if bc['type'][idim] == BC.custom:
-                        if not self._use_old_bc_sig:
-                            bc['custom_fun'](state, dim, state.t, self.qbc,
-                                             self.auxbc, self.num_ghost)
-                        else:
-                            bc['custom_fun'](state, dim, state.t, bc['array'], self.num_ghost)
-
-                    elif bc['type'][idim] == BC.periodic \
-                            and not state.grid.on_lower_boundary[idim]:
+                    bcs.append(('aux', getattr(self,'aux_bc_'+side),
+                                getattr(self,'user_aux_bc_'+side)))
+                bcs.append(('q', getattr(self,'bc_'+side),
+                            getattr(self,'user_bc_'+side)))
+
+                for (name, bc_type, custom_fun) in bcs:
+                    if bc_type[idim] == BC.custom:
+                        plan.append((BC.custom, name, custom_fun, dim, None))
+                    elif bc_type[idim] == BC.periodic \
+                            and not on_other_boundary:
                         pass  # In a parallel run, # PETSc handles periodic BCs.
-
                     else:
-                        self._bc_upper(bc['type'][idim], state, dim, state.t,
-                                        np.rollaxis(bc['array'], idim+1, 1), idim,
-                                        bc['variable'])
-
-    def _bc_lower(self, bc_type, state, dim, t, array, idim, name):
-        r"""
-        Apply lower boundary conditions to array.
-
-        Sets the lower coordinate's ghost cells of *array* depending on what
-        :attr:`bc_lower` is.  If :attr:`bc_lower` = 0 then the user
-        boundary condition specified by :attr:`user_bc_lower` is used.  Note
-        that in this case the function :attr:`user_bc_lower` belongs only to
-        this dimension but :attr:`user_bc_lower` could set all user boundary
-        conditions at once with the appropriate calling sequence.
+                        plan.append(self._bc_plan_entry(bc_type[idim], side,
+                                        grid.num_cells[idim], grid.num_dim,
+                                        idim, name))
 
-        :Input:
-         - *patch* - (:class:`Patch`) Patch that the dimension belongs to.
+        self._bc_plan = plan
+        self._bc_plan_key = self._bc_key()
 
-        :Input/Output:
-         - *array* - (ndarray(...,num_eqn)) Array with added ghost cells which
-           will be set in this routines.
+    def _bc_key(self):
+        r"""
+        Return the boundary condition types and custom functions, for
+        comparison with those the plan was built for.
         """
+        return (tuple(self.bc_lower), tuple(self.bc_upper),
+                tuple(self.aux_bc_lower), tuple(self.aux_bc_upper),
+                self.user_bc_lower, self.user_bc_upper,
+                self.user_aux_bc_lower, self.user_aux_bc_upper,
+                self.num_ghost, tuple(self.reflect_index))
 
-        if bc_type == BC.extrap:
-            for i in range(self.num_ghost):
-                array[:,i,...] = array[:,self.num_ghost,...]
-        elif bc_type == BC.periodic:
-            # This process owns the whole patch
-            array[:,:self.num_ghost,...] = array[:,-2*self.num_ghost:-self.num_ghost,...]
-        elif bc_type == BC.wall:
-            if name == 'q':
-                for i in range(self.num_ghost):
-                    array[:,i,...] = array[:,2*self.num_ghost-1-i,...]
-                    # Negate normal velocity
-                    array[self.reflect_index[idim],i,...] = \
-                        -array[self.reflect_index[idim],2*self.num_ghost-1-i,...]
-            else:
-                for i in range(self.num_ghost):
-                    array[:,i,...] = array[:,2*self.num_ghost-1-i,...]
-        else:
-            if bc_type is None:
-                raise Exception('Lower boundary condition not specified for either q or aux.')
-            else:
-                raise NotImplementedError("Boundary condition %s not implemented" % bc_type)
-
-    def _bc_upper(self, bc_type, state, dim, t, array, idim, name):
+    def _bc_plan_entry(self, bc_type, side, num_cells, num_dim, idim, name):
         r"""
-        Apply upper boundary conditions to array
-
-        Sets the upper coordinate's ghost cells of *array* depending on what
-        :attr:`bc_upper` is.  If :attr:`bc_upper` = 0 then the user
-        boundary condition specified by :attr:`user_bc_upper` is used.  Note
-        that in this case the function :attr:`user_bc_upper` belongs only to
-        this dimension but :attr:`user_bc_upper` could set all user boundary
-        conditions at once with the appropriate calling sequence.
-
-        :Input:
-         - *patch* - (:class:`Patch`) Patch that the dimension belongs to
+        Return the plan entry that fills the *side* ('lower' or 'upper')
+        ghost cells of dimension *idim* of the array *name* ('q' or 'aux')
+        for the boundary condition *bc_type*.
 
-        :Input/Output:
-         - *array* - (ndarray(...,num_eqn)) Array with added ghost cells which will
-           be set in this routines
+        Indices are absolute, computed for ``num_cells + 2*num_ghost`` cells
+        along dimension *idim*.
         """
-
-        if bc_type == BC.extrap:
-            for i in range(self.num_ghost):
-                array[:,-i-1,...] = array[:,-self.num_ghost-1,...]
-        elif bc_type == BC.periodic:
-            # This process owns the whole patch
-            array[:,-self.num_ghost:,...] = array[:,self.num_ghost:2*self.num_ghost,...]
-        elif bc_type == BC.wall:
-            if name == 'q':
-                for i in range(self.num_ghost):
-                    array[:,-i-1,...] = array[:,-2*self.num_ghost+i,...]
-                    #  Negate normal velocity
-                    array[self.reflect_index[idim],-i-1,...] = \
-                        -array[self.reflect_index[idim],-2*self.num_ghost+i,...]
+        num_ghost = self.num_ghost
+        n = num_cells + 2*num_ghost
+        if side == 'lower':
+            ghost = slice(0,num_ghost)
+            if bc_type == BC.extrap:
+                src = slice(num_ghost,num_ghost+1)
+            elif bc_type == BC.periodic:
+                # This process owns the whole patch
+                src = slice(n-2*num_ghost,n-num_ghost)
+            elif bc_type == BC.wall:
+                src = slice(2*num_ghost-1,num_ghost-1,-1)
+            elif bc_type is None:
+                raise Exception('Lower boundary condition not specified for either q or aux.')
             else:
-                for i in range(self.num_ghost):
-                    array[:,-i-1,...] = array[:,-2*self.num_ghost+i,...]
+                raise NotImplementedError("Boundary condition %s not implemented" % bc_type)
         else:
-            if bc_type is None:
+            ghost = slice(n-num_ghost,n)
+            if bc_type == BC.extrap:
+                src = slice(n-num_ghost-1,n-num_ghost)
+            elif bc_type == BC.periodic:
+                # This process owns the whole patch
+                src = slice(num_ghost,2*num_ghost)
+            elif bc_type == BC.wall:
+                src = slice(n-num_ghost-1,n-2*num_ghost-1,-1)
+            elif bc_type is None:
                 raise Exception('Upper boundary condition not specified for either q or aux.')
             else:
                 raise NotImplementedError("Boundary condition %s not implemented" % bc_type)
 
+        def index(component, along):
+            idx = [slice(None)]*(num_dim+1)
+            idx[0] = component
+            idx[idim+1] = along
+            return tuple(idx)
+
+        reflect = None
+        if bc_type == BC.wall and name == 'q':
+            reflect = index(self.reflect_index[idim], ghost)
+        return (bc_type, name, index(slice(None),ghost),
+                index(slice(None),src), reflect)
+
     # ========================================================================
     #  Evolution routines
     # ========================================================================
@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+import os
+import sys
+import shutil
+import numpy as np
+import pytest
+sys.path.append('../../../scripts')
+from pyclaw import Solution
+from amrclaw.adjoint import AdjointSnapshots
+from amrclaw.data import AdjointData
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+binary_dir = os.path.join(this_dir, 'test_data', 'advection_2d_binary')
+
+
+def make_adjoint_output(outdir):
+    # Frame 1 at adjoint time 1 is twice frame 0 at time 0
+    os.makedirs(outdir)
+    with open(os.path.join(binary_dir, 'fort.t0000')) as f:
+        t_lines = f.readlines()
+    for frame in range(2):
+        shutil.copy(os.path.join(binary_dir, 'fort.q0000'),
+                    os.path.join(outdir, 'fort.q%04d' % frame))
+        with open(os.path.join(outdir, 'fort.t%04d' % frame), 'w') as f:
+            f.write("%18.8e    time\n" % frame)
+            f.writelines(t_lines[1:])
+    q = np.fromfile(os.path.join(binary_dir, 'fort.b0000'), dtype=np.float64)
+    q.tofile(os.path.join(outdir, 'fort.b0000'))
+    (2*q).tofile(os.path.join(outdir, 'fort.b0001'))
+
+
+def test_innerproduct(tmpdir):
+    outdir = str(tmpdir.join('_adjoint'))
+    make_adjoint_output(outdir)
+    reference = Solution(0, path=binary_dir, file_format='binary')
+    adjoint = AdjointSnapshots(outdir, innerprod_index=1)
+    assert len(adjoint) == 2
+
+    for k in range(2):
+        snapshot = adjoint.snapshot(k)[0]
+        for state, ref in zip(snapshot.states, reference.states):
+            assert np.array_equal(state.q, (k + 1)*ref.q)
+
+    # Forward time 0.75 is adjoint time 0.25
+    assert adjoint.bracket(0.75) == (0, 1, 0.25)
+    assert adjoint.bracket(1.) == (0, 0, 0.)
+    assert adjoint.bracket(-1.) == (1, 1, 0.)
+    reference.t = 0.75
+    ip = adjoint.innerproduct(reference)
+    expected = adjoint.innerproduct(reference, t=1.)
+    for p, e, state in zip(ip, expected, reference.states):
+        assert p.shape == state.q.shape[1:]
+        assert np.allclose(p, 1.25*e)
+        assert np.all(p >= 0)
+
+    # On the coarsest patch, where no other patch covers a cell, the
+    # adjoint at t=1 is the snapshot itself
+    X, Y = reference.states[0].grid.p_centers
+    finest = adjoint.snapshot(0)[1].locate(X.ravel(), Y.ravel())
+    coarse = (finest == 0).reshape(X.shape)
+    assert coarse.any()
+    q = reference.states[0].q[0]
+    assert np.allclose(expected[0][coarse], q[coarse]**2)
+
+
+def test_set_adjoint_files(tmpdir):
+    outdir = str(tmpdir.join('_adjoint'))
+    make_adjoint_output(outdir)
+    adjointdata = AdjointData(use_adjoint=True)
+    adjointdata.adjoint_outdir = outdir
+    adjointdata.t2 = 0.5
+    adjointdata.set_adjoint_files()
+    assert adjointdata.adjoint_files == [os.path.join(outdir, 'fort.b0000')]
+
+    adjointdata.t2 = 1.
+    adjointdata.innerprod_index = 1
+    adjoint = adjointdata.read_adjoint_files()
+    assert adjointdata.numadjoints == 2
+    assert list(adjoint.times) == [0., 1.]
+
+    # A sharded snapshot cannot be named in adjoint.data, but is read
+    for ext in 'qb':
+        shutil.move(os.path.join(outdir, 'fort.%s0001' % ext),
+                    os.path.join(outdir, 'fort.%s0001.r00000' % ext))
+    with pytest.raises(IOError):
+        adjointdata.set_adjoint_files()
+    assert list(adjointdata.read_adjoint_files().times) == [0., 1.]
+
+
+def test_t2_keeps_t_final(tmpdir):
+    # Snapshots at adjoint times 0 and 1, the second left out by t2
+    outdir = str(tmpdir.join('_adjoint'))
+    make_adjoint_output(outdir)
+    adjoint = AdjointSnapshots(outdir, t2=0.5, innerprod_index=1)
+    assert len(adjoint) == 1
+    assert adjoint.t_final == 1.
+
+    # Forward time 1 is adjoint time 0, the snapshot kept
+    reference = Solution(0, path=binary_dir, file_format='binary')
+    assert adjoint.bracket(1.) == (0, 0, 0.)
+    ip = adjoint.innerproduct(reference, t=1.)
+    full = AdjointSnapshots(outdir, innerprod_index=1).innerproduct(
+        reference, t=1.)
+    for p, e in zip(ip, full):
+        assert np.allclose(p, e)
+
+    adjointdata = AdjointData(use_adjoint=True)
+    adjointdata.adjoint_outdir = outdir
+    adjointdata.t2 = 0.5
+    assert adjointdata.read_adjoint_files().t_final == 1.
@@ -0,0 +1,64 @@
+from __future__ import absolute_import
+import os
+import sys
+import glob
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+sys.path.append('../../../scripts')
+from visclaw import animation_tools
+
+
+def plotfun(frameno):
+    fig = plt.figure(figsize=(2., 1.5), dpi=50)
+    plt.plot([0, 1], [0, frameno])
+    return fig
+
+
+def written_frames(file_name):
+    r"""Frames written by VideoWriter to the directory of *file_name*."""
+    frame_dir = os.path.splitext(file_name)[0]
+    fnames = sorted(glob.glob(os.path.join(frame_dir, 'frame*.png')))
+    return [plt.imread(fname) for fname in fnames]
+
+
+def test_stream_anim_keeps_backend(tmpdir, monkeypatch):
+    # Without ffmpeg the frames are written as png files
+    monkeypatch.setitem(matplotlib.rcParams, 'animation.ffmpeg_path',
+                        'no-such-ffmpeg')
+    plt.switch_backend('pdf')
+    try:
+        file_name = str(tmpdir.join('anim.mp4'))
+        assert animation_tools.stream_anim(plotfun, range(3), file_name,
+                                           num_procs=1) == 3
+        assert matplotlib.get_backend() == 'pdf'
+    finally:
+        plt.switch_backend('Agg')
+    frames = written_frames(file_name)
+    assert len(frames) == 3
+    assert frames[0].shape[:2] == (75, 100)
+    assert not np.array_equal(frames[0], frames[2])
+
+
+def test_mp4_from_plotdir_figsize(tmpdir, monkeypatch):
+    monkeypatch.setitem(matplotlib.rcParams, 'animation.ffmpeg_path',
+                        'no-such-ffmpeg')
+    plotdir = str(tmpdir.join('_plots'))
+    os.makedirs(plotdir)
+    for frameno in range(2):
+        fig = plotfun(frameno)
+        fig.savefig(os.path.join(plotdir, 'frame%04dfig1.png' % frameno))
+        plt.close(fig)
+
+    file_name = str(tmpdir.join('fig1.mp4'))
+    animation_tools.make_mp4_from_plotdir(plotdir, 'frame*fig1.png',
+                                          file_name)
+    assert [frame.shape[:2] for frame in written_frames(file_name)] \
+           == [(75, 100)]*2
+
+    file_name = str(tmpdir.join('fig1_big.mp4'))
+    animation_tools.make_mp4_from_plotdir(plotdir, 'frame*fig1.png',
+                                          file_name, figsize=(4., 2.), dpi=30)
+    assert [frame.shape[:2] for frame in written_frames(file_name)] \
+           == [(60, 120)]*2
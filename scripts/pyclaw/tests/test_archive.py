@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.append('../../../scripts')
+import pyclaw
+pytest.importorskip('h5py')
+from pyclaw.fileio import archive
+
+
+def write_run(outdir, num_frames=3):
+    r"""Write ascii frames of a level 1 patch and a level 2 patch."""
+    for frame in range(num_frames):
+        states = []
+        for n, (xlow, dx, level) in enumerate([(0., 1., 1), (0.5, 0.25, 2)]):
+            x = pyclaw.Dimension(xlow, xlow + dx, 4, name='x')
+            y = pyclaw.Dimension(0., dx, 4, name='y')
+            patch = pyclaw.geometry.Patch([x,y])
+            patch.patch_index = n + 1
+            patch.level = level
+            state = pyclaw.State(patch, 2, 1)
+            X, Y = state.grid.p_centers
+            state.q[0] = frame + X
+            state.q[1] = Y
+            state.aux[0] = -X
+            state.t = 0.5*frame
+            states.append(state)
+        solution = pyclaw.Solution(states,
+                                   pyclaw.Domain([s.patch for s in states]))
+        solution.write(frame, outdir, write_aux=(frame == 0))
+
+
+def test_consolidate_and_read(tmpdir):
+    outdir = str(tmpdir.join('_output'))
+    write_run(outdir)
+    path = archive.consolidate(outdir)
+    assert path == outdir + '.hdf'
+
+    frames, patches = archive.read_index(outdir)
+    assert list(frames['frame']) == [0, 1, 2]
+    assert np.allclose(frames['t'], [0., 0.5, 1.])
+    assert list(patches['level']) == [1, 2]*3
+    assert np.allclose(patches['upper'][1], [0.75, 0.25])
+
+    for frame in range(3):
+        ref = pyclaw.Solution(frame, path=outdir, file_format='ascii')
+        sol = pyclaw.Solution(frame, path=path, file_format='archive')
+        assert sol.t == ref.t
+        for s, r in zip(sol.states, ref.states):
+            assert s.patch.level == r.patch.level
+            assert np.array_equal(s.q, r.q)
+
+    sol = pyclaw.Solution(0, path=outdir, file_format='archive')
+    assert np.array_equal(sol.states[1].aux[0], -sol.states[1].grid.p_centers[0])
+
+
+def test_read_subset(tmpdir):
+    outdir = str(tmpdir.join('_output'))
+    write_run(outdir)
+    archive.consolidate(outdir)
+    sol = pyclaw.Solution(1, path=outdir, file_format='archive', levels=[2])
+    assert [s.patch.level for s in sol.states] == [2]
+    sol = pyclaw.Solution(1, path=outdir, file_format='archive',
+                          bbox=[0.8, 0.9, 0., 0.5])
+    assert [s.patch.patch_index for s in sol.states] == [1]
+    with pytest.raises(IOError):
+        pyclaw.Solution(7, path=outdir, file_format='archive')
@@ -0,0 +1,88 @@
+from __future__ import absolute_import
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+import pyclaw
+
+
+def solver_and_state(bc_lower, bc_upper, user_bc_lower=None, t=0.):
+    solver = pyclaw.ClawSolver2D()
+    solver.user_bc_lower = user_bc_lower
+    solver.bc_lower = bc_lower
+    solver.bc_upper = bc_upper
+    solver.aux_bc_lower = [pyclaw.BC.extrap]*2
+    solver.aux_bc_upper = [pyclaw.BC.extrap]*2
+    x = pyclaw.Dimension(0.,1.,5,name='x')
+    y = pyclaw.Dimension(0.,1.,4,name='y')
+    domain = pyclaw.Domain([x,y])
+    state = pyclaw.State(domain,3,1)
+    state.q[...] = np.random.rand(*state.q.shape)
+    state.aux[...] = np.random.rand(*state.aux.shape)
+    state.t = t
+    solver._allocate_bc_arrays(state)
+    return solver, state
+
+
+def test_wall_and_periodic_ghost_cells():
+    solver, state = solver_and_state([pyclaw.BC.wall, pyclaw.BC.periodic],
+                                     [pyclaw.BC.extrap, pyclaw.BC.periodic])
+    q = state.q
+    qbc = solver.qbc
+    ng = solver.num_ghost
+    interior = qbc[:,ng:-ng,ng:-ng]
+    assert np.array_equal(interior, q)
+    # Wall in x: mirrored, with the normal momentum negated
+    assert np.array_equal(qbc[0,ng-1,ng:-ng], q[0,0,:])
+    assert np.array_equal(qbc[0,0,ng:-ng], q[0,1,:])
+    assert np.array_equal(qbc[1,ng-1,ng:-ng], -q[1,0,:])
+    assert np.array_equal(qbc[2,ng-1,ng:-ng], q[2,0,:])
+    # Extrapolation in x
+    assert np.array_equal(qbc[:,-1,ng:-ng], q[:,-1,:])
+    assert np.array_equal(qbc[:,-2,ng:-ng], q[:,-1,:])
+    # Periodic in y
+    assert np.array_equal(qbc[:,ng:-ng,:ng], q[:,:,-ng:])
+    assert np.array_equal(qbc[:,ng:-ng,-ng:], q[:,:,:ng])
+    # Aux is extrapolated
+    assert np.array_equal(solver.auxbc[:,0,ng:-ng], state.aux[:,0,:])
+
+
+def test_bcs_track_new_q():
+    solver, state = solver_and_state([pyclaw.BC.extrap]*2,
+                                     [pyclaw.BC.extrap]*2)
+    state.q = state.q + 1.
+    solver._apply_bcs(state)
+    assert np.array_equal(solver.qbc[:,0,2:-2], state.q[:,0,:])
+
+
+def test_custom_bc():
+    def user_bc(state, dim, t, qbc, auxbc, num_ghost):
+        if dim.name == 'x':
+            qbc[:,:num_ghost,...] = t
+
+    solver, state = solver_and_state([pyclaw.BC.custom, pyclaw.BC.extrap],
+                                     [pyclaw.BC.extrap]*2, user_bc, t=2.5)
+    assert np.all(solver.qbc[:,:2,2:-2] == 2.5)
+
+
+def test_changed_bcs_rebuild_plan():
+    solver, state = solver_and_state([pyclaw.BC.extrap]*2,
+                                     [pyclaw.BC.extrap]*2)
+    solver.bc_lower[0] = pyclaw.BC.wall
+    solver._apply_bcs(state)
+    ng = solver.num_ghost
+    assert np.array_equal(solver.qbc[1,ng-1,ng:-ng], -state.q[1,0,:])
+    assert np.array_equal(solver.qbc[0,0,ng:-ng], state.q[0,1,:])
+
+
+def test_interior_copied_by_state():
+    solver, state = solver_and_state([pyclaw.BC.extrap]*2,
+                                     [pyclaw.BC.extrap]*2)
+    calls = []
+    get_qbc_from_q = state.get_qbc_from_q
+
+    def counted(num_ghost, qbc):
+        calls.append(num_ghost)
+        return get_qbc_from_q(num_ghost, qbc)
+    state.get_qbc_from_q = counted
+    solver._apply_bcs(state)
+    assert calls == [solver.num_ghost]
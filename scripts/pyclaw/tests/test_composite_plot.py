@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+import sys
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+sys.path.append('../../../scripts')
+import pyclaw
+from visclaw.data import ClawPlotData
+from visclaw import frametools
+
+
+def two_patch_frame():
+    r"""A coarse patch on the unit square with a finer patch in its middle."""
+    states = []
+    for level, (lower, upper) in enumerate([(0., 1.), (0.25, 0.75)]):
+        x = pyclaw.Dimension(lower, upper, 8, name='x')
+        y = pyclaw.Dimension(lower, upper, 8, name='y')
+        patch = pyclaw.geometry.Patch([x, y])
+        patch.level = level + 1
+        state = pyclaw.State(patch, 1)
+        X, Y = state.grid.p_centers
+        state.q[0] = np.sin(6.*X)*np.cos(5.*Y) + level
+        states.append(state)
+    return pyclaw.Solution(states, pyclaw.Domain(states[0].patch))
+
+
+def render(framesoln, plot_type, composite):
+    r"""Plot *framesoln* filling a 160x160 pixel figure, return its pixels."""
+    plotdata = ClawPlotData()
+    plotdata.printfigs = False
+    plotfigure = plotdata.new_plotfigure(name='q', figno=0)
+    plotfigure.kwargs = {'figsize': (2., 2.), 'dpi': 80}
+    plotaxes = plotfigure.new_plotaxes()
+    plotaxes.axescmd = 'axes([0., 0., 1., 1.])'
+    plotaxes.xlimits = [0., 1.]
+    plotaxes.ylimits = [0., 1.]
+    plotitem = plotaxes.new_plotitem(plot_type=plot_type)
+    plotitem.plot_var = 0
+    plotitem.composite = composite
+    setattr(plotitem, plot_type[3:] + '_cmin', -1.)
+    setattr(plotitem, plot_type[3:] + '_cmax', 2.)
+
+    frametools.plot_frame([framesoln], plotdata, 0)
+    fig = plt.figure(0)
+    fig.canvas.draw()
+    image = np.asarray(fig.canvas.buffer_rgba())[..., :3].astype(int)
+    num_artists = len(fig.axes[0].images) + len(fig.axes[0].collections)
+    plt.close(fig)
+    return image, num_artists
+
+
+def test_composite_matches_patches():
+    framesoln = two_patch_frame()
+    for plot_type in ['2d_imshow', '2d_pcolor']:
+        patches, num_patch_artists = render(framesoln, plot_type, False)
+        composite, num_artists = render(framesoln, plot_type, True)
+        assert num_patch_artists == 2 and num_artists == 1
+        assert patches.shape == composite.shape == (160, 160, 3)
+        # Not a blank figure
+        assert len(np.unique(patches.reshape(-1, 3), axis=0)) > 50
+        # Up to rounding of the colors of pcolormesh
+        assert np.abs(patches - composite).max() <= 1
@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+import os
+import csv
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+import pyclaw
+from pyclaw.ensemble import Ensemble
+from riemann import shallow_2D_py
+
+
+def dam_break_controller():
+    solver = pyclaw.ClawSolver2D(shallow_2D_py.shallow_fwave_2d)
+    solver.kernel_language = 'Python'
+    solver.fwave = True
+    solver.limiters = pyclaw.limiters.tvd.MC
+    solver.all_bcs = pyclaw.BC.wall
+    solver.aux_bc_lower = [pyclaw.BC.wall]*2
+    solver.aux_bc_upper = [pyclaw.BC.wall]*2
+
+    x = pyclaw.Dimension(0.,2.,20,name='x')
+    y = pyclaw.Dimension(0.,1.,10,name='y')
+    domain = pyclaw.Domain([x,y])
+    state = pyclaw.State(domain,3,1)
+    state.aux[0] = -0.1
+    state.problem_data['grav'] = 9.81
+    state.problem_data['dry_tolerance'] = 1.e-3
+    state.problem_data['sea_level'] = 0.
+
+    claw = pyclaw.Controller()
+    claw.solution = pyclaw.Solution(state,domain)
+    claw.solver = solver
+    claw.tfinal = 0.3
+    claw.num_output_times = 3
+    claw.output_format = None
+    claw.verbosity = 0
+    return claw
+
+
+def set_dam_height(claw, dam_height):
+    state = claw.solution.state
+    X,Y = state.grid.p_centers
+    state.q[0] = np.where(X < 0.5, dam_height, 0.1)
+    state.q[1:] = 0.
+
+
+def set_dam_height_checked(claw, dam_height):
+    if dam_height <= 0.:
+        raise ValueError("dam_height must be positive")
+    set_dam_height(claw, dam_height)
+
+
+def test_ensemble_statistics(tmpdir):
+    ensemble = Ensemble(dam_break_controller(), {'dam_height': [0.2, 0.4]},
+                        set_parameters=set_dam_height,
+                        outdir=str(tmpdir.join('_ensemble')), num_procs=2)
+    results = ensemble.run()
+
+    assert [parameters for parameters, summary in results] == \
+           [{'dam_height': 0.2}, {'dam_height': 0.4}]
+    low, high = [summary for parameters, summary in results]
+    assert 'error' not in low and 'error' not in high
+    assert np.isclose(low['h_max'], 0.2) and np.isclose(high['h_max'], 0.4)
+    assert high['speed_max'] > low['speed_max'] > 0.
+    assert low['first_arrival'] == 0.
+
+    stats = np.load(os.path.join(ensemble.scenario_dir(1), 'statistics.npz'))
+    assert stats['h_max'].shape == (20,10)
+    assert np.all(stats['h_max'][:5] == 0.4)
+    assert np.all(stats['h_max'][5:] > 0.1 - 1.e-12)
+
+    with open(os.path.join(ensemble.outdir, 'summary.csv')) as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(row['dam_height'] for row in rows) == ['0.2', '0.4']
+
+
+def test_ensemble_serial_matches_parallel(tmpdir):
+    sweeps = [{'dam_height': 0.3}]
+    parallel = Ensemble(dam_break_controller(), sweeps,
+                        set_parameters=set_dam_height,
+                        outdir=str(tmpdir.join('parallel')), num_procs=2).run()
+    serial = Ensemble(dam_break_controller, sweeps,
+                      set_parameters=set_dam_height,
+                      outdir=str(tmpdir.join('serial')), num_procs=1).run()
+    assert parallel == serial
+
+
+def test_ensemble_bad_parameters(tmpdir):
+    ensemble = Ensemble(dam_break_controller(), {'dam_height': [-1., 0.3]},
+                        set_parameters=set_dam_height_checked,
+                        outdir=str(tmpdir.join('_ensemble')), num_procs=1)
+    bad, good = [summary for parameters, summary in ensemble.run()]
+    assert bad == {'error': 'dam_height must be positive'}
+    assert 'error' not in good and np.isclose(good['h_max'], 0.3)
+    assert not os.path.exists(os.path.join(ensemble.scenario_dir(0),
+                                           'statistics.npz'))
+    assert os.path.exists(os.path.join(ensemble.scenario_dir(0),
+                                       'parameters.json'))
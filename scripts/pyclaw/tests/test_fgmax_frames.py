@@ -0,0 +1,109 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+from pyclaw import Solution
+from geoclaw import fgmax_tools
+from visclaw.gridtools import grid_output_2d
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+binary_dir = os.path.join(this_dir, 'test_data', 'advection_2d_binary')
+
+times = [0., 1., 2., 3.]
+scale = [0.25, 0.75, 1.5, 0.5]
+
+
+def write_run(outdir):
+    r"""
+    Write GeoFlood-like frames (h, hu, hv, eta) on the patches of the test
+    frame: the depth is the test q plus x, scaled by *scale*, the velocity in
+    x is ``x - 0.3*k`` in frame k and the topography is ``-y``.
+    """
+    reference = Solution(0, path=binary_dir, file_format='binary')
+    for k, t in enumerate(times):
+        solution = Solution(0, path=binary_dir, file_format='binary')
+        for state, ref in zip(solution.states, reference.states):
+            X, Y = state.grid.p_centers
+            h = scale[k]*(ref.q[0] + X)
+            state.q = np.array([h, h*(X - 0.3*k), 0.*h, h - Y])
+            state.t = t
+        solution.t = t
+        solution.write(k, outdir)
+
+
+def test_sample_grid(tmpdir):
+    outdir = str(tmpdir.join('_output'))
+    write_run(outdir)
+    framesoln = Solution(3, path=outdir)
+    x = np.linspace(-0.1, 0.9, 53)
+    y = np.linspace(0.05, 0.97, 41)
+    X, Y = np.meshgrid(x, y)
+
+    def speed(q):
+        return np.where(q[0] > 1e-3, np.abs(q[1])/q[0], 0.)
+
+    for method in ['nearest', 'linear']:
+        h, s, B, level = fgmax_tools.sample_grid(framesoln, x, y,
+                                                  method=method)
+        assert h.shape == (len(y), len(x))
+        expected = grid_output_2d(framesoln, 0, X, Y, method=method,
+                                  return_ma=False)
+        assert np.array_equal(h, expected, equal_nan=True)
+        expected = grid_output_2d(framesoln, speed, X, Y, method=method,
+                                  return_ma=False)
+        assert np.allclose(s, expected, equal_nan=True)
+        expected = grid_output_2d(framesoln, lambda q: q[3] - q[0], X, Y,
+                                  method=method, return_ma=False)
+        assert np.allclose(B, expected, equal_nan=True)
+
+    # Points left of the domain are not covered
+    assert np.all(level[:, x < 0] == 0)
+    assert np.all(np.isnan(h[:, x < 0]))
+    assert set(np.unique(level[:, x > 0])) == {1, 2, 3}
+
+
+def test_fgmax_from_frames(tmpdir):
+    outdir = str(tmpdir.join('_output'))
+    write_run(outdir)
+    x = np.linspace(-0.1, 0.9, 53)
+    y = np.linspace(0.05, 0.97, 41)
+    arrival_tol = 0.5
+
+    # Maxima of the frames taken one at a time
+    samples = [fgmax_tools.sample_grid(Solution(k, path=outdir), x, y)
+               for k in range(len(times))]
+    h = np.array([sample[0] for sample in samples])
+    s = np.array([sample[1] for sample in samples])
+    covered = samples[0][3] > 0
+    t = np.array(times)
+
+    fg = fgmax_tools.fgmax_from_frames(x, y, outdir, arrival_tol=arrival_tol,
+                                       num_procs=1)
+    assert np.array_equal(fg.h.mask, ~covered)
+    assert np.allclose(fg.h[covered], h.max(axis=0)[covered])
+    assert np.allclose(fg.h_time[covered], t[h.argmax(axis=0)][covered])
+    assert np.allclose(fg.s[covered], s.max(axis=0)[covered])
+    assert np.allclose(fg.s_time[covered], t[s.argmax(axis=0)][covered])
+    assert np.allclose(fg.B[covered], samples[-1][2][covered])
+    assert np.array_equal(fg.level, samples[0][3])
+
+    # The flow arrives where the scaled depth first exceeds arrival_tol
+    arrived = h > arrival_tol
+    never = covered & ~arrived.any(axis=0)
+    assert never.any()
+    assert np.all(fg.arrival_time.mask[never])
+    first = covered & arrived.any(axis=0)
+    assert len(np.unique(fg.arrival_time[first])) > 1
+    assert np.allclose(fg.arrival_time[first], t[arrived.argmax(axis=0)][first])
+    assert len(np.unique(fg.s_time[covered])) > 1
+
+    # Frames split among processes give the same result
+    fg2 = fgmax_tools.fgmax_from_frames(x, y, outdir, arrival_tol=arrival_tol,
+                                        num_procs=2)
+    for name in ['h', 'h_time', 's', 's_time', 'B', 'arrival_time']:
+        a = getattr(fg, name)
+        b = getattr(fg2, name)
+        assert np.array_equal(a.mask, b.mask)
+        assert np.array_equal(a.filled(0.), b.filled(0.))
+    assert np.array_equal(fg.level, fg2.level)
@@ -0,0 +1,56 @@
+from __future__ import absolute_import
+import os
+import sys
+import shutil
+import numpy as np
+sys.path.append('../../../scripts')
+from visclaw.frame_stats import FrameStatistics, var_key, frame_mtime
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+binary_dir = os.path.join(this_dir, 'test_data', 'advection_2d_binary')
+
+
+def make_var(body):
+    # A plot variable as defined in a setplot module
+    namespace = {'__name__': 'setplot'}
+    exec("def scaled_q(q, X, Y, t):\n    return %s\n" % body, namespace)
+    return namespace['scaled_q']
+
+
+def test_edited_var_is_recomputed(tmpdir):
+    outdir = str(tmpdir.join('_output'))
+    shutil.copytree(binary_dir, outdir)
+
+    var = make_var('2.*q[0]')
+    stats = FrameStatistics(outdir, file_format='binary')
+    first = stats.get('all', [0, var], num_procs=1)
+    assert os.path.exists(stats.path)
+    assert np.isclose(first[var][0]['max'], 2*first[0][0]['max'])
+
+    # The same function again comes from the sidecar
+    assert var_key(make_var('2.*q[0]')) == var_key(var)
+    cached = FrameStatistics(outdir, file_format='binary')
+    assert cached.get('all', [make_var('2.*q[0]')], num_procs=1,
+                      getframe=lambda frameno: 1/0)
+
+    # Editing it gives a new key and new statistics
+    edited = make_var('3.*q[0]')
+    assert var_key(edited) != var_key(var)
+    second = FrameStatistics(outdir, file_format='binary').get(
+        'all', [edited], num_procs=1)
+    assert np.isclose(second[edited][0]['max'], 3*first[0][0]['max'])
+
+
+def test_frame_mtime_of_shards(tmpdir):
+    outdir = str(tmpdir)
+    for fname in ['fort.t0003', 'fort.q0003.r00000', 'fort.q0003.r00001',
+                  'fort.t0004']:
+        with open(os.path.join(outdir, fname), 'w') as f:
+            f.write('\n')
+    shard = os.path.join(outdir, 'fort.q0003.r00001')
+    os.utime(os.path.join(outdir, 'fort.t0003'), (1000., 1000.))
+    os.utime(os.path.join(outdir, 'fort.q0003.r00000'), (2000., 2000.))
+    os.utime(shard, (3000., 3000.))
+    assert frame_mtime(outdir, 3) == 3000.
+    assert frame_mtime(outdir, 5) is None
+    assert FrameStatistics(outdir).frame_list() == [3, 4]
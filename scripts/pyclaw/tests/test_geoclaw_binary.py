@@ -0,0 +1,41 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+from pyclaw import Solution
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+# Frames written by fc2d_geoclaw_output_binary for three patches, the last
+# one on block 1 and rank 1: 64 bit, 32 bit, and 64 bit with one shard per
+# rank.  Cell (x,y) holds h = 1 + x + 2y, hu = xy, hv = patch number and
+# b = -x/2, ghost cells included.
+geoclaw_dir = os.path.join(this_dir, 'test_data', 'geoclaw_binary')
+patches = [(1, 0, 0, [4, 3], [0., 0.], [0.25, 0.25]),
+           (2, 0, 0, [4, 4], [1., 0.], [0.125, 0.125]),
+           (2, 1, 1, [5, 3], [2., 0.5], [0.1, 0.125])]
+
+
+def test_read_geoclaw_binary_frames():
+    for frame, t, rtol in [(0, 0., 1e-15), (1, 1.5, 1e-6), (2, 3., 1e-15)]:
+        solution = Solution(frame, path=geoclaw_dir)
+        assert solution.t == t
+        assert len(solution.states) == len(patches)
+        for n, (state, patch) in enumerate(zip(solution.states, patches)):
+            level, block, rank, num_cells, lower, delta = patch
+            assert state.patch.patch_index == n
+            assert state.patch.level == level
+            assert state.patch.block_number == block
+            assert state.patch.mpi_rank == rank
+            assert list(state.grid.num_cells) == num_cells
+            assert np.allclose(state.grid.lower, lower)
+            assert np.allclose(state.grid.delta, delta)
+
+            X, Y = state.grid.p_centers
+            h = 1. + X + 2.*Y
+            assert state.q.shape == (4,) + tuple(num_cells)
+            assert np.allclose(state.q[0], h, rtol=rtol)
+            assert np.allclose(state.q[1], X*Y, rtol=rtol, atol=rtol)
+            assert np.all(state.q[2] == n)
+            # eta = h + b
+            assert np.allclose(state.q[3], h - 0.5*X, rtol=rtol)
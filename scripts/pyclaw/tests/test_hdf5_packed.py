@@ -0,0 +1,79 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.append('../../../scripts')
+import pyclaw
+h5py = pytest.importorskip('h5py')
+from pyclaw.fileio import hdf5
+
+
+def amr_solution():
+    r"""A 2x2 level 1 grid with one refined level 2 patch in its corner."""
+    states = []
+    n = 0
+    for level, dx, origins in [(1, 0.5, [(0.,0.), (0.5,0.), (0.,0.5), (0.5,0.5)]),
+                               (2, 0.25, [(0.,0.)])]:
+        for (xlow, ylow) in origins:
+            mx, my = 4, 3
+            x = pyclaw.Dimension(xlow, xlow + dx, mx, name='x')
+            y = pyclaw.Dimension(ylow, ylow + dx, my, name='y')
+            patch = pyclaw.geometry.Patch([x,y])
+            n += 1
+            patch.patch_index = n
+            patch.level = level
+            state = pyclaw.State(patch, 3, 1)
+            X, Y = state.grid.p_centers
+            state.q[0] = n + X + 10*Y
+            state.q[1] = X*Y
+            state.q[2] = -n
+            state.aux[0] = X - Y
+            state.t = 2.5
+            states.append(state)
+    return pyclaw.Solution(states, pyclaw.geometry.Domain([s.patch for s in states]))
+
+
+def read(path, **options):
+    solution = pyclaw.Solution()
+    hdf5.read(solution, 0, str(path), options=options)
+    return solution
+
+
+@pytest.mark.parametrize('layout', ['patch', 'packed'])
+def test_round_trip(tmpdir, layout):
+    ref = amr_solution()
+    hdf5.write(ref, 0, str(tmpdir), write_aux=True, options={'layout':layout})
+    sol = read(tmpdir)
+    by_index = dict((s.patch.patch_index, s) for s in sol.states)
+    assert len(by_index) == len(ref.states)
+    for s in ref.states:
+        r = by_index[s.patch.patch_index]
+        assert r.patch.level == s.patch.level
+        assert r.t == s.t
+        assert np.allclose(r.grid.lower, s.grid.lower)
+        assert r.grid.num_cells == s.grid.num_cells
+        assert np.array_equal(r.q, s.q)
+        assert np.array_equal(r.aux, s.aux)
+
+
+def test_packed_layout_is_one_dataset(tmpdir):
+    hdf5.write(amr_solution(), 0, str(tmpdir), options={'layout':'packed'})
+    with h5py.File(os.path.join(str(tmpdir), 'claw0000.hdf'), 'r') as f:
+        assert sorted(f.keys()) == ['patches', 'q']
+        assert f['q'].shape == (3, 5*12)
+        assert f['q'].compression == 'gzip'
+        assert list(f['patches']['offset']) == [0, 12, 24, 36, 48]
+
+
+def test_packed_subset(tmpdir):
+    hdf5.write(amr_solution(), 0, str(tmpdir), options={'layout':'packed'})
+    sol = read(tmpdir, levels=[1])
+    assert [s.patch.patch_index for s in sol.states] == [1, 2, 3, 4]
+
+    sol = read(tmpdir, bbox=[0.6, 0.9, 0.1, 0.2])
+    assert [s.patch.patch_index for s in sol.states] == [2]
+    assert np.all(sol.states[0].q[2] == -2)
+
+    sol = read(tmpdir, bbox=[0., 0.2, 0., 0.2], levels=[2])
+    assert [s.patch.patch_index for s in sol.states] == [5]
@@ -0,0 +1,125 @@
+from __future__ import absolute_import
+import os
+import sys
+import json
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.image
+sys.path.append('../../../scripts')
+from clawutil import imagediff
+from clawutil import regression_tests
+
+
+def write_image(fname, value=0.2, pixel=None):
+    a = np.full((8, 10), value)
+    if pixel is not None:
+        a[pixel] = 1. - value
+    matplotlib.image.imsave(fname, a, cmap='gray', vmin=0., vmax=1.)
+
+
+def make_plots(dir1, dir2):
+    # Identical, differing, missing and unreadable images
+    os.makedirs(dir1)
+    os.makedirs(dir2)
+    for d in (dir1, dir2):
+        write_image(os.path.join(d, 'same.png'))
+    write_image(os.path.join(dir1, 'differ.png'))
+    write_image(os.path.join(dir2, 'differ.png'), pixel=(2, 3))
+    write_image(os.path.join(dir1, 'only1.png'))
+    with open(os.path.join(dir1, 'broken.png'), 'w') as f:
+        f.write('not a png')
+    with open(os.path.join(dir2, 'broken.png'), 'w') as f:
+        f.write('not a png either')
+
+
+def test_make_imagediff(tmpdir):
+    fname1 = str(tmpdir.join('a.png'))
+    fname2 = str(tmpdir.join('b.png'))
+    fname3 = str(tmpdir.join('diff.png'))
+    write_image(fname1)
+    write_image(fname2, pixel=(2, 3))
+    stats = {}
+    assert imagediff.make_imagediff(fname1, fname2, fname3,
+                                    stats=stats) == fname3
+    assert stats['num_pixels'] == 80 and stats['num_differ'] == 1
+    assert stats['same_shape']
+    diff = imagediff.read_image(fname3)
+    black = diff[:, :, 0] < 0.5
+    assert black[2, 3] and black.sum() == 1
+
+
+def test_imagediff_dir(tmpdir):
+    dir1 = str(tmpdir.join('plots1'))
+    dir2 = str(tmpdir.join('plots2'))
+    make_plots(dir1, dir2)
+
+    summaries = []
+    for num_procs in [1, 2]:
+        dir3 = str(tmpdir.join('diff%d' % num_procs))
+        assert not imagediff.imagediff_dir(dir1, dir2, dir3,
+                                           num_procs=num_procs)
+        with open(os.path.join(dir3, '_ImageDiffSummary.json')) as f:
+            summary = json.load(f)
+        del summary['dir1'], summary['dir2']
+        summaries.append(summary)
+        assert summary['identical'] == ['same.png']
+        assert summary['missing_from_dir2'] == ['only1.png']
+        assert summary['differ']['differ.png']['num_differ'] == 1
+        assert 'error' in summary['differ']['broken.png']
+
+        # No link to a diff image that was never written
+        assert os.path.isfile(os.path.join(dir3, 'differ.png'))
+        assert not os.path.exists(os.path.join(dir3, 'broken.png'))
+        with open(os.path.join(dir3, '_ImageDiffIndex.html')) as f:
+            html = f.read()
+        assert 'src="differ.png"' in html
+        assert 'src="broken.png"' not in html
+        assert 'Could not diff the images' in html
+    assert summaries[0] == summaries[1]
+
+    assert imagediff.imagediff_dir(dir1, dir2, str(tmpdir.join('diff3')),
+                                   regression_test_files=['same.png'],
+                                   num_procs=1)
+
+
+def test_subdirs_output_in_order(tmpdir, capsys, monkeypatch):
+    monkeypatch.setenv('CLAW', str(tmpdir))
+    examples = str(tmpdir.join('examples'))
+    compare = str(tmpdir.join('gallery'))
+    names = ['ex%d' % n for n in range(3)]
+    for name in names:
+        os.makedirs(os.path.join(examples, name))
+        with open(os.path.join(examples, name, 'setrun.py'), 'w') as f:
+            f.write('\n')
+        for d in (examples, compare):
+            plots = os.path.join(d, name, '_plots')
+            os.makedirs(plots)
+            write_image(os.path.join(plots, 'frame0000fig0.png'),
+                        pixel=(1, 1) if name == 'ex1' and d == compare
+                        else None)
+
+    cwd = os.getcwd()
+    os.chdir(examples)
+    try:
+        for num_procs in [1, 2]:
+            all_ok = regression_tests.test_subdirs(compare, examples,
+                                                   num_procs=num_procs)
+            assert not all_ok
+            out = capsys.readouterr().out
+            # The output of each subdirectory is printed whole, in the
+            # order the subdirectories were listed
+            listed = sorted(names, key=lambda name: out.index(
+                '    ' + os.path.join(examples, name) + '\n'))
+            starts = [out.index('=\n' + os.path.join(examples, name) + '\n=')
+                      for name in listed]
+            assert starts == sorted(starts)
+            k = listed.index('ex1')
+            ex1 = out[starts[k]:(starts + [len(out)])[k+1]]
+            assert 'Regression files are not all identical' in ex1
+            with open('_regression_summary.json') as f:
+                summary = json.load(f)['subdirs']
+            assert [summary[os.path.join(examples, name)]['regression_ok']
+                    for name in names] == [True, False, True]
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+import os
+import sys
+import shutil
+import numpy as np
+import pytest
+sys.path.append('../../../scripts')
+import pyclaw
+from pyclaw import Solution
+from pyclaw.fileio.ascii import write_array
+from visclaw import plot_load_balance
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+binary_dir = os.path.join(this_dir, 'test_data', 'advection_2d_binary')
+
+
+def write_forestclaw_header(f, patch, rank):
+    f.write("%5i                 grid_number\n" % patch.patch_index)
+    f.write("%5i                 AMR_level\n" % patch.level)
+    f.write("%5i                 block_number\n" % 0)
+    f.write("%5i                 mpi_rank\n" % rank)
+    for dim in patch.dimensions:
+        f.write("%5i                 m%s\n" % (dim.num_cells, dim.name))
+    for dim in patch.dimensions:
+        f.write("%24.16e    %slow\n" % (dim.lower, dim.name))
+    for dim in patch.dimensions:
+        f.write("%24.16e    d%s\n" % (dim.delta, dim.name))
+    f.write("\n")
+
+
+def test_binary_frames():
+    # Ranks in the headers of frames 0 and 1, in the shard names of frame 2
+    geoclaw_dir = os.path.join(this_dir, 'test_data', 'geoclaw_binary')
+    for num_procs in [1, 2]:
+        stats = plot_load_balance.load_balance(geoclaw_dir,
+                                               num_procs=num_procs)
+        assert [s['frame'] for s in stats] == [0, 1, 2]
+        for s in stats:
+            assert list(s['cells']) == [4*3 + 4*4, 5*3]
+            assert np.isclose(s['imbalance'], 28 / 21.5)
+
+    # No rank in the headers of an unsharded frame
+    with pytest.raises(ValueError):
+        plot_load_balance.load_balance(binary_dir, file_format='binary',
+                                       num_procs=1)
+    headers = plot_load_balance.frame_load_balance(
+        (0, binary_dir, 'fort', 'binary'))['headers']
+    assert sum(h['num_cells'] for h in headers) == \
+        50*50 + 34*34 + 2*34*32 + 32*32 + 4*16*42 + 4*30*16 + 4*28*16
+    assert all(h['mpi_rank'] is None for h in headers)
+
+
+def test_ascii_headers(tmpdir):
+    reference = Solution(0, path=binary_dir, file_format='binary')
+    ranks = [0, 0, 1, 1, 1] + 12*[2]
+
+    # Frame 0 in one file with ForestClaw headers, frame 1 in one shard
+    # per rank with ranks only in the file names
+    outdir = str(tmpdir.join('_output'))
+    os.makedirs(outdir)
+    with open(os.path.join(outdir, 'fort.q0000'), 'w') as f:
+        for state, rank in zip(reference.states, ranks):
+            write_forestclaw_header(f, state.patch, rank)
+            write_array(f, state.patch, state.q)
+    for rank in range(3):
+        states = [s for s, r in zip(reference.states, ranks) if r == rank]
+        solution = Solution(states, pyclaw.Domain([s.patch for s in states]))
+        solution.t = 1.
+        solution.write(1, str(tmpdir.join('rank%d' % rank)))
+        shutil.move(str(tmpdir.join('rank%d' % rank, 'fort.q0001')),
+                    os.path.join(outdir, 'fort.q0001.r%05d' % rank))
+    for frame in range(2):
+        with open(os.path.join(outdir, 'fort.t%04d' % frame), 'w') as f:
+            f.write("%18.8e     time\n" % frame)
+            for value in [1, 17, 0, 2, 0]:
+                f.write("%5i\n" % value)
+            f.write("ascii                  file_format\n")
+
+    cells = np.zeros(3, dtype=int)
+    for state, rank in zip(reference.states, ranks):
+        cells[rank] += state.q[0].size
+    for num_procs in [1, 2]:
+        stats = plot_load_balance.load_balance(outdir, num_procs=num_procs)
+        assert [s['frame'] for s in stats] == [0, 1]
+        for s in stats:
+            assert np.all(s['cells'] == cells)
+            assert list(s['patches']) == [1, 4, 12]
+            assert np.isclose(s['imbalance'], cells.max() / cells.mean())
+
+    fname = str(tmpdir.join('load_balance.csv'))
+    plot_load_balance.write_csv(stats, fname)
+    frame, time, imbalance, csv_cells, patches = \
+        plot_load_balance.read_csv(fname)
+    assert list(frame) == [0, 1]
+    assert np.allclose(time, [0., 1.])
+    assert np.all(csv_cells == cells)
+    assert np.all(patches == [1, 4, 12])
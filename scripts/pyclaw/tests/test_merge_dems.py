@@ -0,0 +1,92 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+from tools_main import tools
+
+
+def write_tile(fname, Z, xll, yll, cellsize, label_first=False):
+    # Z is stored with its rows from the top, as in the file
+    labels = ['ncols', 'nrows', 'xllcorner', 'yllcorner', 'cellsize',
+              'NODATA_value']
+    values = [Z.shape[1], Z.shape[0], xll, yll, cellsize, -9999]
+    with open(fname, 'w') as f:
+        for label, value in zip(labels, values):
+            if label_first:
+                f.write("%s %s\n" % (label, value))
+            else:
+                f.write("%s %s\n" % (value, label))
+        np.savetxt(f, Z, fmt='%.6f')
+
+
+def read_output(fname):
+    header = tools.read_dem_header(fname)
+    return header, np.loadtxt(fname, skiprows=6, ndmin=2)
+
+
+def test_merge_aligned_tiles(tmpdir):
+    rng = np.random.RandomState(0)
+    Z = np.round(100.*rng.rand(30, 40), 3)
+    Z[3, 4] = -9999
+    paths = []
+    for i in range(3):
+        for j in range(2):
+            fname = str(tmpdir.join('tile%d%d.asc' % (i, j)))
+            write_tile(fname, Z[i*10:(i+1)*10, j*20:(j+1)*20],
+                       1. + 2.*j, 3. - 1.*i, 0.1, label_first=(i == 1))
+            paths.append(fname)
+
+    output = str(tmpdir.join('merged.tt3'))
+    for chunk_rows, max_memory in [(256, 2**30), (3, 0)]:
+        header = tools.merge_dems(paths, output, chunk_rows=chunk_rows,
+                                  max_memory=max_memory)
+        assert not os.path.exists(output + '.mosaic')
+        file_header, merged = read_output(output)
+        assert np.allclose(merged, Z)
+        for key in ['ncols', 'nrows', 'xll', 'yll', 'dx', 'dy']:
+            assert np.isclose(file_header[key], header[key])
+        assert (header['ncols'], header['nrows']) == (40, 30)
+        assert np.allclose([header['xll'], header['yll']], [1., 1.])
+
+
+def test_merge_priority(tmpdir):
+    # A coarse tile of ones on [0,4]x[0,4] and a fine tile of twos with a
+    # hole on [3,6]x[1,3]
+    coarse = np.ones((4, 4))
+    fine = 2.*np.ones((4, 6))
+    fine[0, 0] = -9999
+    coarse_path = str(tmpdir.join('coarse.asc'))
+    fine_path = str(tmpdir.join('fine.asc'))
+    write_tile(coarse_path, coarse, 0., 0., 1.)
+    write_tile(fine_path, fine, 3., 1., 0.5)
+    output = str(tmpdir.join('merged.tt3'))
+
+    header = tools.merge_dems([coarse_path, fine_path], output)
+    Z = read_output(output)[1]
+    assert (header['ncols'], header['nrows'], header['dx']) == (12, 8, 0.5)
+    expected = -9999*np.ones((8, 12))
+    expected[:, :8] = 1.
+    expected[2:6, 6:] = 2.
+    expected[2, 6] = 1.
+    assert np.all(Z == expected)
+
+    for priority in ['first', [1, 0]]:
+        tools.merge_dems([coarse_path, fine_path], output, priority=priority)
+        Z = read_output(output)[1]
+        expected[:, :8] = 1.
+        assert np.all(Z == expected)
+
+
+def test_merge_nodata_value(tmpdir):
+    Z = np.ones((4, 6))
+    Z[0, 0] = -9999
+    path = str(tmpdir.join('tile.asc'))
+    write_tile(path, Z, 0., 0., 1.)
+    output = str(tmpdir.join('merged.tt3'))
+    for nodata_value in [np.nan, -3.5, -9999]:
+        tools.merge_dems([path], output, nodata_value=nodata_value)
+        header, merged = read_output(output)
+        assert np.array_equal(header['nodata'], nodata_value, equal_nan=True)
+        assert np.array_equal(merged[0, 0], nodata_value, equal_nan=True)
+        assert np.all(merged.ravel()[1:] == 1.)
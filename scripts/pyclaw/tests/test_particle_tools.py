@@ -0,0 +1,112 @@
+from __future__ import absolute_import
+import sys
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+sys.path.append('../../../scripts')
+from visclaw import particle_tools
+
+
+class Gauge(object):
+    def __init__(self, particle_path, gtype='lagrangian'):
+        self.particle_path = particle_path
+        self.gtype = gtype
+
+
+def old_interp_particles(gauge_solutions, t, gaugenos, extend='neither'):
+    # interp_particles before ParticlePaths, one numpy.where per gauge
+    particle_positions = {}
+    for gaugeno in gaugenos:
+        g = gauge_solutions[gaugeno]
+        if g.particle_path is None:
+            particle_positions[gaugeno] = (np.nan, np.nan)
+            continue
+        tg = g.particle_path[:,0]
+        xg = g.particle_path[:,1]
+        yg = g.particle_path[:,2]
+        if t <= tg[0]:
+            if extend in ['neither', 'max']:
+                x = y = np.nan
+            else:
+                x, y = xg[0], yg[0]
+        elif t > tg[-1]:
+            if extend in ['neither', 'min']:
+                x = y = np.nan
+            else:
+                x, y = xg[-1], yg[-1]
+        else:
+            i = np.where(tg <= t)[0][-1]
+            if i > len(tg)-2:
+                i = len(tg)-2
+            alf = (t-tg[i])/(tg[i+1]-tg[i])
+            x = xg[i] + alf*(xg[i+1]-xg[i])
+            y = yg[i] + alf*(yg[i+1]-yg[i])
+        particle_positions[gaugeno] = (x, y)
+    return particle_positions
+
+
+def synthetic_gauges():
+    # Paths of different lengths, start and end times and sampling, a
+    # gauge with no data yet and a stationary gauge
+    rng = np.random.RandomState(30)
+    gauges = {}
+    for gaugeno in range(1, 9):
+        n = rng.randint(2, 40)
+        t = np.sort(rng.uniform(0., 10., n))
+        t = t[np.concatenate(([True], np.diff(t) > 0))]
+        path = np.vstack((t, np.cumsum(rng.randn(len(t))),
+                          np.cumsum(rng.randn(len(t))),
+                          rng.rand(len(t)))).T
+        gauges[gaugeno] = Gauge(path)
+    gauges[20] = Gauge(None)
+    gauges[30] = Gauge(gauges[1].particle_path, gtype='stationary')
+    return gauges
+
+
+def test_interp_matches_old_implementation():
+    gauges = synthetic_gauges()
+    gaugenos = sorted(k for k in gauges if gauges[k].gtype == 'lagrangian')
+    sample_times = np.concatenate([gauges[k].particle_path[:,0]
+                                   for k in gaugenos[:3]])
+    times = np.concatenate(([-1., 0., 5., 10., 11.], sample_times,
+                            np.linspace(-0.5, 10.5, 57)))
+    paths = particle_tools.ParticlePaths(gauges)
+    assert sorted(paths.gaugenos) == gaugenos
+
+    for extend in ['neither', 'min', 'max', 'both']:
+        x, y = paths.interp(times, extend=extend)
+        assert x.shape == (len(times), len(gaugenos))
+        for n, t in enumerate(times):
+            expected = old_interp_particles(gauges, t, gaugenos, extend)
+            positions = particle_tools.interp_particles(gauges, t,
+                                                        extend=extend)
+            assert sorted(positions) == gaugenos
+            for k, gaugeno in enumerate(paths.gaugenos):
+                assert np.allclose(expected[gaugeno],
+                                   (x[n,k], y[n,k]), equal_nan=True)
+                assert np.allclose(expected[gaugeno], positions[gaugeno],
+                                   equal_nan=True)
+
+    # Subsets of a packed set of paths
+    subset = [3, 20, 7]
+    positions = particle_tools.interp_particles(paths, 4.2, subset, 'both')
+    expected = old_interp_particles(gauges, 4.2, subset, 'both')
+    for gaugeno in subset:
+        assert np.allclose(expected[gaugeno], positions[gaugeno],
+                           equal_nan=True)
+
+
+def test_plot_particles():
+    gauges = synthetic_gauges()
+    plt.figure()
+    particle_tools.plot_particles(gauges, 4.2, extend='both')
+    lines = plt.gca().get_lines()
+    assert len(lines) == 1
+    gaugenos = particle_tools.ParticlePaths(gauges).gaugenos
+    expected = old_interp_particles(gauges, 4.2, gaugenos, 'both')
+    x, y = lines[0].get_data()
+    assert np.allclose(np.array([x, y]).T,
+                       [expected[gaugeno] for gaugeno in gaugenos],
+                       equal_nan=True)
+    plt.close()
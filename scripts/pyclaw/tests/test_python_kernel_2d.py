@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+import pyclaw
+from riemann import shallow_2D_py
+
+
+def shallow_water_controller(bathymetry, depth, tfinal=0.5, order=2):
+    solver = pyclaw.ClawSolver2D(shallow_2D_py.shallow_fwave_2d)
+    solver.kernel_language = 'Python'
+    solver.fwave = True
+    solver.order = order
+    solver.limiters = pyclaw.limiters.tvd.MC
+    solver.all_bcs = pyclaw.BC.wall
+    solver.aux_bc_lower = [pyclaw.BC.wall]*2
+    solver.aux_bc_upper = [pyclaw.BC.wall]*2
+
+    x = pyclaw.Dimension(-1.,1.,40,name='x')
+    y = pyclaw.Dimension(-1.,1.,30,name='y')
+    domain = pyclaw.Domain([x,y])
+    state = pyclaw.State(domain,3,1)
+    X,Y = state.grid.p_centers
+    state.aux[0] = bathymetry(X,Y)
+    state.problem_data['grav'] = 9.81
+    state.problem_data['dry_tolerance'] = 1.e-3
+    state.problem_data['sea_level'] = 0.
+    state.q[0] = depth(X,Y,state.aux[0])
+    state.q[1] = 0.
+    state.q[2] = 0.
+
+    claw = pyclaw.Controller()
+    claw.solution = pyclaw.Solution(state,domain)
+    claw.solver = solver
+    claw.tfinal = tfinal
+    claw.num_output_times = 1
+    claw.output_format = None
+    claw.keep_copy = True
+    claw.verbosity = 0
+    return claw
+
+
+def test_lake_at_rest_with_island():
+    island = lambda X,Y: 1.5*np.exp(-5.*(X**2 + Y**2)) - 1.
+    claw = shallow_water_controller(island,
+                                    lambda X,Y,b: np.maximum(-b,0.))
+    claw.run()
+    q0, q = claw.frames[0].q, claw.frames[-1].q
+    assert np.allclose(q[0], q0[0], atol=1.e-12)
+    assert np.abs(q[1:]).max() < 1.e-12
+
+
+def test_wetting_and_drying_conserves_mass():
+    slope = lambda X,Y: 0.1*X + 0.2*np.exp(-20.*((X-0.5)**2 + Y**2))
+    claw = shallow_water_controller(slope,
+                                    lambda X,Y,b: np.where(X < -0.5, 0.5, 0.),
+                                    tfinal=1.0)
+    claw.run()
+    q0, q = claw.frames[0].q, claw.frames[-1].q
+    assert np.isfinite(q).all()
+    assert abs(q[0].sum() - q0[0].sum()) < 1.e-10*q0[0].sum()
+    # The front has moved onto the initially dry bed
+    assert (q[0][q0[0] == 0.] > 1.e-3).any()
+
+
+def test_riemann_work_arrays_reused():
+    slope = lambda X,Y: 0.1*X + 0.2*np.exp(-20.*((X-0.5)**2 + Y**2))
+    depth = lambda X,Y,b: np.where(X < -0.5, 0.5, 0.)
+    claw = shallow_water_controller(slope, depth, tfinal=1.0)
+    claw.solution.state.q[1] = np.where(claw.solution.state.q[0] > 0., 0.3, 0.)
+    claw.run()
+    assert all('fwave' in w and 'amdq' in w for w in claw.solver._rp_work)
+
+    # Same result as a solver allocating its arrays on every call
+    def rp(*args):
+        return shallow_2D_py.shallow_fwave_2d(*args)
+    rp.num_eqn = shallow_2D_py.num_eqn
+    rp.num_waves = shallow_2D_py.num_waves
+    reference = shallow_water_controller(slope, depth, tfinal=1.0)
+    reference.solver.rp = rp
+    reference.solution.state.q[1] = claw.frames[0].q[1]
+    reference.run()
+    assert reference.solver._rp_work == [{}, {}]
+    assert np.array_equal(claw.frames[-1].q, reference.frames[-1].q)
+
+    # Later calls write into the same arrays
+    state = claw.solution.state
+    q, aux = claw.frames[-1].q, state.aux
+    work = {}
+    args = (q[:,:-1], q[:,1:], aux[:,:-1], aux[:,1:], state.problem_data)
+    first = shallow_2D_py.shallow_fwave_2d(*args, work=work)
+    expected = [a.copy() for a in first]
+    buffers = dict((name, id(a)) for name, a in work.items())
+    second = shallow_2D_py.shallow_fwave_2d(*args, work=work)
+    assert dict((name, id(a)) for name, a in work.items()) == buffers
+    assert all(a is b for a, b in zip(first, second))
+    assert all(np.array_equal(a, b) for a, b in zip(second, expected))
@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+from amrclaw import region_tools
+
+
+def test_mask_outside():
+    # lower = 0 and upper = s on s in [0,1], then constant
+    slu = np.array([[0., 0., 0.], [1., 0., 1.], [2., 0., 1.]])
+    x = np.linspace(-0.5, 2.5, 13)
+    y = np.linspace(-0.5, 1.5, 9)
+    X, Y = np.meshgrid(x, y)
+    for ixy in ['x', 'y']:
+        rr = region_tools.RuledRectangle(slu=slu)
+        rr.ixy = ixy
+        S, U = (X, Y) if ixy == 'x' else (Y, X)
+        inside_s = (0 <= S) & (S <= 2) & (U >= 0)
+
+        rr.method = 1
+        inside = inside_s & (U <= np.minimum(S, 1.))
+        assert np.array_equal(rr.mask_outside(X, Y), ~inside)
+        assert np.array_equal(rr.mask_outside(X.T, Y.T), ~inside.T)
+
+        rr.method = 0
+        inside = inside_s & (U <= np.where(S < 1, 0., 1.))
+        assert np.array_equal(rr.mask_outside(X, Y), ~inside)
+
+
+def test_covering_selected_points():
+    x = np.linspace(0.05, 0.95, 10)
+    y = np.linspace(0.05, 0.95, 10)
+    X, Y = np.meshgrid(x, y)
+    pts_chosen = ((np.abs(Y - 0.5 - 0.3*np.sin(2*np.pi*X)) < 0.15) &
+                  (X > 0.2)).astype(int)
+    for ixy in ['x', 'y']:
+        for method in [0, 1]:
+            rr = region_tools.ruledrectangle_covering_selected_points(
+                X, Y, pts_chosen, ixy, method=method, verbose=False)
+            mask = rr.mask_outside(X, Y)
+            assert not np.any(mask[pts_chosen == 1])
+
+        # The bounds at each row or column are the first and last point
+        if ixy == 'x':
+            i = np.where(pts_chosen.any(axis=0))[0]
+            assert np.allclose(rr.s, x[i])
+            for k, col in enumerate(i):
+                j = np.where(pts_chosen[:, col])[0]
+                assert rr.lower[k] == y[j.min()]
+                assert rr.upper[k] == y[j.max()]
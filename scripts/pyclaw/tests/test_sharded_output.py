@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+import os
+import sys
+import shutil
+import numpy as np
+sys.path.append('../../../scripts')
+import pyclaw
+from pyclaw import Solution
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+binary_dir = os.path.join(this_dir, 'test_data', 'advection_2d_binary')
+shard_patches = [range(0, 6), range(6, 12), range(12, 17)]
+
+
+def check_same_states(solution, reference):
+    assert len(solution.states) == len(reference.states)
+    for state, ref in zip(solution.states, reference.states):
+        assert state.patch.patch_index == ref.patch.patch_index
+        assert state.patch.level == ref.patch.level
+        assert np.allclose(state.grid.lower, ref.grid.lower)
+        assert np.allclose(state.q, ref.q)
+
+
+def test_read_binary_shards(tmpdir):
+    reference = Solution(0, path=binary_dir, file_format='binary')
+
+    # Split fort.q0000 and fort.b0000 into one shard per processor
+    outdir = str(tmpdir)
+    shutil.copy(os.path.join(binary_dir, 'fort.t0000'), outdir)
+    with open(os.path.join(binary_dir, 'fort.q0000')) as f:
+        lines = [line for line in f if line.strip() != '']
+    data = np.fromfile(os.path.join(binary_dir, 'fort.b0000'), dtype=np.float64)
+    start = 0
+    for rank, patches in enumerate(shard_patches):
+        suffix = '.r%05d' % rank
+        with open(os.path.join(outdir, 'fort.q0000' + suffix), 'w') as f:
+            for m in patches:
+                f.write(''.join(lines[8*m:8*m+8]) + '\n')
+        end = start + sum((reference.states[m].q.shape[1] + 4) *
+                          (reference.states[m].q.shape[2] + 4) for m in patches)
+        data[start:end].tofile(os.path.join(outdir, 'fort.b0000' + suffix))
+        start = end
+
+    check_same_states(Solution(0, path=outdir, file_format='binary'), reference)
+
+
+def test_read_ascii_shards(tmpdir):
+    reference = Solution(0, path=binary_dir, file_format='binary')
+
+    # Write each processor's patches, then keep only its fort.q0000 as a
+    # shard; a stale shard from a run on more processors is ignored
+    outdir = str(tmpdir.join('_output'))
+    os.makedirs(outdir)
+    for rank, patches in enumerate(shard_patches + [range(3)]):
+        states = [reference.states[m] for m in patches]
+        solution = Solution(states, pyclaw.Domain([s.patch for s in states]))
+        solution.t = reference.t
+        solution.write(0, str(tmpdir.join('rank%d' % rank)))
+        shutil.move(str(tmpdir.join('rank%d' % rank, 'fort.q0000')),
+                    os.path.join(outdir, 'fort.q0000.r%05d' % rank))
+    shutil.copy(os.path.join(binary_dir, 'fort.t0000'), outdir)
+
+    # Serial by default
+    solution = Solution(0, path=outdir, file_format='ascii')
+    check_same_states(solution, reference)
+    for num_procs in [1, 2]:
+        solution = Solution(0, path=outdir, file_format='ascii',
+                            num_procs=num_procs)
+        check_same_states(solution, reference)
@@ -0,0 +1,144 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+sys.path.append('../../../scripts')
+from geoclaw import topotools
+
+
+def make_topo():
+    x = np.linspace(0., 1., 101)
+    y = np.linspace(0., 2., 201)
+    X, Y = np.meshgrid(x, y)
+    Z = 10.*X + Y
+    # A levee one point wide that subsampling by 4 misses
+    Z[:, 50] = 100.
+    Z[10:14, 20:30] = -9999
+    topo = topotools.Topography()
+    topo.set_xyZ(x, y, Z)
+    return topo
+
+
+def test_crop_coarsen():
+    topo = make_topo()
+    sub = topo.crop(coarsen=4)
+    assert sub.Z.shape == (51, 26)
+    assert sub.Z.max() < 100.
+
+    # The last x point and y point are past the last whole block
+    for method in ['mean', 'min', 'max']:
+        coarse = topo.crop(coarsen=4, method=method)
+        assert coarse.Z.shape == (50, 25)
+        assert np.allclose(np.diff(coarse.x), 0.04)
+        assert np.allclose(np.diff(coarse.y), 0.04)
+        assert np.isclose(coarse.x[-1], 0.975)
+        assert not np.any(coarse.Z == -9999)
+
+    assert np.all(topo.crop(coarsen=4, method='max').Z[:, 12] == 100.)
+    mean = topo.crop([0.1, 0.4, 0.5, 1.], coarsen=2, method='mean')
+    Z = topo.Z[50:101, 10:41]
+    assert np.isclose(mean.Z[0, 0], Z[:2, :2].mean())
+    assert np.isclose(mean.Z[-1, -1], Z[48:50, 28:30].mean())
+
+    # Blocks with no data stay no data
+    topo.Z[:8, :8] = -9999
+    assert topo.crop(coarsen=8, method='min').Z[0, 0] == -9999
+
+
+def test_coarsen_partial_block():
+    # 10 points coarsened by 4: the last two are dropped
+    x = np.arange(10.)
+    assert np.allclose(topotools._coarsen_coordinate(x, 4), [1.5, 5.5])
+    Z = np.tile(x, (7, 1))
+    Z[0, 0] = np.nan
+    coarse = topotools.coarsen_array(Z, 4, 'max')
+    assert coarse.shape == (1, 2)
+    assert np.allclose(coarse, [[3., 7.]])
+    assert np.isclose(topotools.coarsen_array(Z, 4)[0, 0], 24./15)
+
+
+def test_pyramid(tmpdir):
+    topo = make_topo()
+    path = str(tmpdir.join('topo.tt3'))
+    topo.write(path, topo_type=3)
+
+    full = topotools.read_pyramid(path, topo_type=3)
+    assert os.path.exists(path + '.pyramid')
+    assert np.allclose(full.Z, topo.Z)
+
+    # Levels with 101, 50, 25 and 12 points in x
+    topo.path = path
+    topo.make_pyramid(min_points=8)
+    window = [0.2, 0.6, 0.4, 1.2]
+    coarse = topotools.read_pyramid(path, delta=0.03, filter_region=window)
+    assert np.allclose(coarse.x[1] - coarse.x[0], 0.02)
+    assert coarse.x[0] >= 0.2 and coarse.x[-1] <= 0.6
+    assert coarse.y[0] >= 0.4 and coarse.y[-1] <= 1.2
+    expected = topo.crop(coarsen=2, method='mean').crop(window)
+    assert np.allclose(coarse.Z, expected.Z)
+    assert topotools.read_pyramid(path, delta=1.).Z.shape == (25, 12)
+
+    # A pyramid made with another method is made again, in a directory
+    # whose other files are left alone
+    pyramid_dir = str(tmpdir.join('work'))
+    os.makedirs(pyramid_dir)
+    np.save(os.path.join(pyramid_dir, 'results.npy'), np.zeros(3))
+    topo.make_pyramid(pyramid_dir, min_points=8)
+    coarse = topotools.read_pyramid(path, delta=0.03, topo_type=3,
+                                    method='max', min_points=8,
+                                    pyramid_dir=pyramid_dir)
+    assert np.allclose(coarse.Z, topo.crop(coarsen=2, method='max').Z)
+    assert os.path.exists(os.path.join(pyramid_dir, 'results.npy'))
+    with open(os.path.join(pyramid_dir, 'pyramid.data')) as f:
+        assert f.readlines()[3].split()[0] == 'max'
+
+
+def window_fill(Z, holes):
+    # The square window averaging replace_values used to do point by point
+    Z = Z.copy()
+    for i, j in zip(*holes.nonzero()):
+        r = 1
+        while True:
+            window = (slice(max(i - r, 0), i + r + 1),
+                      slice(max(j - r, 0), j + r + 1))
+            good = ~holes[window]
+            if good.any():
+                Z[i, j] = Z[window][good].mean()
+                break
+            r += 1
+    return Z
+
+
+def test_inpaint():
+    rng = np.random.RandomState(1)
+    Z = 100.*rng.rand(40, 50)
+    holes = rng.rand(40, 50) < 0.3
+    holes[5:20, 10:30] = True
+    expected = window_fill(Z, holes)
+    assert np.allclose(topotools.inpaint(Z, holes), expected)
+    assert np.allclose(topotools.inpaint(Z, holes, tile_size=16, halo=10,
+                                         num_procs=2), expected)
+
+    nearest = topotools.inpaint(Z, holes, method='nearest')
+    assert np.all(nearest[~holes] == Z[~holes])
+    assert np.all(np.isin(nearest[holes], Z[~holes]))
+
+    # Harmonic functions are recovered by the laplace method
+    X, Y = np.meshgrid(np.arange(50.), np.arange(40.))
+    L = 2.*X - 3.*Y
+    holes[:, :] = False
+    holes[10:30, 5:40] = True
+    assert np.allclose(topotools.inpaint(L, holes, method='laplace',
+                                         tol=1e-12), L)
+
+
+def test_replace_no_data_values():
+    topo = make_topo()
+    topo.Z[50, 60] = np.nan
+    holes = (topo.Z == -9999) | np.isnan(topo.Z)
+    expected = window_fill(topo.Z, holes)
+    topo.replace_no_data_values()
+    assert np.allclose(topo.Z, expected)
+
+    topo.replace_values([(0, 0), (1, 1)], value=5., method='value')
+    assert topo.Z[0, 0] == topo.Z[1, 1] == 5.
@@ -0,0 +1,26 @@
+from __future__ import absolute_import
+import os
+import sys
+sys.path.append('../../../scripts')
+from pyclaw.util import map_processes, num_workers
+
+
+def square(n):
+    return n*n
+
+
+def test_map_processes():
+    jobs = list(range(7))
+    expected = [n*n for n in jobs]
+    for num_procs in [1, 2]:
+        assert list(map_processes(square, jobs, num_procs)) == expected
+        assert list(map_processes(square, iter(jobs), num_procs,
+                                  max_pending=2)) == expected
+        assert sorted(map_processes(square, jobs, num_procs,
+                                    ordered=False, max_pending=3)) == expected
+    assert list(map_processes(square, [], 2)) == []
+
+
+def test_num_workers():
+    assert num_workers(3) == 3
+    assert num_workers(None) == (os.cpu_count() or 1)
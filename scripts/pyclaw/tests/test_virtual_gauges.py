@@ -0,0 +1,120 @@
+from __future__ import absolute_import
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.append('../../../scripts')
+import pyclaw
+from pyclaw import virtual_gauges
+from pyclaw.gauges import GaugeSolution
+from visclaw.gridtools import grid_output_2d
+
+binary_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'test_data', 'advection_2d_binary')
+
+
+def write_run(outdir, num_frames=4):
+    r"""Write ascii frames of a level 1 patch and a finer level 2 patch."""
+    for frame in range(num_frames):
+        states = []
+        for n, (xlow, dx, level) in enumerate([(0., 1., 1), (0.5, 0.25, 2)]):
+            x = pyclaw.Dimension(xlow, xlow + dx, 4, name='x')
+            y = pyclaw.Dimension(0., dx, 4, name='y')
+            patch = pyclaw.geometry.Patch([x,y])
+            patch.patch_index = n + 1
+            patch.level = level
+            state = pyclaw.State(patch, 2)
+            X, Y = state.grid.p_centers
+            state.q[0] = frame + X
+            state.q[1] = Y
+            state.t = 0.5*frame
+            states.append(state)
+        solution = pyclaw.Solution(states,
+                                   pyclaw.Domain([s.patch for s in states]))
+        solution.write(frame, outdir)
+
+
+def test_patch_index():
+    states = []
+    for xlow, dx, level in [(0., 1., 1), (0.5, 0.25, 2)]:
+        x = pyclaw.Dimension(xlow, xlow + dx, 4, name='x')
+        y = pyclaw.Dimension(0., dx, 4, name='y')
+        patch = pyclaw.geometry.Patch([x,y])
+        patch.level = level
+        states.append(pyclaw.State(patch, 1))
+    index = virtual_gauges.PatchIndex(states)
+    found = index.locate([0.1, 0.6, 0.6, 2.], [0.1, 0.1, 0.5, 0.5])
+    assert list(found) == [0, 1, 0, -1]
+
+    # A frame without patches, e.g. read with a bbox away from them
+    index = virtual_gauges.PatchIndex([])
+    assert list(index.locate([0.1, 2.], [0.1, 0.5])) == [-1, -1]
+    solution = pyclaw.Solution()
+    level, q = virtual_gauges.sample_frame(solution, [0.1, 2.], [0.1, 0.5],
+                                           num_eqn=2)
+    assert list(level) == [0, 0]
+    assert q.shape == (2, 2)
+    assert np.all(np.isnan(q))
+
+
+def test_sample_frame_matches_grid_output():
+    solution = pyclaw.Solution(0, path=binary_dir, file_format='binary')
+    # Points on cell edges and patch edges included
+    x = np.linspace(-0.1, 1.1, 97)
+    y = np.linspace(0., 1., 65)
+    X, Y = np.meshgrid(x, y)
+    level, q = virtual_gauges.sample_frame(solution, X.ravel(), Y.ravel())
+    expected = grid_output_2d(solution, 0, X, Y, return_ma=False)
+    assert np.array_equal(q[0].reshape(X.shape), expected, equal_nan=True)
+    assert np.array_equal(level == 0, np.isnan(q[0]))
+
+
+def test_extract_gauges(tmpdir):
+    outdir = str(tmpdir.join('_output'))
+    write_run(outdir)
+    points = [(0.1, 0.1), (0.6, 0.1), (3., 3.)]
+    ids = virtual_gauges.extract_gauges(points, outdir=outdir, num_procs=1)
+    assert ids == [1, 2, 3]
+
+    gauge = GaugeSolution(1, path=outdir)
+    assert gauge.location == (0.1, 0.1)
+    assert np.allclose(gauge.t, [0., 0.5, 1., 1.5])
+    assert list(gauge.level) == [1]*4
+    assert np.allclose(gauge.q[0], np.arange(4) + 0.125)
+    assert np.allclose(gauge.q[1], 0.125)
+
+    gauge = GaugeSolution(2, path=outdir)
+    assert list(gauge.level) == [2]*4
+    assert np.allclose(gauge.q[0], np.arange(4) + 0.59375)
+    assert np.allclose(gauge.q[1], 0.09375)
+
+    gauge = GaugeSolution(3, path=outdir)
+    assert list(gauge.level) == [0]*4
+    assert np.all(np.isnan(gauge.q))
+
+    # New gauges are numbered after the existing ones
+    transects = virtual_gauges.extract_transects([[(0., 0.5), (1., 0.5)]],
+                                                 0.25, outdir=outdir,
+                                                 num_procs=2)
+    ids, s = transects[0]
+    assert ids == [4, 5, 6, 7, 8]
+    assert np.allclose(s, [0., 0.25, 0.5, 0.75, 1.])
+    gauge = GaugeSolution(8, path=outdir)
+    assert gauge.location == (1., 0.5)
+    assert np.allclose(gauge.q[0], np.arange(4) + 0.875)
+
+
+def test_extract_gauges_outside_archive(tmpdir):
+    pytest.importorskip('h5py')
+    from pyclaw.fileio import archive
+    outdir = str(tmpdir.join('_output'))
+    write_run(outdir)
+    archive.consolidate(outdir)
+    # No patch is near the points, so no patch is read
+    ids = virtual_gauges.extract_gauges([(3., 3.), (4., 3.)], outdir=outdir,
+                                        file_format='archive', num_procs=1)
+    gauge = GaugeSolution(ids[1], path=outdir)
+    assert np.allclose(gauge.t, [0., 0.5, 1., 1.5])
+    assert list(gauge.level) == [0]*4
+    assert gauge.q.shape == (2, 4)
+    assert np.all(np.isnan(gauge.q))
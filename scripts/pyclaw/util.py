@@ -707,6 +707,99 @@ def _arguments_str_from_dictionary(options):
     option_string = option_string.strip(',')
 
     return option_string
+
+
+class _ModuleName(str):
+    r"""Name of a module replaced by :func:`modules_to_names`."""
+    pass
+
+
+def modules_to_names(state):
+    r"""
+    Return a copy of the attribute dictionary *state* in which every module,
+    such as a solver's ``claw_package`` or compiled Fortran module, is
+    replaced by its name, so that the object can be pickled.
+    """
+    import types
+    state = dict(state)
+    for key, value in state.items():
+        if isinstance(value, types.ModuleType):
+            state[key] = _ModuleName(value.__name__)
+    return state
+
+
+def names_to_modules(state):
+    r"""
+    Inverse of :func:`modules_to_names`: import every module stored by name
+    in the attribute dictionary *state*.
+    """
+    import importlib
+    for key, value in state.items():
+        if isinstance(value, _ModuleName):
+            state[key] = importlib.import_module(str(value))
+    return state
+
+
+def num_workers(num_procs=None):
+    r"""
+    Number of worker processes :func:`map_processes` uses for *num_procs*:
+    the number of cores if *num_procs* is None.
+    """
+    if num_procs is None:
+        return os.cpu_count() or 1
+    return num_procs
+
+
+def map_processes(fun, jobs, num_procs=None, initializer=None, initargs=(),
+                  ordered=True, max_pending=None):
+    r"""
+    Iterate over ``fun(job)`` for every job of *jobs*.
+
+    The jobs are run on a pool of *num_procs* worker processes, all cores if
+    None, or one after the other in this process if *num_procs* is 1.  *fun*
+    and the jobs must then be picklable.
+
+    :Input:
+     - *fun* - (function) Function of one job, defined at module level
+     - *jobs* - (iterable) Jobs
+     - *num_procs* - (int) Number of worker processes
+     - *initializer* - (function) Called with *initargs* in every worker
+       process, or in this process if *num_procs* is 1, before the first job
+     - *ordered* - (bool) Yield the results in the order of *jobs*, rather
+       than as they are finished
+     - *max_pending* - (int) Maximum number of jobs submitted ahead of the
+       results consumed, all jobs if None; bounds the memory used by large
+       results
+    """
+    if num_procs == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for job in jobs:
+            yield fun(job)
+        return
+
+    import collections
+    import itertools
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=num_procs, initializer=initializer,
+                             initargs=initargs) as executor:
+        pending = collections.deque(
+            executor.submit(fun, job)
+            for job in itertools.islice(jobs, max_pending))
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                future = next(iter(wait(pending,
+                                         return_when=FIRST_COMPLETED).done))
+                pending.remove(future)
+            result = future.result()
+            for job in itertools.islice(jobs, 1):
+                pending.append(executor.submit(fun, job))
+            yield result
+
+
 #-----------------------------
 class FrameCounter:
 #-----------------------------
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Virtual gauges and transects extracted from the frame output of a run.
+
+Gauges have to be placed before a run; when a few thousand more points or a
+cross section of a river are needed afterwards, :func:`extract_gauges` reads
+every frame once and samples all the points in it.  In each frame a
+:class:`PatchIndex` finds the finest patch covering every point, whose cell
+value is then recorded; frames are split among a pool of processes.  The
+time series are written as ordinary gauge files (a ``gaugeNNNNN.txt``
+header and a columnar ``gaugeNNNNN.bin``), so that
+:class:`~pyclaw.gauges.GaugeSolution` and the gauge plots of visclaw read
+them like the gauges of the run::
+
+    from pyclaw import virtual_gauges
+    ids = virtual_gauges.extract_gauges([(x1,y1), (x2,y2)], outdir='_output',
+                                        output_path='_virtual')
+    x, y, s = virtual_gauges.transect_points([(0.,0.), (500.,200.)], 10.)
+    ids = virtual_gauges.extract_gauges(list(zip(x,y)), outdir='_output')
+
+Values are only available at the output times of the frames and are taken
+from the cell containing the point, without interpolation.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import glob
+
+import numpy as np
+import sys
+sys.path.append('../../../scripts')
+import pyclaw
+from .gauges import GaugeSolution
+from .fileio.ascii import output_frames
+from .util import map_processes, num_workers
+
+
+class PatchIndex(object):
+    r"""
+    Bucket index of the patches of a 2D frame, for locating points.
+
+    The domain is divided into buckets the size of the smallest patch and
+    every patch is registered in the buckets it overlaps, so that a point
+    only has to be tested against the few patches of its bucket.  A patch
+    covers the points within a thousandth of a cell of it, as in
+    :func:`visclaw.gridtools.grid_eval_2d`.
+
+    :Input:
+     - *states* - (list of :class:`~pyclaw.state.State`) States of the frame
+    """
+
+    def __init__(self, states):
+        self.states = states
+        if len(states) == 0:
+            # e.g. an archive read with a bbox or levels selecting no patch
+            self.order = np.empty(0, dtype=int)
+            return
+        patches = [state.patch for state in states]
+        level = np.array([getattr(patch, 'level', 1) for patch in patches])
+        pad = 1e-3*np.array([patch.delta for patch in patches], dtype=float)
+        lower = np.array([patch.lower_global for patch in patches],
+                         dtype=float) - pad
+        upper = np.array([patch.upper_global for patch in patches],
+                         dtype=float) + pad
+
+        # Patches sorted by level, so that the finest one has the largest rank
+        self.order = np.argsort(level, kind='stable')
+        self.level = level[self.order]
+        self.lower = lower[self.order].reshape(-1, 2)
+        self.upper = upper[self.order].reshape(-1, 2)
+        num_patches = len(self.order)
+
+        self.domain_lower = self.lower.min(axis=0)
+        domain_upper = self.upper.max(axis=0)
+        size = (self.upper - self.lower).min(axis=0)
+        extent = domain_upper - self.domain_lower
+        num_buckets = np.maximum(np.ceil(extent/size), 1).astype(int)
+        # Keep the number of buckets proportional to the number of patches
+        scale = np.sqrt(num_buckets.prod()/(4.*num_patches + 16.))
+        if scale > 1:
+            num_buckets = np.maximum((num_buckets/scale).astype(int), 1)
+        self.num_buckets = num_buckets
+        self.bucket_size = extent/num_buckets
+
+        ilo = self._bucket_coordinates(self.lower)
+        ihi = self._bucket_coordinates(self.upper)
+        width = ihi - ilo + 1
+        counts = width.prod(axis=1)
+        rank = np.repeat(np.arange(num_patches), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                counts)
+        i = ilo[rank, 0] + k % width[rank, 0]
+        j = ilo[rank, 1] + k // width[rank, 0]
+        bucket = i*num_buckets[1] + j
+        sort = np.argsort(bucket, kind='stable')
+        self.bucket_patches = rank[sort]
+        self.bucket_start = np.searchsorted(bucket[sort],
+                                            np.arange(num_buckets.prod() + 1))
+
+    def _bucket_coordinates(self, points):
+        ij = np.floor((points - self.domain_lower)/self.bucket_size)
+        return np.clip(ij.astype(int), 0, self.num_buckets - 1)
+
+    def locate(self, x, y):
+        r"""
+        Return the index in *states* of the finest patch containing each
+        point ``(x, y)``, or -1 for points outside all patches.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(self.order) == 0:
+            return -np.ones(len(x), dtype=int)
+        points = np.column_stack((x, y))
+        ij = self._bucket_coordinates(points)
+        bucket = ij[:, 0]*self.num_buckets[1] + ij[:, 1]
+        start = self.bucket_start[bucket]
+        counts = self.bucket_start[bucket + 1] - start
+
+        point = np.repeat(np.arange(len(x)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                counts)
+        rank = self.bucket_patches[np.repeat(start, counts) + k]
+        inside = np.all((self.lower[rank] <= points[point]) &
+                        (points[point] <= self.upper[rank]), axis=1)
+
+        found = np.empty(len(x), dtype=int)
+        found.fill(-1)
+        np.maximum.at(found, point[inside], rank[inside])
+        return np.where(found >= 0, self.order[found], -1)
+
+
+def sample_frame(solution, x, y, index=None, num_eqn=None, aux=False):
+    r"""
+    Sample the q values of the frame *solution* at the points ``(x, y)``.
+
+    Each point takes the values of the nearest cell center of the finest
+    patch covering it, as :func:`visclaw.gridtools.grid_output_2d` does
+    with ``method='nearest'``.
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) 2D frame
+     - *x, y* - (1d arrays) coordinates of the points
+     - *index* - (:class:`PatchIndex`) index of the states of the frame to
+       sample, e.g. of a subset of its levels, built for all its states if
+       None
+     - *num_eqn* - (int) number of components of q, taken from the states
+       of *solution* if None (0 if it has none)
+     - *aux* - (bool) also sample the aux arrays
+
+    :Output:
+     - (ndarray(:) - int) level of the patch used at each point, 0 outside
+       the domain
+     - (ndarray(num_eqn, :) - float) q at each point, NaN outside the domain
+     - (ndarray(num_aux, :) - float) aux at each point, NaN outside the
+       domain and where a patch has no aux array; only if *aux* is True
+    """
+    if index is None:
+        index = PatchIndex(solution.states)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    found = index.locate(x, y)
+
+    level = np.zeros(len(x), dtype=int)
+    if num_eqn is None:
+        num_eqn = solution.states[0].num_eqn if solution.states else 0
+    q = np.empty((num_eqn, len(x)))
+    q.fill(np.nan)
+    if aux:
+        num_aux = solution.states[0].num_aux if solution.states else 0
+        aux_values = np.empty((num_aux, len(x)))
+        aux_values.fill(np.nan)
+
+    order = np.argsort(found, kind='stable')
+    patches, first = np.unique(found[order], return_index=True)
+    last = np.append(first[1:], len(order))
+    for n, start, stop in zip(patches, first, last):
+        if n < 0:
+            continue
+        points = order[start:stop]
+        state = index.states[n]
+        grid = state.grid
+        i = _nearest_cell(grid.x.centers, x[points])
+        j = _nearest_cell(grid.y.centers, y[points])
+        q[:, points] = state.q[:, i, j]
+        if aux and state.aux is not None:
+            aux_values[:, points] = state.aux[:, i, j]
+        level[points] = getattr(state.patch, 'level', 1)
+    if aux:
+        return level, q, aux_values
+    return level, q
+
+
+def _nearest_cell(centers, x):
+    r"""
+    Index of the cell center nearest each of the points *x*, with ties
+    broken as by :func:`visclaw.gridtools.grid_eval_2d` so that points on
+    cell edges take the same cell.
+    """
+    if len(centers) == 1:
+        return np.zeros(len(x), dtype=int)
+    dx = centers[1] - centers[0]
+    nodes = np.hstack((centers[0] - 0.501*dx, centers,
+                       centers[-1] + 0.501*dx))
+    i = np.clip(np.searchsorted(nodes, x, side='right') - 1,
+                0, len(nodes) - 2)
+    frac = (x - nodes[i])/(nodes[i+1] - nodes[i])
+    k = np.where(frac <= 0.5, i, i + 1)
+    return np.clip(k - 1, 0, len(centers) - 1)
+
+
+def transect_points(polyline, spacing):
+    r"""
+    Equally spaced points at most *spacing* apart along the polyline
+    ``[(x0,y0), (x1,y1), ...]``, including both ends.
+
+    :Output:
+     - *x, y* - (1d arrays) coordinates of the points
+     - *s* - (1d array) distance of each point along the polyline
+    """
+    polyline = np.asarray(polyline, dtype=float)
+    length = np.append(0., np.cumsum(np.hypot(*np.diff(polyline, axis=0).T)))
+    num_points = int(np.ceil(length[-1]/spacing - 1e-9)) + 1
+    s = np.linspace(0., length[-1], max(num_points, 2))
+    x = np.interp(s, length, polyline[:, 0])
+    y = np.interp(s, length, polyline[:, 1])
+    return x, y, s
+
+
+def _frame_header(frame, outdir, file_format, file_prefix):
+    r"""Time and number of components of q of a frame, from its header."""
+    if file_format == 'archive':
+        import h5py
+        from .fileio import archive
+        with h5py.File(archive.archive_path(outdir), 'r') as f:
+            attrs = f['frames/%s' % str(frame).zfill(4)].attrs
+            return attrs['t'], int(attrs['num_eqn'])
+    from .fileio.ascii import read_t
+    t, num_eqn = read_t(frame, outdir, file_prefix)[:2]
+    return t, num_eqn
+
+
+def _sample_frames(args):
+    r"""Process pool entry point: sample the points in some frames."""
+    frames, x, y, outdir, file_format, file_prefix = args
+    bbox = [x.min(), x.max(), y.min(), y.max()]
+    t = np.empty(len(frames))
+    level = np.empty((len(frames), len(x)), dtype=int)
+    q = None
+    for n, frame in enumerate(frames):
+        solution = pyclaw.Solution(frame, path=outdir,
+                                   file_format=file_format,
+                                   file_prefix=file_prefix, read_aux=False,
+                                   bbox=bbox)
+        if len(solution.states) > 0:
+            t[n] = solution.t
+            level[n], values = sample_frame(solution, x, y)
+        else:
+            # No patch near the points: NaN samples
+            t[n], num_eqn = _frame_header(frame, outdir, file_format,
+                                          file_prefix)
+            level[n], values = sample_frame(solution, x, y, num_eqn=num_eqn)
+        if q is None:
+            q = np.empty((len(frames),) + values.shape)
+        q[n] = values
+    return t, level, q
+
+
+def extract_gauges(points, outdir='_output', frames=None, file_format='ascii',
+                   file_prefix='fort', output_path=None, gauge_ids=None,
+                   gauge_format='binary64', num_procs=None):
+    r"""
+    Write the time series of q at *points* in the frames of a run as gauge
+    files.
+
+    :Input:
+     - *points* - (list of (x,y)) locations of the virtual gauges
+     - *outdir* - (string) output directory, or archive if *file_format* is
+       'archive' (only patches near the points are then read)
+     - *frames* - (list) frames to use, all of them by default
+     - *file_format*, *file_prefix* - of the frames
+     - *output_path* - (string) directory for the gauge files, *outdir* by
+       default (the directory of the archive for 'archive')
+     - *gauge_ids* - (list of int) gauge numbers, by default consecutive
+       numbers following the largest gauge number in *output_path*
+     - *gauge_format* - (string) 'binary64', 'binary32' or 'ascii', see
+       :meth:`~pyclaw.gauges.GaugeSolution.write`
+     - *num_procs* - (int) number of processes, see
+       :func:`pyclaw.util.map_processes`
+
+    :Output:
+     - (list of int) gauge numbers of the points
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    x = points[:, 0].copy()
+    y = points[:, 1].copy()
+
+    if output_path is None:
+        output_path = outdir
+        if file_format == 'archive' and not os.path.isdir(outdir):
+            output_path = os.path.dirname(os.path.abspath(outdir))
+    if not os.path.isdir(output_path):
+        os.makedirs(output_path)
+    if gauge_ids is None:
+        existing = [int(os.path.basename(fname)[5:10]) for fname in
+                    glob.glob(os.path.join(output_path, 'gauge?????.txt'))]
+        first = max(existing) + 1 if existing else 1
+        gauge_ids = list(range(first, first + len(x)))
+    if len(gauge_ids) != len(x):
+        raise ValueError("Need one gauge id per point.")
+
+    if frames is None:
+        frames = output_frames(outdir, file_prefix, file_format)
+    if len(frames) == 0:
+        raise IOError("No frames found in %s" % outdir)
+
+    num_chunks = min(num_workers(num_procs), len(frames))
+    jobs = [([int(frame) for frame in chunk], x, y, outdir, file_format, file_prefix)
+            for chunk in np.array_split(frames, num_chunks)]
+    results = list(map_processes(_sample_frames, jobs, num_procs))
+
+    t = np.concatenate([result[0] for result in results])
+    level = np.concatenate([result[1] for result in results])
+    q = np.concatenate([result[2] for result in results])
+    order = np.argsort(t, kind='stable')
+    t, level, q = t[order], level[order], q[order]
+
+    gauge = GaugeSolution()
+    gauge.t = t
+    for n, gauge_id in enumerate(gauge_ids):
+        gauge.id = gauge_id
+        gauge.location = (x[n], y[n])
+        gauge.level = level[:, n]
+        gauge.q = q[:, :, n].T
+        gauge.write(output_path, file_format=gauge_format)
+    return list(gauge_ids)
+
+
+def extract_transects(polylines, spacing, **kargs):
+    r"""
+    Write virtual gauges every *spacing* along each polyline of
+    *polylines*, see :func:`transect_points` and :func:`extract_gauges`
+    (whose keyword arguments are accepted, except *gauge_ids*).
+
+    :Output:
+     - (list) ``(gauge_ids, s)`` for every polyline, *s* being the distance
+       of each gauge along it
+    """
+    x, y, s, counts = [], [], [], []
+    for polyline in polylines:
+        xt, yt, st = transect_points(polyline, spacing)
+        x.append(xt)
+        y.append(yt)
+        s.append(st)
+        counts.append(len(st))
+    ids = extract_gauges(np.column_stack((np.concatenate(x),
+                                          np.concatenate(y))), **kargs)
+    splits = np.cumsum(counts)[:-1]
+    return [(list(gauge_ids), st) for gauge_ids, st in
+            zip(np.split(np.array(ids), splits), s)]
@@ -0,0 +1,10 @@
+"""
+Pure Python Riemann solvers.
+
+These mirror the ``*_py`` solvers of the clawpack.riemann package and can be
+passed to the pyclaw solvers when ``kernel_language = 'Python'``.
+"""
+
+from __future__ import absolute_import
+__all__ = ['shallow_2D_py']
+from . import shallow_2D_py
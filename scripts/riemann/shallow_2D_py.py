@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Riemann solvers for the 2D shallow water equations with bathymetry.
+
+.. math::
+    h_t + (hu)_x + (hv)_y & = 0 \\
+    (hu)_t + (hu^2 + \frac{1}{2}gh^2)_x + (huv)_y & = -g h b_x \\
+    (hv)_t + (huv)_x + (hv^2 + \frac{1}{2}gh^2)_y & = -g h b_y
+
+The solvers are fully vectorized: the left and right states may have any
+shape ``(num_eqn, ...)`` and the waves are returned with matching trailing
+dimensions.  The normal direction is given by *idir* (0 for x, 1 for y), so
+the same solver is used for both sweeps of a dimensionally split step.
+
+The bathymetry is taken from ``aux[0]`` as in GeoClaw.  The following keys of
+*problem_data* are used:
+
+ - *grav* - (float) Gravitational constant
+ - *dry_tolerance* - (float) Depth below which a cell is considered dry
+ - *sea_level* - (float) Not used by the solver but kept for compatibility
+   with the 1D shallow water solvers
+
+:Authors:
+    Based on the 1D shallow water f-wave solver of Clawpack and the
+    wet/dry treatment of the GeoClaw ``rpn2`` solver.
+"""
+
+from __future__ import absolute_import
+import numpy as np
+
+num_eqn = 3
+num_waves = 3
+
+
+def _work_array(work, name, shape, dtype=float):
+    r"""
+    Array *name* of *work* with the given shape, allocated on first use or
+    when the shape changes; a new array if *work* is None.
+    """
+    if work is None:
+        return np.empty(shape, dtype=dtype)
+    a = work.get(name)
+    if a is None or a.shape != shape:
+        a = work[name] = np.empty(shape, dtype=dtype)
+    return a
+
+
+def shallow_fwave_2d(q_l, q_r, aux_l, aux_r, problem_data, idir=0, work=None):
+    r"""
+    f-wave Riemann solver for the 2D shallow water equations with
+    bathymetry and wet/dry interfaces, GeoClaw style.
+
+    The flux difference, including the bathymetry source term, is split into
+    two acoustic f-waves travelling at the Einfeldt speeds and a shear wave
+    carrying the jump in transverse momentum flux at the Roe speed.  If one
+    side of the interface is dry and its bathymetry lies above the surface
+    on the wet side, the dry side is treated as a reflecting wall and no
+    waves enter the dry cell.  Still water over varying bathymetry produces
+    no waves, so lake at rest is preserved exactly.
+
+    :Input:
+     - *q_l*, *q_r* - (ndarray(3,...)) States to the left and right of each
+       interface
+     - *aux_l*, *aux_r* - (ndarray(num_aux,...)) Auxiliary arrays, the
+       bathymetry is ``aux[0]``
+     - *problem_data* - (dict) See module documentation
+     - *idir* - (int) Normal direction, 0 for x and 1 for y
+     - *work* - (dict) Work arrays kept between calls, filled on the first
+       call; the outputs are then views of it, overwritten by the next call
+
+    :Output:
+     - (ndarray(3,3,...)) - f-waves
+     - (ndarray(3,...)) - Wave speeds
+     - (ndarray(3,...)) - Left-going fluctuations
+     - (ndarray(3,...)) - Right-going fluctuations
+    """
+    g = problem_data['grav']
+    dry_tolerance = problem_data['dry_tolerance']
+
+    mu = 1 + idir       # normal momentum
+    mv = 2 - idir       # transverse momentum
+
+    shape = q_l.shape[1:]
+    fwave = _work_array(work, 'fwave', (num_eqn, num_waves) + shape)
+    s = _work_array(work, 's', (num_waves,) + shape)
+    fwave.fill(0.)
+    s.fill(0.)
+
+    # Copies of the states with dry cells emptied
+    dry_l = np.less_equal(q_l[0], dry_tolerance,
+                          out=_work_array(work, 'dry_l', shape, bool))
+    dry_r = np.less_equal(q_r[0], dry_tolerance,
+                          out=_work_array(work, 'dry_r', shape, bool))
+    h_l = _work_array(work, 'h_l', shape)
+    h_r = _work_array(work, 'h_r', shape)
+    hu_l = _work_array(work, 'hu_l', shape)
+    hu_r = _work_array(work, 'hu_r', shape)
+    hv_l = _work_array(work, 'hv_l', shape)
+    hv_r = _work_array(work, 'hv_r', shape)
+    for side, dry, h, hu, hv in [(q_l, dry_l, h_l, hu_l, hv_l),
+                                 (q_r, dry_r, h_r, hu_r, hv_r)]:
+        np.copyto(h, side[0])
+        np.copyto(hu, side[mu])
+        np.copyto(hv, side[mv])
+        for a in (h, hu, hv):
+            a[dry] = 0.
+    b_l = _work_array(work, 'b_l', shape)
+    b_r = _work_array(work, 'b_r', shape)
+    np.copyto(b_l, aux_l[0])
+    np.copyto(b_r, aux_r[0])
+    wet_l = ~dry_l
+    wet_r = ~dry_r
+
+    # Dry side with bathymetry above the wet surface acts as a wall
+    wall_r = wet_l & dry_r & (b_r >= h_l + b_l)
+    wall_l = wet_r & dry_l & (b_l >= h_r + b_r)
+    h_r[wall_r] = h_l[wall_r]
+    hu_r[wall_r] = -hu_l[wall_r]
+    hv_r[wall_r] = hv_l[wall_r]
+    b_r[wall_r] = b_l[wall_r]
+    h_l[wall_l] = h_r[wall_l]
+    hu_l[wall_l] = -hu_r[wall_l]
+    hv_l[wall_l] = hv_r[wall_l]
+    b_l[wall_l] = b_r[wall_l]
+
+    wet_l = h_l > 0.
+    wet_r = h_r > 0.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u_l = np.where(wet_l, hu_l/h_l, 0.)
+        u_r = np.where(wet_r, hu_r/h_r, 0.)
+        v_l = np.where(wet_l, hv_l/h_l, 0.)
+        v_r = np.where(wet_r, hv_r/h_r, 0.)
+
+    # Roe averages and Einfeldt speeds
+    sqrt_h_l = np.sqrt(h_l)
+    sqrt_h_r = np.sqrt(h_r)
+    sqrt_sum = sqrt_h_l + sqrt_h_r
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u_hat = np.where(sqrt_sum > 0.,
+                         (u_l*sqrt_h_l + u_r*sqrt_h_r)/sqrt_sum, 0.)
+    c_hat = np.sqrt(0.5*g*(h_l + h_r))
+    c_l = np.sqrt(g*h_l)
+    c_r = np.sqrt(g*h_r)
+
+    s1 = np.where(wet_l, np.minimum(u_l - c_l, u_hat - c_hat),
+                         u_r - 2.*c_r)
+    s3 = np.where(wet_r, np.maximum(u_r + c_r, u_hat + c_hat),
+                         u_l + 2.*c_l)
+    s[0] = s1
+    s[1] = u_hat
+    s[2] = s3
+
+    # Flux difference including the bathymetry source term
+    delta_h = hu_r - hu_l
+    delta_hu = (hu_r*u_r + 0.5*g*h_r**2) - (hu_l*u_l + 0.5*g*h_l**2) \
+               + 0.5*g*(h_l + h_r)*(b_r - b_l)
+    delta_hv = hu_r*v_r - hu_l*v_l
+
+    dry = ~(wet_l | wet_r)
+    ds = np.where(dry, 1., s3 - s1)
+    beta1 = np.where(dry, 0., (s3*delta_h - delta_hu)/ds)
+    beta3 = np.where(dry, 0., (delta_hu - s1*delta_h)/ds)
+
+    fwave[0,0] = beta1
+    fwave[mu,0] = beta1*s1
+    fwave[mv,0] = beta1*v_l
+    fwave[0,2] = beta3
+    fwave[mu,2] = beta3*s3
+    fwave[mv,2] = beta3*v_r
+    fwave[mv,1] = delta_hv - beta1*v_l - beta3*v_r
+
+    # No waves enter a wall
+    fwave[:,1:,wall_r] = 0.
+    fwave[:,:2,wall_l] = 0.
+    s[:,dry] = 0.
+
+    # Fluctuations, half of a wave of zero speed going each way
+    amdq = _work_array(work, 'amdq', (num_eqn,) + shape)
+    apdq = _work_array(work, 'apdq', (num_eqn,) + shape)
+    amdq.fill(0.)
+    apdq.fill(0.)
+    half = _work_array(work, 'half', (num_eqn,) + shape)
+    for mw in range(num_waves):
+        np.add(amdq, fwave[:,mw], out=amdq, where=s[mw] < 0.)
+        np.add(apdq, fwave[:,mw], out=apdq, where=s[mw] > 0.)
+        still = s[mw] == 0.
+        if still.any():
+            np.multiply(fwave[:,mw], 0.5, out=half)
+            np.add(amdq, half, out=amdq, where=still)
+            np.add(apdq, half, out=apdq, where=still)
+
+    return fwave, s, amdq, apdq
+
+shallow_fwave_2d.num_eqn = num_eqn
+shallow_fwave_2d.num_waves = num_waves
+shallow_fwave_2d.uses_work = True
@@ -103,73 +103,217 @@ def swap_header(fp):
         return fnew
 
 # =================== merge dems ======================================
-def merge_dems(dem_paths, output_filename):
+def read_dem_header(fp):
     """
-    Merge multiple DEMs into a single file.
+    Read the header of an ASCII (topo_type 2 or 3) or GeoTIFF DEM.
+
+    Header lines may be written value first or label first, and the lower
+    left corner may be given as xllcorner/yllcorner or as the center of the
+    lower left cell (xllcenter/yllcenter, or xlower/ylower as GeoClaw
+    writes it).
+
+    Returns
+    -------
+    dict
+        ncols, nrows, xll and yll (lower left corner), dx, dy and nodata.
+    """
+
+    if os.path.splitext(fp)[1].lower() in ['.tif', '.tiff']:
+        import rasterio
+        with rasterio.open(fp) as src:
+            t = src.transform
+            nodata = src.nodata if src.nodata is not None else np.nan
+            return {'ncols': src.width, 'nrows': src.height,
+                    'xll': t.c, 'yll': t.f + src.height*t.e,
+                    'dx': t.a, 'dy': -t.e, 'nodata': nodata}
+
+    header = {}
+    with open(fp, 'r') as f:
+        for i in range(6):
+            entries = f.readline().split()
+            try:
+                # Value first, which may be nan as well as a number
+                float(entries[0])
+                label, values = entries[-1].lower(), entries[:-1]
+            except ValueError:
+                label, values = entries[0].lower(), entries[1:]
+            header[label] = [float(v) for v in values]
+
+    dx = header['cellsize'][0]
+    dy = header['cellsize'][-1]
+    corner = {}
+    for xy, d in zip(['x', 'y'], [dx, dy]):
+        if xy + 'llcorner' in header:
+            corner[xy] = header[xy + 'llcorner'][0]
+        else:
+            center = header.get(xy + 'llcenter', header.get(xy + 'lower'))
+            corner[xy] = center[0] - d/2.
+    return {'ncols': int(header['ncols'][0]), 'nrows': int(header['nrows'][0]),
+            'xll': corner['x'], 'yll': corner['y'], 'dx': dx, 'dy': dy,
+            'nodata': header['nodata_value'][0]}
+
+
+def read_dem_rows(fp, header, chunk_rows):
+    """
+    Yield (first row, rows) of a DEM, chunk_rows rows at a time starting
+    from the top, without reading the whole file.
+    """
+
+    nrows, ncols = header['nrows'], header['ncols']
+    if os.path.splitext(fp)[1].lower() in ['.tif', '.tiff']:
+        import rasterio
+        from rasterio.windows import Window
+        with rasterio.open(fp) as src:
+            for r0 in range(0, nrows, chunk_rows):
+                n = min(chunk_rows, nrows - r0)
+                yield r0, src.read(1, window=Window(0, r0, ncols, n)).astype(float)
+        return
+
+    with open(fp, 'r') as f:
+        for i in range(6):
+            f.readline()
+        # Values may be one per line (topo_type 2) or one row per line (3)
+        values = []
+        num_values = 0
+        r0 = 0
+        for line in f:
+            row = np.fromstring(line, sep=' ')
+            values.append(row)
+            num_values += len(row)
+            if num_values >= chunk_rows*ncols:
+                data = np.concatenate(values)
+                n = len(data) // ncols
+                yield r0, data[:n*ncols].reshape(n, ncols)
+                values = [data[n*ncols:]]
+                num_values = len(values[0])
+                r0 += n
+        if num_values > 0:
+            data = np.concatenate(values)
+            yield r0, data[:(len(data)//ncols)*ncols].reshape(-1, ncols)
+
+
+def merge_dems(dem_paths, output_filename, priority='resolution', cellsize=None,
+               nodata_value=-9999, chunk_rows=256, max_memory=2**30,
+               Z_format='%15.7e'):
+    """
+    Merge multiple DEMs into a single topo_type 3 file.
+
+    The tiles are streamed a few rows at a time into the output grid, so
+    only the output (memory-mapped if larger than max_memory bytes) and
+    chunk_rows rows of one tile are in memory. Every output cell takes
+    the value of the tile cell containing its center, from the tile of
+    highest priority with data there.
 
     Parameters
     ----------
     dem_paths : list
-        A list of file paths to the DEMs to be merged.
+        A list of file paths to the DEMs to be merged, ASCII (topo_type 2
+        or 3, header label first or last) or GeoTIFF (needs rasterio).
     output_filename : str
         The file path to the output file.
+    priority : str or list
+        'resolution' for the finest tile first, 'first' or 'last' for the
+        first or last tile in dem_paths first, or a number per tile, the
+        highest first. Ties go to the tile first in dem_paths.
+    cellsize : float or tuple
+        Cell size of the output, the finest of the tiles by default.
+    nodata_value : float
+        Value written where no tile has data, possibly NaN.
+    chunk_rows : int
+        Number of rows of a tile read at a time.
 
     Returns
     -------
-    None
+    dict
+        The header of the output, as returned by read_dem_header.
     """
 
-    # import the necessary modules
-    import rasterio
-    from rasterio.merge import merge
-
-    # merge the DEMs
-    src_files_to_mosaic = []
-    for fp in dem_paths:
-        swap_header(fp) # swap the header of the DEM if necessary
-        src = rasterio.open(fp + '_new')   # open the new DEM
-        src_files_to_mosaic.append(src)   # append the DEM to the list of DEMs to be merged
-        mosaic, out = merge(src_files_to_mosaic)  # merge the DEMs
-
-    # copy the file meta data to the mosaic
-    out_meta = src.meta.copy()
-    out_meta.update(
-        {'driver': 'GTiff',
-            'height': mosaic.shape[1],
-            'width': mosaic.shape[2],
-            'transform': out,
-            }
-    )
-
-    # write the mosaic to a new GeoTIFF file
-    tif_file = output_filename[:-4] + '.tif'
-    with rasterio.open(
-            tif_file,
-            "w",
-            **out_meta
-    ) as dest:
-        dest.write(mosaic)
-
-    # ==== save the mosaic as a new ASCII DEM file ========================
-    # Construct the gdal_translate command
-    command = [
-        'gdal_translate',
-        '-of', 'AAIGrid',  # Output format
-        tif_file,  # Input TIFF file
-        output_filename  # Output ASCII DEM file
-    ]
-
-    # Execute the command using subprocess
-    import subprocess
-    subprocess.run(command, check=True)
-
-    # remove the temporary files with errors
-    for fp in dem_paths:
-        if os.path.isfile(fp + '_new'): os.remove(fp + '_new')
-        if os.path.isfile(fp[:-4] + '_merged.tif'): os.remove(fp[:-4] + '_merged.tif')
-        if os.path.isfile(fp + '.xml'): os.remove(fp + '.xml')
-        if os.path.isfile(fp[:-4] + '_merged.tt2.aux.xml'): os.remove(fp[:-4] + '_merged.tt2.aux.xml')
-            
+    headers = [read_dem_header(fp) for fp in dem_paths]
+
+    # Tiles in the order they claim cells
+    num_tiles = len(dem_paths)
+    if priority == 'resolution':
+        rank = [h['dx']*h['dy'] for h in headers]
+    elif priority == 'first':
+        rank = list(range(num_tiles))
+    elif priority == 'last':
+        rank = list(range(num_tiles, 0, -1))
+    else:
+        rank = [-p for p in priority]
+    order = sorted(range(num_tiles), key=lambda k: (rank[k], k))
+
+    # Output grid covering all the tiles
+    if cellsize is None:
+        dx = min(h['dx'] for h in headers)
+        dy = min(h['dy'] for h in headers)
+    else:
+        dx, dy = np.ones(2)*cellsize
+    xll = min(h['xll'] for h in headers)
+    yll = min(h['yll'] for h in headers)
+    xur = max(h['xll'] + h['ncols']*h['dx'] for h in headers)
+    yur = max(h['yll'] + h['nrows']*h['dy'] for h in headers)
+    ncols = int(np.ceil((xur - xll)/dx - 1e-6))
+    nrows = int(np.ceil((yur - yll)/dy - 1e-6))
+    yur = yll + nrows*dy
+
+    # Rows from the top, as in the files
+    shape = (nrows, ncols)
+    mosaic_file = None
+    if nrows*ncols*8 > max_memory:
+        mosaic_file = output_filename + '.mosaic'
+        Z = np.memmap(mosaic_file, dtype=float, mode='w+', shape=shape)
+    else:
+        Z = np.empty(shape)
+    Z[...] = np.nan
+    x = xll + (np.arange(ncols) + 0.5)*dx
+    y = yur - (np.arange(nrows) + 0.5)*dy
+
+    for k in order:
+        h = headers[k]
+        # Tile cell containing each output cell center
+        col = np.floor((x - h['xll'])/h['dx']).astype(int)
+        row = np.floor((h['yll'] + h['nrows']*h['dy'] - y)/h['dy']).astype(int)
+        cols = np.nonzero((0 <= col) & (col < h['ncols']))[0]
+        rows = np.nonzero((0 <= row) & (row < h['nrows']))[0]
+        if len(cols) == 0 or len(rows) == 0:
+            continue
+        j0, j1 = cols[0], cols[-1] + 1
+        for r0, data in read_dem_rows(dem_paths[k], h, chunk_rows):
+            i = rows[(r0 <= row[rows]) & (row[rows] < r0 + len(data))]
+            if len(i) == 0:
+                continue
+            values = data[row[i] - r0][:, col[j0:j1]]
+            values[values == h['nodata']] = np.nan
+            block = Z[i[0]:i[-1]+1, j0:j1]   # a view, updated in place
+            empty = np.isnan(block)
+            block[empty] = values[empty]
+
+    with open(output_filename, 'w') as f:
+        f.write('%6i                              ncols\n' % ncols)
+        f.write('%6i                              nrows\n' % nrows)
+        f.write('%22.15e              xllcorner\n' % xll)
+        f.write('%22.15e              yllcorner\n' % yll)
+        if abs(dx - dy) < 1e-8*dx:
+            f.write('%22.15e              cellsize\n' % dx)
+        else:
+            f.write('%22.15e    %22.15e          cellsize\n' % (dx, dy))
+        # As the data, so that the cells without data match the header
+        if float(nodata_value).is_integer():
+            nodata = '%10i' % nodata_value
+        else:
+            nodata = Z_format % nodata_value
+        f.write('%s                          nodata_value\n' % nodata)
+        for r0 in range(0, nrows, chunk_rows):
+            block = np.array(Z[r0:r0+chunk_rows])
+            block[np.isnan(block)] = nodata_value
+            np.savetxt(f, block, fmt=Z_format)
+
+    if mosaic_file is not None:
+        del Z
+        os.remove(mosaic_file)
+
+    return {'ncols': ncols, 'nrows': nrows, 'xll': xll, 'yll': yll,
+            'dx': dx, 'dy': dy, 'nodata': nodata_value}
 
 
 def convert_file_type(input_file,output_file,input_type,output_type):
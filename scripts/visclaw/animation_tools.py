@@ -9,6 +9,8 @@ Three types of animations are supported:
    NOTE: this replaces the old JSAnimation tools, now incorporated into
    matplotlib's `animation.FuncAnimation`.
  - creation of mp4 files using ffmpeg (provided this package is installed).
+   stream_anim renders figures and pipes them to ffmpeg one at a time, on
+   several processes, without png files or holding all frames in memory.
 
 The set of images to combine in an animation can be specified as a
 list of images, a list of `matplotlib` figures, or a directory of
@@ -50,6 +52,8 @@ from __future__ import print_function
 from matplotlib import image, animation
 from matplotlib import pyplot as plt
 import warnings
+import sys
+sys.path.append('../../../scripts')
 
 
 def make_plotdir(plotdir='_plots', clobber=True):
@@ -116,19 +120,8 @@ def make_anim(plotdir, fname_pattern='frame*.png', figsize=None, dpi=None):
     filenames=sorted(filenames)
 
     im0 = image.imread(filenames[0])
-    
-    if figsize is None:
-        # choose figsize based on aspect ratio of image
-        xin = 6.  # width in inches
-        yin = xin * im0.shape[0]/im0.shape[1]
-        figsize = (xin,yin)
-        #print('+++ im0.shape, xin, yin: ',im0.shape, xin, yin)
-        
-    fig = plt.figure(figsize=figsize, dpi=dpi)
-    ax = fig.add_axes([0, 0, 1, 1])
-    ax.axis('off')  # so there's not a second set of axes
-    im = plt.imshow(im0)
-    
+    fig, im = image_figure(im0, figsize, dpi)
+
     def init():
         im.set_data(im0)
         return im,
@@ -146,6 +139,25 @@ def make_anim(plotdir, fname_pattern='frame*.png', figsize=None, dpi=None):
     return anim
 
 
+def image_figure(im0, figsize=None, dpi=None):
+    """
+    Create a figure showing the image im0 on axes filling it, as used by
+    make_anim, and return the figure and the AxesImage.  If figsize is None
+    the figure is 6 inches wide with the aspect ratio of the image.
+    """
+    if figsize is None:
+        # choose figsize based on aspect ratio of image
+        xin = 6.  # width in inches
+        yin = xin * im0.shape[0]/im0.shape[1]
+        figsize = (xin,yin)
+
+    fig = plt.figure(figsize=figsize, dpi=dpi)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.axis('off')  # so there's not a second set of axes
+    im = ax.imshow(im0)
+    return fig, im
+
+
 def animate_images(images, figsize=(10,6), dpi=None):
 
     """
@@ -263,6 +275,201 @@ def make_mp4(anim, file_name='anim.mp4',
     print("Created %s" % file_name)
 
 
+class VideoWriter(object):
+    """
+    Write frames given as RGB(A) arrays to a video file one at a time,
+    by piping them to an ffmpeg process, so that memory use does not grow
+    with the number of frames.
+
+    If ffmpeg is not available the frames are written as an image sequence
+    instead, to the directory file_name without its extension, e.g.
+    anim/frame00000.png for anim.mp4, which ffmpeg can encode later.
+    The ffmpeg executable is taken from matplotlib's
+    rcParams['animation.ffmpeg_path'].
+    """
+
+    def __init__(self, file_name='anim.mp4', fps=5, codec='libx264',
+                 extra_args=None):
+        import os, shutil
+        import matplotlib
+        self.file_name = file_name
+        self.fps = fps
+        self.codec = codec
+        self.extra_args = extra_args if extra_args is not None else []
+        self.shape = None
+        self.num_frames = 0
+        self._proc = None
+        self.ffmpeg = shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+        if self.ffmpeg is None:
+            self.frame_dir = os.path.splitext(file_name)[0]
+            if not os.path.isdir(self.frame_dir):
+                os.makedirs(self.frame_dir)
+            msg = "\n*** ffmpeg not found, writing frames to %s" \
+                  % self.frame_dir
+            warnings.warn(msg)
+
+    def _start(self, shape):
+        import subprocess
+        height, width, depth = shape
+        pix_fmt = {3: 'rgb24', 4: 'rgba'}[depth]
+        cmd = [self.ffmpeg, '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', pix_fmt,
+               '-s', '%ix%i' % (width, height), '-r', str(self.fps),
+               '-i', '-',
+               # libx264 with yuv420p needs even dimensions:
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+               '-vcodec', self.codec, '-pix_fmt', 'yuv420p'] \
+              + list(self.extra_args) + [self.file_name]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        """
+        Append frame, an array of shape (height, width, 3 or 4) of uint8
+        values or of floats between 0 and 1 (as returned by plt.imread).
+        All frames must have the same shape.
+        """
+        import os
+        import numpy as np
+        frame = np.asarray(frame)
+        if frame.dtype != np.uint8:
+            frame = np.clip(np.round(frame*255), 0, 255).astype(np.uint8)
+        if self.shape is None:
+            self.shape = frame.shape
+            if self.ffmpeg is not None:
+                self._start(frame.shape)
+        elif frame.shape != self.shape:
+            raise ValueError("Frame %i has shape %s, expected %s"
+                             % (self.num_frames, frame.shape, self.shape))
+
+        if self.ffmpeg is not None:
+            self._proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+        else:
+            filename = os.path.join(self.frame_dir, 'frame%s.png'
+                                    % str(self.num_frames).zfill(5))
+            plt.imsave(filename, frame)
+        self.num_frames += 1
+
+    def close(self):
+        """Finish the video and wait for ffmpeg."""
+        if self._proc is not None:
+            self._proc.stdin.close()
+            if self._proc.wait() != 0:
+                raise RuntimeError("ffmpeg failed writing %s" % self.file_name)
+            self._proc = None
+            print("Created %s" % self.file_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def render_figure(fig, dpi=None):
+    """
+    Render the matplotlib figure fig and return its pixels as an array of
+    shape (height, width, 4) of uint8 values, without writing an image file.
+    """
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    if dpi is not None:
+        fig.set_dpi(dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
+
+
+# Set in every worker process by _init_render_worker
+_render = {}
+
+def _init_render_worker(plotfun, dpi, worker=True):
+    # Frames are drawn by render_figure with Agg whatever the backend, so
+    # the backend of the caller is left alone when rendering in-process.
+    if worker:
+        import matplotlib
+        matplotlib.use('Agg')
+    _render['plotfun'] = plotfun
+    _render['dpi'] = dpi
+
+
+def _render_frame(frameno):
+    """Process pool entry point: render one frame to an array."""
+    fig = _render['plotfun'](frameno)
+    if fig is None:
+        fig = plt.gcf()
+    frame = render_figure(fig, _render['dpi'])
+    plt.close(fig)
+    return frame
+
+
+def stream_anim(plotfun, framenos, file_name='anim.mp4', fps=5, dpi=None,
+                num_procs=None, codec='libx264'):
+    """
+    Make a video directly from figures, without saving png files or holding
+    more than a few frames in memory.
+
+    plotfun(frameno) must create the figure for frame frameno and return it
+    (or leave it as the current figure).  Frames are rendered on num_procs
+    worker processes (see pyclaw.util.map_processes) and written to
+    file_name in the order of framenos as they come in, see VideoWriter.
+    On platforms that do not fork, plotfun must be defined at the top
+    level of a module.
+
+    For example, to animate figure 2 of a setplot function:
+        def plotfun(frameno):
+            frametools.plotframe(frameno, plotdata)
+            return plt.figure(2)
+        stream_anim(plotfun, range(101), 'teton.mp4', fps=10)
+    """
+    from pyclaw.util import map_processes, num_workers
+
+    # keep only a couple of frames per worker in flight:
+    frames = map_processes(_render_frame, framenos, num_procs,
+                           initializer=_init_render_worker,
+                           initargs=(plotfun, dpi, num_procs != 1),
+                           max_pending=2*num_workers(num_procs))
+    with VideoWriter(file_name, fps=fps, codec=codec) as writer:
+        for frame in frames:
+            writer.write(frame)
+    return writer.num_frames
+
+
+def make_mp4_from_plotdir(plotdir='_plots', fname_pattern='frame*.png',
+                          file_name='anim.mp4', fps=5, figsize=None, dpi=None):
+    """
+    Encode the image files in plotdir matching fname_pattern, in sorted
+    order, to a video, reading one image at a time.  Unlike make_anim and
+    make_mp4 this does not hold all images in memory.
+
+    The images are encoded at their own size unless figsize or dpi is
+    given, in which case they are shown in a figure of that size as in
+    make_anim, see image_figure.
+    """
+    import glob, os
+
+    filenames = sorted(glob.glob(os.path.join(plotdir, fname_pattern)))
+    if len(filenames) == 0:
+        msg = '\n*** No files found matching %s/%s' % (plotdir, fname_pattern)
+        warnings.warn(msg)
+        return None
+
+    fig = None
+    if (figsize is not None) or (dpi is not None):
+        fig, im = image_figure(plt.imread(filenames[0]), figsize, dpi)
+    try:
+        with VideoWriter(file_name, fps=fps) as writer:
+            for filename in filenames:
+                if fig is None:
+                    writer.write(plt.imread(filename))
+                else:
+                    im.set_data(plt.imread(filename))
+                    writer.write(render_figure(fig))
+    finally:
+        if fig is not None:
+            plt.close(fig)
+    return file_name
+
+
 def read_images(plotdir, fname_pattern='*.png'):
 
     import glob, os
@@ -405,12 +612,14 @@ def make_anim_outputs_from_plotdir(plotdir='_plots', fignos='all',
 
         #fname_pattern = 'frame*fig%s.png' % figno
         fname_pattern = '%s*fig%s.png' % (png_prefix,figno)
-        anim = make_anim(plotdir, fname_pattern, figsize, dpi)
+        if ('html' in outputs) or ('rst' in outputs):
+            anim = make_anim(plotdir, fname_pattern, figsize, dpi)
 
         if 'mp4' in outputs:
+            # streamed from the png files rather than from anim:
             file_name = file_name_prefix + 'fig%s.mp4' % figno
-            make_mp4(anim, file_name, fps=fps, \
-                embed_frames=True, default_mode='once')
+            make_mp4_from_plotdir(plotdir, fname_pattern, file_name, fps=fps,
+                                  figsize=figsize, dpi=dpi)
 
         if 'html' in outputs:
             file_name = file_name_prefix + 'fig%s.html' % figno
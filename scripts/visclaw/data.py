@@ -815,12 +815,16 @@ class ClawPlotItem(clawdata.ClawData):
                 self.add_attribute('pcolor_cmap',colormaps.yellow_red_blue)
                 self.add_attribute('pcolor_cmin',None)
                 self.add_attribute('pcolor_cmax',None)
+                # draw all patches as one image, see frametools.composite_init
+                self.add_attribute('composite',False)
 
             elif plot_type == '2d_imshow':
                 from visclaw import colormaps
                 self.add_attribute('imshow_cmap',colormaps.yellow_red_blue)
                 self.add_attribute('imshow_cmin',None)
                 self.add_attribute('imshow_cmax',None)
+                # draw all patches as one image, see frametools.composite_init
+                self.add_attribute('composite',False)
 
 
             elif plot_type in ['2d_contour', '2d_contourf']:
@@ -0,0 +1,235 @@
+"""
+Per-frame statistics of the output of a run, cached in a sidecar file.
+
+Choosing colour or axis limits for a run means looking at every frame.
+:class:`FrameStatistics` computes the minimum, maximum, sum, number of cells
+and number of wet cells of each plot variable in each frame once, on a pool
+of processes, and keeps them in a small json file next to the frames
+(``outdir/fort.stats.json``).  An entry is recomputed only when the files of
+its frame have changed, so that :func:`visclaw.frametools.var_minmax` and
+:func:`visclaw.frametools.var_limits` need not read the frames again::
+
+    from visclaw.frame_stats import FrameStatistics
+    stats = FrameStatistics('_output')
+    s = stats.get('all', [0, 3])
+    hmax = max(s[0][frameno]['max'] for frameno in s[0])
+
+Variables are components of q (int) or functions ``var(q, X, Y, t)`` (in
+2D), as for :func:`~visclaw.frametools.var_minmax`.  Statistics of functions
+defined at the top level of a module are cached by module, name and a hash
+of their code; other functions (e.g. lambdas) are evaluated every time.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import sys
+import glob
+import json
+import hashlib
+import pickle
+
+import numpy as np
+
+sys.path.append('../../../scripts')
+from pyclaw import Solution
+from pyclaw.fileio.ascii import output_frames
+from pyclaw.util import map_processes
+
+
+def _code_digest(code, digest):
+    r"""Add the bytecode, constants and names of *code* to *digest*."""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _code_digest(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+def var_key(var):
+    r"""
+    Key of the variable *var* in the sidecar, None if its statistics can
+    not be cached.  The key of a function includes a hash of its code and
+    default arguments, so that editing it invalidates its statistics.
+    """
+    if isinstance(var, (int, np.integer)):
+        return str(int(var))
+    name = getattr(var, '__name__', None)
+    module = getattr(var, '__module__', None)
+    code = getattr(var, '__code__', None)
+    if name is None or module is None or name == '<lambda>' or code is None:
+        return None
+    digest = hashlib.md5()
+    _code_digest(code, digest)
+    digest.update(repr(getattr(var, '__defaults__', None)).encode())
+    return '%s.%s.%s' % (module, name, digest.hexdigest()[:12])
+
+
+def frame_mtime(outdir, frameno, file_prefix='fort'):
+    r"""
+    Latest modification time of the files of frame *frameno*
+    (``fort.q0012``, ``fort.t0012``, ... and the shards ``fort.q0012.r00000``
+    of a parallel run), None if there are none.
+    """
+    fname = os.path.join(outdir, '%s.?%04d' % (file_prefix, frameno))
+    files = glob.glob(fname) + glob.glob(fname + '.r[0-9]*')
+    if len(files) == 0:
+        return None
+    return max(os.path.getmtime(fname) for fname in files)
+
+
+def evaluate_var(state, var, t):
+    r"""Values of the variable *var* on the patch of *state*."""
+    if isinstance(var, (int, np.integer)):
+        return state.q[var, ...]
+    centers = state.patch.grid.p_centers
+    return var(state.q, *(list(centers) + [t]))
+
+
+def solution_statistics(solution, vars, depth_var=0, dry_tolerance=1.e-3):
+    r"""
+    Statistics of each variable of *vars* over all patches of *solution*.
+
+    :Output:
+     - (list of dict) for each variable, its minimum ``'min'``, maximum
+       ``'max'`` and sum ``'sum'`` over all cells, the number of cells
+       ``'count'`` and the number of those where ``q[depth_var]`` exceeds
+       *dry_tolerance* ``'wet'``.  NaN and masked values are left out.
+    """
+    stats = [{'min': np.inf, 'max': -np.inf, 'sum': 0., 'count': 0, 'wet': 0}
+             for var in vars]
+    for state in solution.states:
+        if depth_var is not None:
+            wet = state.q[depth_var, ...] > dry_tolerance
+        for var, s in zip(vars, stats):
+            values = np.ma.masked_invalid(evaluate_var(state, var, solution.t))
+            valid = ~np.ma.getmaskarray(values)
+            values = values.compressed()
+            if values.size == 0:
+                continue
+            s['min'] = min(s['min'], float(values.min()))
+            s['max'] = max(s['max'], float(values.max()))
+            s['sum'] += float(values.sum())
+            s['count'] += int(values.size)
+            if depth_var is not None:
+                s['wet'] += int(np.count_nonzero(wet & valid))
+    return stats
+
+
+def _frame_statistics(args):
+    r"""Process pool entry point: statistics of one frame."""
+    frameno, outdir, file_prefix, file_format, vars, options = args
+    solution = Solution(frameno, path=outdir, file_prefix=file_prefix,
+                        file_format=file_format)
+    return frameno, solution_statistics(solution, vars, **options)
+
+
+class FrameStatistics(object):
+    r"""
+    Sidecar of per-frame statistics of the output in *outdir*.
+
+    :Input:
+     - *outdir* - (string) output directory of the run
+     - *file_prefix*, *file_format* - of the frames,
+       ``default = 'fort', 'ascii'``
+     - *depth_var* - (int) component of q holding the depth, for counting
+       wet cells, or None.  ``default = 0``
+     - *dry_tolerance* - (float) depth of a dry cell, ``default = 1e-3``
+    """
+
+    def __init__(self, outdir='_output', file_prefix='fort', file_format='ascii',
+                 depth_var=0, dry_tolerance=1.e-3):
+        self.outdir = outdir
+        self.file_prefix = file_prefix
+        self.file_format = file_format
+        self.options = {'depth_var': depth_var, 'dry_tolerance': dry_tolerance}
+        self.path = os.path.join(outdir, '%s.stats.json' % file_prefix)
+        self.frames = {}
+        r"""(dict) - cached ``{'mtime': ..., 'vars': {key: stats}}`` of
+        each frame, with frame numbers as string keys"""
+        self.load()
+
+    def load(self):
+        r"""Read the sidecar, if there is one made with the same options."""
+        self.frames = {}
+        try:
+            with open(self.path) as f:
+                sidecar = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        if sidecar.get('options') == self.options:
+            self.frames = sidecar.get('frames', {})
+
+    def save(self):
+        r"""Write the sidecar, unless *outdir* is not writable."""
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({'options': self.options, 'frames': self.frames}, f)
+        except (IOError, OSError):
+            pass
+
+    def frame_list(self):
+        r"""Sorted frame numbers of the frames in *outdir*."""
+        return output_frames(self.outdir, self.file_prefix)
+
+    def get(self, framenos, vars, num_procs=None, getframe=None):
+        r"""
+        Statistics of the variables *vars* in the frames *framenos* (or
+        'all'), as ``stats[var][frameno]``, see
+        :func:`solution_statistics`.
+
+        Frames missing from the sidecar, or whose files changed, are read
+        on *num_procs* processes (see :func:`pyclaw.util.map_processes`)
+        and the sidecar is updated.  *getframe*, if given, is used instead of
+        reading the frames in-process, e.g. ``plotdata.getframe``.
+        """
+        if framenos == 'all':
+            framenos = self.frame_list()
+        stats = dict((var, {}) for var in vars)
+        keys = dict((var, var_key(var)) for var in vars)
+
+        # Find what is missing from the sidecar
+        todo = {}
+        for frameno in framenos:
+            mtime = frame_mtime(self.outdir, frameno, self.file_prefix)
+            entry = self.frames.get(str(frameno))
+            if mtime is None or entry is None or entry['mtime'] != mtime:
+                entry = {'mtime': mtime, 'vars': {}}
+                self.frames[str(frameno)] = entry
+            missing = []
+            for var in vars:
+                if keys[var] is not None and keys[var] in entry['vars']:
+                    stats[var][frameno] = entry['vars'][keys[var]]
+                else:
+                    missing.append(var)
+            if missing:
+                todo[frameno] = missing
+
+        if len(todo) == 0:
+            return stats
+
+        if getframe is None:
+            try:
+                pickle.dumps(list(vars))
+            except (pickle.PicklingError, AttributeError, TypeError):
+                num_procs = 1  # e.g. lambdas, evaluated in-process
+            if len(todo) == 1:
+                num_procs = 1
+            jobs = [(frameno, self.outdir, self.file_prefix, self.file_format,
+                     todo[frameno], self.options) for frameno in sorted(todo)]
+            results = list(map_processes(_frame_statistics, jobs, num_procs))
+        else:
+            results = [(frameno, solution_statistics(
+                            getframe(frameno), todo[frameno], **self.options))
+                       for frameno in sorted(todo)]
+
+        for frameno, frame_stats in results:
+            entry = self.frames[str(frameno)]
+            for var, s in zip(todo[frameno], frame_stats):
+                stats[var][frameno] = s
+                if keys[var] is not None and entry['mtime'] is not None:
+                    entry['vars'][keys[var]] = s
+        self.save()
+        return stats
@@ -348,6 +348,12 @@ def plot_frame(framesolns,plotdata,frameno=0,verbose=False):
                     # end of loop over plotitems
                 # end of loop over patches
 
+                # draw the images of composite plotitems:
+                for itemname in plotaxes._itemnames:
+                    plotitem = plotaxes.plotitem_dict[itemname]
+                    if getattr(plotitem, '_composite', None) is not None:
+                        composite_draw(plotitem)
+
             if False and num_skipped > 0:
                 # possible warning message:
                 print('Skipped plotting %i patches not visible' % num_skipped)
@@ -725,7 +731,7 @@ def plotitem2(framesoln, plotitem, current_data, stateno):
     # The following plot parameters should be set and independent of
     # which AMR level a patch is on:
 
-    base_params = ['plot_type','afteritem','mapc2p','MappedGrid']
+    base_params = ['plot_type','afteritem','mapc2p','MappedGrid','composite']
 
     level_params = ['plot_var','afterpatch','kwargs',
              'celledges_show','celledges_color','patch_bgcolor',
@@ -746,6 +752,13 @@ def plotitem2(framesoln, plotitem, current_data, stateno):
         # if this item does not have a mapping, check for a global mapping:
         pp['mapc2p'] = getattr(plotdata, 'mapc2p', None)
 
+    # color limits set to 'all_frames' come from the statistics sidecar:
+    for cmd in ['pcolor','imshow','fill']:
+        for lim in ['_cmin','_cmax']:
+            if isinstance(pp[cmd+lim], str) and pp[cmd+lim] == 'all_frames':
+                pp[cmd+lim] = all_frames_limits(plotdata,
+                                    pp['plot_var'])[lim == '_cmax']
+
     # turn patch background color into a colormap for use with pcolor cmd:
     pp['patch_bgcolormap'] = colormaps.make_colormap({0.: pp['patch_bgcolor'], \
                                              1.: pp['patch_bgcolor']})
@@ -786,7 +799,14 @@ def plotitem2(framesoln, plotitem, current_data, stateno):
         pc_cmd = 'pcolormesh'
         pc_mth = plt.pcolormesh
 
-    if pp['plot_type'] == '2d_pcolor':
+    if pp['composite'] and (not pp['MappedGrid']) and \
+            (pp['plot_type'] in ['2d_pcolor','2d_imshow']):
+        # paint this patch into the image drawn by composite_draw:
+        if getattr(plotitem, '_composite', None) is None:
+            composite_init(plotitem, framesoln, current_data.plotaxes, pp)
+        composite_patch(plotitem, patch, var, pp)
+
+    elif pp['plot_type'] == '2d_pcolor':
 
         pcolor_cmd = "plotitem._current_pobj = plt."+pc_cmd+"(X_edge, Y_edge, var, \
                         cmap=pp['pcolor_cmap']"
@@ -991,7 +1011,8 @@ def plotitem2(framesoln, plotitem, current_data, stateno):
 
     # plot patch patch edges if desired:
 
-    if pp['patchedges_show']:
+    if pp['patchedges_show'] and \
+            (getattr(plotitem, '_composite', None) is None):
         for i in [0, X_edge.shape[0]-1]:
             X1 = X_edge[i,:]
             Y1 = Y_edge[i,:]
@@ -1036,6 +1057,143 @@ def plotitem2(framesoln, plotitem, current_data, stateno):
 
     return current_data
 
+#==================================================================
+def composite_init(plotitem, framesoln, plotaxes, pp):
+#==================================================================
+    """
+    Set up the image of a composite 2d plot item (plotitem.composite = True)
+    for the frame framesoln.  The image covers the axes limits, or all
+    patches if they are not set, with one pixel per screen pixel of the
+    axes but no more than one per cell of the finest patch.
+    """
+
+    lower = np.array([state.patch.lower_global for state in framesoln.states])
+    upper = np.array([state.patch.upper_global for state in framesoln.states])
+    delta = np.array([state.patch.delta for state in framesoln.states])
+
+    limits = []
+    for d, axlimits in enumerate([plotaxes.xlimits, plotaxes.ylimits]):
+        if (axlimits is not None) and (type(axlimits) is not str):
+            limits.append((float(axlimits[0]), float(axlimits[1])))
+        else:
+            limits.append((lower[:,d].min(), upper[:,d].max()))
+
+    bbox = plt.gca().get_window_extent()
+    shape = []
+    for d, pixels in enumerate([bbox.width, bbox.height]):
+        cells = np.ceil((limits[d][1] - limits[d][0]) / delta[:,d].min())
+        shape.append(int(max(min(pixels, cells), 1)))
+
+    plotitem._composite = {
+        'pp': pp,
+        'extent': (limits[0][0], limits[0][1], limits[1][0], limits[1][1]),
+        'data': np.zeros((shape[1], shape[0])),
+        'mask': np.ones((shape[1], shape[0]), dtype=bool),
+        'level': np.zeros((shape[1], shape[0]), dtype=int),
+        'patchedges': {},
+        'celledges': {}}
+
+
+#==================================================================
+def composite_patch(plotitem, patch, var, pp):
+#==================================================================
+    """
+    Paint the values var of patch into the image of a composite plot item:
+    each pixel takes the value of the cell containing its center, and of
+    the finest patch where patches overlap.  Patch and cell edges are
+    collected for composite_draw; cell edges only where cells are at least
+    3 pixels wide.
+    """
+
+    c = plotitem._composite
+    x1, x2, y1, y2 = c['extent']
+    ny, nx = c['data'].shape
+    px = (x2 - x1) / nx
+    py = (y2 - y1) / ny
+    xlo, ylo = patch.lower_global
+    xhi, yhi = patch.upper_global
+    dx, dy = patch.delta
+    mx, my = patch.num_cells_global
+
+    # pixels whose centers are in the patch:
+    i0 = max(int(np.ceil((xlo - x1)/px - 0.5)), 0)
+    i1 = min(int(np.ceil((xhi - x1)/px - 0.5)), nx)
+    j0 = max(int(np.ceil((ylo - y1)/py - 0.5)), 0)
+    j1 = min(int(np.ceil((yhi - y1)/py - 0.5)), ny)
+
+    if (i1 > i0) and (j1 > j0):
+        xc = x1 + (np.arange(i0, i1) + 0.5)*px
+        yc = y1 + (np.arange(j0, j1) + 0.5)*py
+        ci = np.clip(np.floor((xc - xlo)/dx).astype(int), 0, mx-1)
+        cj = np.clip(np.floor((yc - ylo)/dy).astype(int), 0, my-1)
+        values = ma.asarray(var)[np.ix_(ci, cj)].T
+
+        level = c['level'][j0:j1, i0:i1]
+        paint = level <= patch.level
+        c['data'][j0:j1, i0:i1][paint] = ma.getdata(values)[paint]
+        c['mask'][j0:j1, i0:i1][paint] = ma.getmaskarray(values)[paint]
+        level[paint] = patch.level
+
+    if pp['patchedges_show']:
+        c['patchedges'].setdefault(pp['patchedges_color'], []).append(
+            (xlo, xhi, ylo, yhi))
+    if pp['celledges_show'] and (dx >= 3*px) and (dy >= 3*py):
+        c['celledges'].setdefault(pp['celledges_color'], []).append(
+            (xlo, xhi, ylo, yhi, mx, my))
+
+
+#==================================================================
+def composite_draw(plotitem):
+#==================================================================
+    """
+    Draw the image of a composite plot item with a single imshow, and the
+    patch and cell edges collected by composite_patch as one line per color.
+    """
+
+    c = plotitem._composite
+    plotitem._composite = None
+    pp = c['pp']
+    cmd = pp['plot_type'][3:]   # pcolor or imshow
+
+    var = ma.masked_array(c['data'], c['mask'])
+    if var.count() > 0:
+        cmin = pp[cmd+'_cmin']
+        cmax = pp[cmd+'_cmax']
+        if cmin in ['auto',None]:
+            cmin = var.min()
+        if cmax in ['auto',None]:
+            cmax = var.max()
+        color_norm = Normalize(cmin, cmax, clip=True)
+
+        # options that only make sense for pcolor:
+        kwargs = dict((k, v) for k, v in pp['kwargs'].items() if k not in
+                      ['shading','edgecolors','edgecolor','linewidth',
+                       'linewidths','antialiased','rasterized'])
+        plotitem._current_pobj = plt.imshow(var, extent=c['extent'],
+                origin='lower', cmap=pp[cmd+'_cmap'], norm=color_norm,
+                interpolation='nearest', aspect='auto', **kwargs)
+
+    for color, patches in c['patchedges'].items():
+        X = []
+        Y = []
+        for (xlo, xhi, ylo, yhi) in patches:
+            X += [xlo, xhi, xhi, xlo, xlo, np.nan]
+            Y += [ylo, ylo, yhi, yhi, ylo, np.nan]
+        plt.plot(X, Y, color)
+
+    for color, patches in c['celledges'].items():
+        X = []
+        Y = []
+        for (xlo, xhi, ylo, yhi, mx, my) in patches:
+            for x in np.linspace(xlo, xhi, mx+1)[1:-1]:
+                X += [x, x, np.nan]
+                Y += [ylo, yhi, np.nan]
+            for y in np.linspace(ylo, yhi, my+1)[1:-1]:
+                X += [xlo, xhi, np.nan]
+                Y += [y, y, np.nan]
+        plt.plot(X, Y, color=color, linewidth=0.5)
+
+
 #--------------------------------------
 def get_var(state, plot_var, current_data):
 #--------------------------------------
@@ -1340,7 +1498,7 @@ def printframes(plotdata=None, verbose=True):
 
 
 #------------------------------------------------------------------
-def var_limits(plotdata,vars,padding=0.1):
+def var_limits(plotdata,vars,padding=0.1,num_procs=None):
 #------------------------------------------------------------------
     """
     Determine range of values encountered in data for all frames
@@ -1356,6 +1514,9 @@ def var_limits(plotdata,vars,padding=0.1):
     If vars=='all', use vars=[0,1,...] over all components of q.
     *** not implemented yet ***
 
+    Frames are only read if they are not in the statistics sidecar,
+    see var_minmax.
+
     Returns: varmin, varmax, varlim,
     each is a dictionary with keys consisting by the elements of vars.
 
@@ -1371,7 +1532,7 @@ def var_limits(plotdata,vars,padding=0.1):
     """
 
     varlim = {}
-    vmin,vmax = var_minmax(plotdata,'all',vars)
+    vmin,vmax = var_minmax(plotdata,'all',vars,num_procs)
     varmin = {}
     varmax = {}
     for var in vars:
@@ -1385,7 +1546,7 @@ def var_limits(plotdata,vars,padding=0.1):
 
 
 #------------------------------------------------------------------
-def var_minmax(plotdata,framenos,vars):
+def var_minmax(plotdata,framenos,vars,num_procs=None):
 #------------------------------------------------------------------
     """
     Determine range of values encountered in data for all frames
@@ -1416,6 +1577,10 @@ def var_minmax(plotdata,framenos,vars):
        varmin['machnumber']['all'] is the minimum of machnumber
            over all patches in all frames.
 
+    The values are taken from the statistics sidecar of plotdata.outdir
+    (see visclaw.frame_stats), so frames are only read the first time or
+    after they changed, on num_procs processes (all cores if None).
+
     """
 
     framenos = only_most_recent(framenos, plotdata.outdir)
@@ -1437,44 +1602,41 @@ def var_minmax(plotdata,framenos,vars):
             varmin[var][frameno] = np.inf
             varmax[var][frameno] = -np.inf
 
-    for frameno in framenos:
-        solution = plotdata.getframe(frameno, plotdata.outdir)
-        num_dim = solution.num_dim
-
-        for state in solution.states:
-            patch = state.patch
-            for var in vars:
-                if isinstance(var,int):
-                    if num_dim == 1:
-                        qvar = state.q[var,:]
-                    elif num_dim == 2:
-                        qvar = state.q[var,:,:]
-                    elif num_dim == 3:
-                        qvar = state.q[var,:,:,:]
-                else:
-                    t = solution.t
-                    #patch.compute_physical_coordinates()
-                    if num_dim == 1:
-                        X_center = patch.grid.p_centers[0]
-                        qvar = var(state.q, X_center, t)
-                    elif num_dim == 2:
-                        X_center, Y_center = patch.grid.p_centers
-                        qvar = var(state.q, X_center, \
-                                   Y_center, t)
-                    elif num_dim == 3:
-                        X_center, Y_center, Z_center = patch.grid.p_centers
-                        qvar = var(state.q, X_center, \
-                                   Y_center, Z_center, t)
-                varmin[var][frameno] = min(varmin[var][frameno], qvar.min())
-                varmax[var][frameno] = max(varmax[var][frameno], qvar.max())
-                varmin[var]['all'] = min(varmin[var]['all'], \
-                                         varmin[var][frameno])
-                varmax[var]['all'] = max(varmax[var]['all'], \
-                                         varmax[var][frameno])
+    from visclaw.frame_stats import FrameStatistics
+    stats = FrameStatistics(plotdata.outdir, plotdata.file_prefix,
+                            plotdata.format).get(framenos, vars, num_procs)
+    for var in vars:
+        for frameno in framenos:
+            varmin[var][frameno] = stats[var][frameno]['min']
+            varmax[var][frameno] = stats[var][frameno]['max']
+            varmin[var]['all'] = min(varmin[var]['all'], \
+                                     varmin[var][frameno])
+            varmax[var]['all'] = max(varmax[var]['all'], \
+                                     varmax[var][frameno])
     return (varmin, varmax)
 
 
 
+#------------------------------------------------------------------
+def all_frames_limits(plotdata,plot_var):
+#------------------------------------------------------------------
+    """
+    Return (vmin, vmax) of the component plot_var of q over all frames,
+    for plot items with e.g. pcolor_cmin = pcolor_cmax = 'all_frames'.
+    Uses var_minmax, and remembers the result in plotdata.
+    """
+
+    if not isinstance(plot_var, int):
+        raise ValueError("Color limits 'all_frames' need an integer plot_var")
+
+    limits = plotdata.__dict__.setdefault('_all_frames_limits', {})
+    key = (os.path.abspath(plotdata.outdir), plot_var)
+    if key not in limits:
+        varmin, varmax = var_minmax(plotdata, 'all', [plot_var])
+        limits[key] = (varmin[plot_var]['all'], varmax[plot_var]['all'])
+    return limits[key]
+
+
 #------------------------------------------------------------------
 def only_most_recent(framenos,outdir='.',prefix='fort',verbose=True):
 #------------------------------------------------------------------
@@ -7,10 +7,12 @@ First attempt, could be improved.
 from __future__ import absolute_import
 from __future__ import print_function
 
+import sys
 import numpy
-from clawpack.visclaw import gaugetools
-from clawpack.pyclaw import gauges
-from clawpack.amrclaw.data import GaugeData
+sys.path.append('../../../scripts')
+from visclaw import gaugetools
+from pyclaw import gauges
+from amrclaw.data import GaugeData
 
 def read_gauges(gaugenos='all', outdir=None):
     
@@ -66,53 +68,166 @@ def check_gaugenos_input(gauge_solutions, gaugenos):
     return gaugenos_lagrangian
                
                            
+class ParticlePaths(object):
+    """
+    Paths of a set of Lagrangian gauges packed into flat arrays, so that
+    positions of all particles can be interpolated to many times at once.
+
+    The path of the k'th particle, gauge number `gaugenos[k]`, is
+    `t[offsets[k]:offsets[k+1]]`, and similarly for `x` and `y`.
+    Gauges without data yet have an empty path.
+    """
+
+    def __init__(self, gauge_solutions, gaugenos='all'):
+        gaugenos = check_gaugenos_input(gauge_solutions, gaugenos)
+        self.gaugenos = list(gaugenos)
+
+        paths = [gauge_solutions[gaugeno].particle_path
+                 for gaugeno in self.gaugenos]
+        lengths = [0 if path is None else path.shape[0] for path in paths]
+        self.offsets = numpy.zeros(len(paths)+1, dtype=int)
+        self.offsets[1:] = numpy.cumsum(lengths)
+
+        paths = [path[:,:3] for path in paths if path is not None]
+        if len(paths) > 0:
+            packed = numpy.vstack(paths)
+        else:
+            packed = numpy.empty((0,3))
+        self.t = packed[:,0].copy()
+        self.x = packed[:,1].copy()
+        self.y = packed[:,2].copy()
+
+        # Particle each point belongs to
+        self.particle = numpy.repeat(numpy.arange(len(self.gaugenos)),
+                                     lengths)
+
+        # Replace each time by its rank among all times so that the paths
+        # can be searched together with integer keys (particle, rank),
+        # which are sorted since the times of each path are.
+        self._times = numpy.unique(self.t)
+        self._stride = len(self._times) + 1
+        self._keys = self.particle * self._stride \
+                     + numpy.searchsorted(self._times, self.t) + 1
+
+    def __len__(self):
+        return len(self.gaugenos)
+
+    def select(self, gaugenos):
+        """
+        Return the ParticlePaths of a subset of the gauges.
+        """
+        if gaugenos == 'all':
+            return self
+        elif type(gaugenos) is int:
+            gaugenos = [gaugenos]
+        paths = {}
+        for gaugeno in gaugenos:
+            k = self.gaugenos.index(gaugeno)
+            i1, i2 = self.offsets[k], self.offsets[k+1]
+            g = _PackedGauge()
+            if i2 > i1:
+                g.particle_path = numpy.vstack((self.t[i1:i2], self.x[i1:i2],
+                                                self.y[i1:i2])).T
+            paths[gaugeno] = g
+        return ParticlePaths(paths)
+
+    def interp(self, t, particles=None, extend='neither'):
+        """
+        Interpolate particle positions to the times `t`.
+
+        If `particles` is None, `t` may be a scalar or an array of times and
+        the positions of all particles are returned as arrays `x,y` of
+        shape `t.shape + (len(self),)`.  Otherwise `particles` is an array
+        of particle indices (not gauge numbers) broadcast against `t`, and
+        `x,y` have the broadcast shape.
+
+        At times before the start of a path, positions are NaN unless
+        `extend` is 'min' or 'both', in which case the first position is
+        used, and similarly after the end of a path with 'max' or 'both'.
+        """
+        if extend not in ['neither', 'min', 'max', 'both']:
+            raise ValueError('Unrecognized extend')
+
+        t = numpy.asarray(t, dtype=float)
+        if particles is None:
+            particles = numpy.arange(len(self))
+            t = t[...,numpy.newaxis]
+        t, particles = numpy.broadcast_arrays(t, particles)
+
+        if len(self.t) == 0:
+            # no gauge data yet
+            return numpy.full(t.shape, numpy.nan), \
+                   numpy.full(t.shape, numpy.nan)
+
+        start = self.offsets[particles]
+        end = self.offsets[particles+1]
+        first = numpy.minimum(start, len(self.t)-1)
+        last = numpy.maximum(end-1, 0)
+
+        # Last point of each path at or before t, found for all particles
+        # and times at once.  Paths ending at or before t are interpolated
+        # in their last interval.
+        rank = numpy.searchsorted(self._times, t, side='right')
+        i = numpy.searchsorted(self._keys, particles*self._stride + rank,
+                               side='right') - 1
+        before = t <= self.t[first]
+        after = (t > self.t[last]) & ~before
+        i = numpy.maximum(numpy.minimum(i, end-2), start)
+        i = numpy.minimum(i, len(self.t)-1)
+        j = numpy.minimum(i+1, last)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            alf = (t - self.t[i]) / (self.t[j] - self.t[i])
+            x = self.x[i] + alf*(self.x[j] - self.x[i])
+            y = self.y[i] + alf*(self.y[j] - self.y[i])
+
+        empty = start == end
+        if extend in ['neither', 'max']:
+            x[before] = numpy.nan
+            y[before] = numpy.nan
+        else:
+            x[before] = self.x[first][before]
+            y[before] = self.y[first][before]
+        if extend in ['neither', 'min']:
+            x[after] = numpy.nan
+            y[after] = numpy.nan
+        else:
+            x[after] = self.x[last][after]
+            y[after] = self.y[last][after]
+        x[empty] = numpy.nan
+        y[empty] = numpy.nan
+        return x, y
+
+
+class _PackedGauge(object):
+    # Minimal stand-in for a GaugeSolution, used by ParticlePaths.select
+    gtype = 'lagrangian'
+    particle_path = None
+
+
+def particle_paths(gauge_solutions, gaugenos='all'):
+    """
+    Return the ParticlePaths of the specified gauges.  `gauge_solutions`
+    may be the dictionary returned by `read_gauges` or a ParticlePaths
+    object, which is then reused; when making many plots from the same
+    gauges, pack them once with `ParticlePaths(gauge_solutions)`.
+    """
+    if isinstance(gauge_solutions, ParticlePaths):
+        return gauge_solutions.select(gaugenos)
+    return ParticlePaths(gauge_solutions, gaugenos)
+
+
 def interp_particles(gauge_solutions, t, gaugenos='all', extend='neither'):
     """
     Interpolate (x,y) to the given time t for each specified gauge.
     Returns a dictionary of results indexed by gauge number.
     """
-        
-    gaugenos = check_gaugenos_input(gauge_solutions, gaugenos)
-    
+
+    paths = particle_paths(gauge_solutions, gaugenos)
+    x, y = paths.interp(t, extend=extend)
+
     particle_positions = {}
-    for gaugeno in gaugenos:
-        g = gauge_solutions[gaugeno]
-        if g.particle_path is None: 
-            particle_positions[gaugeno] = (numpy.nan, numpy.nan)
-            continue # no gauge data yet, go on to next gauge
-        tg = g.particle_path[:,0]
-        xg = g.particle_path[:,1]
-        yg = g.particle_path[:,2]
-        if t <= tg[0]:
-            if extend in ['neither', 'max']:
-                x = numpy.nan
-                y = numpy.nan
-            elif extend in ['min', 'both']:
-                x = xg[0]
-                y = yg[0]
-            else:
-                raise ValueError('Unrecognized extend')
-        elif t > tg[-1]:
-            if extend in ['neither', 'min']:
-                x = numpy.nan
-                y = numpy.nan
-            elif extend in ['max', 'both']:
-                x = xg[-1]
-                y = yg[-1]
-            else:
-                raise ValueError('Unrecognized extend')
-        else:
-            i = numpy.where(tg<=t)[0][-1]
-            if i > len(tg)-2: 
-                i = len(tg)-2
-            if i<len(tg)-1:
-                alf = (t-tg[i])/(tg[i+1]-tg[i])
-                x = xg[i] + alf*(xg[i+1]-xg[i])
-                y = yg[i] + alf*(yg[i+1]-yg[i])
-            else:
-                x = xg[-1]
-                y = yg[-1]
-        particle_positions[gaugeno] = (x,y)
+    for k, gaugeno in enumerate(paths.gaugenos):
+        particle_positions[gaugeno] = (x[k], y[k])
     return particle_positions
 
 
@@ -123,61 +238,65 @@ def plot_particles(gauge_solutions, t, gaugenos='all', kwargs_plot=None,
     """
     from matplotlib import pyplot as plt
 
-    gaugenos = check_gaugenos_input(gauge_solutions, gaugenos)
-        
     if kwargs_plot is None:
         kwargs_plot = {'marker':'o','markersize':2,'color':'k'}
-        
-    pp = interp_particles(gauge_solutions, t, gaugenos, extend)
-    for k in pp.keys():
-        x,y = pp[k]
-        plt.plot([x],[y],**kwargs_plot)
-        
+    kwargs_plot = dict(kwargs_plot)
+    kwargs_plot.setdefault('linestyle', 'None')
+
+    paths = particle_paths(gauge_solutions, gaugenos)
+    x, y = paths.interp(t, extend=extend)
+    plt.plot(x, y, **kwargs_plot)
+
 
 def plot_paths(gauge_solutions, t1=None, t2=None, gaugenos='all', 
                kwargs_plot=None, extend='neither'):
     """
-    Plot the particle path for a set of gauges over some time interval.
+    Plot the particle path for a set of gauges over some time interval:
+    the positions interpolated to t1 and t2 joined by all points of the
+    path in between.  If t1 or t2 is None, each path starts or ends with
+    the gauge data.
+    All paths are drawn as a single line broken by NaNs.
     """
     from matplotlib import pyplot as plt
     
-    
     if kwargs_plot is None:
         kwargs_plot = {'linestyle':'-','linewidth':0.7,'color':'k'}
 
-    gaugenos = check_gaugenos_input(gauge_solutions, gaugenos)
-    
-    for gaugeno in gaugenos:
-        g = gauge_solutions[gaugeno]
-        if g.particle_path is None: 
-            continue # no gauge data yet, go on to next gauge
-        tg = g.particle_path[:,0]
-        xg = g.particle_path[:,1]
-        yg = g.particle_path[:,2]
-        if 1:
-            if t1 is None:
-                i1 = 0
-                t1 = tg[0]
-            else:
-                try:
-                    i1 = numpy.where(tg>=t1)[0][0]
-                except:
-                    i1 = None
-            if t2 is None:
-                i2 = -1
-                t2 = tg[-1]
-            else:
-                try:
-                    i2 = numpy.where(tg<=t2)[0][-1]
-                except:
-                    i2 = None
-            
-            if (i1 is not None) and (i2 is not None):
-                pp1 = interp_particles(gauge_solutions, t1, gaugeno, extend)
-                pp2 = interp_particles(gauge_solutions, t2, gaugeno, extend)
-                xp = numpy.hstack((pp1[gaugeno][0], xg[i1:i2], pp2[gaugeno][0]))
-                yp = numpy.hstack((pp1[gaugeno][1], yg[i1:i2], pp2[gaugeno][1]))
-                plt.plot(xp, yp, **kwargs_plot)
-            else:
-                pass # no points in this time range
+    paths = particle_paths(gauge_solutions, gaugenos)
+    num_particles = len(paths)
+    if len(paths.t) == 0:
+        return # no gauge data yet
+
+    start = paths.offsets[:-1]
+    end = paths.offsets[1:]
+    nonempty = end > start
+    t_first = numpy.where(nonempty, paths.t[numpy.minimum(start,
+                                                len(paths.t)-1)], numpy.nan)
+    t_last = numpy.where(nonempty, paths.t[end-1], numpy.nan)
+    tp1 = t_first if t1 is None else numpy.full(num_particles, float(t1))
+    tp2 = t_last if t2 is None else numpy.full(num_particles, float(t2))
+
+    # Particles with some data in [t1,t2]
+    show = nonempty & (tp1 <= t_last) & (tp2 >= t_first)
+    if not show.any():
+        return # no points in this time range
+
+    particles = numpy.arange(num_particles)
+    x1, y1 = paths.interp(tp1, particles, extend)
+    x2, y2 = paths.interp(tp2, particles, extend)
 
+    # Interior points of each path, then the interpolated end points and a
+    # NaN separator, ordered by particle and then position along the path
+    inside = show[paths.particle] & (paths.t >= tp1[paths.particle]) \
+             & (paths.t <= tp2[paths.particle])
+    p = numpy.hstack((paths.particle[inside], particles[show],
+                      particles[show], particles[show]))
+    order = numpy.hstack((numpy.flatnonzero(inside) + 1,
+                          numpy.zeros(show.sum()),
+                          numpy.full(show.sum(), len(paths.t) + 1),
+                          numpy.full(show.sum(), len(paths.t) + 2)))
+    nan = numpy.full(show.sum(), numpy.nan)
+    xp = numpy.hstack((paths.x[inside], x1[show], x2[show], nan))
+    yp = numpy.hstack((paths.y[inside], y1[show], y2[show], nan))
+    k = numpy.lexsort((order, p))
+    plt.plot(xp[k], yp[k], **kwargs_plot)
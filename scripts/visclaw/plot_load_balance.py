@@ -0,0 +1,395 @@
+"""
+Plot the parallel load balance of a run, from the patch headers of its frames.
+
+The frames written by ForestClaw record the ``block_number`` and
+``mpi_rank`` of every patch in its header, and frames written as one shard
+per processor (``fort.q0012.r00003``) record the rank in the file name.
+Unsharded frames without ``mpi_rank`` in their headers, such as those of
+older versions, have no rank information and are refused.  This module
+scans the patch headers of every frame of a run, seeking past the q data
+rather than reading it, and tabulates for each frame the number of cells
+owned by each rank, the number of patches on each level and the imbalance
+factor, the largest number of cells on one rank over the mean.
+
+The table is written to `load_balance.csv` in the output directory.  If you
+execute this at the command line you can specify the output directory, e.g.
+
+    python plot_load_balance.py _output
+
+and the table and plots will be made, with png files placed in the output
+directory next to those of `plot_timing_stats.py`.  If `timing.csv` is
+there too, the wall time between frames is plotted against the imbalance
+factor, to see when partitioning is costing wall time.
+
+For more control, import this module and call `load_balance`, which returns
+the statistics of each frame, or `make_plots`.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import sys
+
+import numpy as np
+
+sys.path.append('../../../scripts')
+from pyclaw.fileio.ascii import read_t, shard_files, output_frames
+from pyclaw.util import map_processes
+
+# text for html file showing all plots:
+
+html_text = """
+    <html>
+    <h1>Load balance</h1>
+    <p>
+    <pre>
+    %s
+    </pre>
+    <p>
+    <img width=45%% src="load_balance_Imbalance.png">
+    <img width=45%% src="load_balance_CellsByRank.png">
+
+    <p>
+    <img width=45%% src="load_balance_PatchesByLevel.png">
+    <img width=45%% src="load_balance_CellsByRankFrame.png">
+
+    </html>
+"""
+
+
+def read_patch_headers(fname, num_dim=2, ascii_data=True, max_patches=None,
+                       rank=None):
+    r"""
+    Read the patch headers of the q file *fname*, without reading its data.
+
+    :Input:
+     - *fname* - (string) q file, or one shard of it
+     - *num_dim* - (int) Number of dimensions, only 2 is supported when
+       the file holds ascii data
+     - *ascii_data* - (bool) Whether the data follows each header in the
+       file, as for ascii output, rather than being in a separate file
+     - *max_patches* - (int) Stop after this many patches, or at the end of
+       the file if None
+     - *rank* - (int) Rank of patches whose header has no ``mpi_rank``,
+       None if unknown
+
+    :Output:
+     - (list) of dict with the ``patch_index``, ``level``,
+       ``block_number`` (-1 if not in the header), ``mpi_rank`` (*rank*
+       if not in the header) and ``num_cells`` of each patch
+    """
+    if ascii_data and num_dim != 2:
+        raise NotImplementedError("Skipping %s dimensional ascii data"
+                                  % num_dim)
+
+    headers = []
+    with open(fname, 'rb') as f:
+        while max_patches is None or len(headers) < max_patches:
+            line = f.readline()
+            while line != b'' and line.strip() == b'':
+                line = f.readline()
+            if line == b'':
+                break
+
+            # Header lines are a value followed by its name, then a blank line
+            values = {}
+            while line.strip() != b'':
+                words = line.split()
+                values[words[-1].decode()] = words[0].decode()
+                line = f.readline()
+            n = [int(values['m%s' % name]) for name in 'xyz'[:num_dim]]
+            headers.append({
+                'patch_index': int(values.get('grid_number',
+                                              values.get('patch_number', 0))),
+                'level': int(values['AMR_level']),
+                'block_number': int(values.get('block_number', -1)),
+                'mpi_rank': (int(values['mpi_rank']) if 'mpi_rank' in values
+                             else rank),
+                'num_cells': int(np.prod(n))})
+
+            if ascii_data:
+                skip_array(f, n[0], n[1])
+    return headers
+
+
+def skip_array(f, mx, my):
+    r"""
+    Move *f* past the ascii data of a 2d patch: *my* rows of *mx* lines,
+    each row followed by a blank line.
+
+    Data lines have the same length, so that the end of the data is found
+    from the length of the first line and of the first blank line.  If
+    that does not land on the next header (or the end of the file), the
+    lines are skipped one by one.
+    """
+    start = f.tell()
+    row_size = len(f.readline()) * mx
+    f.seek(start + row_size)
+    row_size += len(f.readline())
+    end = start + my * row_size
+
+    f.seek(end - 1)
+    if f.read(1) == b'\n':
+        line = f.readline()
+        if line.strip() == b'' or _is_int(line.split()[0]):
+            f.seek(end)
+            return
+
+    f.seek(start)
+    for i in range(my * (mx + 1)):
+        f.readline()
+
+
+def _is_int(word):
+    try:
+        int(word)
+        return True
+    except ValueError:
+        return False
+
+
+def frame_load_balance(args):
+    r"""
+    Patch headers of frame *frameno* in *outdir*, in *file_format* or the
+    format named in its t file if None.  Also the process pool entry point
+    for scanning frames in parallel.
+
+    :Output:
+     - (dict) with the time ``t`` of the frame and its patch ``headers``,
+       see :func:`read_patch_headers`
+    """
+    frameno, outdir, file_prefix, file_format = args
+    t, num_eqn, num_patches, num_aux, num_dim, num_ghost, t_format = \
+        read_t(frameno, path=outdir, file_prefix=file_prefix)
+    if file_format is None:
+        file_format = t_format
+    ascii_data = file_format is None or file_format == 'ascii'
+
+    fname = os.path.join(outdir, '%s.q%s' % (file_prefix, str(frameno).zfill(4)))
+    shards = shard_files(fname)
+    headers = []
+    for shard in shards:
+        if len(headers) >= num_patches:
+            break
+        rank = int(shard[len(fname)+2:]) if shard != fname else None
+        headers += read_patch_headers(shard, num_dim, ascii_data,
+                                      max_patches=num_patches - len(headers),
+                                      rank=rank)
+    return {'frame': frameno, 't': t, 'headers': headers}
+
+
+def load_balance(outdir='_output', file_prefix='fort', frames='all',
+                 file_format=None, num_procs=None):
+    r"""
+    Load balance of the frames *frames* (or 'all') of the run in *outdir*.
+
+    Frames are scanned on *num_procs* processes, see
+    :func:`pyclaw.util.map_processes`.  *file_format* is needed only for
+    frames whose t file does not name it, as ascii is assumed then.
+
+    Raises ValueError if the rank of some patch is known neither from its
+    header nor from the name of its shard.
+
+    :Output:
+     - (list) for each frame, a dict with its ``frame`` number, time ``t``,
+       ``cells`` (array of the number of cells on each rank), ``patches``
+       (array of the number of patches on each level, level 1 first) and
+       ``imbalance`` factor, the largest number of cells on one rank over
+       the mean over ranks.  Arrays have the same length for all frames.
+    """
+    if frames == 'all':
+        frames = output_frames(outdir, file_prefix)
+    jobs = [(frameno, outdir, file_prefix, file_format) for frameno in frames]
+    if len(jobs) < 2:
+        num_procs = 1
+    scans = list(map_processes(frame_load_balance, jobs, num_procs))
+
+    unknown = [scan['frame'] for scan in scans
+               if any(h['mpi_rank'] is None for h in scan['headers'])]
+    if unknown:
+        raise ValueError("No mpi_rank in the patch headers of frames %s of %s,"
+                         " which are not sharded: their load balance is "
+                         "unknown" % (unknown, outdir))
+
+    num_ranks = 1
+    num_levels = 1
+    for scan in scans:
+        for h in scan['headers']:
+            num_ranks = max(num_ranks, h['mpi_rank'] + 1)
+            num_levels = max(num_levels, h['level'])
+
+    stats = []
+    for scan in scans:
+        cells = np.zeros(num_ranks, dtype=int)
+        patches = np.zeros(num_levels, dtype=int)
+        for h in scan['headers']:
+            cells[h['mpi_rank']] += h['num_cells']
+            patches[h['level'] - 1] += 1
+        mean_cells = cells.mean()
+        imbalance = cells.max() / mean_cells if mean_cells > 0 else 1.
+        stats.append({'frame': scan['frame'], 't': scan['t'], 'cells': cells,
+                      'patches': patches, 'imbalance': imbalance})
+    return stats
+
+
+def write_csv(stats, fname):
+    r"""
+    Write the load balance *stats* of :func:`load_balance` to *fname*, one
+    line per frame: frame, time, imbalance, then the number of cells on
+    each rank and the number of patches on each level.
+    """
+    num_ranks = len(stats[0]['cells']) if stats else 1
+    num_levels = len(stats[0]['patches']) if stats else 1
+    with open(fname, 'w') as f:
+        f.write(','.join(['frame', 'time', 'imbalance'] +
+                         ['cells_rank%d' % r for r in range(num_ranks)] +
+                         ['patches_level%d' % (l+1) for l in range(num_levels)])
+                + '\n')
+        for s in stats:
+            f.write(','.join(['%d' % s['frame'], '%.8e' % s['t'],
+                              '%.6f' % s['imbalance']] +
+                             ['%d' % c for c in s['cells']] +
+                             ['%d' % p for p in s['patches']]) + '\n')
+
+
+def read_csv(fname):
+    r"""
+    Read a table written by :func:`write_csv`.
+
+    :Output:
+     - *frame*, *time*, *imbalance* - (arrays) one value per frame
+     - *cells* - (array) cells on each rank, of shape (frames, ranks)
+     - *patches* - (array) patches on each level, of shape (frames, levels)
+    """
+    with open(fname) as f:
+        names = f.readline().strip().split(',')
+    data = np.loadtxt(fname, skiprows=1, delimiter=',', ndmin=2)
+    ranks = [j for j, name in enumerate(names) if name.startswith('cells_rank')]
+    levels = [j for j, name in enumerate(names)
+              if name.startswith('patches_level')]
+    return (data[:,0].astype(int), data[:,1], data[:,2],
+            data[:,ranks], data[:,levels])
+
+
+#=======================================================================
+
+def make_plots(outdir='_output', make_pngs=True, make_html=None,
+               plotdir=None, file_prefix='fort', file_format=None,
+               num_procs=None):
+
+    """
+    Scan the frames in `outdir`, write `load_balance.csv` there and plot it.
+    Set `make_pngs` to `True` to create png files,
+    By default, an html index will be made if `make_pngs == True` but
+    you can turn this off by setting `make_html` to `False`.
+    If `plotdir == None` then png file will be put in `outdir`.
+    """
+    import matplotlib.pyplot as plt
+
+    if make_pngs:
+        if plotdir is None:
+            plotdir = outdir
+        os.system('mkdir -p %s' % plotdir)
+
+    if make_html is None:
+        make_html = make_pngs
+
+    def make_png(fname):
+        if make_pngs:
+            plt.tight_layout()
+            fname = os.path.join(plotdir, fname)
+            plt.savefig(fname)
+            print('Created %s' % fname)
+
+    stats = load_balance(outdir, file_prefix, file_format=file_format,
+                         num_procs=num_procs)
+    if len(stats) == 0:
+        print('*** No frames found in %s' % outdir)
+        return
+    csv_file = os.path.join(outdir, 'load_balance.csv')
+    write_csv(stats, csv_file)
+    print('Created %s' % csv_file)
+    frame, time, imbalance, cells, patches = read_csv(csv_file)
+    num_ranks = cells.shape[1]
+
+    colors = 3*['r','c','m','limegreen','b','orange','g','yellow']
+
+    # Imbalance, against the wall time between frames if it was recorded
+    plt.figure(51)
+    plt.clf()
+    plt.plot(time, imbalance, 'b-o', label='Imbalance (max / mean cells)')
+    plt.axhline(1., color='k', lw=0.5)
+    plt.xlabel('Simulation time t')
+    plt.ylabel('Imbalance factor')
+    plt.title('Load imbalance over %d ranks' % num_ranks)
+    timing_file = os.path.join(outdir, 'timing.csv')
+    if os.path.exists(timing_file):
+        timing = np.loadtxt(timing_file, skiprows=1, delimiter=',', ndmin=2)
+        if timing.shape[0] > 1:
+            ax = plt.gca().twinx()
+            ax.step(timing[:,0], np.hstack([0, np.diff(timing[:,1])]), 'r',
+                    where='pre', label='Wall time between frames')
+            ax.set_ylabel('Wall time (seconds) / output frame', color='r')
+    plt.legend(loc='upper left')
+    make_png('load_balance_Imbalance.png')
+
+    # Cells on each rank
+    plt.figure(52)
+    plt.clf()
+    for r in range(num_ranks):
+        plt.plot(time, cells[:,r], label='Rank %d' % r if r < 16 else None)
+    plt.plot(time, cells.mean(axis=1), 'k--', lw=2, label='Mean')
+    plt.xlabel('Simulation time t')
+    plt.ylabel('Grid cells')
+    plt.title('Grid cells on each rank')
+    plt.legend(loc='upper left', fontsize='small')
+    make_png('load_balance_CellsByRank.png')
+
+    # Patches on each level
+    plt.figure(53)
+    plt.clf()
+    sum_patches = np.zeros(len(time))
+    for j in range(patches.shape[1]):
+        last_sum_patches = sum_patches.copy()
+        sum_patches += patches[:,j]
+        plt.fill_between(time, last_sum_patches, sum_patches,
+                         color=colors[j], edgecolor=None,
+                         label='Level %s' % (j+1))
+        plt.plot(time, sum_patches, 'k')
+    plt.xlabel('Simulation time t')
+    plt.ylabel('Patches')
+    plt.title('Cumulative patches on each level')
+    plt.legend(loc='upper left')
+    make_png('load_balance_PatchesByLevel.png')
+
+    # Cells on each rank in the most imbalanced frame
+    n = int(np.argmax(imbalance))
+    plt.figure(54)
+    plt.clf()
+    plt.bar(np.arange(num_ranks), cells[n], color='c', edgecolor='k')
+    plt.axhline(cells[n].mean(), color='k', ls='--', label='Mean')
+    plt.xlabel('Rank')
+    plt.ylabel('Grid cells')
+    plt.title('Frame %d, t = %g: imbalance %.3f' % (frame[n], time[n],
+                                                     imbalance[n]))
+    plt.legend(loc='upper right')
+    make_png('load_balance_CellsByRankFrame.png')
+
+    if make_html:
+        summary = 'From: %s\nFrames: %d, ranks: %d, levels: %d\n' \
+                  % (os.path.abspath(outdir), len(frame), num_ranks,
+                     patches.shape[1]) \
+                  + 'Mean imbalance: %.3f, largest: %.3f (frame %d)' \
+                  % (imbalance.mean(), imbalance[n], frame[n])
+        html_file = os.path.join(plotdir, 'load_balance.html')
+        with open(html_file, 'w') as h:
+            h.write(html_text % summary)
+        print('Created %s' % html_file)
+
+
+if __name__=='__main__':
+    if len(sys.argv) > 1:
+        outdir = sys.argv[1]
+    else:
+        outdir = '_output'
+    make_plots(outdir)
@@ -5,7 +5,11 @@ Requires modified valout function from Clawpack 5.5.0 to print this info.
 To use, first run the Clawpack or GeoClaw code, and insure that the 
 file `timing.csv` was generated in the output directory.
 This file has one line for each output time giving the cumulative CPU and
-Wall time, both in total and broken down by levels.
+Wall time, both in total and broken down by levels.  GeoFlood adds the
+cumulative wall time of each phase of its run loop (advance, regrid,
+ghostfill, output and gauges), which is plotted too.  Gauges are sampled
+and written during the advance, so their time is taken out of the advance
+time in the plots.
 
 If you execute this at the command line you can specify the output
 directory, e.g.
@@ -50,6 +54,14 @@ html_text2 = """
     </html>
 """
 
+html_text_phases = """
+    <p>
+    <img width=45% src="timing_CumPhaseWallTime.png">
+    <img width=45% src="timing_ByFramePhaseWallTime.png">
+
+    </html>
+"""
+
 #=======================================================================
 
 def make_plots(outdir='_output', make_pngs=True, make_html=None, 
@@ -214,7 +226,22 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
     timing_stats = loadtxt(timing_stats_file, skiprows=1, delimiter=',',
                            ndmin=2)
     ntimes = timing_stats.shape[0]
-    nlevels = int(timing_stats.shape[1] / 3) - 1
+
+    # GeoFlood also writes the cumulative wall time of each phase of the
+    # run loop (advance, regrid, ghostfill, output, gauges) in columns
+    # named '<phase>_wall_time' after the levels, and numbers the levels
+    # in the names of their columns
+    with open(timing_stats_file) as f:
+        names = f.readline().strip().split(',')
+    phase_columns = [k for k,name in enumerate(names) if k >= 3
+                     and name.endswith('_wall_time') and 'level' not in name]
+    phases = [names[k][:-len('_wall_time')] for k in phase_columns]
+    nlevels = int((timing_stats.shape[1] - len(phase_columns)) / 3) - 1
+    levels = [j+1 for j in range(nlevels)]
+    for j in range(nlevels):
+        name = names[3*j + 5] if len(names) > 3*j + 5 else ''
+        if name.startswith('cells_level_'):
+            levels[j] = name[len('cells_level_'):]
 
     time = zeros(ntimes)
     total_cpu = zeros(ntimes)
@@ -243,13 +270,13 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
     for j in range(nlevels):
         if max(cells[:,j]) == 0:
             break
-        #plot(time/3600, cells[:,j], label='Level %s' % (j+1))
+        #plot(time/3600, cells[:,j], label='Level %s' % levels[j])
         last_sum_cells = sum_cells_over_levels.copy()
         sum_cells_over_levels += cells[:,j]
         plot(time, sum_cells_over_levels, 'k')
         fill_between(time, last_sum_cells, sum_cells_over_levels, 
                      color=colors[j+1], edgecolor=None,
-                     label='Level %s' % (j+1))
+                     label='Level %s' % levels[j])
 
     plot(time, sum_cells_over_levels, 'k', lw=1, label='Total Cells')
     xlim(xlimits)
@@ -273,11 +300,11 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
     for j in range(nlevels):
         if max(cpu[:,j]) == 0:
             break
-        #plot(time/3600, cpu[:,j], label='Level %s' % (j+1))
+        #plot(time/3600, cpu[:,j], label='Level %s' % levels[j])
         last_sum_cpu = sum_cpu_over_levels.copy()
         sum_cpu_over_levels += cpu[:,j]
         fill_between(time, last_sum_cpu, sum_cpu_over_levels, color=colors[j+1],
-                      edgecolor=None,label='Level %s' % (j+1))
+                      edgecolor=None,label='Level %s' % levels[j])
         plot(time, sum_cpu_over_levels, 'k')
 
     fill_between(time, total_cpu,sum_cpu_over_levels,color=colors[0],
@@ -304,7 +331,7 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
         fill_between(time, last_sum_wtime,
                      sum_wtime_over_levels, 
                      color=colors[j+1], edgecolor=None,
-                     label='Level %s' % (j+1))
+                     label='Level %s' % levels[j])
         plot(time, sum_wtime_over_levels, 'k')
 
     fill_between(time, total_wall, sum_wtime_over_levels, color=colors[0],
@@ -339,7 +366,7 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
                 if n == 1:
                     fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc],
                                  color=colors[j+1], edgecolor=None,
-                                 label='Level %s' % (j+1))
+                                 label='Level %s' % levels[j])
                 else:
                     fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc],
                                   edgecolor=None,color=colors[j+1])
@@ -382,7 +409,7 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
                 if n == 1:
                     fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc],
                                  color=colors[j+1], edgecolor=None,
-                                 label='Level %s' % (j+1))
+                                 label='Level %s' % levels[j])
                 else:
                     fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc],
                                   edgecolor=None,color=colors[j+1])
@@ -439,7 +466,7 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
                 if n == 1:
                     fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc],
                                  color=colors[j+1], edgecolor=None,
-                                 label='Level %s' % (j+1))
+                                 label='Level %s' % levels[j])
                 else:
                     fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc], edgecolor=None,
                                  color=colors[j+1])
@@ -512,6 +539,79 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
 
     make_png('timing_ByFrameCellUpdatesPerCPU.png')
 
+
+    # wall time of each phase, cumulative and between frames:
+
+    if len(phases) > 0:
+        phase_wall = timing_stats[:,phase_columns] / comptime_factor
+        if 'advance' in phases and 'gauges' in phases:
+            # The advance timer runs while the gauges are updated
+            phase_wall[:,phases.index('advance')] -= \
+                phase_wall[:,phases.index('gauges')]
+
+        figure(51)
+        clf()
+        sum_phases = zeros(ntimes)
+        for k in range(len(phases)):
+            last_sum_phases = sum_phases.copy()
+            sum_phases += phase_wall[:,k]
+            fill_between(time, last_sum_phases, sum_phases,
+                         color=colors[k+1], edgecolor=None,
+                         label=phases[k].capitalize())
+            plot(time, sum_phases, 'k')
+
+        fill_between(time, total_wall, sum_phases, color=colors[0],
+                     edgecolor=None, label='Other')
+        plot(time, total_wall, 'k', lw=1, label='Total Wall')
+        xlim(xlimits)
+        ylim(0, 1.1*max(total_wall.max(), sum_phases.max()))
+        title('Cumulative wall time in each phase')
+        xlabel('Simulation time t (%s)' % simtime_units)
+        ylabel('Wall time (%s)' % comptime_units)
+        legend(loc='upper left')
+
+        make_png('timing_CumPhaseWallTime.png')
+
+        figure(52)
+        clf()
+        dc_max = 0
+        for n in range(1,ntimes):
+            tt = array([time[n-1],time[n]])
+            if time[n] == time[n-1]:
+                continue
+            dcn = 0
+            for k in range(len(phases)):
+                dc = phase_wall[n,k] - phase_wall[n-1,k]
+                if n == 1:
+                    kwargs_label = {'label': phases[k].capitalize()}
+                else:
+                    kwargs_label = {}
+                fill_between(tt, [dcn,dcn], [dcn+dc,dcn+dc],
+                             color=colors[k+1], edgecolor=None,
+                             **kwargs_label)
+                dcn = dcn + dc
+
+            dtot = max(total_wall[n]-total_wall[n-1], dcn)
+            if n == 1:
+                kwargs_label = {'label': 'Other'}
+            else:
+                kwargs_label = {}
+            fill_between(tt, [dcn,dcn], [dtot,dtot], color=colors[0],
+                         edgecolor=None, **kwargs_label)
+            plot(tt, [dtot,dtot], 'k')
+            plot([time[n-1],time[n-1]], [0,dtot], 'k')
+            plot([time[n],time[n]], [0,dtot], 'k')
+            dc_max = max(dc_max, dtot)
+
+        xlim(xlimits)
+        ylim(0, 1.2*dc_max)
+        title('Wall time in each phase between output frames')
+        xlabel('Simulation time t (%s)' % simtime_units)
+        ylabel('Wall time (%s) / output frame' % comptime_units)
+        legend(loc='upper left')
+
+        make_png('timing_ByFramePhaseWallTime.png')
+
     if make_pngs:
 
         try:
@@ -525,6 +625,8 @@ def make_plots(outdir='_output', make_pngs=True, make_html=None,
             timing_text = 'Error -- could not read timing.txt from %s' \
                            % outdir
         html_text = html_text1 + timing_text + html_text2
+        if len(phases) > 0:
+            html_text = html_text.replace('</html>', html_text_phases)
 
     if make_html:
         html_file = os.path.join(plotdir, 'timing.html')
@@ -27,6 +27,7 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 // #include "fc2d_cpucuda_options.h"
 #include "fc2d_cpucuda_fort.h"
 #include "../fc2d_geoclaw/fc2d_geoclaw_output_ascii.h"
+#include "../fc2d_geoclaw/fc2d_geoclaw_timing.h"
 
 #include <stdlib.h>  /* For size_t */
 
@@ -502,7 +503,7 @@ void geoclaw_output(fclaw2d_global_t *glob, int iframe)
 {
     const fc2d_cpucuda_options_t*geo_opt = fc2d_cpucuda_get_options(glob);
     if (geo_opt->ascii_out != 0)
-        fc2d_geoclaw_output_ascii(glob,iframe);        
+        fc2d_geoclaw_output_ascii(glob,iframe,0);
 }
 
 
@@ -916,6 +917,10 @@ void fc2d_geoclaw_module_setup(fclaw2d_global_t *glob)
                              &fclaw_opt->bx, 
                              &fclaw_opt->ay, 
                              &fclaw_opt->by);
+
+    FC2D_GEOCLAW_SET_TOPO_CACHE(&geo_opt->topo_cache_size);
+
+    fc2d_geoclaw_timing_set_csv(geo_opt->timing_csv);
 }
 
 /* -------------------------- Virtual table  ---------------------------- */
@@ -152,6 +152,11 @@ void FC2D_GEOCLAW_SET_MODULES(const int* mwaves_in, const int* mcapa_in,
                               const double *ay,
                               const double *by);
 
+#define FC2D_GEOCLAW_SET_TOPO_CACHE FCLAW_F77_FUNC(fc2d_geoclaw_set_topo_cache, \
+                                                   FC2D_GEOCLAW_SET_TOPO_CACHE)
+
+void FC2D_GEOCLAW_SET_TOPO_CACHE(const int* cache_size);
+
 
 #define FC2D_GEOCLAW_QINIT   FCLAW_F77_FUNC(fc2d_geoclaw_qinit, FC2D_GEOCLAW_QINIT)
 void FC2D_GEOCLAW_QINIT(const int* meqn,const int* mbc,
@@ -455,7 +460,17 @@ void FC2D_GEOCLAW_FORT_INTERPOLATE_CORNER(const int* mx,
 #define FC2D_GEOCLAW_FORT_WRITE_HEADER FCLAW_F77_FUNC(fc2d_geoclaw_fort_write_header,\
                                                       FC2D_GEOCLAW_FORT_WRITE_HEADER)
 void FC2D_GEOCLAW_FORT_WRITE_HEADER(int* iframe, double* time, int* meqn, 
-                                    int* maux, int* ngrids, int* mbc);
+                                    int* maux, int* ngrids, int* mbc,
+                                    int* sharded);
+
+#define FC2D_GEOCLAW_FORT_OPEN_FILE FCLAW_F77_FUNC(fc2d_geoclaw_fort_open_file, \
+                                                   FC2D_GEOCLAW_FORT_OPEN_FILE)
+void FC2D_GEOCLAW_FORT_OPEN_FILE(const int* iframe, const int* mpirank,
+                                 const int* sharded);
+
+#define FC2D_GEOCLAW_FORT_CLOSE_FILE FCLAW_F77_FUNC(fc2d_geoclaw_fort_close_file, \
+                                                    FC2D_GEOCLAW_FORT_CLOSE_FILE)
+void FC2D_GEOCLAW_FORT_CLOSE_FILE();
 
 #define FC2D_GEOCLAW_FORT_WRITE_FILE FCLAW_F77_FUNC(fc2d_geoclaw_fort_write_file, \
                                                     FC2D_GEOCLAW_FORT_WRITE_FILE)
@@ -94,9 +94,17 @@ geoclaw_register (fc2d_cpucuda_options_t *geo_opt, sc_options_t * opt)
     sc_options_add_int (opt, 0, "mbathy", &geo_opt->mbathy, 1,
                         "[geoclaw] Location of bathymetry in aux array [1]");
 
+    sc_options_add_int (opt, 0, "topo-cache-size", &geo_opt->topo_cache_size, 1024,
+                        "[geoclaw] Number of patches whose topography is cached " \
+                        "for regridding, 0 to disable [1024]");
+
     sc_options_add_bool (opt, 0, "ascii-out", &geo_opt->ascii_out,1,
                          "Output ascii files for post-processing [T]");
 
+    sc_options_add_bool (opt, 0, "timing-csv", &geo_opt->timing_csv, 1,
+                         "Write wall times by phase to timing.csv " \
+                         "at every output frame [T]");
+
     geo_opt->is_registered = 1;
 
     return NULL;
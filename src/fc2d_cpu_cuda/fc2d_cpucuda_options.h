@@ -58,6 +58,7 @@ typedef struct fc2d_cpucuda_options
     int mbathy;
     int src_term;
     int use_fwaves;
+    int topo_cache_size;
 
     double dry_tolerance_c;
     double wave_tolerance_c;
@@ -66,6 +67,7 @@ typedef struct fc2d_cpucuda_options
     const char *speed_tolerance_c_string;
 
     int ascii_out;  /* Only one type of output now  */    
+    int timing_csv; /* timing.csv row at every output frame */
 
     int buffer_len;
 
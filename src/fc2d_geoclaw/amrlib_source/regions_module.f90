@@ -18,6 +18,18 @@ module regions_module
 
     integer :: num_regions
     type(region_type), allocatable :: regions(:)
+
+    ! Spatial index of the regions: a uniform grid of bins over the regions,
+    ! each bin listing the regions that overlap it (in compressed rows
+    ! region_bin_start/region_bin_list).  Regions that span a large part of
+    ! the grid are not binned but listed in wide_regions, and are always
+    ! candidates.
+    integer :: region_nbins_x = 0, region_nbins_y = 0
+    double precision :: region_bin_xlow, region_bin_ylow
+    double precision :: region_bin_dx, region_bin_dy
+    integer, allocatable :: region_bin_start(:), region_bin_list(:)
+    integer :: num_wide_regions = 0
+    integer, allocatable :: wide_regions(:)
       
 contains
 
@@ -63,9 +75,206 @@ contains
             endif
             close(unit)
 
+            call build_region_bins()
+
             module_setup = .true.
         end if
 
     end subroutine set_regions
 
+
+    ! Build the spatial index of the regions, see region_candidates.
+    ! Called by set_regions; must be called again if regions are changed.
+    subroutine build_region_bins()
+
+        implicit none
+
+        integer :: m, nbins, nnarrow, i, j, ib
+        integer :: ilo, ihi, jlo, jhi
+        double precision :: xlow, xhi, ylow, yhi
+        logical :: wide(num_regions)
+
+        if (allocated(region_bin_start)) deallocate(region_bin_start)
+        if (allocated(region_bin_list)) deallocate(region_bin_list)
+        if (allocated(wide_regions)) deallocate(wide_regions)
+        region_nbins_x = 0
+        region_nbins_y = 0
+        num_wide_regions = 0
+        allocate(wide_regions(max(num_regions,1)))
+        if (num_regions == 0) return
+
+        ! Regions covering more than a quarter of the extent of all
+        ! regions in x or y, e.g. a background region over the whole
+        ! domain, would only make the bins coarse: keep them aside
+        wide = .false.
+        call regions_extent(.false.)
+        do m = 1,num_regions
+            wide(m) = (regions(m)%x_hi - regions(m)%x_low > 0.25d0*(xhi - xlow)) &
+                 .or. (regions(m)%y_hi - regions(m)%y_low > 0.25d0*(yhi - ylow))
+        end do
+        nnarrow = num_regions - count(wide)
+        if (nnarrow < 0.75d0*num_regions .or. nnarrow < 8) then
+            ! Few regions or mostly large ones: just test all of them
+            wide = .true.
+            nnarrow = 0
+        endif
+        do m = 1,num_regions
+            if (wide(m)) then
+                num_wide_regions = num_wide_regions + 1
+                wide_regions(num_wide_regions) = m
+            endif
+        end do
+        if (nnarrow == 0) return
+
+        ! About one bin per region over the extent of the narrow regions
+        call regions_extent(.true.)
+        nbins = ceiling(sqrt(dble(nnarrow)))
+        region_nbins_x = nbins
+        region_nbins_y = nbins
+        region_bin_xlow = xlow
+        region_bin_ylow = ylow
+        region_bin_dx = max(xhi - xlow, tiny(1.d0))/nbins
+        region_bin_dy = max(yhi - ylow, tiny(1.d0))/nbins
+
+        ! Count the regions in every bin, then fill the lists
+        allocate(region_bin_start(nbins*nbins + 1))
+        region_bin_start = 0
+        do m = 1,num_regions
+            if (wide(m)) cycle
+            call region_bin_range(regions(m)%x_low,regions(m)%y_low, &
+                                  regions(m)%x_hi,regions(m)%y_hi,ilo,ihi,jlo,jhi)
+            do j = jlo,jhi
+                do i = ilo,ihi
+                    ib = j*nbins + i + 1
+                    region_bin_start(ib) = region_bin_start(ib) + 1
+                end do
+            end do
+        end do
+        region_bin_start(1) = 1
+        do ib = 2,nbins*nbins + 1
+            region_bin_start(ib) = region_bin_start(ib-1) + region_bin_start(ib)
+        end do
+        allocate(region_bin_list(region_bin_start(nbins*nbins+1) - 1))
+        do m = 1,num_regions
+            if (wide(m)) cycle
+            call region_bin_range(regions(m)%x_low,regions(m)%y_low, &
+                                  regions(m)%x_hi,regions(m)%y_hi,ilo,ihi,jlo,jhi)
+            do j = jlo,jhi
+                do i = ilo,ihi
+                    ib = j*nbins + i + 1
+                    region_bin_start(ib) = region_bin_start(ib) - 1
+                    region_bin_list(region_bin_start(ib)) = m
+                end do
+            end do
+        end do
+        ! Lists were filled backwards from the end of each bin; keep them
+        ! in region order
+        do ib = 1,nbins*nbins
+            region_bin_list(region_bin_start(ib):region_bin_start(ib+1)-1) = &
+                 region_bin_list(region_bin_start(ib+1)-1:region_bin_start(ib):-1)
+        end do
+
+    contains
+
+        subroutine regions_extent(narrow_only)
+            logical, intent(in) :: narrow_only
+            integer :: m
+            xlow = huge(1.d0)
+            ylow = huge(1.d0)
+            xhi = -huge(1.d0)
+            yhi = -huge(1.d0)
+            do m = 1,num_regions
+                if (narrow_only .and. wide(m)) cycle
+                xlow = min(xlow, regions(m)%x_low)
+                ylow = min(ylow, regions(m)%y_low)
+                xhi = max(xhi, regions(m)%x_hi)
+                yhi = max(yhi, regions(m)%y_hi)
+            end do
+        end subroutine regions_extent
+
+    end subroutine build_region_bins
+
+
+    ! Range of bins overlapped by the box [xlower,xupper] x [ylower,yupper],
+    ! clipped to the bin grid.  Empty (ihi < ilo or jhi < jlo) if the box
+    ! is outside the grid.
+    subroutine region_bin_range(xlower,ylower,xupper,yupper,ilo,ihi,jlo,jhi)
+
+        implicit none
+
+        double precision, intent(in) :: xlower,ylower,xupper,yupper
+        integer, intent(out) :: ilo,ihi,jlo,jhi
+
+        ilo = bin_index(xlower,region_bin_xlow,region_bin_dx,region_nbins_x)
+        ihi = bin_index(xupper,region_bin_xlow,region_bin_dx,region_nbins_x)
+        jlo = bin_index(ylower,region_bin_ylow,region_bin_dy,region_nbins_y)
+        jhi = bin_index(yupper,region_bin_ylow,region_bin_dy,region_nbins_y)
+        if (xupper < region_bin_xlow .or. yupper < region_bin_ylow .or. &
+            xlower > region_bin_xlow + region_nbins_x*region_bin_dx .or. &
+            ylower > region_bin_ylow + region_nbins_y*region_bin_dy) then
+            ihi = ilo - 1
+        endif
+
+    contains
+
+        integer function bin_index(x,xlow,dx,nbins)
+            double precision, intent(in) :: x,xlow,dx
+            integer, intent(in) :: nbins
+            double precision :: r
+            r = (x - xlow)/dx
+            if (r <= 0.d0) then
+                bin_index = 0
+            else if (r >= nbins - 1) then
+                bin_index = nbins - 1
+            else
+                bin_index = int(r)
+            endif
+        end function bin_index
+
+    end subroutine region_bin_range
+
+
+    ! Indices of the regions that may intersect the box
+    ! [xlower,xupper] x [ylower,yupper], each listed once: the wide regions
+    ! and the regions in the bins overlapped by the box.  A region lying in
+    ! several of these bins is only taken from the first of them.
+    subroutine region_candidates(xlower,ylower,xupper,yupper,candidates,num_candidates)
+
+        implicit none
+
+        double precision, intent(in) :: xlower,ylower,xupper,yupper
+        integer, intent(out) :: candidates(num_regions), num_candidates
+
+        integer :: i, j, k, m, ilo, ihi, jlo, jhi, rilo, rihi, rjlo, rjhi
+
+        if (.not. allocated(wide_regions)) then
+            ! Index not built: every region is a candidate
+            num_candidates = num_regions
+            candidates = (/ (m, m = 1,num_regions) /)
+            return
+        endif
+
+        num_candidates = num_wide_regions
+        candidates(1:num_wide_regions) = wide_regions(1:num_wide_regions)
+        if (region_nbins_x == 0) return
+
+        call region_bin_range(xlower,ylower,xupper,yupper,ilo,ihi,jlo,jhi)
+        do j = jlo,jhi
+            do i = ilo,ihi
+                do k = region_bin_start(j*region_nbins_x + i + 1), &
+                       region_bin_start(j*region_nbins_x + i + 2) - 1
+                    m = region_bin_list(k)
+                    call region_bin_range(regions(m)%x_low,regions(m)%y_low, &
+                                          regions(m)%x_hi,regions(m)%y_hi, &
+                                          rilo,rihi,rjlo,rjhi)
+                    if (i == max(ilo,rilo) .and. j == max(jlo,rjlo)) then
+                        num_candidates = num_candidates + 1
+                        candidates(num_candidates) = m
+                    endif
+                end do
+            end do
+        end do
+
+    end subroutine region_candidates
+
 end module regions_module
@@ -27,6 +27,8 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #include "fc2d_geoclaw_options.h"
 #include "fc2d_geoclaw_fort.h"
 #include "fc2d_geoclaw_output_ascii.h"
+#include "fc2d_geoclaw_output_binary.h"
+#include "fc2d_geoclaw_timing.h"
 
 #include <fclaw_pointer_map.h>
 
@@ -46,6 +48,8 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #include <fclaw2d_diagnostics.h>
 #include <fclaw2d_defs.h>
 
+#include <time.h>
+
 /* Some mapping functions */
 #include <fclaw2d_map_brick.h>
 #include <fclaw2d_map.h>
@@ -270,6 +274,91 @@ void geoclaw_src2(fclaw2d_global_t *glob,
 
 }
 
+/* Cells checked by geoclaw_patch_dry */
+#define GEOCLAW_DRY_ALL       0
+#define GEOCLAW_DRY_INTERIOR  1
+#define GEOCLAW_DRY_GHOST     2
+
+static
+int geoclaw_patch_dry(fclaw2d_global_t *glob,
+                      fclaw2d_patch_t *patch,
+                      int cells)
+{
+    int mx,my,mbc;
+    double xlower,ylower,dx,dy;
+    fclaw2d_clawpatch_grid_data(glob,patch, &mx,&my,&mbc,
+                                &xlower,&ylower,&dx,&dy);
+
+    int meqn;
+    double *q;
+    fclaw2d_clawpatch_soln_data(glob,patch,&q,&meqn);
+
+    int is_dry;
+    FC2D_GEOCLAW_DRY_PATCH(&mbc,&mx,&my,&meqn,q,&cells,&is_dry);
+    return is_dry;
+}
+
+/* Wet/dry state of the interior of each local patch at the end of its
+   last step, so that before the next step a wet patch is not scanned at
+   all and a dry one only has its ghost cells scanned.  A flag holds only
+   for the patch it was set for (same position and level) and a step
+   starting at the time it was set: patches that are new after a regrid
+   or partition, and steps that are retaken, get a full scan.  Ghost
+   cells, refilled by every ghost exchange, are always scanned. */
+typedef struct geoclaw_dry_flag
+{
+    double t;
+    double xlower, ylower;
+    int level;
+    int dry;
+} geoclaw_dry_flag_t;
+
+static geoclaw_dry_flag_t *geoclaw_dry_flags = NULL;
+static int geoclaw_num_dry_flags = 0;
+
+static
+geoclaw_dry_flag_t* geoclaw_dry_flag(fclaw2d_global_t *glob,
+                                     int blockno, int patchno)
+{
+    fclaw2d_domain_t *domain = glob->domain;
+    if (geoclaw_num_dry_flags != domain->local_num_patches)
+    {
+        /* The number of local patches changed in a regrid: start over */
+        FCLAW_FREE(geoclaw_dry_flags);
+        geoclaw_num_dry_flags = domain->local_num_patches;
+        geoclaw_dry_flags = FCLAW_ALLOC(geoclaw_dry_flag_t,
+                                        geoclaw_num_dry_flags);
+        for (int k = 0; k < geoclaw_num_dry_flags; k++)
+            geoclaw_dry_flags[k].level = -1;
+    }
+    return &geoclaw_dry_flags[domain->blocks[blockno].num_patches_before
+                              + patchno];
+}
+
+static
+int geoclaw_dry_flag_valid(const geoclaw_dry_flag_t *flag,
+                           fclaw2d_patch_t *patch,
+                           double xlower, double ylower,
+                           double t, double dt)
+{
+    return flag->level == patch->level &&
+           flag->xlower == xlower && flag->ylower == ylower &&
+           fabs(flag->t - t) < 1e-6*dt;
+}
+
+static
+void geoclaw_dry_flag_set(geoclaw_dry_flag_t *flag,
+                          fclaw2d_patch_t *patch,
+                          double xlower, double ylower,
+                          double t, int dry)
+{
+    flag->t = t;
+    flag->xlower = xlower;
+    flag->ylower = ylower;
+    flag->level = patch->level;
+    flag->dry = dry;
+}
+
 /* This is called from the single_step callback. and is of type 'flaw_single_step_t' */
 static
 double geoclaw_step2(fclaw2d_global_t *glob,
@@ -349,13 +438,12 @@ void fc2d_geoclaw_dt(fclaw2d_global_t *glob,double t, double* dt)
 
 
 static
-double geoclaw_update(fclaw2d_global_t *glob,
-                      fclaw2d_patch_t *patch,
-                      int blockno,
-                      int patchno,
-                      double t,
-                      double dt,
-                      void* user)
+double geoclaw_single_step(fclaw2d_global_t *glob,
+                           fclaw2d_patch_t *patch,
+                           int blockno,
+                           int patchno,
+                           double t,
+                           double dt)
 {
     FC2D_GEOCLAW_TOPO_UPDATE(&t);
 
@@ -364,6 +452,48 @@ double geoclaw_update(fclaw2d_global_t *glob,
                     blockno,
                     patchno,t,dt);
 
+    /* Dry patch fast path.  The Riemann solvers skip interfaces where
+       both depths are below the dry tolerance, so on a patch that is dry,
+       ghost cells included, step2 leaves q unchanged and the CFL number
+       is zero.  The default source terms leave the zero momentum of dry
+       cells unchanged, but user source terms (e.g. rain) still run. */
+    fc2d_geoclaw_vtable_t *geoclaw_vt = fc2d_geoclaw_vt(glob);
+    const fc2d_geoclaw_options_t* geoclaw_opt = fc2d_geoclaw_get_options(glob);
+    geoclaw_dry_flag_t *flag = NULL;
+    double xlower, ylower;
+    int dry = 0;
+    if (geoclaw_opt->skip_dry_patches &&
+        geoclaw_vt->rpn2 == FC2D_GEOCLAW_RPN2 &&
+        geoclaw_vt->rpt2 == FC2D_GEOCLAW_RPT2)
+    {
+        int mx, my, mbc;
+        double dx, dy;
+        fclaw2d_clawpatch_grid_data(glob,patch,&mx,&my,&mbc,
+                                    &xlower,&ylower,&dx,&dy);
+        flag = geoclaw_dry_flag(glob,blockno,patchno);
+        if (!geoclaw_dry_flag_valid(flag,patch,xlower,ylower,t,dt))
+            dry = geoclaw_patch_dry(glob,patch,GEOCLAW_DRY_ALL);
+        else if (flag->dry)
+            dry = geoclaw_patch_dry(glob,patch,GEOCLAW_DRY_GHOST);
+    }
+
+    if (dry)
+    {
+        /* In case we need to re-take this step */
+        fclaw2d_clawpatch_save_current_step(glob, patch);
+
+        if (geoclaw_opt->src_term > 0 && geoclaw_vt->src2 != FC2D_GEOCLAW_SRC2)
+        {
+            geoclaw_src2(glob,
+                         patch,
+                         blockno,
+                         patchno,t,dt);
+            dry = geoclaw_patch_dry(glob,patch,GEOCLAW_DRY_INTERIOR);
+        }
+        geoclaw_dry_flag_set(flag,patch,xlower,ylower,t+dt,dry);
+        return 0.0;
+    }
+
     double maxcfl = geoclaw_step2(glob,
                                   patch,
                                   blockno,
@@ -374,7 +504,6 @@ double geoclaw_update(fclaw2d_global_t *glob,
     
 
 
-    const fc2d_geoclaw_options_t* geoclaw_opt = fc2d_geoclaw_get_options(glob);
     if (geoclaw_opt->src_term > 0)
     {
         geoclaw_src2(glob,
@@ -383,6 +512,40 @@ double geoclaw_update(fclaw2d_global_t *glob,
                      patchno,t,dt);
     }
 
+    if (flag != NULL)
+    {
+        /* Stops at the first wet row, so cheap for wet patches */
+        dry = geoclaw_patch_dry(glob,patch,GEOCLAW_DRY_INTERIOR);
+        geoclaw_dry_flag_set(flag,patch,xlower,ylower,t+dt,dry);
+    }
+
+    return maxcfl;
+}
+
+static
+double geoclaw_update(fclaw2d_global_t *glob,
+                      fclaw2d_patch_t *patch,
+                      int blockno,
+                      int patchno,
+                      double t,
+                      double dt,
+                      void* user)
+{
+    /* Time each patch update, for the cell updates and times by level
+       in timing.csv */
+    double wall = fclaw2d_timer_wtime();
+    clock_t cpu = clock();
+
+    double maxcfl = geoclaw_single_step(glob,patch,blockno,patchno,t,dt);
+
+    int mx,my,mbc;
+    double xlower,ylower,dx,dy;
+    fclaw2d_clawpatch_grid_data(glob,patch,&mx,&my,&mbc,
+                                &xlower,&ylower,&dx,&dy);
+
+    fc2d_geoclaw_timing_update(patch->level,mx*my,
+                               fclaw2d_timer_wtime() - wall,
+                               (double) (clock() - cpu)/CLOCKS_PER_SEC);
     return maxcfl;
 }
 
@@ -394,7 +557,10 @@ void geoclaw_output(fclaw2d_global_t *glob, int iframe)
 {
     const fc2d_geoclaw_options_t*geo_opt = fc2d_geoclaw_get_options(glob);
     if (geo_opt->ascii_out != 0)
-        fc2d_geoclaw_output_ascii(glob,iframe);        
+        fc2d_geoclaw_output_ascii(glob,iframe,geo_opt->output_shards);
+
+    if (geo_opt->binary_out != 0)
+        fc2d_geoclaw_output_binary(glob,iframe);
 }
 
 
@@ -808,6 +974,10 @@ void fc2d_geoclaw_module_setup(fclaw2d_global_t *glob)
                              &fclaw_opt->bx, 
                              &fclaw_opt->ay, 
                              &fclaw_opt->by);
+
+    FC2D_GEOCLAW_SET_TOPO_CACHE(&geo_opt->topo_cache_size);
+
+    fc2d_geoclaw_timing_set_csv(geo_opt->timing_csv);
 }
 
 /* -------------------------- Virtual table  ---------------------------- */
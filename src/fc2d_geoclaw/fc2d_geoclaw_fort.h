@@ -140,6 +140,11 @@ void FC2D_GEOCLAW_SET_MODULES(const int* mwaves_in, const int* mcapa_in,
                               const double *ay,
                               const double *by);
 
+#define FC2D_GEOCLAW_SET_TOPO_CACHE FCLAW_F77_FUNC(fc2d_geoclaw_set_topo_cache, \
+                                                   FC2D_GEOCLAW_SET_TOPO_CACHE)
+
+void FC2D_GEOCLAW_SET_TOPO_CACHE(const int* cache_size);
+
 
 #define FC2D_GEOCLAW_QINIT   FCLAW_F77_FUNC(fc2d_geoclaw_qinit, FC2D_GEOCLAW_QINIT)
 void FC2D_GEOCLAW_QINIT(const int* meqn,const int* mbc,
@@ -166,6 +171,11 @@ void FC2D_GEOCLAW_B4STEP2(const int* mbc,
                           const double* t, const double* dt,
                           const int* maux, double aux[]);
 
+#define FC2D_GEOCLAW_DRY_PATCH FCLAW_F77_FUNC(fc2d_geoclaw_dry_patch, FC2D_GEOCLAW_DRY_PATCH)
+void FC2D_GEOCLAW_DRY_PATCH(const int* mbc, const int* mx, const int* my,
+                            const int* meqn, double q[], const int* cells,
+                            int* is_dry);
+
 #if 0
 #define FC2D_GEOCLAW_CHECK_DTOPOTIME FCLAW_F77_FUNC(fc2d_geoclaw_check_dtopotime, 
                                                     FC2D_GEOCLAW_CHECK_DTOPOTIME)
@@ -443,7 +453,17 @@ void FC2D_GEOCLAW_FORT_INTERPOLATE_CORNER(const int* mx,
 #define FC2D_GEOCLAW_FORT_WRITE_HEADER FCLAW_F77_FUNC(fc2d_geoclaw_fort_write_header,\
                                                       FC2D_GEOCLAW_FORT_WRITE_HEADER)
 void FC2D_GEOCLAW_FORT_WRITE_HEADER(int* iframe, double* time, int* meqn, 
-                                    int* maux, int* ngrids, int* mbc);
+                                    int* maux, int* ngrids, int* mbc,
+                                    int* sharded);
+
+#define FC2D_GEOCLAW_FORT_OPEN_FILE FCLAW_F77_FUNC(fc2d_geoclaw_fort_open_file, \
+                                                   FC2D_GEOCLAW_FORT_OPEN_FILE)
+void FC2D_GEOCLAW_FORT_OPEN_FILE(const int* iframe, const int* mpirank,
+                                 const int* sharded);
+
+#define FC2D_GEOCLAW_FORT_CLOSE_FILE FCLAW_F77_FUNC(fc2d_geoclaw_fort_close_file, \
+                                                    FC2D_GEOCLAW_FORT_CLOSE_FILE)
+void FC2D_GEOCLAW_FORT_CLOSE_FILE();
 
 #define FC2D_GEOCLAW_FORT_WRITE_FILE FCLAW_F77_FUNC(fc2d_geoclaw_fort_write_file, \
                                                     FC2D_GEOCLAW_FORT_WRITE_FILE)
@@ -29,6 +29,7 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #include "fc2d_geoclaw_fort.h"
 
 #include "fc2d_geoclaw_options.h"
+#include "fc2d_geoclaw_timing.h"
 
 #include <fclaw2d_clawpatch.h>
 #include <fclaw2d_clawpatch_options.h>
@@ -242,6 +243,8 @@ void geoclaw_gauge_update_default(fclaw2d_global_t*
 
     int m;
 
+    double wall = fclaw2d_timer_wtime();
+
     fclaw2d_clawpatch_grid_data(glob,patch,&mx,&my,&mbc,
                                 &xlower,&ylower,&dx,&dy);
 
@@ -270,6 +273,8 @@ void geoclaw_gauge_update_default(fclaw2d_global_t*
     }
     guser->avar[0] = avar[0];   /* Just store bathymetry for now */
     fclaw_gauge_set_buffer_entry(glob,g,guser);
+
+    fc2d_geoclaw_timing_gauges(fclaw2d_timer_wtime() - wall);
 }
 
 void geoclaw_print_gauges_default(fclaw2d_global_t *glob, 
@@ -281,6 +286,8 @@ void geoclaw_print_gauges_default(fclaw2d_global_t *glob,
     char filename[15];  /* gaugexxxxx.txt + EOL character */
     FILE *fp;
 
+    double wall = fclaw2d_timer_wtime();
+
     /* This assumes on buffers be organized as an array; entries
        start at 0 and with kmax-1 */
     fclaw_gauge_get_buffer(glob,gauge,&kmax,(void***) &gauge_buffer);
@@ -302,6 +309,8 @@ void geoclaw_print_gauges_default(fclaw2d_global_t *glob,
         FCLAW_FREE(guser);
     }
     fclose(fp);
+
+    fc2d_geoclaw_timing_gauges(fclaw2d_timer_wtime() - wall);
 }
 
 #ifdef __cplusplus
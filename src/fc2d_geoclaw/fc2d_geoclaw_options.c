@@ -54,6 +54,13 @@ geoclaw_register (fc2d_geoclaw_options_t *geo_opt, sc_options_t * opt)
     sc_options_add_bool (opt, 0, "use_fwaves", &geo_opt->use_fwaves, 0,
                          "[geoclaw] Use fwaves flux-form [F]");
 
+    sc_options_add_bool (opt, 0, "skip-dry-patches", &geo_opt->skip_dry_patches, 1,
+                         "[geoclaw] Skip the update of patches that are dry, " \
+                         "ghost cells included [T]");
+
+    sc_options_add_int (opt, 0, "topo-cache-size", &geo_opt->topo_cache_size, 1024,
+                        "[geoclaw] Number of patches whose topography is cached " \
+                        "for regridding, 0 to disable [1024]");
 
     sc_options_add_int (opt, 0, "mwaves", &geo_opt->mwaves, 1,
                         "[geoclaw] Number of waves [1]");
@@ -91,6 +98,21 @@ geoclaw_register (fc2d_geoclaw_options_t *geo_opt, sc_options_t * opt)
     sc_options_add_bool (opt, 0, "ascii-out", &geo_opt->ascii_out,1,
                          "Output ascii files for post-processing [T]");
 
+    sc_options_add_bool (opt, 0, "binary-out", &geo_opt->binary_out,0,
+                         "Output binary files (fort.b) for post-processing, " \
+                         "instead of ascii-out [F]");
+
+    sc_options_add_int (opt, 0, "binary-precision", &geo_opt->binary_precision, 64,
+                        "Precision of binary output, 64 or 32 bit [64]");
+
+    sc_options_add_bool (opt, 0, "output-shards", &geo_opt->output_shards, 1,
+                         "With more than one MPI rank, each rank writes its own " \
+                         "fort.qXXXX.rNNNNN (and fort.bXXXX.rNNNNN) [T]");
+
+    sc_options_add_bool (opt, 0, "timing-csv", &geo_opt->timing_csv, 1,
+                         "Write wall and CPU times by level and by phase " \
+                         "to timing.csv at every output frame [T]");
+
     geo_opt->is_registered = 1;
 
     return NULL;
@@ -107,7 +129,22 @@ geoclaw_check (fc2d_geoclaw_options_t *geo_opt)
     geo_opt->method[4] = geo_opt->src_term;
     geo_opt->method[5] = geo_opt->mcapa;
 
-    return FCLAW_NOEXIT;    /* Nothing can go wrong here! */
+    if (geo_opt->binary_precision != 64 && geo_opt->binary_precision != 32)
+    {
+        fclaw_global_essentialf("binary-precision must be 64 or 32\n");
+        return FCLAW_EXIT_ERROR;
+    }
+
+    if (geo_opt->ascii_out && geo_opt->binary_out)
+    {
+        /* Both would write fort.tXXXX and fort.qXXXX */
+        fclaw_global_essentialf("ascii-out and binary-out write the same " \
+                                "fort.t and fort.q files; set ascii-out = F " \
+                                "to write binary output\n");
+        return FCLAW_EXIT_ERROR;
+    }
+
+    return FCLAW_NOEXIT;
 }
 
 
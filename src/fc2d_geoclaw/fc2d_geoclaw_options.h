@@ -56,6 +56,8 @@ typedef struct fc2d_geoclaw_options
     int mbathy;
     int src_term;
     int use_fwaves;
+    int skip_dry_patches;
+    int topo_cache_size;
 
     double dry_tolerance_c;
     double wave_tolerance_c;
@@ -63,7 +65,11 @@ typedef struct fc2d_geoclaw_options
     double *speed_tolerance_c;
     const char *speed_tolerance_c_string;
 
-    int ascii_out;  /* Only one type of output now  */    
+    int ascii_out;
+    int binary_out;
+    int binary_precision;  /* 64 or 32 bit floats in fort.bXXXX */
+    int output_shards;     /* one fort.qXXXX.rNNNNN per MPI rank */
+    int timing_csv;        /* timing.csv row at every output frame */
 
     int is_registered;
     
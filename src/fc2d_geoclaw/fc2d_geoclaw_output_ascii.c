@@ -72,7 +72,7 @@ void cb_geoclaw_output_ascii(fclaw2d_domain_t *domain,
 }
 
 static
-void geoclaw_header_ascii(fclaw2d_global_t* glob,int iframe)
+void geoclaw_header_ascii(fclaw2d_global_t* glob,int iframe,int sharded)
 {
     double time = glob->curr_time;
     int ngrids = glob->domain->global_num_patches;
@@ -82,33 +82,47 @@ void geoclaw_header_ascii(fclaw2d_global_t* glob,int iframe)
     int maux = clawpatch_opt->maux;
     int mbc = clawpatch_opt->mbc;
 
-    FC2D_GEOCLAW_FORT_WRITE_HEADER(&iframe,&time,&meqn,&maux,&ngrids,&mbc);
+    FC2D_GEOCLAW_FORT_WRITE_HEADER(&iframe,&time,&meqn,&maux,&ngrids,&mbc,
+                                   &sharded);
 }
 
 /* --------------------------------------------------------------
 	Public interface
    ------------------------------------------------------------ */
 
-void fc2d_geoclaw_output_ascii(fclaw2d_global_t* glob,int iframe)
+void fc2d_geoclaw_output_ascii(fclaw2d_global_t* glob,int iframe,
+                               int output_shards)
 {
     fclaw2d_domain_t *domain = glob->domain;
 
+    int sharded = output_shards && domain->mpisize > 1;
+    if (sharded)
+    {
+        /* Each processor writes its own fort.qXXXX.rNNNNN, without waiting
+           for the others.  Readers merge the shards in rank order, which
+           is the order the patches have in a single fort.qXXXX. */
+        if (domain->mpirank == 0)
+            geoclaw_header_ascii(glob,iframe,sharded);
+
+        FC2D_GEOCLAW_FORT_OPEN_FILE(&iframe,&domain->mpirank,&sharded);
+        fclaw2d_global_iterate_patches (glob, cb_geoclaw_output_ascii, &iframe);
+        FC2D_GEOCLAW_FORT_CLOSE_FILE();
+        return;
+    }
+
     /* BEGIN NON-SCALABLE CODE */
     /* Write the file contents in serial.
        Use only for small numbers of processors. */
     fclaw2d_domain_serialization_enter (domain);
 
     if (domain->mpirank == 0)
-        geoclaw_header_ascii(glob,iframe);
+        geoclaw_header_ascii(glob,iframe,sharded);
 
     /* Write out each patch to fort.qXXXX */
+    FC2D_GEOCLAW_FORT_OPEN_FILE(&iframe,&domain->mpirank,&sharded);
     fclaw2d_global_iterate_patches (glob, cb_geoclaw_output_ascii, &iframe);
+    FC2D_GEOCLAW_FORT_CLOSE_FILE();
 
     fclaw2d_domain_serialization_leave (domain);
     /* END OF NON-SCALABLE CODE */
 }
-
-
-
-
-
@@ -37,7 +37,9 @@ extern "C"
 
 struct fclaw2d_global;
 
-void fc2d_geoclaw_output_ascii(struct fclaw2d_global* glob,int iframe);
+/* With output_shards, each MPI rank writes its own fort.qXXXX.rNNNNN */
+void fc2d_geoclaw_output_ascii(struct fclaw2d_global* glob,int iframe,
+                               int output_shards);
 
 
 #ifdef __cplusplus
@@ -0,0 +1,237 @@
+/*
+Copyright (c) 2012 Carsten Burstedde, Donna Calhoun, Yu-Hsuan Shih
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+ * Redistributions of source code must retain the above copyright notice, this
+list of conditions and the following disclaimer.
+ * Redistributions in binary form must reproduce the above copyright notice,
+this list of conditions and the following disclaimer in the documentation
+and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+*/
+
+
+#include "fc2d_geoclaw_output_binary.h"
+
+#include "fc2d_geoclaw.h"
+#include "fc2d_geoclaw_options.h"
+
+#include <fclaw2d_clawpatch.h>  /* Include patch, domain declarations */
+#include <fclaw2d_clawpatch_options.h>  /* Include patch, domain declarations */
+
+#include <fclaw2d_patch.h>
+#include <fclaw2d_global.h>
+
+/* Files are appended to by every processor in turn, or written by each
+   processor to its own shard */
+typedef struct geoclaw_binary_files
+{
+    FILE *fq;
+    FILE *fb;
+    int precision;
+    void *buffer;
+    size_t buffer_size;
+} geoclaw_binary_files_t;
+
+static
+void cb_geoclaw_output_binary(fclaw2d_domain_t *domain,
+                              fclaw2d_patch_t *patch,
+                              int blockno, int patchno,
+                              void *user)
+{
+    fclaw2d_global_iterate_t* s = (fclaw2d_global_iterate_t*) user;
+    fclaw2d_global_t *glob = (fclaw2d_global_t*) s->glob;
+    geoclaw_binary_files_t *files = (geoclaw_binary_files_t*) s->user;
+
+    /* Get info not readily available to user */
+    int local_num, global_num, level;
+    fclaw2d_patch_get_info(glob->domain,patch,
+                           blockno,patchno,
+                           &global_num, 
+                           &local_num,&level);
+
+    int mx,my,mbc;
+    double xlower,ylower,dx,dy;
+    fclaw2d_clawpatch_grid_data(glob,patch,&mx,&my,&mbc,
+                                &xlower,&ylower,&dx,&dy);
+
+    double *q;
+    int meqn;
+    fclaw2d_clawpatch_soln_data(glob,patch,&q,&meqn);
+
+    double *aux;
+    int maux;
+    fclaw2d_clawpatch_aux_data(glob,patch,&aux,&maux);
+
+    /* Same patch header as written by fc2d_geoclaw_output_ascii */
+    fprintf(files->fq,"%5d                 grid_number\n",global_num);
+    fprintf(files->fq,"%5d                 AMR_level\n",level);
+    fprintf(files->fq,"%5d                 block_number\n",blockno);
+    fprintf(files->fq,"%5d                 mpi_rank\n",domain->mpirank);
+    fprintf(files->fq,"%5d                 mx\n",mx);
+    fprintf(files->fq,"%5d                 my\n",my);
+    fprintf(files->fq,"%24.16e    xlow\n",xlower);
+    fprintf(files->fq,"%24.16e    ylow\n",ylower);
+    fprintf(files->fq,"%24.16e    dx\n",dx);
+    fprintf(files->fq,"%24.16e    dy\n\n",dy);
+
+    /* q(meqn+1,1-mbc:mx+mbc,1-mbc:my+mbc), ghost cells included, with
+       the surface eta = h + b stored as the last component */
+    size_t num_cells = (size_t) (mx + 2*mbc)*(my + 2*mbc);
+    size_t num_values = num_cells*(meqn + 1);
+    size_t value_size = files->precision == 32 ? sizeof(float) : sizeof(double);
+    if (num_values*value_size > files->buffer_size)
+    {
+        FCLAW_FREE(files->buffer);
+        files->buffer_size = num_values*value_size;
+        files->buffer = FCLAW_ALLOC(char,files->buffer_size);
+    }
+
+    /* Bathymetry is aux(1), as in the ascii output */
+    int mb = 0;
+    size_t k, k_out;
+    int m;
+    if (files->precision == 32)
+    {
+        float *b = (float*) files->buffer;
+        for (k = 0; k < num_cells; k++)
+        {
+            k_out = k*(meqn + 1);
+            for (m = 0; m < meqn; m++)
+                b[k_out + m] = (float) q[k*meqn + m];
+            b[k_out + meqn] = (float) (q[k*meqn] + aux[k*maux + mb]);
+        }
+    }
+    else
+    {
+        double *b = (double*) files->buffer;
+        for (k = 0; k < num_cells; k++)
+        {
+            k_out = k*(meqn + 1);
+            for (m = 0; m < meqn; m++)
+                b[k_out + m] = q[k*meqn + m];
+            b[k_out + meqn] = q[k*meqn] + aux[k*maux + mb];
+        }
+    }
+    fwrite(files->buffer,value_size,num_values,files->fb);
+}
+
+static
+void geoclaw_header_binary(fclaw2d_global_t* glob,int iframe,int precision,
+                           int sharded)
+{
+    double time = glob->curr_time;
+    int ngrids = glob->domain->global_num_patches;
+
+    const fclaw2d_clawpatch_options_t *clawpatch_opt = fclaw2d_clawpatch_get_options(glob);
+    int meqn = clawpatch_opt->meqn;
+    int maux = clawpatch_opt->maux;
+    int mbc = clawpatch_opt->mbc;
+
+    char filename[11];    /* fort.xXXXX + EOL */
+    FILE *fp;
+
+    sprintf(filename,"fort.t%04d",iframe);
+    fp = fopen(filename,"w");
+    fprintf(fp,"%30.20e    time\n",time);
+    fprintf(fp,"%5d                 meqn\n",meqn + 1);
+    fprintf(fp,"%5d                 ngrids\n",ngrids);
+    fprintf(fp,"%5d                 num_aux\n",maux);
+    fprintf(fp,"%5d                 num_dim\n",2);
+    fprintf(fp,"%5d                 num_ghost\n",mbc);
+    fprintf(fp,"binary%d              file_format\n",precision);
+    fclose(fp);
+
+    if (sharded)
+    {
+        /* Every processor writes its own shards; remove any stale
+           fort.qXXXX and fort.bXXXX, which readers would prefer */
+        sprintf(filename,"fort.q%04d",iframe);
+        remove(filename);
+        sprintf(filename,"fort.b%04d",iframe);
+        remove(filename);
+        return;
+    }
+
+    /* Truncate patch header and data files */
+    sprintf(filename,"fort.q%04d",iframe);
+    fp = fopen(filename,"w");
+    fclose(fp);
+
+    sprintf(filename,"fort.b%04d",iframe);
+    fp = fopen(filename,"wb");
+    fclose(fp);
+}
+
+/* --------------------------------------------------------------
+	Public interface
+   ------------------------------------------------------------ */
+
+void fc2d_geoclaw_output_binary(fclaw2d_global_t* glob,int iframe)
+{
+    fclaw2d_domain_t *domain = glob->domain;
+    const fc2d_geoclaw_options_t *geo_opt = fc2d_geoclaw_get_options(glob);
+
+    geoclaw_binary_files_t files;
+    char filename[18];    /* fort.xXXXX.rNNNNN + EOL */
+
+    files.precision = geo_opt->binary_precision;
+    files.buffer = NULL;
+    files.buffer_size = 0;
+
+    int sharded = geo_opt->output_shards && domain->mpisize > 1;
+    if (sharded)
+    {
+        /* Each processor writes fort.qXXXX.rNNNNN and fort.bXXXX.rNNNNN
+           without waiting for the others; readers merge the shards in
+           rank order. */
+        if (domain->mpirank == 0)
+            geoclaw_header_binary(glob,iframe,files.precision,sharded);
+
+        sprintf(filename,"fort.q%04d.r%05d",iframe,domain->mpirank);
+        files.fq = fopen(filename,"w");
+        sprintf(filename,"fort.b%04d.r%05d",iframe,domain->mpirank);
+        files.fb = fopen(filename,"wb");
+
+        fclaw2d_global_iterate_patches (glob, cb_geoclaw_output_binary, &files);
+
+        fclose(files.fq);
+        fclose(files.fb);
+        FCLAW_FREE(files.buffer);
+        return;
+    }
+
+    /* Patches must be written in the same order to fort.q and fort.b, so
+       processors still take turns; each writes its patches with a single
+       fwrite per patch instead of formatting every value. */
+    fclaw2d_domain_serialization_enter (domain);
+
+    if (domain->mpirank == 0)
+        geoclaw_header_binary(glob,iframe,files.precision,sharded);
+
+    sprintf(filename,"fort.q%04d",iframe);
+    files.fq = fopen(filename,"a");
+    sprintf(filename,"fort.b%04d",iframe);
+    files.fb = fopen(filename,"ab");
+
+    fclaw2d_global_iterate_patches (glob, cb_geoclaw_output_binary, &files);
+
+    fclose(files.fq);
+    fclose(files.fb);
+    FCLAW_FREE(files.buffer);
+
+    fclaw2d_domain_serialization_leave (domain);
+}
@@ -39,6 +39,7 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #include "fclaw_math.h"
 
 #include <fc2d_geoclaw_fort.h>
+#include "fc2d_geoclaw_timing.h"
 
 
 
@@ -195,6 +196,7 @@ void outstyle_1(fclaw2d_global_t *glob)
     int iframe = 0;
 
     fclaw2d_output_frame(glob,iframe);
+    fc2d_geoclaw_timing_frame(glob,iframe);
 
     const fclaw_options_t *fclaw_opt = fclaw2d_get_options(glob);
 
@@ -399,6 +401,7 @@ void outstyle_1(fclaw2d_global_t *glob)
         glob->curr_time = t_curr;
         iframe++;
         fclaw2d_output_frame(glob,iframe);
+        fc2d_geoclaw_timing_frame(glob,iframe);
     }
 }
 
@@ -425,6 +428,7 @@ void outstyle_3(fclaw2d_global_t *glob)
 
     int iframe = 0;
     fclaw2d_output_frame(glob,iframe);
+    fc2d_geoclaw_timing_frame(glob,iframe);
 
 
     const fclaw_options_t *fclaw_opt = fclaw2d_get_options(glob);
@@ -585,6 +589,7 @@ void outstyle_3(fclaw2d_global_t *glob)
             iframe++;
             //fclaw2d_diagnostics_gather(glob,init_flag);
             fclaw2d_output_frame(glob,iframe);
+            fc2d_geoclaw_timing_frame(glob,iframe);
         }
     }
 }
@@ -597,6 +602,7 @@ void outstyle_4(fclaw2d_global_t *glob)
     /* Write out an initial time file */
     int iframe = 0;
     fclaw2d_output_frame(glob,iframe);
+    fc2d_geoclaw_timing_frame(glob,iframe);
 
     int init_flag = 1;
     fclaw2d_diagnostics_gather(glob,init_flag);
@@ -648,6 +654,7 @@ void outstyle_4(fclaw2d_global_t *glob)
             fclaw2d_diagnostics_gather(glob,init_flag);
             iframe++;
             fclaw2d_output_frame(glob,iframe);
+            fc2d_geoclaw_timing_frame(glob,iframe);
         }
     }
 }
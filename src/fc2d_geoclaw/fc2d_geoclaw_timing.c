@@ -0,0 +1,242 @@
+/*
+Copyright (c) 2012 Carsten Burstedde, Donna Calhoun
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+ * Redistributions of source code must retain the above copyright notice, this
+list of conditions and the following disclaimer.
+ * Redistributions in binary form must reproduce the above copyright notice,
+this list of conditions and the following disclaimer in the documentation
+and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+*/
+
+#include "fc2d_geoclaw_timing.h"
+
+#include <fclaw2d_options.h>
+#include <fclaw2d_global.h>
+
+#include <time.h>
+
+#define GEOCLAW_TIMING_MAXLEVEL 32
+
+/* Phases of the run loop : the first ones are ForestClaw timers, the last
+   one (gauges) is timed by the GeoClaw gauge routines.  Gauges are updated
+   during the advance, so the advance time includes the gauge time. */
+#define GEOCLAW_TIMING_NUM_PHASES 5
+
+static const int s_phase_timer[GEOCLAW_TIMING_NUM_PHASES-1] =
+{
+    FCLAW2D_TIMER_ADVANCE,
+    FCLAW2D_TIMER_REGRID,
+    FCLAW2D_TIMER_GHOSTFILL,
+    FCLAW2D_TIMER_OUTPUT
+};
+
+static const char* s_phase_name[GEOCLAW_TIMING_NUM_PHASES] =
+{
+    "advance", "regrid", "ghostfill", "output", "gauges"
+};
+
+/* Local (this processor) times and cell updates since frame 0 */
+typedef struct geoclaw_timing
+{
+    double level_wall[GEOCLAW_TIMING_MAXLEVEL];
+    double level_cpu[GEOCLAW_TIMING_MAXLEVEL];
+    double level_cells[GEOCLAW_TIMING_MAXLEVEL];
+    double gauges_wall;
+
+    double start_wall;
+    clock_t start_cpu;
+    double start_phase[GEOCLAW_TIMING_NUM_PHASES];
+} geoclaw_timing_t;
+
+static geoclaw_timing_t s_timing;
+
+/* Set by the solver from its options; off until then */
+static int s_timing_csv = 0;
+
+
+static
+void geoclaw_timing_phases(fclaw2d_global_t *glob, double phase[])
+{
+    int k;
+    for(k = 0; k < GEOCLAW_TIMING_NUM_PHASES-1; k++)
+    {
+        phase[k] = glob->timers[s_phase_timer[k]].cumulative;
+    }
+    phase[GEOCLAW_TIMING_NUM_PHASES-1] = s_timing.gauges_wall;
+}
+
+/* --------------------------------------------------------------
+	Public interface
+   ------------------------------------------------------------ */
+
+void fc2d_geoclaw_timing_update(int level, int num_cells,
+                                double wall_time, double cpu_time)
+{
+    if (level < 0 || level >= GEOCLAW_TIMING_MAXLEVEL)
+        return;
+
+    s_timing.level_wall[level] += wall_time;
+    s_timing.level_cpu[level] += cpu_time;
+    s_timing.level_cells[level] += num_cells;
+}
+
+void fc2d_geoclaw_timing_gauges(double wall_time)
+{
+    s_timing.gauges_wall += wall_time;
+}
+
+void fc2d_geoclaw_timing_set_csv(int timing_csv)
+{
+    s_timing_csv = timing_csv;
+}
+
+void fc2d_geoclaw_timing_frame(fclaw2d_global_t* glob, int iframe)
+{
+    if (!s_timing_csv)
+        return;
+
+    fclaw2d_domain_t *domain = glob->domain;
+    const fclaw_options_t *fclaw_opt = fclaw2d_get_options(glob);
+    int minlevel = fclaw_opt->minlevel;
+    int maxlevel = fclaw_opt->maxlevel;
+    if (maxlevel >= GEOCLAW_TIMING_MAXLEVEL)
+        maxlevel = GEOCLAW_TIMING_MAXLEVEL - 1;
+    int num_levels = maxlevel - minlevel + 1;
+
+    double phase[GEOCLAW_TIMING_NUM_PHASES];
+    geoclaw_timing_phases(glob,phase);
+
+    int k, level;
+    if (iframe == 0)
+    {
+        /* Start the clock; anything before the first frame is set up */
+        for(level = 0; level < GEOCLAW_TIMING_MAXLEVEL; level++)
+        {
+            s_timing.level_wall[level] = 0;
+            s_timing.level_cpu[level] = 0;
+            s_timing.level_cells[level] = 0;
+        }
+        for(k = 0; k < GEOCLAW_TIMING_NUM_PHASES; k++)
+        {
+            s_timing.start_phase[k] = phase[k];
+        }
+        s_timing.start_wall = fclaw2d_timer_wtime();
+        s_timing.start_cpu = clock();
+    }
+
+    /* CPU times and cell updates are summed over processors, wall times
+       are those of the slowest processor */
+    int nsum = 1 + 2*num_levels;
+    int nmax = 1 + num_levels + GEOCLAW_TIMING_NUM_PHASES;
+    double *local = FCLAW_ALLOC(double, nsum + nmax);
+    double *global = FCLAW_ALLOC(double, nsum + nmax);
+    double *local_max = local + nsum;
+    double *global_sum = global;
+    double *global_max = global + nsum;
+
+    local[0] = (double) (clock() - s_timing.start_cpu)/CLOCKS_PER_SEC;
+    local_max[0] = fclaw2d_timer_wtime() - s_timing.start_wall;
+    for(level = minlevel; level <= maxlevel; level++)
+    {
+        int j = level - minlevel;
+        local[1 + 2*j] = s_timing.level_cpu[level];
+        local[2 + 2*j] = s_timing.level_cells[level];
+        local_max[1 + j] = s_timing.level_wall[level];
+    }
+    for(k = 0; k < GEOCLAW_TIMING_NUM_PHASES; k++)
+    {
+        local_max[1 + num_levels + k] = phase[k] - s_timing.start_phase[k];
+    }
+
+    sc_MPI_Allreduce(local, global_sum, nsum, sc_MPI_DOUBLE, sc_MPI_SUM,
+                     domain->mpicomm);
+    sc_MPI_Allreduce(local_max, global_max, nmax, sc_MPI_DOUBLE, sc_MPI_MAX,
+                     domain->mpicomm);
+
+    if (domain->mpirank == 0)
+    {
+        FILE *fp = fopen("timing.csv", iframe == 0 ? "w" : "a");
+        if (fp == NULL)
+        {
+            fclaw_global_essentialf("fc2d_geoclaw_timing : Could not open " \
+                                    "timing.csv\n");
+            FCLAW_FREE(local);
+            FCLAW_FREE(global);
+            return;
+        }
+        if (iframe == 0)
+        {
+            fprintf(fp,"output_time,total_wall_time,total_cpu_time");
+            for(level = minlevel; level <= maxlevel; level++)
+            {
+                fprintf(fp,",wall_time_level_%d,cpu_time_level_%d,cells_level_%d",
+                        level,level,level);
+            }
+            for(k = 0; k < GEOCLAW_TIMING_NUM_PHASES; k++)
+            {
+                fprintf(fp,",%s_wall_time",s_phase_name[k]);
+            }
+            fprintf(fp,"\n");
+        }
+
+        fprintf(fp,"%.10e,%.6f,%.6f",glob->curr_time,global_max[0],
+                global_sum[0]);
+        for(level = minlevel; level <= maxlevel; level++)
+        {
+            int j = level - minlevel;
+            fprintf(fp,",%.6f,%.6f,%.0f",global_max[1 + j],
+                    global_sum[1 + 2*j],global_sum[2 + 2*j]);
+        }
+        for(k = 0; k < GEOCLAW_TIMING_NUM_PHASES; k++)
+        {
+            fprintf(fp,",%.6f",global_max[1 + num_levels + k]);
+        }
+        fprintf(fp,"\n");
+        fclose(fp);
+
+        /* Summary shown on the html page of plot_timing_stats */
+        double cells = 0;
+        for(level = 0; level < num_levels; level++)
+        {
+            cells += global_sum[2 + 2*level];
+        }
+        fp = fopen("timing.txt","w");
+        if (fp == NULL)
+        {
+            fclaw_global_essentialf("fc2d_geoclaw_timing : Could not open " \
+                                    "timing.txt\n");
+            FCLAW_FREE(local);
+            FCLAW_FREE(global);
+            return;
+        }
+        fprintf(fp,"Output frame %d, t = %g, on %d processors\n\n",
+                iframe,glob->curr_time,domain->mpisize);
+        fprintf(fp,"Elapsed wall time (s) : %12.3f\n",global_max[0]);
+        fprintf(fp,"Total CPU time (s)    : %12.3f\n",global_sum[0]);
+        fprintf(fp,"Cell updates          : %12.4e\n\n",cells);
+        for(k = 0; k < GEOCLAW_TIMING_NUM_PHASES; k++)
+        {
+            fprintf(fp,"%-10s wall time (s) : %12.3f\n",s_phase_name[k],
+                    global_max[1 + num_levels + k]);
+        }
+        fclose(fp);
+    }
+
+    FCLAW_FREE(local);
+    FCLAW_FREE(global);
+}
@@ -0,0 +1,65 @@
+/*
+Copyright (c) 2012 Carsten Burstedde, Donna Calhoun
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+ * Redistributions of source code must retain the above copyright notice, this
+list of conditions and the following disclaimer.
+ * Redistributions in binary form must reproduce the above copyright notice,
+this list of conditions and the following disclaimer in the documentation
+and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+*/
+
+#ifndef FC2D_GEOCLAW_TIMING_H
+#define FC2D_GEOCLAW_TIMING_H
+
+#ifdef __cplusplus
+extern "C"
+{
+#if 0
+}
+#endif
+#endif
+
+
+struct fclaw2d_global;
+
+/* Turn timing.csv output on or off (off by default).  The timing routines
+   do not read solver options, so that they can be shared by the solvers
+   that build fc2d_geoclaw_run.c */
+void fc2d_geoclaw_timing_set_csv(int timing_csv);
+
+/* Add the wall and CPU time of one patch update on 'level' */
+void fc2d_geoclaw_timing_update(int level, int num_cells,
+                                double wall_time, double cpu_time);
+
+/* Add the wall time spent recording or printing gauges */
+void fc2d_geoclaw_timing_gauges(double wall_time);
+
+/* Append the cumulative times and cell updates at output frame 'iframe'
+   to timing.csv, as read by visclaw.plot_timing_stats; frame 0 starts
+   the clock and truncates the file.  Called by all processors. */
+void fc2d_geoclaw_timing_frame(struct fclaw2d_global* glob, int iframe);
+
+
+#ifdef __cplusplus
+#if 0
+{
+#endif
+}
+#endif
+
+#endif
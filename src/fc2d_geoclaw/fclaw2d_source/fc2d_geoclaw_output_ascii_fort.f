@@ -1,8 +1,8 @@
       subroutine fc2d_geoclaw_fort_write_header(iframe,time,
-     &      meqn,maux,ngrids,mbc)
+     &      meqn,maux,ngrids,mbc,sharded)
       implicit none
 
-      integer iframe,meqn,maux,ngrids,mbc
+      integer iframe,meqn,maux,ngrids,mbc,sharded
 
       character*10 matname1
       character*10 matname2
@@ -32,8 +32,54 @@
 
       close(matunit2)
 
+c     # Truncate fort.qXXXX, or remove it if every processor writes its
+c     # own fort.qXXXX.rNNNNN so that readers do not find a stale one
       open(unit=matunit1,file=matname1,status='replace')
-      close(matunit1)
+      if (sharded .ne. 0) then
+         close(matunit1,status='delete')
+      else
+         close(matunit1)
+      endif
+
+      end
+
+      subroutine fc2d_geoclaw_fort_open_file(iframe,mpirank,sharded)
+      implicit none
+
+      integer iframe, mpirank, sharded
+
+      character*17 matname1
+      integer matunit1
+      integer nstp,ipos,idigit
+
+      matname1 = 'fort.qxxxx.rxxxxx'
+      matunit1 = 10
+      nstp     = iframe
+      do ipos = 10, 7, -1
+         idigit = mod(nstp,10)
+         matname1(ipos:ipos) = char(ichar('0') + idigit)
+         nstp = nstp / 10
+      enddo
+
+c     # Patches are written to unit 10 by fc2d_geoclaw_fort_write_file
+      if (sharded .ne. 0) then
+         nstp = mpirank
+         do ipos = 17, 13, -1
+            idigit = mod(nstp,10)
+            matname1(ipos:ipos) = char(ichar('0') + idigit)
+            nstp = nstp / 10
+         enddo
+         open(matunit1,file=matname1,status='replace')
+      else
+         open(matunit1,file=matname1(1:10),position='append')
+      endif
+
+      end
+
+      subroutine fc2d_geoclaw_fort_close_file()
+      implicit none
+
+      close(10)
 
       end
 
@@ -50,9 +96,7 @@
       double precision q(meqn,1-mbc:mx+mbc,1-mbc:my+mbc)
       double precision aux(maux,1-mbc:mx+mbc,1-mbc:my+mbc)
 
-      character*10 matname1
       integer matunit1
-      integer nstp,ipos,idigit
       integer i,j,mq
       double precision eta
 
@@ -60,16 +104,9 @@
 
       mbathy = 1
 
-      matname1 = 'fort.qxxxx'
+c     # fort.qXXXX (or this processor's shard) was opened on unit 10 by
+c     # fc2d_geoclaw_fort_open_file
       matunit1 = 10
-      nstp     = iframe
-      do ipos = 10, 7, -1
-         idigit = mod(nstp,10)
-         matname1(ipos:ipos) = char(ichar('0') + idigit)
-         nstp = nstp / 10
-      enddo
-
-      open(matunit1,file=matname1,position='append');
 
       write(matunit1,1001) patch_num, level, blockno, mpirank, mx, my
  1001 format(i5,'                 grid_number',/,
@@ -112,6 +149,4 @@ c      write(6,*) 'WARNING : (claw_out2.f ) Setting q to 0'
       enddo
   120 format (5E26.16)
 
-      close(matunit1)
-
       end
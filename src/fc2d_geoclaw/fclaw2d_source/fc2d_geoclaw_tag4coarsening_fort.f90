@@ -71,6 +71,7 @@ SUBROUTINE fc2d_geoclaw_test_coarsen(blockno, mx,my,mbc,meqn,maux,xlower,ylower,
     LOGICAL :: is_coarsening
 
     INTEGER :: fc2d_geoclaw_flag2refine, flag_patch
+    LOGICAL :: fc2d_geoclaw_patch_may_flag, region_forced
 
 
     !! Check if regions would allow coarsening
@@ -91,6 +92,14 @@ SUBROUTINE fc2d_geoclaw_test_coarsen(blockno, mx,my,mbc,meqn,maux,xlower,ylower,
     tag_patch = 1    !! Allow coarsening if nothing below prevents it
 
     is_coarsening = .true.
+
+    !! No cell exceeds the coarsening thresholds : coarsen
+    if (.not. fc2d_geoclaw_patch_may_flag(mx,my,mbc,meqn,maux,q,aux, &
+            xlower,ylower,dx,dy,t,level,maxlevel,init_flag,is_coarsening, &
+            region_forced)) then
+        return
+    endif
+
     do j = 1,my
         yc   = ylower + (j - 0.5d0) * dy
         y1 = ylower + (j-1)*dy
@@ -102,7 +111,7 @@ SUBROUTINE fc2d_geoclaw_test_coarsen(blockno, mx,my,mbc,meqn,maux,xlower,ylower,
 
             flag_patch = fc2d_geoclaw_flag2refine( & 
                     blockno,mx,my, meqn,maux, q, aux, dx,dy,xc,yc,x1,y1,x2,y2,t,level, & 
-                    maxlevel, init_flag, is_coarsening,i,j,mbc)
+                    maxlevel, init_flag, is_coarsening,i,j,mbc,region_forced)
 
 !!          # flag_patch : 
 !!          # -1 : Not conclusive (possibly ghost cell) (do not tag for coarsening)
@@ -16,6 +16,7 @@ SUBROUTINE fc2d_geoclaw_fort_tag4refinement(mx,my,mbc,meqn,maux,xlower,ylower, &
 
 !!    INTEGER :: tag_patch_regions, fc2d_geoclaw_refine_using_regions
     INTEGER :: fc2d_geoclaw_flag2refine, flag_patch
+    LOGICAL :: fc2d_geoclaw_patch_may_flag, region_forced
 
 !!    xupper = xlower + mx*dx
 !!    yupper = ylower + my*dy
@@ -32,6 +33,15 @@ SUBROUTINE fc2d_geoclaw_fort_tag4refinement(mx,my,mbc,meqn,maux,xlower,ylower, &
     tag_patch = 0 
 
     is_coarsening = .false.   !! Don't loop over ghost cells.
+
+    !! Dry or quiescent patches, away from regions forcing refinement,
+    !! are decided without testing every cell
+    if (.not. fc2d_geoclaw_patch_may_flag(mx,my,mbc,meqn,maux,q,aux, &
+            xlower,ylower,dx,dy,t,level,maxlevel,init_flag,is_coarsening, &
+            region_forced)) then
+        return
+    endif
+
     DO j = 1,my
         yc = ylower + (j-0.5)*dy
         y1 = ylower + (j-1)*dy
@@ -44,7 +54,7 @@ SUBROUTINE fc2d_geoclaw_fort_tag4refinement(mx,my,mbc,meqn,maux,xlower,ylower, &
 
             flag_patch = fc2d_geoclaw_flag2refine( & 
                     blockno,mx,my, meqn,maux, q, aux, dx,dy,xc,yc,x1,y1,x2,y2,t,level, & 
-                    maxlevel, init_flag, is_coarsening,i,j,mbc)
+                    maxlevel, init_flag, is_coarsening,i,j,mbc,region_forced)
 
 !!          # -1 : Not conclusive (possibly ghost cell); don't tag for refinement
 !!          # 0  : Does not pass threshold (don't tag for refinement)      
@@ -7,22 +7,30 @@ SUBROUTINE fc2d_geoclaw_test_regions(level,xlower,ylower,xupper,yupper, &
     DOUBLE PRECISION :: xlower,ylower,xupper,yupper,t
     integer :: level, refine, tag_patch
 
-    INTEGER :: m, min_level, max_level
+    INTEGER :: k, m, min_level, max_level, num_candidates
     LOGICAL :: region_found, fc2d_geoclaw_P_intersects_R
 
-    LOGICAL :: inregion(num_regions)
+    INTEGER :: candidates(num_regions)
 
     tag_patch = -1  !!  Inconclusive for now.
 
-    !! Get list of regions that this patch intersects
+    !! Find minimum and maximum levels for regions intersected by this patch.
+    !! Only regions near the patch, found from the bins of the regions 
+    !! module, are tested.
     !! If we are coarsening, the "patch" dimensions are the dimensions of the 
     !! quadrant occupied by parent quadrant, i.e. the coarsened patch.  But 'level'
     !! is the level of the four siblings.
+    call region_candidates(xlower,ylower,xupper,yupper,candidates,num_candidates)
+
     region_found = .false.
-    DO m = 1,num_regions
-        inregion(m) = fc2d_geoclaw_P_intersects_R(xlower,ylower,xupper,yupper,t,regions(m))
-        if (inregion(m)) then
+    min_level = 100    !! larger than any possible number of levels
+    max_level = 0
+    DO k = 1,num_candidates
+        m = candidates(k)
+        if (fc2d_geoclaw_P_intersects_R(xlower,ylower,xupper,yupper,t,regions(m))) then
             region_found = .true.
+            min_level = min(min_level,regions(m)%min_level)
+            max_level = max(max_level,regions(m)%max_level)
         endif
     end do
     if (.not. region_found) then
@@ -31,16 +39,6 @@ SUBROUTINE fc2d_geoclaw_test_regions(level,xlower,ylower,xupper,yupper, &
         return
     endif
 
-    !! Find minimum and maximum levels for regions intersected by this patch
-    min_level = 100    !! larger than any possible number of levels
-    max_level = 0
-    do m = 1,num_regions
-        if (inregion(m)) then            
-            min_level = min(min_level,regions(m)%min_level)
-            max_level = max(max_level,regions(m)%max_level)
-        endif
-    end do
-
     !! Determine if we are allowed to refine or coarsen, based on regions above.
     if (refine .ne. 0) then
         !! We are tagging for refinement
@@ -6,7 +6,7 @@
 
 integer function fc2d_geoclaw_flag2refine(blockno, mx, my, meqn, maux, q, aux, dx, dy, &
                                           xc, yc, x1, y1, x2, y2, t, level, maxlevel, &
-                                          init_flag, is_coarsening, i, j, mbc)
+                                          init_flag, is_coarsening, i, j, mbc, check_regions)
 
     use geoclaw_module, only : dry_tolerance, sea_level
     use refinement_data_module, only : wave_tolerance, speed_tolerance, num_flowgrades, &
@@ -19,6 +19,9 @@ integer function fc2d_geoclaw_flag2refine(blockno, mx, my, meqn, maux, q, aux, d
     double precision, intent(in) :: dx, dy, xc, yc, x1, y1, x2, y2, t
     double precision, intent(in) :: q(meqn, 1-mbc:mx+mbc, 1-mbc:my+mbc), aux(maux, 1-mbc:mx+mbc, 1-mbc:my+mbc)
     logical, intent(in) :: is_coarsening
+    ! .false. if no region forcing refinement overlaps the patch, see
+    ! fc2d_geoclaw_patch_may_flag
+    logical, intent(in) :: check_regions
 
     integer :: m, n, th_factor, iflow, max_num_speeds
     double precision :: momentum, depth, speed, eta
@@ -41,15 +44,17 @@ integer function fc2d_geoclaw_flag2refine(blockno, mx, my, meqn, maux, q, aux, d
     fc2d_geoclaw_flag2refine = 0  ! Default is not to flag for refinement
 
     ! Early exit if refinement is forced in any specified region
-    do m = 1, mregions
-        if (level < minlevelregion(m) .and. t >= tlowregion(m) .and. t <= thiregion(m)) then
-            if (x2 > xlowregion(m) .and. x1 < xhiregion(m) .and. &
-                y2 > ylowregion(m) .and. y1 < yhiregion(m)) then
-                fc2d_geoclaw_flag2refine = 1
-                return
+    if (check_regions) then
+        do m = 1, mregions
+            if (level < minlevelregion(m) .and. t >= tlowregion(m) .and. t <= thiregion(m)) then
+                if (x2 > xlowregion(m) .and. x1 < xhiregion(m) .and. &
+                    y2 > ylowregion(m) .and. y1 < yhiregion(m)) then
+                    fc2d_geoclaw_flag2refine = 1
+                    return
+                endif
             endif
-        endif
-    enddo
+        enddo
+    endif
 
     ! Evaluate conditions for refinement based on flow grade criteria
     max_num_speeds = min(size(speed_tolerance),maxlevel)
@@ -128,3 +133,124 @@ integer function fc2d_geoclaw_flag2refine(blockno, mx, my, meqn, maux, q, aux, d
     
 
 end function fc2d_geoclaw_flag2refine
+
+
+! @brief : Patch summary used before the cell-by-cell tests of fc2d_geoclaw_flag2refine.
+!          Returns .false. if no interior cell of the patch can be flagged, i.e. if
+!          fc2d_geoclaw_flag2refine would return 0 or -1 for every cell; .true. if the
+!          cell-by-cell tests are needed.  Region tests are done once for the patch, and
+!          the flow criteria are applied to the maxima of depth, momentum, speed and
+!          surface elevation over the patch, computed in a single pass.  region_forced
+!          is .true. if a region forcing refinement overlaps the patch; otherwise the
+!          cell-by-cell tests need not check the regions again.
+
+logical function fc2d_geoclaw_patch_may_flag(mx, my, mbc, meqn, maux, q, aux, &
+                                             xlower, ylower, dx, dy, t, level, maxlevel, &
+                                             init_flag, is_coarsening, region_forced)
+
+    use geoclaw_module, only : dry_tolerance, sea_level
+    use refinement_data_module, only : wave_tolerance, speed_tolerance, num_flowgrades, &
+                                  iflowgradevariable, iflowgrademinlevel, flowgradevalue
+    use refinement_data_module, only : max_velocity_depth_product
+
+    implicit none
+
+    integer, intent(in) :: mx, my, mbc, meqn, maux, level, maxlevel, init_flag
+    double precision, intent(in) :: xlower, ylower, dx, dy, t
+    double precision, intent(in) :: q(meqn, 1-mbc:mx+mbc, 1-mbc:my+mbc), aux(maux, 1-mbc:mx+mbc, 1-mbc:my+mbc)
+    logical, intent(in) :: is_coarsening
+    logical, intent(out) :: region_forced
+
+    integer :: i, j, m, n, th_factor, max_num_speeds
+    double precision :: xupper, yupper
+    double precision :: momentum, depth, speed, eta
+    double precision :: depth_max, momentum_max, eta_max, wave_max, speed_max, ratio_max
+    logical :: wet, refinement_needed
+
+    include 'regions.i'
+
+    fc2d_geoclaw_patch_may_flag = .true.
+    region_forced = .false.
+
+    ! Cells are never flagged when coarsening on initial refinement
+    if (init_flag .ne. 0 .and. is_coarsening) then
+        fc2d_geoclaw_patch_may_flag = .false.
+        return
+    endif
+
+    ! Refinement forced by a region overlapping the patch
+    xupper = xlower + mx*dx
+    yupper = ylower + my*dy
+    do m = 1, mregions
+        if (level < minlevelregion(m) .and. t >= tlowregion(m) .and. t <= thiregion(m)) then
+            if (xupper > xlowregion(m) .and. xlower < xhiregion(m) .and. &
+                yupper > ylowregion(m) .and. ylower < yhiregion(m)) then
+                region_forced = .true.
+                return
+            endif
+        endif
+    enddo
+
+    ! Maxima over the interior cells; eta and speed only over wet cells
+    depth_max = -huge(1.d0)
+    momentum_max = -huge(1.d0)
+    eta_max = -huge(1.d0)
+    wave_max = -huge(1.d0)
+    speed_max = -huge(1.d0)
+    ratio_max = -huge(1.d0)
+    wet = .false.
+    do j = 1, my
+        do i = 1, mx
+            depth = q(1,i,j)
+            momentum = sqrt(q(2,i,j)**2 + q(3,i,j)**2)
+            depth_max = max(depth_max, depth)
+            momentum_max = max(momentum_max, momentum)
+            if (depth > dry_tolerance) then
+                wet = .true.
+                eta = depth + aux(1,i,j)
+                speed = momentum / depth
+                eta_max = max(eta_max, abs(eta))
+                wave_max = max(wave_max, abs(eta - sea_level))
+                speed_max = max(speed_max, speed)
+                ratio_max = max(ratio_max, speed/depth)
+            endif
+        enddo
+    enddo
+
+    ! Same thresholds as fc2d_geoclaw_flag2refine
+    th_factor = 1.0
+    if (is_coarsening) th_factor = 0.5
+
+    ! Flow grade criteria
+    do m = 1, num_flowgrades
+        if (level < iflowgrademinlevel(m)) then
+            refinement_needed = .false.
+            select case (iflowgradevariable(m))
+                case (1)  ! depth
+                    refinement_needed = (depth_max > flowgradevalue(m))
+                case (2)  ! momentum
+                    refinement_needed = (momentum_max > flowgradevalue(m))
+                case (3)  ! elevation
+                    refinement_needed = wet .and. (eta_max > flowgradevalue(m))
+            end select
+            if (refinement_needed) return
+        endif
+    enddo
+
+    if (wet) then
+        ! Speed criteria
+        max_num_speeds = min(size(speed_tolerance),maxlevel)
+        do n = 1, max_num_speeds
+            if ((speed_max > th_factor * speed_tolerance(n)) .and. (level <= n)) return
+        enddo
+
+        ! Wave and velocity-depth product criteria
+        if (num_flowgrades == 0) then
+            if (wave_max > th_factor*wave_tolerance) return
+            if (ratio_max > max_velocity_depth_product) return
+        endif
+    endif
+
+    fc2d_geoclaw_patch_may_flag = .false.
+
+end function fc2d_geoclaw_patch_may_flag
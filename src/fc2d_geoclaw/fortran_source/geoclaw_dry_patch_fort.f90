@@ -0,0 +1,41 @@
+!! ============================================================
+SUBROUTINE fc2d_geoclaw_dry_patch(mbc,mx,my,meqn,q,cells,is_dry)
+!! ============================================================
+!!
+!! Wet/dry summary of a patch: is_dry = 1 if the depth q(1,i,j) is
+!! below dry_tolerance in all cells of the patch (cells = 0), in its
+!! interior cells (cells = 1) or in its ghost cells (cells = 2).
+!!
+!! The Riemann solvers skip every interface of a patch that is dry,
+!! ghost cells included, so step2 leaves q unchanged and the update of
+!! the patch can be skipped.  The scan stops at the first row with a
+!! wet cell.
+
+    USE geoclaw_module, ONLY: dry_tolerance
+
+    IMPLICIT NONE
+
+    INTEGER, INTENT(in) :: mbc,mx,my,meqn,cells
+    DOUBLE PRECISION, INTENT(in) :: q(meqn,1-mbc:mx+mbc,1-mbc:my+mbc)
+    INTEGER, INTENT(out) :: is_dry
+
+    INTEGER :: j
+
+    !! .NOT. (h < dry_tolerance) so that NaN counts as wet
+    is_dry = 0
+    DO j = 1-mbc,my+mbc
+        IF (j >= 1 .AND. j <= my) THEN
+            IF (cells /= 2) THEN
+                IF (ANY(.NOT. (q(1,1:mx,j) < dry_tolerance))) RETURN
+            ENDIF
+            IF (cells /= 1) THEN
+                IF (ANY(.NOT. (q(1,1-mbc:0,j) < dry_tolerance))) RETURN
+                IF (ANY(.NOT. (q(1,mx+1:mx+mbc,j) < dry_tolerance))) RETURN
+            ENDIF
+        ELSE IF (cells /= 1) THEN
+            IF (ANY(.NOT. (q(1,1-mbc:mx+mbc,j) < dry_tolerance))) RETURN
+        ENDIF
+    ENDDO
+    is_dry = 1
+
+END SUBROUTINE fc2d_geoclaw_dry_patch
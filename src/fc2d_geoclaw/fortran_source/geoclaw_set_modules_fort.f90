@@ -61,3 +61,16 @@ SUBROUTINE fc2d_geoclaw_set_modules(mwaves_in, mcapa_in, meqn_in, maux_in,  &
     CALL read_refinement_data()       !# read and sets refinement control parameters
 
 END SUBROUTINE fc2d_geoclaw_set_modules
+
+
+SUBROUTINE fc2d_geoclaw_set_topo_cache(cache_size)
+    USE topo_module, ONLY: set_topo_cache_size
+
+    IMPLICIT NONE
+
+    INTEGER, INTENT(in) :: cache_size
+
+    !! Number of patches whose topography is cached for regridding
+    CALL set_topo_cache_size(cache_size)
+
+END SUBROUTINE fc2d_geoclaw_set_topo_cache
@@ -39,6 +39,9 @@ SUBROUTINE fc2d_geoclaw_setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux, &
   CHARACTER(len=*), PARAMETER :: aux_format = "(2i4,4d15.3)"
   INTEGER :: skipcount,iaux,ilo,jlo
   LOGICAL ghost_invalid
+  INTEGER :: nfiles
+  INTEGER, ALLOCATABLE :: ranks(:)
+  LOGICAL :: use_cache, topo_cached
 
   is_ghost = is_ghost_in .ne. 0
 
@@ -107,6 +110,21 @@ SUBROUTINE fc2d_geoclaw_setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux, &
   ilo = FLOOR((xlow - xlower + .05d0*dx)/dx)
   jlo = FLOOR((ylow - ylower + .05d0*dy)/dy)
 
+  !! Topography of patches rebuilt over unchanged terrain is taken from
+  !! the patch cache; otherwise only the topo files that overlap this
+  !! patch (ghost cells included) are used to integrate over its cells.
+  use_cache = (.NOT. is_ghost) .AND. mtopofiles > 0 .AND. &
+       test_topography == 0 .AND. num_dtopo == 0 .AND. topo_cache_size > 0
+  topo_cached = .FALSE.
+  IF (use_cache) THEN
+     topo_cached = topo_cache_lookup(mx,my,mbc,maux,ilo,jlo,dx,dy,aux)
+  ENDIF
+  IF (mtopofiles > 0 .AND. test_topography == 0 .AND. .NOT. topo_cached) THEN
+     ALLOCATE(ranks(mtopofiles))
+     CALL topo_patch_files(xlower + (ilo-mbc)*dx, xlower + (ilo+mx+mbc)*dx, &
+          ylower + (jlo-mbc)*dy, ylower + (jlo+my+mbc)*dy, nfiles, ranks)
+  ENDIF
+
   !! Set bathymetry
   skipcount = 0
   DO jj=1-mbc,my+mbc
@@ -163,12 +181,9 @@ SUBROUTINE fc2d_geoclaw_setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux, &
 
 
         !! Use input topography files if available
-        IF (mtopofiles > 0 .AND. test_topography == 0) THEN
-           topo_integral = 0.d0
-           CALL cellgridintegrate(topo_integral,xm,x,xp,ym,y,yp, &
-                xlowtopo,ylowtopo,xhitopo,yhitopo,dxtopo,dytopo, &
-                mxtopo,mytopo,mtopo,i0topo,mtopoorder, &
-                mtopofiles,mtoposize,topowork)
+        IF (mtopofiles > 0 .AND. test_topography == 0 &
+             .AND. .NOT. topo_cached) THEN
+           CALL cellintegral_files(xm,xp,ym,yp,nfiles,ranks,topo_integral)
 
            IF (coordinate_system == 2) THEN
               aux(1,ii,jj) = topo_integral / (dx * dy * aux(2,ii,jj))
@@ -218,6 +233,10 @@ SUBROUTINE fc2d_geoclaw_setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux, &
   ENDDO
 
 
+  IF (use_cache .AND. .NOT. topo_cached) THEN
+     CALL topo_cache_store(mx,my,mbc,maux,ilo,jlo,dx,dy,aux)
+  ENDIF
+
   !! Set friction coefficient based on a set of depth levels
   IF (friction_index > 0) THEN
      CALL set_friction_field(mx,my,mbc,maux,xlow,ylow,dx,dy,aux &
@@ -67,6 +67,20 @@ module topo_module
 
     double precision topo_missing
 
+    ! Cache of the cell-averaged topography of patches, so that patches
+    ! rebuilt over unchanged terrain by regridding are not integrated again.
+    ! Only used when there is no dtopo (topography is then fixed in time).
+    ! Number of slots set by the [geoclaw] option topo-cache-size, 0 to
+    ! disable; the topography of a slot is only allocated once a patch is
+    ! stored in it, so memory grows with the patches actually cached.
+    integer :: topo_cache_size = 1024
+    type, private :: topo_cache_entry
+        integer :: key(5) = -huge(1)
+        double precision :: dx(2) = 0.d0
+        double precision, allocatable :: aux1(:,:)
+    end type topo_cache_entry
+    type(topo_cache_entry), allocatable, private :: topo_cache(:)
+
     ! ====== define parameters for C interface ======
     ! type, bind(C) :: TopoParameters
     !     integer(c_int) :: num_dtopo
@@ -1549,6 +1563,270 @@ end subroutine rectintegral
 
     
 
+subroutine topo_patch_files(x1,x2,y1,y2,nfiles,ranks)
+
+    ! Find the topo files that overlap the rectangle (x1,x2) x (y1,y2),
+    ! typically a patch including its ghost cells.  On return
+    ! ranks(1:nfiles) are their indices into mtopoorder, fine to coarse.
+
+    ! Files that do not overlap a patch contribute nothing to the integral
+    ! over any of its cells, so rectintegral_files and cellintegral_files
+    ! restricted to this list give the same values as rectintegral and
+    ! cellgridintegrate, without visiting every topo file for every cell.
+
+    implicit none
+
+    ! arguments
+    real (kind=8), intent(in) :: x1,x2,y1,y2
+    integer, intent(out) :: nfiles
+    integer, intent(out) :: ranks(mtopofiles)
+
+    ! local
+    integer :: m, mfid
+
+    nfiles = 0
+    do m = 1,mtopofiles
+        mfid = mtopoorder(m)
+        if (xhitopo(mfid) > x1 .and. xlowtopo(mfid) < x2 .and. &
+            yhitopo(mfid) > y1 .and. ylowtopo(mfid) < y2) then
+            nfiles = nfiles + 1
+            ranks(nfiles) = m
+        endif
+    enddo
+
+end subroutine topo_patch_files
+
+
+
+recursive subroutine rectintegral_files(x1,x2,y1,y2,k,nfiles,ranks,integral)
+
+    ! Same as rectintegral, using only the topo files mtopoorder(ranks(k))
+    ! through mtopoorder(ranks(nfiles)) (coarse to fine), as found by
+    ! topo_patch_files for a patch containing the rectangle.
+
+    implicit none
+
+    ! arguments
+    real (kind=8), intent(in) :: x1,x2,y1,y2
+    integer, intent(in) :: k, nfiles
+    integer, intent(in) :: ranks(nfiles)
+    real (kind=8), intent(out) :: integral
+
+    ! local
+    double precision :: xmlo,xmhi,ymlo,ymhi,area,x1m,x2m, &
+        y1m,y2m, int1,int2,int3
+    integer :: mfid, indicator, i0
+    double precision, external :: topointegral
+
+
+    mfid = mtopoorder(ranks(k))
+    i0=i0topo(mfid)
+
+    if (k == nfiles) then
+         ! innermost step of recursion: coarsest topo grid overlapping
+         ! the patch -- compute directly...
+         call intersection(indicator,area,xmlo,xmhi, &
+             ymlo,ymhi, x1,x2,y1,y2, &
+             xlowtopo(mfid),xhitopo(mfid),ylowtopo(mfid),yhitopo(mfid))
+
+         if (indicator.eq.1) then
+            integral = topointegral( xmlo,xmhi,ymlo, &
+                    ymhi,xlowtopo(mfid),ylowtopo(mfid),dxtopo(mfid), &
+                    dytopo(mfid),mxtopo(mfid),mytopo(mfid),topowork(i0),1)
+         else
+            integral = 0.d0
+         endif
+
+    else
+        ! recursive call to compute area using one fewer topo grids:
+        call rectintegral_files(x1,x2,y1,y2,k+1,nfiles,ranks,int1)
+
+        ! region of intersection of cell with new topo grid:
+        call intersection(indicator,area,x1m,x2m, &
+             y1m,y2m, x1,x2,y1,y2, &
+             xlowtopo(mfid),xhitopo(mfid),ylowtopo(mfid),yhitopo(mfid))
+
+        if (area > 0) then
+
+            ! correction to subtract out from previous set of topo grids:
+            call rectintegral_files(x1m,x2m,y1m,y2m,k+1,nfiles,ranks,int2)
+
+            ! correction to add in for new topo grid:
+            int3 = topointegral(x1m,x2m, y1m,y2m, &
+                        xlowtopo(mfid),ylowtopo(mfid),dxtopo(mfid), &
+                        dytopo(mfid),mxtopo(mfid),mytopo(mfid),topowork(i0),1)
+
+            ! adjust integral due to corrections for new topo grid:
+            integral = int1 - int2 + int3
+        else
+            integral = int1
+        endif
+    endif
+
+end subroutine rectintegral_files
+
+
+
+subroutine cellintegral_files(xim,xip,yjm,yjp,nfiles,ranks,integral)
+
+    ! Integral of topo over the grid cell (xim,xip) x (yjm,yjp), as in
+    ! cellgridintegrate, using only the topo files ranks(1:nfiles) found by
+    ! topo_patch_files for the patch containing the cell.
+
+    implicit none
+
+    ! arguments
+    real (kind=8), intent(in) :: xim,xip,yjm,yjp
+    integer, intent(in) :: nfiles
+    integer, intent(in) :: ranks(nfiles)
+    real (kind=8), intent(out) :: integral
+
+    ! local
+    double precision :: xmlo,xmhi,ymlo,ymhi,area,cellarea
+    integer :: k, mfid, indicator, i0
+    double precision, external :: topointegral
+
+    integral = 0.d0
+    cellarea = (xip-xim)*(yjp-yjm)
+
+    ! first see if the grid cell is entirely in a fine topofile
+    do k = 1,nfiles
+        mfid = mtopoorder(ranks(k))
+        i0=i0topo(mfid)
+        call intersection(indicator,area,xmlo,xmhi, &
+            ymlo,ymhi,xim,xip,yjm,yjp, &
+            xlowtopo(mfid),xhitopo(mfid),ylowtopo(mfid),yhitopo(mfid))
+        if (indicator.eq.1) then
+            if (area.eq.cellarea) then
+                ! cell is entirely in grid
+                integral = topointegral(xmlo,xmhi,ymlo, &
+                    ymhi,xlowtopo(mfid),ylowtopo(mfid),dxtopo(mfid), &
+                    dytopo(mfid),mxtopo(mfid),mytopo(mfid),topowork(i0),1)
+            else
+                ! cell intersects only this topo grid and perhaps coarser
+                call rectintegral_files(xim,xip,yjm,yjp,k,nfiles,ranks, &
+                                        integral)
+            endif
+            return
+        endif
+    enddo
+
+    write(6,601) xim,xip,yjm,yjp
+601 format('*** Error, grid cell does not overlap any topo grid',/, &
+           '  xim = ',e24.14,'  xip = ',e24.14, &
+           /,'  yjm = ',e24.14,'  yjp = ',e24.14)
+    stop
+
+end subroutine cellintegral_files
+
+
+
+subroutine set_topo_cache_size(cache_size)
+
+    ! Number of patches the topography cache holds, 0 to disable it.
+    ! Patches already cached are dropped.
+
+    implicit none
+
+    integer, intent(in) :: cache_size
+
+    if (allocated(topo_cache)) then
+        deallocate(topo_cache)
+    endif
+    topo_cache_size = max(cache_size,0)
+
+end subroutine set_topo_cache_size
+
+
+
+logical function topo_cache_lookup(mx,my,mbc,maux,ilo,jlo,dx,dy,aux) &
+                 result(found)
+
+    ! Copy the cached topography of the patch of size mx x my (with mbc
+    ! ghost cells) at integer offset (ilo,jlo) and resolution (dx,dy) into
+    ! aux(1,:,:), if it is in the cache.
+
+    implicit none
+
+    ! arguments
+    integer, intent(in) :: mx,my,mbc,maux,ilo,jlo
+    real (kind=8), intent(in) :: dx,dy
+    real (kind=8), intent(inout) :: aux(maux,1-mbc:mx+mbc,1-mbc:my+mbc)
+
+    ! local
+    integer :: slot
+
+    found = .false.
+    if (.not. allocated(topo_cache)) return
+
+    slot = topo_cache_slot(ilo,jlo,dx)
+    if (any(topo_cache(slot)%key /= (/ ilo, jlo, mx, my, mbc /))) return
+    if (topo_cache(slot)%dx(1) /= dx .or. topo_cache(slot)%dx(2) /= dy) return
+
+    aux(1,:,:) = topo_cache(slot)%aux1
+    found = .true.
+
+end function topo_cache_lookup
+
+
+
+subroutine topo_cache_store(mx,my,mbc,maux,ilo,jlo,dx,dy,aux)
+
+    ! Save the topography aux(1,:,:) of a patch in the cache, see
+    ! topo_cache_lookup.  The cache is direct-mapped: a patch replaces
+    ! whatever was cached in its slot.
+
+    implicit none
+
+    ! arguments
+    integer, intent(in) :: mx,my,mbc,maux,ilo,jlo
+    real (kind=8), intent(in) :: dx,dy
+    real (kind=8), intent(in) :: aux(maux,1-mbc:mx+mbc,1-mbc:my+mbc)
+
+    ! local
+    integer :: slot
+
+    if (topo_cache_size <= 0) return
+
+    if (.not. allocated(topo_cache)) then
+        allocate(topo_cache(0:topo_cache_size-1))
+    endif
+
+    slot = topo_cache_slot(ilo,jlo,dx)
+    if (allocated(topo_cache(slot)%aux1)) then
+        if (any(topo_cache(slot)%key(3:5) /= (/ mx, my, mbc /))) then
+            deallocate(topo_cache(slot)%aux1)
+        endif
+    endif
+    if (.not. allocated(topo_cache(slot)%aux1)) then
+        allocate(topo_cache(slot)%aux1(1-mbc:mx+mbc,1-mbc:my+mbc))
+    endif
+    topo_cache(slot)%key = (/ ilo, jlo, mx, my, mbc /)
+    topo_cache(slot)%dx = (/ dx, dy /)
+    topo_cache(slot)%aux1 = aux(1,:,:)
+
+end subroutine topo_cache_store
+
+
+
+integer function topo_cache_slot(ilo,jlo,dx) result(slot)
+
+    ! Slot of a patch in the cache, hashed from its offset and level.
+
+    implicit none
+
+    integer, intent(in) :: ilo,jlo
+    real (kind=8), intent(in) :: dx
+
+    integer(kind=8) :: h
+
+    h = 73856093_8*ilo + 19349663_8*jlo + 83492791_8*exponent(dx)
+    slot = int(modulo(h, int(topo_cache_size,kind=8)))
+
+end function topo_cache_slot
+
+
+
 subroutine intersection(indicator,area,xintlo,xinthi, &
            yintlo,yinthi,x1lo,x1hi,y1lo,y1hi,x2lo,x2hi,y2lo,y2hi)
 